@@ -0,0 +1,254 @@
+// backend/cluster.js
+// Modo multi-núcleo: el proceso primario prepara la base de datos y levanta
+// CLUSTER_WORKERS workers (server.js) que comparten el puerto HTTP. Además
+// coordina lo que no puede vivir dentro de cada worker:
+// - el candado del escritor único de SQLite: una transacción de escritura a
+//   la vez en todo el cluster, en orden de llegada (ver database/storage.js);
+// - la numeración y agrupación de eventos del bus (services/eventBus.js);
+// - la invalidación de la caché del catálogo en todos los workers;
+// - el calendario de archivo, respaldos y fotos de inventario
+//   (services/maintenance.js), que corre en un solo worker;
+// - el adaptador de Socket.io entre workers (@socket.io/cluster-adapter).
+//
+// SIGHUP reinicia los workers uno por uno (el reemplazo escucha antes de que
+// el anterior cierre); SIGTERM y SIGINT cierran todos con su gracefulShutdown.
+//
+// Uso: node cluster.js   (CLUSTER_WORKERS=0 usa un worker por CPU)
+const cluster = require('cluster');
+const os = require('os');
+const path = require('path');
+require('dotenv').config();
+
+const WORKERS = parseInt(process.env.CLUSTER_WORKERS || '0') || os.cpus().length;
+const SHUTDOWN_TIMEOUT_MS = parseInt(process.env.SHUTDOWN_TIMEOUT_MS || '10000');
+const STARTUP_TIMEOUT_MS = 60000;
+const RESPAWN_DELAY_MS = 1000;
+
+// Los workers no vuelven a resetear la base de datos que ya preparó el primario
+const WORKER_ENV = { POS_CLUSTER: 'true', DB_FORCE_SYNC: 'false', DB_RESET: 'false' };
+
+// Turnos del escritor único, en orden de llegada
+class WriteLockServer {
+  constructor() {
+    this.queue = [];
+    this.holder = null;
+    this.stats = { grants: 0, maxQueue: 0 };
+  }
+
+  acquire(worker, id) {
+    this.queue.push({ worker, id });
+    this.stats.maxQueue = Math.max(this.stats.maxQueue, this.queue.length);
+    this.next();
+  }
+
+  // Libera el turno o retira la solicitud si aún estaba en espera
+  release(worker, id) {
+    if (this.holder && this.holder.worker === worker && this.holder.id === id) {
+      this.holder = null;
+      this.next();
+      return;
+    }
+    this.queue = this.queue.filter(entry => !(entry.worker === worker && entry.id === id));
+  }
+
+  // Un worker que termina no puede retener el candado
+  releaseWorker(worker) {
+    this.queue = this.queue.filter(entry => entry.worker !== worker);
+    if (this.holder && this.holder.worker === worker) {
+      this.holder = null;
+      this.next();
+    }
+  }
+
+  next() {
+    while (!this.holder && this.queue.length > 0) {
+      const entry = this.queue.shift();
+      if (!entry.worker.isConnected()) continue;
+
+      this.holder = entry;
+      this.stats.grants += 1;
+      entry.worker.send({ type: 'db-lock:granted', id: entry.id });
+    }
+  }
+}
+
+const writeLock = new WriteLockServer();
+const retiring = new Set();
+let sequencer = null;
+let stopping = false;
+let restarting = false;
+
+// Envía un mensaje a todos los workers conectados (menos `except`)
+function broadcast(message, except = null) {
+  for (const worker of Object.values(cluster.workers)) {
+    if (worker !== except && worker.isConnected()) {
+      worker.send(message);
+    }
+  }
+}
+
+function handleMessage(worker, message) {
+  switch (message && message.type) {
+    case 'db-lock:acquire':
+      writeLock.acquire(worker, message.id);
+      break;
+    case 'db-lock:release':
+      writeLock.release(worker, message.id);
+      break;
+    case 'events:publish':
+      sequencer.publish(message.event, message.data, { key: message.key, channels: message.channels });
+      break;
+    case 'events:state':
+      worker.send({ type: 'events:state', ...sequencer.state() });
+      break;
+    case 'catalog:invalidate':
+    case 'tables:changed':
+      broadcast(message, worker);
+      break;
+    default:
+      // Mensajes del adaptador de Socket.io y de cluster
+      break;
+  }
+}
+
+// Manda la tarea a un worker activo (el primero disponible)
+function dispatchMaintenance(job) {
+  const worker = Object.values(cluster.workers).find(candidate => candidate.isConnected() && !retiring.has(candidate));
+  if (worker && !stopping) {
+    worker.send({ type: 'maintenance:run', job });
+  }
+}
+
+function scheduleMaintenance() {
+  const { maintenanceSchedule } = require('./services/maintenance');
+  const { delayMs, intervals } = maintenanceSchedule();
+
+  for (const [job, intervalMs] of Object.entries(intervals)) {
+    if (intervalMs <= 0) continue;
+    setTimeout(() => {
+      dispatchMaintenance(job);
+      setInterval(() => dispatchMaintenance(job), intervalMs).unref();
+    }, delayMs).unref();
+  }
+}
+
+// Resuelve cuando el worker emite `event`; falla si termina antes
+function waitFor(worker, event, timeoutMs) {
+  return new Promise((resolve, reject) => {
+    const timer = setTimeout(() => {
+      cleanup();
+      reject(new Error(`Worker ${worker.id} no respondió en ${timeoutMs} ms`));
+    }, timeoutMs);
+    const onEvent = () => {
+      cleanup();
+      resolve();
+    };
+    const onExit = () => {
+      cleanup();
+      reject(new Error(`Worker ${worker.id} terminó antes de quedar listo`));
+    };
+    const cleanup = () => {
+      clearTimeout(timer);
+      worker.off(event, onEvent);
+      worker.off('exit', onExit);
+    };
+
+    worker.once(event, onEvent);
+    worker.once('exit', onExit);
+  });
+}
+
+// Pide al worker su gracefulShutdown y espera a que termine
+function retire(worker, reason) {
+  retiring.add(worker);
+  const exited = new Promise(resolve => worker.once('exit', resolve));
+
+  if (worker.isConnected()) {
+    worker.send({ type: 'shutdown', reason });
+  }
+  // Respaldo por si el worker no respeta su propio límite de cierre
+  const timer = setTimeout(() => worker.process.kill('SIGKILL'), SHUTDOWN_TIMEOUT_MS + 5000);
+  return exited.finally(() => clearTimeout(timer));
+}
+
+// Reemplaza los workers de uno en uno sin dejar el puerto sin atender
+async function rollingRestart() {
+  if (restarting || stopping) return;
+  restarting = true;
+  console.log('\n🔄 Reinicio escalonado de workers...');
+
+  try {
+    for (const worker of Object.values(cluster.workers)) {
+      if (retiring.has(worker)) continue;
+
+      const replacement = cluster.fork(WORKER_ENV);
+      await waitFor(replacement, 'listening', STARTUP_TIMEOUT_MS);
+      await retire(worker, 'reinicio escalonado');
+      console.log(`🔁 Worker ${worker.id} reemplazado por ${replacement.id}`);
+    }
+    console.log('✅ Reinicio escalonado completado');
+  } catch (error) {
+    console.error('❌ Error en reinicio escalonado:', error);
+  } finally {
+    restarting = false;
+  }
+}
+
+async function shutdown(signal) {
+  if (stopping) return;
+  stopping = true;
+  console.log(`\n🛑 Recibida señal ${signal}. Cerrando workers...`);
+
+  try {
+    await Promise.all(Object.values(cluster.workers).map(worker => retire(worker, signal)));
+    sequencer.close();
+    console.log('✅ Cluster cerrado correctamente');
+    process.exit(0);
+  } catch (error) {
+    console.error('❌ Error durante el cierre:', error);
+    process.exit(1);
+  }
+}
+
+async function startPrimary() {
+  try {
+    // Migraciones y datos iniciales una sola vez, antes de los workers
+    const { initDatabase, sequelize } = require('./database/init');
+    console.log('🗄️  Inicializando base de datos...');
+    await initDatabase();
+    await sequelize.close();
+
+    const { setupPrimary } = require('@socket.io/cluster-adapter');
+    const { EventSequencer } = require('./services/eventBus');
+    setupPrimary();
+    sequencer = new EventSequencer(broadcast);
+
+    cluster.setupPrimary({ exec: path.join(__dirname, 'server.js') });
+    cluster.on('message', handleMessage);
+    cluster.on('exit', (worker, code, signal) => {
+      writeLock.releaseWorker(worker);
+      if (retiring.delete(worker) || stopping) return;
+
+      console.error(`❌ Worker ${worker.id} terminó (${signal || code}); levantando reemplazo`);
+      setTimeout(() => {
+        if (!stopping) cluster.fork(WORKER_ENV);
+      }, RESPAWN_DELAY_MS);
+    });
+
+    console.log(`🧩 Modo cluster: ${WORKERS} workers (primario pid ${process.pid})`);
+    for (let i = 0; i < WORKERS; i++) {
+      cluster.fork(WORKER_ENV);
+    }
+    scheduleMaintenance();
+
+    process.on('SIGHUP', rollingRestart);
+    process.on('SIGTERM', shutdown);
+    process.on('SIGINT', shutdown);
+
+  } catch (error) {
+    console.error('❌ Error al iniciar el cluster:', error);
+    process.exit(1);
+  }
+}
+
+startPrimary();
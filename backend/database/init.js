@@ -1,6 +1,9 @@
 const { Sequelize, DataTypes } = require('sequelize');
 const path = require('path');
 const fs = require('fs');
+const { configureStorage, applyDatabasePragmas } = require('./storage');
+const { instrumentQueries } = require('../services/metrics');
+const { runMigrations } = require('./migrations');
 
 // Configuración de la base de datos
 const dbPath = process.env.DB_PATH || './database/pos.sqlite';
@@ -12,18 +15,17 @@ if (!fs.existsSync(dbDir)) {
 }
 
 // Configurar Sequelize con SQLite
+// (SQLite no usa pool: lectores y escritor se configuran en ./storage)
 const sequelize = new Sequelize({
   dialect: 'sqlite',
   storage: dbPath,
   logging: process.env.NODE_ENV === 'development' ? console.log : false,
-  pool: {
-    max: 5,
-    min: 0,
-    acquire: 30000,
-    idle: 10000
-  }
+  transactionType: Sequelize.Transaction.TYPES.IMMEDIATE
 });
 
+configureStorage(sequelize);
+instrumentQueries(sequelize);
+
 // Modelo de Usuarios
 const User = sequelize.define('User', {
   id: {
@@ -310,6 +312,23 @@ const Sale = sequelize.define('Sale', {
   deliveryFee: {
     type: DataTypes.DECIMAL(10, 2),
     defaultValue: 0
+  },
+  shiftId: {
+    type: DataTypes.INTEGER,
+    references: {
+      model: 'shifts',
+      key: 'id'
+    }
+  },
+  cancelledAt: {
+    type: DataTypes.DATE
+  },
+  cancelReason: {
+    type: DataTypes.TEXT
+  },
+  // Llave de idempotencia del dispositivo (ventas offline sincronizadas)
+  clientId: {
+    type: DataTypes.STRING(64)
   }
 }, {
   tableName: 'sales',
@@ -381,6 +400,17 @@ const Shift = sequelize.define('Shift', {
   endingCash: {
     type: DataTypes.DECIMAL(10, 2)
   },
+  expectedCash: {
+    type: DataTypes.DECIMAL(10, 2)
+  },
+  cashSales: {
+    type: DataTypes.DECIMAL(10, 2),
+    defaultValue: 0
+  },
+  cardSales: {
+    type: DataTypes.DECIMAL(10, 2),
+    defaultValue: 0
+  },
   totalSales: {
     type: DataTypes.DECIMAL(10, 2),
     defaultValue: 0
@@ -434,6 +464,7 @@ function setupAssociations() {
   Sale.belongsTo(User, { foreignKey: 'userId' });
   Sale.belongsTo(Table, { foreignKey: 'tableId' });
   Sale.belongsTo(Customer, { foreignKey: 'customerId' });
+  Sale.belongsTo(Shift, { foreignKey: 'shiftId' });
   Sale.hasMany(SaleItem, { foreignKey: 'saleId', onDelete: 'CASCADE' });
   
   // SaleItem associations
@@ -442,6 +473,7 @@ function setupAssociations() {
   
   // Shift associations
   Shift.belongsTo(User, { foreignKey: 'userId' });
+  Shift.hasMany(Sale, { foreignKey: 'shiftId' });
 }
 
 // Función para inicializar la base de datos
@@ -451,6 +483,9 @@ async function initDatabase() {
     await sequelize.authenticate();
     console.log('✅ Conexión a SQLite establecida correctamente');
     
+    // WAL, synchronous, mmap y caché (ver database/storage.js)
+    await applyDatabasePragmas(sequelize);
+    
     // Configurar asociaciones
     setupAssociations();
     
@@ -470,6 +505,12 @@ async function initDatabase() {
     
     console.log('✅ Modelos sincronizados correctamente');
     
+    // Columnas e índices sobre tablas existentes
+    if (syncOptions.force) {
+      await sequelize.query('DROP TABLE IF EXISTS `schema_migrations`');
+    }
+    await runMigrations(sequelize);
+    
     // Insertar datos iniciales si es necesario
     await seedInitialData();
     
@@ -490,32 +531,34 @@ async function seedInitialData() {
     if (userCount === 0) {
       console.log('🌱 Insertando datos iniciales...');
       
-      // Crear usuarios iniciales
-      const bcrypt = require('bcryptjs');
-      const saltRounds = 10;
+      // Crear usuarios iniciales (hashes en paralelo en el pool de contraseñas)
+      const { passwordHasher } = require('../services/passwordHasher');
+      const [adminHash, tablet1Hash, tablet2Hash, mesero1Hash] = await Promise.all(
+        ['admin123', 'tablet123', 'caja123', 'mesa123'].map(password => passwordHasher.hash(password))
+      );
       
       const users = [
         {
           username: 'admin',
-          password: await bcrypt.hash('admin123', saltRounds),
+          password: adminHash,
           name: 'Administrador',
           role: 'admin'
         },
         {
           username: 'tablet1',
-          password: await bcrypt.hash('tablet123', saltRounds),
+          password: tablet1Hash,
           name: 'Tablet Meseros',
           role: 'waiter'
         },
         {
           username: 'tablet2',
-          password: await bcrypt.hash('caja123', saltRounds),
+          password: tablet2Hash,
           name: 'Tablet Caja',
           role: 'cashier'
         },
         {
           username: 'mesero1',
-          password: await bcrypt.hash('mesa123', saltRounds),
+          password: mesero1Hash,
           name: 'Juan Pérez',
           role: 'waiter'
         }
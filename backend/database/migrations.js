@@ -0,0 +1,371 @@
+// backend/database/migrations.js
+// Migraciones incrementales del esquema. sequelize.sync() solo crea tablas
+// nuevas; cualquier cambio sobre tablas existentes (columnas, índices) se
+// registra aquí y se aplica una sola vez por base de datos.
+const { QueryTypes } = require('sequelize');
+
+// Índices que siguen la forma real de las consultas de reports, sales, shifts y sync
+const INDEXES = [
+  // Reportes y listados: WHERE status = ? AND createdAt BETWEEN ? ORDER BY createdAt
+  { name: 'sales_status_created_at', table: 'sales', columns: ['status', 'createdAt'] },
+  // Listado de ventas de un usuario (no admin)
+  { name: 'sales_user_status_created_at', table: 'sales', columns: ['userId', 'status', 'createdAt'] },
+  // Estadísticas y cierre de turno
+  { name: 'sales_shift_status', table: 'sales', columns: ['shiftId', 'status'] },
+  // /api/sync/pending y /api/sync/status
+  { name: 'sales_synced_created_at', table: 'sales', columns: ['synced', 'createdAt'] },
+  { name: 'sales_synced_synced_at', table: 'sales', columns: ['synced', 'syncedAt'] },
+  // Historial por cliente y por mesa
+  { name: 'sales_customer_created_at', table: 'sales', columns: ['customerId', 'createdAt'] },
+  { name: 'sales_table_status', table: 'sales', columns: ['tableId', 'status'] },
+  // Líneas de venta: include por venta y agrupación por producto
+  { name: 'sale_items_sale_id', table: 'sale_items', columns: ['saleId'] },
+  { name: 'sale_items_menu_item_sale', table: 'sale_items', columns: ['menuItemId', 'saleId'] },
+  // Turno activo del usuario (login, ventas, perfil)
+  { name: 'shifts_user_status', table: 'shifts', columns: ['userId', 'status'] }
+];
+
+async function columnExists(sequelize, table, column, transaction) {
+  const columns = await sequelize.query(`PRAGMA table_info(\`${table}\`)`, {
+    type: QueryTypes.SELECT,
+    transaction
+  });
+  return columns.some(info => info.name === column);
+}
+
+async function addColumnIfMissing(sequelize, table, column, definition, transaction) {
+  if (!(await columnExists(sequelize, table, column, transaction))) {
+    await sequelize.query(`ALTER TABLE \`${table}\` ADD COLUMN \`${column}\` ${definition}`, { transaction });
+  }
+}
+
+async function createIndexes(sequelize, indexes, transaction) {
+  for (const index of indexes) {
+    const columns = index.columns.map(column => `\`${column}\``).join(', ');
+    await sequelize.query(
+      `CREATE INDEX IF NOT EXISTS \`${index.name}\` ON \`${index.table}\` (${columns})`,
+      { transaction }
+    );
+  }
+}
+
+async function dropIndexes(sequelize, indexes, transaction) {
+  for (const index of indexes) {
+    await sequelize.query(`DROP INDEX IF EXISTS \`${index.name}\``, { transaction });
+  }
+}
+
+// Lista ordenada; nunca reordenar ni editar una migración ya publicada
+const MIGRATIONS = [
+  {
+    name: '001-sales-shift-and-cancel-columns',
+    up: async (sequelize, transaction) => {
+      await addColumnIfMissing(sequelize, 'sales', 'shiftId', 'INTEGER REFERENCES `shifts` (`id`)', transaction);
+      await addColumnIfMissing(sequelize, 'sales', 'cancelledAt', 'DATETIME', transaction);
+      await addColumnIfMissing(sequelize, 'sales', 'cancelReason', 'TEXT', transaction);
+    }
+  },
+  {
+    name: '002-query-indexes',
+    up: async (sequelize, transaction) => {
+      await createIndexes(sequelize, INDEXES, transaction);
+    }
+  },
+  {
+    name: '003-sales-rollups',
+    up: async (sequelize, transaction) => {
+      await sequelize.query(`
+        CREATE TABLE IF NOT EXISTS \`sales_rollup\` (
+          \`granularity\` TEXT NOT NULL,
+          \`bucket\` TEXT NOT NULL,
+          \`paymentMethod\` TEXT NOT NULL,
+          \`userId\` INTEGER NOT NULL,
+          \`shiftId\` INTEGER NOT NULL,
+          \`saleCount\` INTEGER NOT NULL DEFAULT 0,
+          \`revenueCents\` INTEGER NOT NULL DEFAULT 0,
+          \`itemCount\` INTEGER NOT NULL DEFAULT 0,
+          \`cancelledCount\` INTEGER NOT NULL DEFAULT 0,
+          \`cancelledCents\` INTEGER NOT NULL DEFAULT 0,
+          PRIMARY KEY (\`granularity\`, \`bucket\`, \`paymentMethod\`, \`userId\`, \`shiftId\`)
+        ) WITHOUT ROWID`, { transaction });
+      await sequelize.query(`
+        CREATE TABLE IF NOT EXISTS \`sales_item_rollup\` (
+          \`granularity\` TEXT NOT NULL,
+          \`bucket\` TEXT NOT NULL,
+          \`menuItemId\` INTEGER NOT NULL,
+          \`quantity\` INTEGER NOT NULL DEFAULT 0,
+          \`revenueCents\` INTEGER NOT NULL DEFAULT 0,
+          PRIMARY KEY (\`granularity\`, \`bucket\`, \`menuItemId\`)
+        ) WITHOUT ROWID`, { transaction });
+
+      // Carga inicial desde el historial existente
+      const { rebuildRollups } = require('../services/salesRollup');
+      await rebuildRollups({ transaction });
+    }
+  },
+  {
+    name: '004-sales-client-id',
+    up: async (sequelize, transaction) => {
+      // Llave de idempotencia generada por el dispositivo para /api/sync/sales
+      await addColumnIfMissing(sequelize, 'sales', 'clientId', 'VARCHAR(64)', transaction);
+      await sequelize.query(
+        'CREATE UNIQUE INDEX IF NOT EXISTS `sales_client_id` ON `sales` (`clientId`)',
+        { transaction }
+      );
+    }
+  },
+  {
+    name: '005-cart-store',
+    up: async (sequelize, transaction) => {
+      // Log de operaciones de carritos (solo se agrega) y su compactación
+      await sequelize.query(`
+        CREATE TABLE IF NOT EXISTS \`cart_ops\` (
+          \`id\` INTEGER PRIMARY KEY AUTOINCREMENT,
+          \`cartKey\` TEXT NOT NULL,
+          \`op\` TEXT NOT NULL,
+          \`menuItemId\` INTEGER,
+          \`quantity\` INTEGER,
+          \`data\` TEXT,
+          \`userId\` INTEGER,
+          \`createdAt\` TEXT NOT NULL
+        )`, { transaction });
+      await sequelize.query(
+        'CREATE INDEX IF NOT EXISTS `cart_ops_cart_key_id` ON `cart_ops` (`cartKey`, `id`)',
+        { transaction }
+      );
+      await sequelize.query(`
+        CREATE TABLE IF NOT EXISTS \`cart_snapshots\` (
+          \`cartKey\` TEXT PRIMARY KEY,
+          \`opId\` INTEGER NOT NULL,
+          \`lines\` TEXT NOT NULL,
+          \`updatedAt\` TEXT NOT NULL
+        ) WITHOUT ROWID`, { transaction });
+      await sequelize.query(
+        'CREATE INDEX IF NOT EXISTS `cart_snapshots_op_id` ON `cart_snapshots` (`opId`)',
+        { transaction }
+      );
+    }
+  },
+  {
+    name: '006-shift-totals',
+    up: async (sequelize, transaction) => {
+      // Columnas que el cierre de turno ya escribía pero no existían
+      await addColumnIfMissing(sequelize, 'shifts', 'expectedCash', 'DECIMAL(10,2)', transaction);
+      await addColumnIfMissing(sequelize, 'shifts', 'cashSales', 'DECIMAL(10,2) DEFAULT 0', transaction);
+      await addColumnIfMissing(sequelize, 'shifts', 'cardSales', 'DECIMAL(10,2) DEFAULT 0', transaction);
+
+      // Contadores por turno y método de pago (ver services/shiftTotals.js)
+      await sequelize.query(`
+        CREATE TABLE IF NOT EXISTS \`shift_totals\` (
+          \`shiftId\` INTEGER NOT NULL,
+          \`paymentMethod\` TEXT NOT NULL,
+          \`saleCount\` INTEGER NOT NULL DEFAULT 0,
+          \`revenueCents\` INTEGER NOT NULL DEFAULT 0,
+          \`cancelledCount\` INTEGER NOT NULL DEFAULT 0,
+          \`cancelledCents\` INTEGER NOT NULL DEFAULT 0,
+          PRIMARY KEY (\`shiftId\`, \`paymentMethod\`)
+        ) WITHOUT ROWID`, { transaction });
+
+      // Carga inicial desde el historial existente
+      const { rebuildShiftTotals } = require('../services/shiftTotals');
+      await rebuildShiftTotals({ transaction });
+    }
+  },
+  {
+    name: '007-customer-search',
+    up: async (sequelize, transaction) => {
+      const { phoneDigitsSql } = require('../services/customerSearch');
+      const run = (sql) => sequelize.query(sql, { transaction });
+
+      // Teléfono normalizado (solo dígitos) para buscar por prefijo con índice
+      await addColumnIfMissing(sequelize, 'customers', 'phoneDigits', 'TEXT', transaction);
+      await run(`UPDATE \`customers\` SET \`phoneDigits\` = ${phoneDigitsSql('phone')}`);
+      await run('CREATE INDEX IF NOT EXISTS `customers_phone_digits` ON `customers` (`phoneDigits`)');
+      await run(`
+        CREATE TRIGGER IF NOT EXISTS \`customers_phone_digits_ai\` AFTER INSERT ON \`customers\` BEGIN
+          UPDATE \`customers\` SET \`phoneDigits\` = ${phoneDigitsSql('NEW.phone')} WHERE id = NEW.id;
+        END`);
+      await run(`
+        CREATE TRIGGER IF NOT EXISTS \`customers_phone_digits_au\` AFTER UPDATE OF \`phone\` ON \`customers\` BEGIN
+          UPDATE \`customers\` SET \`phoneDigits\` = ${phoneDigitsSql('NEW.phone')} WHERE id = NEW.id;
+        END`);
+
+      // Índice de texto sin acentos sobre nombre y dirección (contenido externo:
+      // el texto vive en `customers`, FTS5 solo guarda el índice)
+      await run(`
+        CREATE VIRTUAL TABLE IF NOT EXISTS \`customers_fts\` USING fts5(
+          name, address1, address2, city,
+          content='customers', content_rowid='id',
+          tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )`);
+      await run(`
+        CREATE TRIGGER IF NOT EXISTS \`customers_fts_ai\` AFTER INSERT ON \`customers\` BEGIN
+          INSERT INTO customers_fts (rowid, name, address1, address2, city)
+          VALUES (NEW.id, NEW.name, NEW.address1, NEW.address2, NEW.city);
+        END`);
+      await run(`
+        CREATE TRIGGER IF NOT EXISTS \`customers_fts_ad\` AFTER DELETE ON \`customers\` BEGIN
+          INSERT INTO customers_fts (customers_fts, rowid, name, address1, address2, city)
+          VALUES ('delete', OLD.id, OLD.name, OLD.address1, OLD.address2, OLD.city);
+        END`);
+      // Solo cuando cambia texto indexado (no en cada venta que toca totalOrders)
+      await run(`
+        CREATE TRIGGER IF NOT EXISTS \`customers_fts_au\`
+        AFTER UPDATE OF name, address1, address2, city ON \`customers\` BEGIN
+          INSERT INTO customers_fts (customers_fts, rowid, name, address1, address2, city)
+          VALUES ('delete', OLD.id, OLD.name, OLD.address1, OLD.address2, OLD.city);
+          INSERT INTO customers_fts (rowid, name, address1, address2, city)
+          VALUES (NEW.id, NEW.name, NEW.address1, NEW.address2, NEW.city);
+        END`);
+      await run("INSERT INTO customers_fts (customers_fts) VALUES ('rebuild')");
+    }
+  },
+  {
+    name: '008-table-changes',
+    up: async (sequelize, transaction) => {
+      // Log de cambios del salón; su id es la versión (ver services/tableState.js)
+      await sequelize.query(`
+        CREATE TABLE IF NOT EXISTS \`table_changes\` (
+          \`id\` INTEGER PRIMARY KEY AUTOINCREMENT,
+          \`tableId\` INTEGER NOT NULL,
+          \`data\` TEXT NOT NULL,
+          \`createdAt\` TEXT NOT NULL
+        )`, { transaction });
+      // Tras DB_RESET las mesas se recrean: los cambios viejos ya no aplican
+      // (los clientes detectan el hueco y piden la foto completa)
+      await sequelize.query('DELETE FROM `table_changes`', { transaction });
+    }
+  },
+  {
+    name: '009-archive-months',
+    up: async (sequelize, transaction) => {
+      // Un archivo SQLite por mes con las ventas frías (ver services/archive.js);
+      // `moving` marca un mes con un traslado a medias
+      await sequelize.query(`
+        CREATE TABLE IF NOT EXISTS \`archive_months\` (
+          \`month\` TEXT PRIMARY KEY,
+          \`file\` TEXT NOT NULL,
+          \`saleCount\` INTEGER NOT NULL DEFAULT 0,
+          \`itemCount\` INTEGER NOT NULL DEFAULT 0,
+          \`minSaleId\` INTEGER,
+          \`maxSaleId\` INTEGER,
+          \`columns\` TEXT,
+          \`moving\` INTEGER NOT NULL DEFAULT 0,
+          \`archivedAt\` TEXT,
+          \`backedUpAt\` TEXT
+        ) WITHOUT ROWID`, { transaction });
+      // Tras DB_RESET los archivos de otra base ya no corresponden (el
+      // archivador aparta los que encuentre sin registrar)
+      await sequelize.query('DELETE FROM `archive_months`', { transaction });
+      // Búsqueda de meses por archivar y fragmentos crudos de los reportes
+      // (sin filtrar por estado)
+      await createIndexes(sequelize, [
+        { name: 'sales_created_at', table: 'sales', columns: ['createdAt'] }
+      ], transaction);
+    }
+  },
+  {
+    name: '010-inventory-ledger',
+    up: async (sequelize, transaction) => {
+      const run = (sql) => sequelize.query(sql, { transaction });
+
+      // Insumos con su existencia vigente (la mantiene services/inventory.js
+      // junto con cada movimiento); clientId liga los creados en una tableta
+      await run(`
+        CREATE TABLE IF NOT EXISTS \`inventory_items\` (
+          \`id\` INTEGER PRIMARY KEY AUTOINCREMENT,
+          \`name\` VARCHAR(255) NOT NULL,
+          \`category\` VARCHAR(100),
+          \`unit\` VARCHAR(20),
+          \`minLevel\` REAL NOT NULL DEFAULT 0,
+          \`level\` REAL NOT NULL DEFAULT 0,
+          \`lastMovementId\` INTEGER NOT NULL DEFAULT 0,
+          \`clientId\` VARCHAR(64),
+          \`isActive\` INTEGER NOT NULL DEFAULT 1,
+          \`createdAt\` TEXT NOT NULL,
+          \`updatedAt\` TEXT NOT NULL
+        )`);
+      await run('CREATE UNIQUE INDEX IF NOT EXISTS `inventory_items_client_id` ON `inventory_items` (`clientId`) WHERE `clientId` IS NOT NULL');
+      // Stock bajo: faltante ordenado, sin recorrer los insumos
+      await run('CREATE INDEX IF NOT EXISTS `inventory_items_shortfall` ON `inventory_items` (`level` - `minLevel`) WHERE `isActive` = 1');
+
+      // Receta: cuánto de cada insumo consume una unidad del producto
+      await run(`
+        CREATE TABLE IF NOT EXISTS \`recipe_lines\` (
+          \`menuItemId\` INTEGER NOT NULL,
+          \`inventoryItemId\` INTEGER NOT NULL,
+          \`quantity\` REAL NOT NULL,
+          PRIMARY KEY (\`menuItemId\`, \`inventoryItemId\`)
+        ) WITHOUT ROWID`);
+      await run('CREATE INDEX IF NOT EXISTS `recipe_lines_inventory_item` ON `recipe_lines` (`inventoryItemId`)');
+
+      // Libro de movimientos: solo se agregan filas
+      await run(`
+        CREATE TABLE IF NOT EXISTS \`stock_movements\` (
+          \`id\` INTEGER PRIMARY KEY AUTOINCREMENT,
+          \`inventoryItemId\` INTEGER NOT NULL,
+          \`type\` VARCHAR(20) NOT NULL,
+          \`delta\` REAL NOT NULL,
+          \`saleId\` INTEGER,
+          \`userId\` INTEGER,
+          \`deviceId\` VARCHAR(100),
+          \`clientId\` VARCHAR(64),
+          \`reason\` TEXT,
+          \`occurredAt\` TEXT,
+          \`createdAt\` TEXT NOT NULL
+        )`);
+      await createIndexes(sequelize, [
+        { name: 'stock_movements_item_id', table: 'stock_movements', columns: ['inventoryItemId', 'id'] },
+        { name: 'stock_movements_created_at', table: 'stock_movements', columns: ['createdAt'] }
+      ], transaction);
+      await run('CREATE INDEX IF NOT EXISTS `stock_movements_sale_id` ON `stock_movements` (`saleId`) WHERE `saleId` IS NOT NULL');
+      await run('CREATE UNIQUE INDEX IF NOT EXISTS `stock_movements_client_id` ON `stock_movements` (`clientId`) WHERE `clientId` IS NOT NULL');
+
+      // Existencia de cada insumo al movimiento dado (stock a una fecha)
+      await run(`
+        CREATE TABLE IF NOT EXISTS \`stock_snapshots\` (
+          \`inventoryItemId\` INTEGER NOT NULL,
+          \`movementId\` INTEGER NOT NULL,
+          \`level\` REAL NOT NULL,
+          \`takenAt\` TEXT NOT NULL,
+          PRIMARY KEY (\`inventoryItemId\`, \`movementId\`)
+        ) WITHOUT ROWID`);
+    }
+  }
+];
+
+// Aplica las migraciones pendientes, cada una en su propia transacción
+async function runMigrations(sequelize) {
+  await sequelize.query(
+    'CREATE TABLE IF NOT EXISTS `schema_migrations` (`name` VARCHAR(255) PRIMARY KEY, `appliedAt` DATETIME NOT NULL)'
+  );
+
+  const applied = await sequelize.query('SELECT `name` FROM `schema_migrations`', { type: QueryTypes.SELECT });
+  const appliedNames = new Set(applied.map(row => row.name));
+
+  for (const migration of MIGRATIONS) {
+    if (appliedNames.has(migration.name)) {
+      continue;
+    }
+
+    await sequelize.transaction(async (transaction) => {
+      await migration.up(sequelize, transaction);
+      await sequelize.query('INSERT INTO `schema_migrations` (`name`, `appliedAt`) VALUES (?, ?)', {
+        replacements: [migration.name, new Date().toISOString()],
+        transaction
+      });
+    });
+    console.log(`📦 Migración aplicada: ${migration.name}`);
+  }
+
+  // Actualiza estadísticas del planificador si hubo cambios de índices
+  await sequelize.query('PRAGMA optimize');
+}
+
+module.exports = {
+  INDEXES,
+  MIGRATIONS,
+  runMigrations,
+  createIndexes,
+  dropIndexes
+};
@@ -0,0 +1,361 @@
+// backend/database/storage.js
+// Perfil de rendimiento de SQLite: PRAGMAs por conexión, conexiones de solo
+// lectura para las rutas GET y un único escritor serializado.
+//
+// Sequelize con SQLite no tiene un pool real: reutiliza una conexión
+// "default" y abre una conexión nueva por transacción. Aquí se aprovecha eso:
+// - las peticiones GET usan un conjunto fijo de conexiones lectoras
+//   (PRAGMA query_only) que en modo WAL no esperan al escritor;
+// - las transacciones pasan por un candado FIFO, de modo que solo una
+//   transacción de escritura está abierta a la vez y nunca hay SQLITE_BUSY
+//   entre escrituras del mismo proceso. Las escrituras sueltas (Model.create,
+//   instance.update, sequelize.query con INSERT/UPDATE... sin transacción)
+//   toman el mismo candado mientras dura la sentencia.
+// - en modo cluster (cluster.js) el candado lo administra el proceso
+//   primario, así el escritor único abarca a todos los workers.
+// - withConnectionSetup abre conexiones con sentencias extra (ATTACH de los
+//   archivos mensuales de ventas y vistas temporales, ver services/archive.js).
+const { AsyncLocalStorage } = require('async_hooks');
+const { QueryTypes } = require('sequelize');
+const ipc = require('../services/clusterIpc');
+const { observeLockWait, observeLockHold } = require('../services/metrics');
+
+const toInt = (value, fallback) => {
+  const parsed = parseInt(value);
+  return Number.isNaN(parsed) ? fallback : parsed;
+};
+
+// Configuración (sobrescribible por variables de entorno)
+const storageConfig = {
+  journalMode: process.env.DB_JOURNAL_MODE || 'WAL',
+  synchronous: process.env.DB_SYNCHRONOUS || 'NORMAL',
+  mmapSize: toInt(process.env.DB_MMAP_SIZE, 268435456),      // 256 MB
+  cacheSize: toInt(process.env.DB_CACHE_SIZE, -16000),         // negativo = KiB (16 MB)
+  busyTimeout: toInt(process.env.DB_BUSY_TIMEOUT, 5000),       // ms
+  readPoolSize: toInt(process.env.DB_READ_POOL, 4),
+  writeTimeout: toInt(process.env.DB_WRITE_TIMEOUT, 30000)     // ms esperando el candado
+};
+
+const VALID_JOURNAL_MODES = ['WAL', 'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'OFF'];
+const VALID_SYNCHRONOUS = ['OFF', 'NORMAL', 'FULL', 'EXTRA'];
+
+// Sentencias que no escriben (no piden el candado)
+const READ_STATEMENT = /^\s*(SELECT|PRAGMA|EXPLAIN)\b/i;
+
+// Contexto de la petición actual: nombre de la conexión lectora asignada
+const readerContext = new AsyncLocalStorage();
+let nextReader = 0;
+
+// Turno del escritor que tiene el callback de una transacción manejada: sus
+// consultas sin `transaction` no vuelven a pedir el candado (esperarían a sí
+// mismas). Deja de valer al liberarse, aunque quede trabajo pendiente que
+// haya heredado el contexto.
+const writerContext = new AsyncLocalStorage();
+
+// SQL extra para las conexiones nuevas que se abran dentro del contexto
+// (nunca para la conexión default ni para las lectoras compartidas)
+const setupContext = new AsyncLocalStorage();
+const DEDICATED_PREFIX = 'dedicated-';
+let nextDedicated = 0;
+let connectionManager = null;
+
+// Ejecuta una sentencia directamente sobre una conexión de node-sqlite3
+function exec(connection, sql) {
+  return new Promise((resolve, reject) => {
+    connection.exec(sql, err => (err ? reject(err) : resolve()));
+  });
+}
+
+// PRAGMAs que SQLite guarda por conexión
+function connectionPragmas() {
+  return [
+    `PRAGMA busy_timeout = ${storageConfig.busyTimeout}`,
+    `PRAGMA synchronous = ${storageConfig.synchronous}`,
+    `PRAGMA cache_size = ${storageConfig.cacheSize}`,
+    `PRAGMA mmap_size = ${storageConfig.mmapSize}`,
+    'PRAGMA temp_store = MEMORY'
+  ].join(';\n');
+}
+
+// Intercepta la apertura de conexiones para aplicar PRAGMAs y enrutar lecturas
+function instrumentConnections(sequelize) {
+  const manager = sequelize.connectionManager;
+  const getConnection = manager.getConnection.bind(manager);
+  connectionManager = manager;
+
+  manager.getConnection = async (options = {}) => {
+    const reader = readerContext.getStore();
+    if (reader && !options.uuid) {
+      options.uuid = reader;
+    }
+
+    const key = options.uuid || 'default';
+    const isNew = !manager.connections[key];
+    const connection = await getConnection(options);
+
+    if (isNew) {
+      const shared = key === 'default' || key.startsWith('reader-');
+      const setup = shared ? null : setupContext.getStore();
+
+      await exec(connection, connectionPragmas());
+      // Antes de query_only: las vistas temporales también son escrituras
+      if (setup) {
+        await exec(connection, setup);
+      }
+      if (key.startsWith('reader-') || key.startsWith(DEDICATED_PREFIX)) {
+        await exec(connection, 'PRAGMA query_only = ON');
+      }
+    }
+    return connection;
+  };
+}
+
+// Cierra y olvida una conexión abierta con una clave propia
+function closeConnection(key) {
+  const connection = connectionManager && connectionManager.connections[key];
+  if (!connection) {
+    return Promise.resolve();
+  }
+  delete connectionManager.connections[key];
+  return new Promise(resolve => connection.close(() => resolve()));
+}
+
+// Candado FIFO para el escritor único
+function createWriteLock(timeout) {
+  let tail = Promise.resolve();
+
+  return function acquire() {
+    let release;
+    const released = new Promise(resolve => { release = resolve; });
+    const previous = tail;
+    tail = tail.then(() => released);
+
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        // Se libera el turno para no bloquear a los siguientes en la cola
+        previous.then(release);
+        reject(new Error(`Tiempo de espera agotado para escribir en la base de datos (${timeout} ms)`));
+      }, timeout);
+
+      previous.then(() => {
+        clearTimeout(timer);
+        let done = false;
+        resolve(() => {
+          if (!done) {
+            done = true;
+            release();
+          }
+        });
+      });
+    });
+  };
+}
+
+// Candado del escritor único en modo cluster: el primario concede los turnos
+// en orden de llegada. Un turno concedido después de expirar la espera se
+// devuelve de inmediato.
+function createClusterWriteLock(timeout) {
+  const waiting = new Map();
+  let nextId = 0;
+
+  ipc.on('db-lock:granted', ({ id }) => {
+    const entry = waiting.get(id);
+    if (!entry) {
+      ipc.send('db-lock:release', { id });
+      return;
+    }
+
+    waiting.delete(id);
+    clearTimeout(entry.timer);
+    let done = false;
+    entry.resolve(() => {
+      if (!done) {
+        done = true;
+        ipc.send('db-lock:release', { id });
+      }
+    });
+  });
+
+  return function acquire() {
+    const id = ++nextId;
+
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        waiting.delete(id);
+        ipc.send('db-lock:release', { id });
+        reject(new Error(`Tiempo de espera agotado para escribir en la base de datos (${timeout} ms)`));
+      }, timeout);
+
+      waiting.set(id, { resolve, timer });
+      ipc.send('db-lock:acquire', { id });
+    });
+  };
+}
+
+// Registra en las métricas la espera por el candado y cuánto se retiene
+function timedRelease(release, requestedAt) {
+  const acquiredAt = process.hrtime.bigint();
+  observeLockWait(Number(acquiredAt - requestedAt) / 1e6);
+
+  let done = false;
+  return () => {
+    if (!done) {
+      done = true;
+      observeLockHold(Number(process.hrtime.bigint() - acquiredAt) / 1e6);
+    }
+    release();
+  };
+}
+
+// Hace que todas las transacciones (manejadas o no) y las escrituras fuera
+// de una transacción pasen por el candado
+function serializeTransactions(sequelize) {
+  const begin = sequelize.transaction.bind(sequelize);
+  const query = sequelize.query.bind(sequelize);
+  const acquire = ipc.isClusterWorker
+    ? createClusterWriteLock(storageConfig.writeTimeout)
+    : createWriteLock(storageConfig.writeTimeout);
+
+  sequelize.transaction = async function (options, autoCallback) {
+    if (typeof options === 'function') {
+      autoCallback = options;
+      options = undefined;
+    }
+
+    const requestedAt = process.hrtime.bigint();
+    const release = timedRelease(await acquire(), requestedAt);
+
+    if (autoCallback) {
+      const turn = { active: true };
+      try {
+        return await writerContext.run(turn, () => begin(options, autoCallback));
+      } finally {
+        turn.active = false;
+        release();
+      }
+    }
+
+    let transaction;
+    try {
+      transaction = await begin(options);
+    } catch (error) {
+      release();
+      throw error;
+    }
+
+    const commit = transaction.commit.bind(transaction);
+    const rollback = transaction.rollback.bind(transaction);
+    transaction.commit = async () => {
+      try {
+        return await commit();
+      } finally {
+        release();
+      }
+    };
+    transaction.rollback = async () => {
+      try {
+        return await rollback();
+      } finally {
+        release();
+      }
+    };
+
+    return transaction;
+  };
+
+  // Escritura suelta: el candado se toma solo mientras dura la sentencia.
+  // Las consultas de una transacción ya lo tienen, y las lectoras
+  // (query_only) nunca escriben
+  sequelize.query = async function (sql, options) {
+    const text = typeof sql === 'string' ? sql : (sql && sql.query) || '';
+    const turn = writerContext.getStore();
+    if ((options && options.transaction) || (turn && turn.active) ||
+        readerContext.getStore() || READ_STATEMENT.test(text)) {
+      return query(sql, options);
+    }
+
+    const requestedAt = process.hrtime.bigint();
+    const release = timedRelease(await acquire(), requestedAt);
+    try {
+      return await query(sql, options);
+    } finally {
+      release();
+    }
+  };
+}
+
+// Middleware: las peticiones GET se atienden con una conexión lectora
+function readReplicaMiddleware(req, res, next) {
+  if (req.method !== 'GET' || storageConfig.readPoolSize <= 0) {
+    return next();
+  }
+
+  const reader = `reader-${nextReader}`;
+  nextReader = (nextReader + 1) % storageConfig.readPoolSize;
+  readerContext.run(reader, next);
+}
+
+// Ejecuta una función usando una conexión lectora (scripts y reportes)
+function withReader(fn) {
+  const reader = `reader-${nextReader}`;
+  nextReader = (nextReader + 1) % Math.max(1, storageConfig.readPoolSize);
+  return readerContext.run(reader, fn);
+}
+
+/**
+ * Ejecuta fn aplicando `setup` (SQL) a las conexiones que abra:
+ * - { reader: true }: sus consultas sin transacción van a una conexión de
+ *   solo lectura propia, que se cierra al terminar fn
+ * - sin reader: a las transacciones que abra (Sequelize abre una conexión
+ *   nueva por transacción, así el ATTACH queda fuera del BEGIN)
+ */
+async function withConnectionSetup(setup, fn, { reader = false } = {}) {
+  if (!reader) {
+    return setupContext.run(setup, fn);
+  }
+
+  const key = `${DEDICATED_PREFIX}${++nextDedicated}`;
+  try {
+    return await setupContext.run(setup, () => readerContext.run(key, fn));
+  } finally {
+    await closeConnection(key);
+  }
+}
+
+// Valida los valores que se interpolan en los PRAGMAs
+function validateConfig() {
+  storageConfig.journalMode = storageConfig.journalMode.toUpperCase();
+  storageConfig.synchronous = storageConfig.synchronous.toUpperCase();
+
+  if (!VALID_JOURNAL_MODES.includes(storageConfig.journalMode)) {
+    throw new Error(`DB_JOURNAL_MODE inválido: ${storageConfig.journalMode}`);
+  }
+  if (!VALID_SYNCHRONOUS.includes(storageConfig.synchronous)) {
+    throw new Error(`DB_SYNCHRONOUS inválido: ${storageConfig.synchronous}`);
+  }
+}
+
+// Prepara la instancia de Sequelize; llamar una sola vez al crearla
+function configureStorage(sequelize) {
+  validateConfig();
+  instrumentConnections(sequelize);
+  serializeTransactions(sequelize);
+}
+
+// PRAGMAs persistentes de la base de datos (se aplican en initDatabase)
+async function applyDatabasePragmas(sequelize) {
+  const [{ journal_mode: mode }] = await sequelize.query(
+    `PRAGMA journal_mode = ${storageConfig.journalMode}`,
+    { type: QueryTypes.SELECT }
+  );
+  console.log(`⚙️  SQLite: journal_mode=${mode}, synchronous=${storageConfig.synchronous}, mmap=${storageConfig.mmapSize}, cache=${storageConfig.cacheSize}, lectores=${storageConfig.readPoolSize}`);
+}
+
+module.exports = {
+  storageConfig,
+  configureStorage,
+  applyDatabasePragmas,
+  readReplicaMiddleware,
+  withReader,
+  withConnectionSetup
+};
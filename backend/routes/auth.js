@@ -1,11 +1,13 @@
 const express = require('express');
-const bcrypt = require('bcryptjs');
 const jwt = require('jsonwebtoken');
-const { User, Shift, Sale } = require('../database/init');
+const { User, Shift, sequelize } = require('../database/init');
+const { passwordHasher, HashPoolError } = require('../services/passwordHasher');
+const { tokenCache } = require('../services/tokenCache');
+const { closeShift: closeActiveShift } = require('../services/shiftTotals');
 
 const router = express.Router();
 
-// Middleware para verificar JWT
+// Middleware para verificar JWT (verificaciones cacheadas, ver services/tokenCache)
 const authenticateToken = (req, res, next) => {
   const authHeader = req.headers['authorization'];
   const token = authHeader && authHeader.split(' ')[1];
@@ -14,13 +16,12 @@ const authenticateToken = (req, res, next) => {
     return res.status(401).json({ error: 'Token de acceso requerido' });
   }
 
-  jwt.verify(token, process.env.JWT_SECRET, (err, user) => {
-    if (err) {
-      return res.status(403).json({ error: 'Token inválido' });
-    }
-    req.user = user;
-    next();
-  });
+  try {
+    req.user = tokenCache.verify(token);
+  } catch (err) {
+    return res.status(403).json({ error: 'Token inválido' });
+  }
+  next();
 };
 
 // POST /api/auth/login - Iniciar sesión
@@ -50,7 +51,7 @@ router.post('/login', async (req, res) => {
     }
 
     // Verificar contraseña
-    const validPassword = await bcrypt.compare(password, user.password);
+    const validPassword = await passwordHasher.compare(password, user.password);
     if (!validPassword) {
       return res.status(401).json({
         error: 'Credenciales inválidas'
@@ -112,16 +113,18 @@ router.post('/login', async (req, res) => {
     });
 
     // Emitir evento de conexión via Socket.io
-    if (req.io) {
-      req.io.emit('user-connected', {
+    if (req.events) {
+      req.events.publish('user-connected', {
         userId: user.id,
         username: user.username,
-        role: user.role,
-        timestamp: new Date().toISOString()
-      });
+        role: user.role
+      }, { key: `user:${user.id}` });
     }
 
   } catch (error) {
+    if (error instanceof HashPoolError) {
+      return res.status(error.status).json({ error: error.message });
+    }
     console.error('Error en login:', error);
     res.status(500).json({
       error: 'Error interno del servidor'
@@ -134,45 +137,29 @@ router.post('/logout', authenticateToken, async (req, res) => {
   try {
     const { closeShift } = req.body;
 
-    // Si se solicita cerrar turno
+    // Si se solicita cerrar turno (totales desde los contadores del turno)
     if (closeShift) {
-      const shift = await Shift.findOne({
-        where: {
-          userId: req.user.userId,
-          status: 'active'
-        }
-      });
-
-      if (shift) {
-        // Calcular totales del turno
-        const shiftSales = await Sale.findAll({
+      await sequelize.transaction(async (transaction) => {
+        const shift = await Shift.findOne({
           where: {
             userId: req.user.userId,
-            createdAt: {
-              [require('sequelize').Op.gte]: shift.startTime
-            }
-          }
+            status: 'active'
+          },
+          transaction
         });
 
-        const totalSales = shiftSales.reduce((sum, sale) => sum + parseFloat(sale.total), 0);
-        const totalTransactions = shiftSales.length;
-
-        await shift.update({
-          endTime: new Date(),
-          totalSales,
-          totalTransactions,
-          status: 'closed'
-        });
-      }
+        if (shift) {
+          await closeActiveShift(shift, { transaction });
+        }
+      });
     }
 
     // Emitir evento de desconexión
-    if (req.io) {
-      req.io.emit('user-disconnected', {
+    if (req.events) {
+      req.events.publish('user-disconnected', {
         userId: req.user.userId,
-        username: req.user.username,
-        timestamp: new Date().toISOString()
-      });
+        username: req.user.username
+      }, { key: `user:${req.user.userId}` });
     }
 
     res.json({
@@ -258,7 +245,7 @@ router.put('/change-password', authenticateToken, async (req, res) => {
     const user = await User.findByPk(req.user.userId);
 
     // Verificar contraseña actual
-    const validPassword = await bcrypt.compare(currentPassword, user.password);
+    const validPassword = await passwordHasher.compare(currentPassword, user.password);
     if (!validPassword) {
       return res.status(401).json({
         error: 'Contraseña actual incorrecta'
@@ -266,7 +253,7 @@ router.put('/change-password', authenticateToken, async (req, res) => {
     }
 
     // Encriptar nueva contraseña
-    const hashedPassword = await bcrypt.hash(newPassword, 10);
+    const hashedPassword = await passwordHasher.hash(newPassword);
 
     // Actualizar contraseña
     await user.update({
@@ -279,6 +266,9 @@ router.put('/change-password', authenticateToken, async (req, res) => {
     });
 
   } catch (error) {
+    if (error instanceof HashPoolError) {
+      return res.status(error.status).json({ error: error.message });
+    }
     console.error('Error cambiando contraseña:', error);
     res.status(500).json({
       error: 'Error interno del servidor'
@@ -342,7 +332,7 @@ router.post('/users', authenticateToken, async (req, res) => {
     }
 
     // Encriptar contraseña
-    const hashedPassword = await bcrypt.hash(password, 10);
+    const hashedPassword = await passwordHasher.hash(password);
 
     // Crear usuario
     const newUser = await User.create({
@@ -364,6 +354,9 @@ router.post('/users', authenticateToken, async (req, res) => {
     });
 
   } catch (error) {
+    if (error instanceof HashPoolError) {
+      return res.status(error.status).json({ error: error.message });
+    }
     console.error('Error creando usuario:', error);
     res.status(500).json({
       error: 'Error interno del servidor'
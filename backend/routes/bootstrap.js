@@ -0,0 +1,41 @@
+// backend/routes/bootstrap.js
+// Arranque de tabletas y app móvil en una sola petición (ver services/bootstrap.js)
+const express = require('express');
+const { authenticateToken } = require('./auth');
+const { buildBootstrap, parseKnown, sectionsFor } = require('../services/bootstrap');
+
+const router = express.Router();
+
+// Aplicar autenticación a todas las rutas
+router.use(authenticateToken);
+
+// GET /api/bootstrap?known=menu:<versión>,tables:<versión>&sections=menu,tables
+// Todo lo que necesita el rol del usuario; las secciones cuya versión ya
+// tiene el cliente llegan como { version, unchanged: true }
+router.get('/', async (req, res) => {
+  try {
+    const only = req.query.sections
+      ? String(req.query.sections).split(',').map(name => name.trim()).filter(Boolean)
+      : null;
+    const unknown = (only || []).filter(name => !sectionsFor(req.user.role).includes(name));
+    if (unknown.length > 0) {
+      return res.status(400).json({ error: `Secciones no disponibles: ${unknown.join(', ')}` });
+    }
+
+    const { body, sections, unchanged } = await buildBootstrap(req.user, {
+      known: parseKnown(req.query.known),
+      only
+    });
+
+    res.set('Cache-Control', 'private, no-cache');
+    res.set('X-Bootstrap-Sections', `${sections - unchanged}/${sections}`);
+    res.type('application/json').send(body);
+  } catch (error) {
+    console.error('Error en arranque del cliente:', error);
+    res.status(500).json({
+      error: 'Error interno del servidor'
+    });
+  }
+});
+
+module.exports = router;
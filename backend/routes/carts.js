@@ -1,132 +1,164 @@
 // backend/routes/carts.js
 const express = require('express');
 const { authenticateToken } = require('./auth');
+const { cartStore, CartError } = require('../services/cartStore');
+const { catalogCache } = require('../services/catalogCache');
 
 const router = express.Router();
 
-// Storage temporal de carritos en memoria (mejor usar Redis en producción)
-const carts = new Map();
-
 // Aplicar autenticación
 router.use(authenticateToken);
 
-// GET /api/carts/:tableId - Obtener carrito de una mesa
-router.get('/:tableId', (req, res) => {
+// Datos visibles de la línea: nombre y precio vienen del catálogo
+async function lineData(menuItemId, notes) {
+  const menuItem = (await catalogCache.getItemsById()).get(menuItemId);
+  if (!menuItem) {
+    throw new CartError(`Item del menú no encontrado: ${menuItemId}`);
+  }
+  return { name: menuItem.name, price: menuItem.price, ...(notes ? { notes } : {}) };
+}
+
+// Publica el delta de una línea (cantidad resultante; 0 = eliminada)
+function publishLine(req, cartKey, menuItemId, { opId, line }) {
+  if (req.events) {
+    req.events.publish('cart-line', {
+      cartKey,
+      seq: opId,
+      menuItemId,
+      quantity: line ? line.quantity : 0,
+      ...(line ? { name: line.name, price: line.price, notes: line.notes } : {})
+    }, { key: `cart:${cartKey}:${menuItemId}` });
+  }
+}
+
+function handleError(res, error, message) {
+  if (error instanceof CartError) {
+    return res.status(error.status).json({ error: error.message });
+  }
+  console.error(`${message}:`, error);
+  res.status(500).json({ error: 'Error interno del servidor' });
+}
+
+// GET /api/carts - Carritos abiertos
+router.get('/', async (req, res) => {
   try {
-    const { tableId } = req.params;
-    const cart = carts.get(tableId) || { items: [], total: 0 };
-    
+    const carts = await cartStore.list();
+
     res.json({
       success: true,
-      cart
+      carts
     });
   } catch (error) {
-    console.error('Error obteniendo carrito:', error);
-    res.status(500).json({ error: 'Error interno del servidor' });
+    handleError(res, error, 'Error obteniendo carritos');
   }
 });
 
-// POST /api/carts/:tableId/items - Agregar item al carrito
-router.post('/:tableId/items', (req, res) => {
+// GET /api/carts/:cartKey - Obtener carrito ('table-5' o el id de la mesa)
+router.get('/:cartKey', async (req, res) => {
   try {
-    const { tableId } = req.params;
-    const { item, quantity } = req.body;
-    
-    let cart = carts.get(tableId) || { items: [], total: 0 };
-    
-    // Buscar si el item ya existe
-    const existingItem = cart.items.find(i => i.id === item.id);
-    
-    if (existingItem) {
-      existingItem.quantity += quantity;
-    } else {
-      cart.items.push({
-        ...item,
-        quantity
-      });
-    }
-    
-    // Recalcular total
-    cart.total = cart.items.reduce((sum, i) => sum + (i.price * i.quantity), 0);
-    
-    carts.set(tableId, cart);
-    
-    // 🔥 EMITIR EVENTO A TODOS LOS CLIENTES
-    req.io.emit('cart-updated', {
-      tableId,
-      cart,
-      action: 'add',
-      item: { ...item, quantity },
-      timestamp: new Date().toISOString(),
-      user: req.user.username
-    });
-    
+    const cart = await cartStore.get(req.params.cartKey);
+
     res.json({
       success: true,
       cart
     });
-    
   } catch (error) {
-    console.error('Error agregando al carrito:', error);
-    res.status(500).json({ error: 'Error interno del servidor' });
+    handleError(res, error, 'Error obteniendo carrito');
   }
 });
 
-// DELETE /api/carts/:tableId/items/:itemId - Remover item del carrito
-router.delete('/:tableId/items/:itemId', (req, res) => {
+// POST /api/carts/:cartKey/items - Agregar item al carrito
+router.post('/:cartKey/items', async (req, res) => {
   try {
-    const { tableId, itemId } = req.params;
-    
-    let cart = carts.get(tableId) || { items: [], total: 0 };
-    
-    cart.items = cart.items.filter(i => i.id !== parseInt(itemId));
-    cart.total = cart.items.reduce((sum, i) => sum + (i.price * i.quantity), 0);
-    
-    carts.set(tableId, cart);
-    
-    // 🔥 EMITIR EVENTO A TODOS LOS CLIENTES
-    req.io.emit('cart-updated', {
-      tableId,
-      cart,
-      action: 'remove',
-      itemId,
-      timestamp: new Date().toISOString(),
-      user: req.user.username
+    const { cartKey } = req.params;
+    const { item, quantity = 1 } = req.body;
+    const menuItemId = parseInt(item && (item.menuItemId ?? item.id));
+
+    const result = await cartStore.apply(cartKey, {
+      op: 'add',
+      menuItemId,
+      quantity: parseInt(quantity),
+      data: await lineData(menuItemId, item && item.notes)
+    }, req.user.userId);
+
+    // 🔥 PUBLICAR DELTA DE LA LÍNEA
+    publishLine(req, result.cart.cartKey, menuItemId, result);
+
+    res.json({
+      success: true,
+      cart: result.cart
     });
-    
+
+  } catch (error) {
+    handleError(res, error, 'Error agregando al carrito');
+  }
+});
+
+// PUT /api/carts/:cartKey/items/:itemId - Fijar cantidad de un item
+router.put('/:cartKey/items/:itemId', async (req, res) => {
+  try {
+    const { cartKey } = req.params;
+    const menuItemId = parseInt(req.params.itemId);
+    const { quantity, notes } = req.body;
+
+    const result = await cartStore.apply(cartKey, {
+      op: 'set',
+      menuItemId,
+      quantity: parseInt(quantity),
+      data: await lineData(menuItemId, notes)
+    }, req.user.userId);
+
+    publishLine(req, result.cart.cartKey, menuItemId, result);
+
     res.json({
       success: true,
-      cart
+      cart: result.cart
     });
-    
+
   } catch (error) {
-    console.error('Error removiendo del carrito:', error);
-    res.status(500).json({ error: 'Error interno del servidor' });
+    handleError(res, error, 'Error actualizando carrito');
   }
 });
 
-// DELETE /api/carts/:tableId - Limpiar carrito completo
-router.delete('/:tableId', (req, res) => {
+// DELETE /api/carts/:cartKey/items/:itemId - Remover item del carrito
+router.delete('/:cartKey/items/:itemId', async (req, res) => {
   try {
-    const { tableId } = req.params;
-    
-    carts.delete(tableId);
-    
-    // 🔥 EMITIR EVENTO A TODOS LOS CLIENTES
-    req.io.emit('cart-cleared', {
-      tableId,
-      timestamp: new Date().toISOString(),
-      user: req.user.username
+    const { cartKey } = req.params;
+    const menuItemId = parseInt(req.params.itemId);
+
+    const result = await cartStore.apply(cartKey, { op: 'remove', menuItemId }, req.user.userId);
+
+    publishLine(req, result.cart.cartKey, menuItemId, result);
+
+    res.json({
+      success: true,
+      cart: result.cart
     });
-    
+
+  } catch (error) {
+    handleError(res, error, 'Error removiendo del carrito');
+  }
+});
+
+// DELETE /api/carts/:cartKey - Limpiar carrito completo
+router.delete('/:cartKey', async (req, res) => {
+  try {
+    const { cartKey } = req.params;
+
+    const { opId, cart } = await cartStore.apply(cartKey, { op: 'clear' }, req.user.userId);
+
+    // 🔥 PUBLICAR LIMPIEZA (los clientes descartan líneas con seq menor)
+    if (req.events) {
+      req.events.publish('cart-cleared', { cartKey: cart.cartKey, seq: opId });
+    }
+
     res.json({
       success: true,
       message: 'Carrito limpiado'
     });
-    
+
   } catch (error) {
-    console.error('Error limpiando carrito:', error);
-    res.status(500).json({ error: 'Error interno del servidor' });
+    handleError(res, error, 'Error limpiando carrito');
   }
 });
 
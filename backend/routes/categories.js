@@ -1,6 +1,7 @@
 const express = require('express');
 const router = express.Router();
 const { Category } = require('../database/init'); // Ajusta la ruta si tus modelos están en otro archivo
+const { catalogCache, buildCategoryList } = require('../services/catalogCache');
 
 // Crear nueva categoría
 router.post('/', async (req, res) => {
@@ -15,6 +16,7 @@ router.post('/', async (req, res) => {
       sortOrder: sortOrder || 0,
       isActive: isActive !== undefined ? isActive : true,
     });
+    catalogCache.invalidate({ reason: 'category' });
     res.status(201).json(nuevaCategoria);
   } catch (error) {
     if (error.name === 'SequelizeUniqueConstraintError') {
@@ -29,8 +31,7 @@ router.post('/', async (req, res) => {
 // Obtener todas las categorías activas
 router.get('/', async (req, res) => {
   try {
-    const categorias = await Category.findAll({ where: { isActive: true } });
-    res.json(categorias);
+    await catalogCache.send(req, res, 'categories', buildCategoryList());
   } catch (error) {
     console.error(error);
     res.status(500).json({ error: 'Error al obtener las categorías.' });
@@ -3,6 +3,7 @@ const express = require('express');
 const { Op } = require('sequelize');
 const { Customer, Sale, SaleItem, MenuItem, User } = require('../database/init');
 const { authenticateToken } = require('./auth');
+const { searchCustomers, MAX_LIMIT } = require('../services/customerSearch');
 
 const router = express.Router();
 
@@ -21,20 +22,30 @@ router.get('/', async (req, res) => {
     
     const offset = (page - 1) * limit;
     
-    // Construir filtros
-    const where = { isActive };
-    
-    if (search) {
-      where[Op.or] = [
-        { phone: { [Op.like]: `%${search}%` } },
-        { name: { [Op.like]: `%${search}%` } },
-        { address1: { [Op.like]: `%${search}%` } },
-        { city: { [Op.like]: `%${search}%` } }
-      ];
+    // Con búsqueda: índice FTS5 / prefijo de teléfono, ordenado por relevancia
+    if (search && search.trim()) {
+      const pageSize = Math.min(parseInt(limit) || 50, MAX_LIMIT);
+      const { customers, total } = await searchCustomers(search, {
+        limit: pageSize,
+        offset: (parseInt(page) - 1) * pageSize,
+        isActive: String(isActive) !== 'false',
+        count: true
+      });
+      
+      return res.json({
+        success: true,
+        customers,
+        pagination: {
+          total,
+          page: parseInt(page),
+          limit: pageSize,
+          pages: Math.ceil(total / pageSize)
+        }
+      });
     }
     
     const { count, rows } = await Customer.findAndCountAll({
-      where,
+      where: { isActive },
       order: [['name', 'ASC']],
       limit: parseInt(limit),
       offset: parseInt(offset)
@@ -59,22 +70,14 @@ router.get('/', async (req, res) => {
   }
 });
 
-// GET /api/customers/search/:query - Búsqueda rápida de clientes
+// GET /api/customers/search/:query - Búsqueda rápida de clientes (?limit=, máx. 50)
 router.get('/search/:query', async (req, res) => {
   try {
     const { query } = req.params;
+    const { limit = 10 } = req.query;
     
-    const customers = await Customer.findAll({
-      where: {
-        isActive: true,
-        [Op.or]: [
-          { phone: { [Op.like]: `%${query}%` } },
-          { name: { [Op.like]: `%${query}%` } }
-        ]
-      },
-      order: [['name', 'ASC']],
-      limit: 10
-    });
+    // Autocompletado: una búsqueda por índice por cada tecla
+    const { customers } = await searchCustomers(query, { limit });
     
     res.json({
       success: true,
@@ -0,0 +1,152 @@
+// backend/routes/inventory.js
+// Insumos, recetas y libro de movimientos (ver services/inventory.js)
+const express = require('express');
+const { authenticateToken } = require('./auth');
+const inventory = require('../services/inventory');
+
+const { InventoryError } = inventory;
+
+const router = express.Router();
+
+// Aplicar autenticación a todas las rutas
+router.use(authenticateToken);
+
+// Existencias y recetas las cambian administradores y gerentes
+function requireManager(req, res, next) {
+  if (req.user.role !== 'admin' && req.user.role !== 'manager') {
+    return res.status(403).json({ error: 'Acceso denegado' });
+  }
+  next();
+}
+
+// Respuesta de error común: InventoryError lleva su código HTTP
+function sendError(res, error, context) {
+  if (error instanceof InventoryError) {
+    return res.status(error.status).json({ error: error.message });
+  }
+  console.error(`Error ${context}:`, error);
+  res.status(500).json({
+    error: 'Error interno del servidor'
+  });
+}
+
+// GET /api/inventory/items - Insumos con su existencia vigente (?active=false incluye inactivos)
+router.get('/items', async (req, res) => {
+  try {
+    const items = await inventory.listItems({ active: req.query.active !== 'false' });
+    res.json({ success: true, items });
+  } catch (error) {
+    sendError(res, error, 'obteniendo insumos');
+  }
+});
+
+// GET /api/inventory/low-stock - Insumos en o por debajo de su mínimo
+router.get('/low-stock', async (req, res) => {
+  try {
+    const items = await inventory.lowStock();
+    res.json({ success: true, items });
+  } catch (error) {
+    sendError(res, error, 'obteniendo stock bajo');
+  }
+});
+
+// GET /api/inventory/levels?at=ISO[&items=1,2] - Existencias a una fecha
+router.get('/levels', async (req, res) => {
+  try {
+    const itemIds = req.query.items
+      ? String(req.query.items).split(',').map(id => parseInt(id)).filter(Number.isInteger)
+      : null;
+    const levels = await inventory.levelsAt(req.query.at || new Date(), { itemIds });
+    res.json({ success: true, ...levels });
+  } catch (error) {
+    sendError(res, error, 'calculando existencias');
+  }
+});
+
+// POST /api/inventory/items - Crear insumo ({ level } registra la existencia inicial)
+router.post('/items', requireManager, async (req, res) => {
+  try {
+    const item = await inventory.createItem(req.body, { userId: req.user.userId });
+    res.status(201).json({ success: true, item });
+  } catch (error) {
+    sendError(res, error, 'creando insumo');
+  }
+});
+
+// PUT /api/inventory/items/:id - Actualizar datos del insumo (no la existencia)
+router.put('/items/:id', requireManager, async (req, res) => {
+  try {
+    const item = await inventory.updateItem(parseInt(req.params.id), req.body);
+    res.json({ success: true, item });
+  } catch (error) {
+    sendError(res, error, 'actualizando insumo');
+  }
+});
+
+// GET /api/inventory/items/:id/movements?before=&limit= - Libro de un insumo
+router.get('/items/:id/movements', async (req, res) => {
+  try {
+    const id = parseInt(req.params.id);
+    const item = await inventory.getItem(id);
+    if (!item) {
+      return res.status(404).json({ error: 'Insumo no encontrado' });
+    }
+
+    const page = await inventory.listMovements(id, req.query);
+    res.json({ success: true, item, ...page });
+  } catch (error) {
+    sendError(res, error, 'obteniendo movimientos');
+  }
+});
+
+// GET /api/inventory/recipes/:menuItemId - Receta de un producto
+router.get('/recipes/:menuItemId', async (req, res) => {
+  try {
+    const lines = await inventory.getRecipe(parseInt(req.params.menuItemId));
+    res.json({ success: true, lines });
+  } catch (error) {
+    sendError(res, error, 'obteniendo receta');
+  }
+});
+
+// PUT /api/inventory/recipes/:menuItemId - Reemplazar receta ({ lines: [{ inventoryItemId, quantity }] })
+router.put('/recipes/:menuItemId', requireManager, async (req, res) => {
+  try {
+    const lines = await inventory.setRecipe(parseInt(req.params.menuItemId), req.body.lines);
+    res.json({ success: true, lines });
+  } catch (error) {
+    sendError(res, error, 'guardando receta');
+  }
+});
+
+// POST /api/inventory/sync - Subir movimientos (entradas, ajustes, conteos)
+// e insumos creados en la tableta. Idempotente por clientId.
+router.post('/sync', requireManager, async (req, res) => {
+  try {
+    const { items, movements, deviceId } = req.body;
+    const { manifest, items: levels, counts } = await inventory.syncMovements(
+      { items: items || [], movements: movements || [], deviceId },
+      req.user
+    );
+
+    if (req.events && counts.created > 0) {
+      req.events.publish('inventory-changed', {
+        deviceId: deviceId || null,
+        items: levels.map(item => ({ id: item.id, level: item.level, low: item.low }))
+      });
+    }
+
+    res.json({
+      success: true,
+      created: counts.created,
+      duplicates: counts.duplicate,
+      rejected: counts.rejected,
+      results: manifest,
+      items: levels
+    });
+  } catch (error) {
+    sendError(res, error, 'sincronizando inventario');
+  }
+});
+
+module.exports = router;
@@ -2,43 +2,31 @@
 const express = require('express');
 const { MenuItem, Category } = require('../database/init');
 const { authenticateToken } = require('./auth');
+const { pickDefined } = require('../services/eventBus');
+const { catalogCache, buildMenu, buildMenuCategories } = require('../services/catalogCache');
 
 const router = express.Router();
 
+// Campos que viajan en los deltas de actualización
+const MENU_ITEM_FIELDS = ['name', 'description', 'price', 'cost', 'categoryId', 'image', 'stock', 'isActive'];
+const CATEGORY_FIELDS = ['name', 'description', 'sortOrder', 'isActive'];
+
 // Aplicar autenticación a todas las rutas
 router.use(authenticateToken);
 
-// GET /api/menu - Obtener menú completo
+// GET /api/menu - Obtener menú completo (desde la caché del catálogo)
 router.get('/', async (req, res) => {
   try {
     const { category, active = true } = req.query;
+    const isActive = active !== 'false';
+    const categoryId = category ? parseInt(category) || null : null;
     
-    const where = {};
-    if (active !== 'false') {
-      where.isActive = true;
-    }
-    if (category) {
-      where.categoryId = category;
-    }
-    
-    const menuItems = await MenuItem.findAll({
-      where,
-      include: [
-        {
-          model: Category,
-          where: active !== 'false' ? { isActive: true } : {}
-        }
-      ],
-      order: [
-        [Category, 'sortOrder', 'ASC'],
-        ['name', 'ASC']
-      ]
-    });
-    
-    res.json({
-      success: true,
-      menuItems
-    });
+    await catalogCache.send(
+      req,
+      res,
+      `menu:${isActive}:${categoryId || ''}`,
+      buildMenu({ active: isActive, category: categoryId })
+    );
     
   } catch (error) {
     console.error('Error obteniendo menú:', error);
@@ -51,15 +39,7 @@ router.get('/', async (req, res) => {
 // GET /api/menu/categories - Obtener categorías
 router.get('/categories', async (req, res) => {
   try {
-    const categories = await Category.findAll({
-      where: { isActive: true },
-      order: [['sortOrder', 'ASC']]
-    });
-    
-    res.json({
-      success: true,
-      categories
-    });
+    await catalogCache.send(req, res, 'menu-categories', buildMenuCategories());
   } catch (error) {
     console.error('Error obteniendo categorías:', error);
     res.status(500).json({
@@ -84,14 +64,10 @@ router.post('/items', async (req, res) => {
       isActive: true
     });
     
-    // 🔥 EMITIR EVENTO DE SOCKET.IO
-    req.io.emit('menu-item-created', {
-      menuItem: await MenuItem.findByPk(menuItem.id, {
-        include: [Category]
-      }),
-      timestamp: new Date().toISOString(),
-      user: req.user.username
-    });
+    catalogCache.invalidate({ reason: 'menu' });
+    
+    // 🔥 PUBLICAR DELTA EN EL BUS DE EVENTOS
+    req.events.publish('menu-item-created', menuItem.toJSON(), { key: `menu-item:${menuItem.id}` });
     
     res.status(201).json({
       success: true,
@@ -128,14 +104,13 @@ router.put('/items/:id', async (req, res) => {
       isActive: isActive !== undefined ? isActive : menuItem.isActive
     });
     
-    // 🔥 EMITIR EVENTO DE SOCKET.IO
-    req.io.emit('menu-item-updated', {
-      menuItem: await MenuItem.findByPk(id, {
-        include: [Category]
-      }),
-      timestamp: new Date().toISOString(),
-      user: req.user.username
-    });
+    catalogCache.invalidate({ reason: 'menu' });
+    
+    // 🔥 PUBLICAR DELTA EN EL BUS DE EVENTOS (solo campos enviados)
+    req.events.publish('menu-item-updated', {
+      id: menuItem.id,
+      ...pickDefined(req.body, MENU_ITEM_FIELDS)
+    }, { key: `menu-item:${menuItem.id}` });
     
     res.json({
       success: true,
@@ -163,12 +138,10 @@ router.delete('/items/:id', async (req, res) => {
     // Soft delete
     await menuItem.update({ isActive: false });
     
-    // 🔥 EMITIR EVENTO DE SOCKET.IO
-    req.io.emit('menu-item-deleted', {
-      itemId: id,
-      timestamp: new Date().toISOString(),
-      user: req.user.username
-    });
+    catalogCache.invalidate({ reason: 'menu' });
+    
+    // 🔥 PUBLICAR DELTA EN EL BUS DE EVENTOS
+    req.events.publish('menu-item-deleted', { id: menuItem.id }, { key: `menu-item:${menuItem.id}` });
     
     res.json({
       success: true,
@@ -195,12 +168,10 @@ router.post('/categories', async (req, res) => {
       isActive: true
     });
     
-    // 🔥 EMITIR EVENTO DE SOCKET.IO
-    req.io.emit('category-created', {
-      category,
-      timestamp: new Date().toISOString(),
-      user: req.user.username
-    });
+    catalogCache.invalidate({ reason: 'category' });
+    
+    // 🔥 PUBLICAR DELTA EN EL BUS DE EVENTOS
+    req.events.publish('category-created', category.toJSON(), { key: `category:${category.id}` });
     
     res.status(201).json({
       success: true,
@@ -233,12 +204,13 @@ router.put('/categories/:id', async (req, res) => {
       isActive: isActive !== undefined ? isActive : category.isActive
     });
     
-    // 🔥 EMITIR EVENTO DE SOCKET.IO
-    req.io.emit('category-updated', {
-      category,
-      timestamp: new Date().toISOString(),
-      user: req.user.username
-    });
+    catalogCache.invalidate({ reason: 'category' });
+    
+    // 🔥 PUBLICAR DELTA EN EL BUS DE EVENTOS (solo campos enviados)
+    req.events.publish('category-updated', {
+      id: category.id,
+      ...pickDefined(req.body, CATEGORY_FIELDS)
+    }, { key: `category:${category.id}` });
     
     res.json({
       success: true,
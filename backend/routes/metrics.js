@@ -0,0 +1,74 @@
+// backend/routes/metrics.js
+const express = require('express');
+const { authenticateToken } = require('./auth');
+const { registry } = require('../services/metrics');
+const { startProfile, profileStatus, ProfilerError } = require('../services/profiler');
+
+const router = express.Router();
+
+// Con METRICS_TOKEN configurado, el scraper debe enviarlo como Bearer
+function metricsAuth(req, res, next) {
+  const expected = process.env.METRICS_TOKEN;
+  if (!expected) return next();
+
+  const authHeader = req.headers['authorization'];
+  const token = authHeader && authHeader.split(' ')[1];
+  if (token !== expected) {
+    return res.status(401).json({ error: 'Token de métricas requerido' });
+  }
+  next();
+}
+
+function requireAdmin(req, res, next) {
+  if (req.user.role !== 'admin') {
+    return res.status(403).json({ error: 'Acceso denegado' });
+  }
+  next();
+}
+
+// GET /api/metrics - Métricas en texto de Prometheus (?format=json con percentiles)
+router.get('/', metricsAuth, (req, res) => {
+  try {
+    if (req.query.format === 'json') {
+      return res.json({
+        success: true,
+        metrics: registry.toJSON()
+      });
+    }
+
+    res.type('text/plain; version=0.0.4').send(registry.render());
+  } catch (error) {
+    console.error('Error generando métricas:', error);
+    res.status(500).json({ error: 'Error interno del servidor' });
+  }
+});
+
+// GET /api/metrics/profile - Estado del perfilador de CPU
+router.get('/profile', authenticateToken, requireAdmin, (req, res) => {
+  res.json({
+    success: true,
+    profile: profileStatus()
+  });
+});
+
+// POST /api/metrics/profile - Perfilar la CPU durante { seconds } (máx. 120)
+router.post('/profile', authenticateToken, requireAdmin, async (req, res) => {
+  try {
+    const { seconds, intervalUs } = req.body || {};
+    const profile = await startProfile({ seconds, intervalUs });
+
+    res.status(202).json({
+      success: true,
+      message: `Perfil de CPU iniciado por ${profile.seconds} s`,
+      profile
+    });
+  } catch (error) {
+    if (error instanceof ProfilerError) {
+      return res.status(error.status).json({ error: error.message });
+    }
+    console.error('Error iniciando perfil de CPU:', error);
+    res.status(500).json({ error: 'Error interno del servidor' });
+  }
+});
+
+module.exports = router;
@@ -2,67 +2,64 @@ const express = require('express');
 const { Op } = require('sequelize');
 const { Sale, SaleItem, MenuItem, User, Shift, sequelize } = require('../database/init');
 const { authenticateToken } = require('./auth');
+const { aggregateSales, aggregateItems, parseRange, fromCents } = require('../services/salesRollup');
+const { wantsKeyset, decodeCursor, parseLimit, keysetWhere, keysetPage } = require('../services/pagination');
+const { withTiers, ArchiveError } = require('../services/archive');
 
 const router = express.Router();
 
 router.use(authenticateToken);
 
 // GET /api/reports/dashboard - Dashboard general
+// Responde desde los acumulados por hora/día (ver services/salesRollup.js)
 router.get('/dashboard', async (req, res) => {
   try {
     const { startDate, endDate } = req.query;
+    const range = parseRange(startDate, endDate);
     
-    const dateFilter = {};
-    if (startDate && endDate) {
-      dateFilter.createdAt = {
-        [Op.between]: [new Date(startDate), new Date(endDate)]
-      };
-    }
+    const [byPayment, byItem] = await Promise.all([
+      aggregateSales(range, 'paymentMethod'),
+      aggregateItems(range)
+    ]);
     
-    // Ventas completadas
-    const completedSales = await Sale.findAll({
-      where: {
-        ...dateFilter,
-        status: 'completed'
-      }
-    });
+    // Calcular totales
+    let totalSales = 0;
+    let cancelledSales = 0;
+    let revenueCents = 0;
+    let cashCents = 0;
     
-    // Ventas canceladas
-    const cancelledSales = await Sale.findAll({
-      where: {
-        ...dateFilter,
-        status: 'cancelled'
+    byPayment.forEach(row => {
+      totalSales += row.saleCount;
+      cancelledSales += row.cancelledCount;
+      revenueCents += row.revenueCents;
+      if (['cash', 'efectivo'].includes(row.groupKey)) {
+        cashCents += row.revenueCents;
       }
     });
     
-    // Calcular totales
-    const totalRevenue = completedSales.reduce((sum, sale) => sum + parseFloat(sale.total), 0);
-    const cashSales = completedSales
-      .filter(s => ["cash", "efectivo"].includes(s.paymentMethod))
-      .reduce((sum, sale) => sum + parseFloat(sale.total), 0);
+    const totalRevenue = fromCents(revenueCents);
+    const cashSales = fromCents(cashCents);
     const cardSales = totalRevenue - cashSales;
     
     // Productos más vendidos
-    const topProducts = await SaleItem.findAll({
-      attributes: [
-        'menuItemId',
-        [sequelize.fn('SUM', sequelize.col('quantity')), 'totalQuantity'],
-        [sequelize.fn('SUM', sequelize.col('totalPrice')), 'totalRevenue']
-      ],
-      include: [{
-        model: MenuItem,
-        attributes: ['name', 'price']
-      }, {
-        model: Sale,
-        attributes: [],
-        where: {
-          ...dateFilter,
-          status: 'completed'
-        }
-      }],
-      group: ['menuItemId'],
-      order: [[sequelize.fn('SUM', sequelize.col('quantity')), 'DESC']],
-      limit: 10
+    const top = byItem
+      .sort((a, b) => b.quantity - a.quantity)
+      .slice(0, 10);
+    const menuItems = await MenuItem.findAll({
+      where: { id: top.map(row => row.groupKey) },
+      attributes: ['id', 'name', 'price'],
+      raw: true
+    });
+    const menuById = new Map(menuItems.map(item => [item.id, item]));
+    
+    const topProducts = top.map(row => {
+      const menuItem = menuById.get(row.groupKey);
+      return {
+        menuItemId: row.groupKey,
+        totalQuantity: row.quantity,
+        totalRevenue: fromCents(row.revenueCents),
+        MenuItem: menuItem ? { name: menuItem.name, price: menuItem.price } : null
+      };
     });
     
     res.json({
@@ -71,9 +68,9 @@ router.get('/dashboard', async (req, res) => {
         totalRevenue: totalRevenue.toFixed(2),
         cashSales: cashSales.toFixed(2),
         cardSales: cardSales.toFixed(2),
-        totalSales: completedSales.length,
-        cancelledSales: cancelledSales.length,
-        averageTicket: completedSales.length > 0 ? (totalRevenue / completedSales.length).toFixed(2) : '0.00',
+        totalSales,
+        cancelledSales,
+        averageTicket: totalSales > 0 ? (totalRevenue / totalSales).toFixed(2) : '0.00',
         topProducts
       }
     });
@@ -91,25 +88,15 @@ router.get('/by-payment-method', async (req, res) => {
   try {
     const { startDate, endDate } = req.query;
     
-    const dateFilter = {};
-    if (startDate && endDate) {
-      dateFilter.createdAt = {
-        [Op.between]: [new Date(startDate), new Date(endDate)]
-      };
-    }
+    const rows = await aggregateSales(parseRange(startDate, endDate), 'paymentMethod');
     
-    const salesByPayment = await Sale.findAll({
-      attributes: [
-        'paymentMethod',
-        [sequelize.fn('COUNT', sequelize.col('id')), 'count'],
-        [sequelize.fn('SUM', sequelize.col('total')), 'total']
-      ],
-      where: {
-        ...dateFilter,
-        status: 'completed'
-      },
-      group: ['paymentMethod']
-    });
+    const salesByPayment = rows
+      .filter(row => row.saleCount > 0)
+      .map(row => ({
+        paymentMethod: row.groupKey,
+        count: row.saleCount,
+        total: fromCents(row.revenueCents)
+      }));
     
     res.json({
       success: true,
@@ -129,28 +116,24 @@ router.get('/by-user', async (req, res) => {
   try {
     const { startDate, endDate } = req.query;
     
-    const dateFilter = {};
-    if (startDate && endDate) {
-      dateFilter.createdAt = {
-        [Op.between]: [new Date(startDate), new Date(endDate)]
-      };
-    }
+    const rows = (await aggregateSales(parseRange(startDate, endDate), 'userId'))
+      .filter(row => row.saleCount > 0);
+    
+    const users = await User.findAll({
+      where: { id: rows.map(row => row.groupKey) },
+      attributes: ['id', 'name', 'username'],
+      raw: true
+    });
+    const userById = new Map(users.map(user => [user.id, user]));
     
-    const salesByUser = await Sale.findAll({
-      attributes: [
-        'userId',
-        [sequelize.fn('COUNT', sequelize.col('Sale.id')), 'count'],
-        [sequelize.fn('SUM', sequelize.col('total')), 'total']
-      ],
-      include: [{
-        model: User,
-        attributes: ['name', 'username']
-      }],
-      where: {
-        ...dateFilter,
-        status: 'completed'
-      },
-      group: ['userId', 'User.id']
+    const salesByUser = rows.map(row => {
+      const user = userById.get(row.groupKey);
+      return {
+        userId: row.groupKey || null,
+        count: row.saleCount,
+        total: fromCents(row.revenueCents),
+        User: user ? { name: user.name, username: user.username } : null
+      };
     });
     
     res.json({
@@ -173,15 +156,35 @@ router.get("/cancelled", async (req, res) => {
     const offset = (page - 1) * limit;
     const dateFilter = {};
     if (startDate && endDate) dateFilter.createdAt = { [Op.between]: [new Date(startDate), new Date(endDate)] };
-    const { count, rows } = await Sale.findAndCountAll({
+    const include = [{ model: User, attributes: ["id", "name", "username"] }, { model: SaleItem, include: [MenuItem] }];
+    // Con rango se incluyen los meses archivados que toca
+    const ranges = startDate && endDate ? [{ start: startDate, end: endDate }] : [];
+
+    // Paginación por cursor (opt-in): sin COUNT ni OFFSET
+    if (wantsKeyset(req.query)) {
+      const position = decodeCursor(req.query.cursor);
+      if (position === undefined) return res.status(400).json({ error: "Cursor inválido" });
+      const pageLimit = parseLimit(limit);
+      const rows = await withTiers(ranges, () => Sale.findAll({
+        where: { ...dateFilter, status: "cancelled", ...keysetWhere(position) },
+        include,
+        order: [["createdAt", "DESC"], ["id", "DESC"]],
+        limit: pageLimit + 1
+      }));
+      const result = keysetPage(rows, pageLimit);
+      return res.json({ success: true, cancelledSales: result.rows, pagination: result.pagination });
+    }
+
+    const { count, rows } = await withTiers(ranges, () => Sale.findAndCountAll({
       where: { ...dateFilter, status: "cancelled" },
-      include: [{ model: User, attributes: ["id", "name", "username"] }, { model: SaleItem, include: [MenuItem] }],
+      include,
       order: [["createdAt", "DESC"]],
       limit: parseInt(limit),
       offset: parseInt(offset)
-    });
+    }));
     res.json({ success: true, cancelledSales: rows, pagination: { total: count, page: parseInt(page), limit: parseInt(limit), pages: Math.ceil(count / limit) } });
   } catch (error) {
+    if (error instanceof ArchiveError) return res.status(error.status).json({ error: error.message });
     console.error("Error:", error);
     res.status(500).json({ error: "Error interno del servidor" });
   }
@@ -2,6 +2,15 @@ const express = require('express');
 const { Op } = require('sequelize');
 const { Sale, SaleItem, MenuItem, User, Table, Customer, Shift, sequelize } = require('../database/init');
 const { authenticateToken } = require('./auth');
+const { commitSale, SaleError } = require('../services/saleCommit');
+const { StockError, restoreStock, quantitiesByItem } = require('../services/stock');
+const { reverseSaleConsumption } = require('../services/inventory');
+const { RollupDelta, applyRollupDelta, aggregateSales, fromCents } = require('../services/salesRollup');
+const { wantsKeyset, decodeCursor, parseLimit, keysetWhere, keysetPage } = require('../services/pagination');
+const { streamSalesExport, FORMATS } = require('../services/salesExport');
+const { withTiers, withSaleTiers, ArchiveError } = require('../services/archive');
+const { saleDelta } = require('../services/eventBus');
+const { TableStateError } = require('../services/tableState');
 
 const router = express.Router();
 
@@ -10,201 +19,13 @@ router.use(authenticateToken);
 
 // POST /api/sales - Crear nueva venta
 router.post('/', async (req, res) => {
-  const transaction = await sequelize.transaction();
-  
   try {
-    const { 
-      items, 
-      tableId, 
-      customerId, 
-      orderType = 'dine-in', // 'dine-in', 'takeaway', 'delivery'
-      paymentMethod, 
-      notes, 
-      deviceId,
-      deliveryFee = 0
-    } = req.body;
-    
-    // Validar datos de entrada
-    if (!items || !Array.isArray(items) || items.length === 0) {
-      await transaction.rollback();
-      return res.status(400).json({
-        error: 'Los items de la venta son requeridos'
-      });
-    }
-    
-    // Validaciones según tipo de pedido
-    if (orderType === 'dine-in' && !tableId) {
-      await transaction.rollback();
-      return res.status(400).json({
-        error: 'Mesa es requerida para pedidos en restaurante'
-      });
-    }
-    
-    if (orderType === 'delivery' && !customerId) {
-      await transaction.rollback();
-      return res.status(400).json({
-        error: 'Cliente es requerido para pedidos a domicilio'
-      });
-    }
-    
-    // Validar que la mesa exista (si aplica)
-    if (tableId) {
-      const table = await Table.findByPk(tableId);
-      if (!table) {
-        await transaction.rollback();
-        return res.status(400).json({
-          error: 'Mesa no encontrada'
-        });
-      }
-    }
-    
-    // Validar que el cliente exista (si aplica)
-    let customer = null;
-    let deliveryAddress = null;
-    if (customerId) {
-      customer = await Customer.findByPk(customerId);
-      if (!customer) {
-        await transaction.rollback();
-        return res.status(400).json({
-          error: 'Cliente no encontrado'
-        });
-      }
-      deliveryAddress = `${customer.address1}${customer.address2 ? ', ' + customer.address2 : ''}, ${customer.city}`;
-    }
-    
-    // Calcular totales
-    let subtotal = 0;
-    const saleItems = [];
-    
-    for (const item of items) {
-      const menuItem = await MenuItem.findByPk(item.id);
-      if (!menuItem) {
-        await transaction.rollback();
-        return res.status(400).json({
-          error: `Item del menú no encontrado: ${item.id}`
-        });
-      }
-      
-      // Verificar stock si es necesario
-      if (menuItem.stock !== -1 && menuItem.stock < item.quantity) {
-        await transaction.rollback();
-        return res.status(400).json({
-          error: `Stock insuficiente para ${menuItem.name}`
-        });
-      }
-      
-      const totalPrice = parseFloat(menuItem.price) * item.quantity;
-      subtotal += totalPrice;
-      
-      saleItems.push({
-        menuItemId: menuItem.id,
-        quantity: item.quantity,
-        unitPrice: menuItem.price,
-        totalPrice: totalPrice,
-        notes: item.notes || null
-      });
-    }
-    
-    // Calcular impuestos (configurable)
-    const taxRate = parseFloat(process.env.TAX_RATE || '0');
-    const tax = subtotal * taxRate;
-    const deliveryFeeAmount = parseFloat(deliveryFee || 0);
-    const total = subtotal + tax + deliveryFeeAmount;
-    
-    // Obtener turno activo
-    const activeShift = await Shift.findOne({ where: { userId: req.user.userId, status: "active" } });
-
-    // Crear la venta
-    const sale = await Sale.create({
-      subtotal: subtotal.toFixed(2),
-      tax: tax.toFixed(2),
-      deliveryFee: deliveryFeeAmount.toFixed(2),
-      total: total.toFixed(2),
-      paymentMethod: paymentMethod || 'cash',
-      orderType,
-      notes,
-      tableId: tableId || null,
-      customerId: customerId || null,
-      userId: req.user.userId,
-      shiftId: activeShift ? activeShift.id : null,
-      deviceId: deviceId || null,
-      deliveryAddress,
-      synced: false
-    }, { transaction });
-    
-    // Crear los items de la venta
-    for (const item of saleItems) {
-      await SaleItem.create({
-        ...item,
-        saleId: sale.id
-      }, { transaction });
-      
-      // Actualizar stock si es necesario
-      const menuItem = await MenuItem.findByPk(item.menuItemId);
-      if (menuItem.stock !== -1) {
-        await menuItem.update({
-          stock: menuItem.stock - item.quantity
-        }, { transaction });
-      }
-    }
+    const completeSale = await commitSale(req.body, req.user);
     
-    // Actualizar estado de mesa si se especifica
-    if (tableId && orderType === 'dine-in') {
-      const table = await Table.findByPk(tableId);
-      if (table) {
-        await table.update({
-          status: 'occupied'
-        }, { transaction });
-      }
-    }
-    
-    // Actualizar estadísticas del cliente
-    if (customer) {
-      await customer.update({
-        lastOrderDate: new Date(),
-        totalOrders: customer.totalOrders + 1
-      }, { transaction });
-    }
-    
-    await transaction.commit();
-    
-    // Obtener la venta completa con relaciones
-    const completeSale = await Sale.findByPk(sale.id, {
-      include: [
-        {
-          model: SaleItem,
-          include: [MenuItem]
-        },
-        {
-          model: User,
-          attributes: ['id', 'name', 'username']
-        },
-        {
-          model: Table,
-          attributes: ['id', 'number']
-        },
-        {
-          model: Customer,
-          attributes: ['id', 'name', 'phone', 'address1', 'address2', 'city']
-        }
-      ]
-    });
-    
-    // Emitir evento de nueva venta via Socket.io
-    if (req.io) {
-      req.io.emit('new-sale', {
-        sale: completeSale,
-        timestamp: new Date().toISOString()
-      });
-      
-      // Emitir cambio de estado de mesa
-      if (tableId && orderType === 'dine-in') {
-        req.io.emit('table-updated', {
-          tableId,
-          status: 'occupied',
-          timestamp: new Date().toISOString()
-        });
-      }
+    // Publicar delta de la venta (no el grafo completo) a caja, admin y cocina;
+    // el cambio de mesa lo publica el motor de mesas con su versión
+    if (req.events) {
+      req.events.publish('new-sale', saleDelta(completeSale));
     }
     
     res.status(201).json({
@@ -214,7 +35,11 @@ router.post('/', async (req, res) => {
     });
     
   } catch (error) {
-    await transaction.rollback();
+    if (error instanceof SaleError || error instanceof StockError || error instanceof TableStateError) {
+      return res.status(error.status).json({
+        error: error.message
+      });
+    }
     console.error('Error creando venta:', error);
     res.status(500).json({
       error: 'Error interno del servidor'
@@ -277,30 +102,63 @@ router.get('/', async (req, res) => {
       where.userId = req.user.userId;
     }
     
-    const { count, rows } = await Sale.findAndCountAll({
+    const include = [
+      {
+        model: SaleItem,
+        include: [MenuItem]
+      },
+      {
+        model: User,
+        attributes: ['id', 'name', 'username']
+      },
+      {
+        model: Table,
+        attributes: ['id', 'number']
+      },
+      {
+        model: Customer,
+        attributes: ['id', 'name', 'phone', 'address1', 'address2', 'city']
+      }
+    ];
+    
+    // Sin rango de fechas solo se listan las ventas de la base principal; con
+    // rango se incluyen los meses archivados que toca
+    const ranges = startDate || endDate
+      ? [{ start: startDate || null, end: endDate || null }]
+      : [];
+    
+    // Paginación por cursor (opt-in): sin COUNT ni OFFSET
+    if (wantsKeyset(req.query)) {
+      const position = decodeCursor(req.query.cursor);
+      if (position === undefined) {
+        return res.status(400).json({
+          error: 'Cursor inválido'
+        });
+      }
+      
+      const pageLimit = parseLimit(limit);
+      const rows = await withTiers(ranges, () => Sale.findAll({
+        where: { ...where, ...keysetWhere(position) },
+        include,
+        order: [['createdAt', 'DESC'], ['id', 'DESC']],
+        limit: pageLimit + 1
+      }));
+      
+      const page = keysetPage(rows, pageLimit);
+      return res.json({
+        success: true,
+        sales: page.rows,
+        pagination: page.pagination
+      });
+    }
+    
+    const { count, rows } = await withTiers(ranges, () => Sale.findAndCountAll({
       where,
-      include: [
-        {
-          model: SaleItem,
-          include: [MenuItem]
-        },
-        {
-          model: User,
-          attributes: ['id', 'name', 'username']
-        },
-        {
-          model: Table,
-          attributes: ['id', 'number']
-        },
-        {
-          model: Customer,
-          attributes: ['id', 'name', 'phone', 'address1', 'address2', 'city']
-        }
-      ],
+      include,
       order: [['createdAt', 'DESC']],
       limit: parseInt(limit),
       offset: parseInt(offset)
-    });
+    }));
     
     res.json({
       success: true,
@@ -314,6 +172,11 @@ router.get('/', async (req, res) => {
     });
     
   } catch (error) {
+    if (error instanceof ArchiveError) {
+      return res.status(error.status).json({
+        error: error.message
+      });
+    }
     console.error('Error obteniendo ventas:', error);
     res.status(500).json({
       error: 'Error interno del servidor'
@@ -322,7 +185,33 @@ router.get('/', async (req, res) => {
 });
 
 
-module.exports = router;
+// GET /api/sales/export - Exportar ventas con sus líneas (NDJSON o CSV) en streaming
+router.get('/export', async (req, res) => {
+  try {
+    const { format = 'ndjson', status = 'completed', startDate, endDate } = req.query;
+    
+    if (!FORMATS[format]) {
+      return res.status(400).json({
+        error: 'Formato inválido (ndjson o csv)'
+      });
+    }
+    
+    // Si no es admin, solo exportar sus propias ventas
+    const userId = req.user.role !== 'admin' && req.user.role !== 'manager'
+      ? req.user.userId
+      : req.query.userId;
+    
+    await streamSalesExport(req, res, { status, startDate, endDate, userId }, format);
+    
+  } catch (error) {
+    console.error('Error exportando ventas:', error);
+    if (!res.headersSent) {
+      res.status(500).json({
+        error: 'Error interno del servidor'
+      });
+    }
+  }
+});
 
 // GET /api/sales/today - Obtener ventas de hoy
 router.get('/today', async (req, res) => {
@@ -386,7 +275,7 @@ router.get('/:id', async (req, res) => {
   try {
     const { id } = req.params;
     
-    const sale = await Sale.findByPk(id, {
+    const find = () => Sale.findByPk(id, {
       include: [
         {
           model: SaleItem,
@@ -403,6 +292,9 @@ router.get('/:id', async (req, res) => {
       ]
     });
     
+    // Si ya no está en la base principal, buscarla en los meses archivados
+    const sale = (await find()) || (await withSaleTiers(id, find));
+    
     if (!sale) {
       return res.status(404).json({
         error: 'Venta no encontrada'
@@ -422,6 +314,11 @@ router.get('/:id', async (req, res) => {
     });
     
   } catch (error) {
+    if (error instanceof ArchiveError) {
+      return res.status(error.status).json({
+        error: error.message
+      });
+    }
     console.error('Error obteniendo venta:', error);
     res.status(500).json({
       error: 'Error interno del servidor'
@@ -464,30 +361,29 @@ router.put('/:id/cancel', async (req, res) => {
       });
     }
     
-    // Restaurar stock
-    for (const item of sale.SaleItems) {
-      const menuItem = await MenuItem.findByPk(item.menuItemId);
-      if (menuItem && menuItem.stock !== -1) {
-        await menuItem.update({
-          stock: menuItem.stock + item.quantity
-        }, { transaction });
-      }
-    }
+    // Restaurar stock (un solo UPDATE; ignora productos ilimitados)
+    await restoreStock(quantitiesByItem(sale.SaleItems), { transaction });
+    await reverseSaleConsumption(sale.id, { transaction, userId: req.user.userId });
     
     // Actualizar estado de la venta
+    const previousStatus = sale.status;
     await sale.update({
       status: 'cancelled',
+      cancelledAt: new Date(),
+      cancelReason: reason || 'Sin razón especificada',
       notes: `${sale.notes || ''} [CANCELADA: ${reason || 'Sin razón'}]`.trim()
     }, { transaction });
     
+    // Mover el importe a cancelados en los acumulados de reportes
+    const rollup = new RollupDelta();
+    rollup.addCancellation(sale, sale.SaleItems, previousStatus);
+    await applyRollupDelta(rollup, transaction);
+    
     await transaction.commit();
     
-    // Emitir evento via Socket.io
-    if (req.io) {
-      req.io.emit('sale-cancelled', {
-        saleId: sale.id,
-        timestamp: new Date().toISOString()
-      });
+    // Publicar cancelación
+    if (req.events) {
+      req.events.publish('sale-cancelled', { id: sale.id, status: 'cancelled' }, { key: `sale:${sale.id}` });
     }
     
     res.json({
@@ -532,21 +428,12 @@ router.get('/stats/summary', async (req, res) => {
         endDate.setDate(endDate.getDate() + 1);
     }
     
-    const sales = await Sale.findAll({
-      where: {
-        createdAt: {
-          [Op.between]: [startDate, endDate]
-        },
-        status: 'completed'
-      },
-      include: [SaleItem]
-    });
+    // Desde los acumulados por hora/día (ver services/salesRollup.js)
+    const [totals] = await aggregateSales({ start: startDate, end: endDate });
     
-    const totalSales = sales.length;
-    const totalRevenue = sales.reduce((sum, sale) => sum + parseFloat(sale.total), 0);
-    const totalItems = sales.reduce((sum, sale) => {
-      return sum + sale.SaleItems.reduce((itemSum, item) => itemSum + item.quantity, 0);
-    }, 0);
+    const totalSales = totals ? totals.saleCount : 0;
+    const totalRevenue = totals ? fromCents(totals.revenueCents) : 0;
+    const totalItems = totals ? totals.itemCount : 0;
     
     res.json({
       success: true,
@@ -572,79 +459,3 @@ router.get('/stats/summary', async (req, res) => {
 });
 
 module.exports = router;
-// PUT /api/sales/:id/cancel - Cancelar ticket
-router.put('/:id/cancel', async (req, res) => {
-  const transaction = await sequelize.transaction();
-  
-  try {
-    const { id } = req.params;
-    const { reason } = req.body;
-    
-    const sale = await Sale.findByPk(id, {
-      include: [SaleItem]
-    });
-    
-    if (!sale) {
-      await transaction.rollback();
-      return res.status(404).json({
-        error: 'Venta no encontrada'
-      });
-    }
-    
-    // Verificar permisos
-    if (req.user.role !== 'admin' && req.user.role !== 'manager') {
-      await transaction.rollback();
-      return res.status(403).json({
-        error: 'Solo administradores pueden cancelar tickets'
-      });
-    }
-    
-    // Verificar que no esté ya cancelada
-    if (sale.cancelledAt) {
-      await transaction.rollback();
-      return res.status(400).json({
-        error: 'Esta venta ya está cancelada'
-      });
-    }
-    
-    // Restaurar stock
-    for (const item of sale.SaleItems) {
-      const menuItem = await MenuItem.findByPk(item.menuItemId);
-      if (menuItem && menuItem.stock !== -1) {
-        await menuItem.update({
-          stock: menuItem.stock + item.quantity
-        }, { transaction });
-      }
-    }
-    
-    // Marcar como cancelada
-    await sale.update({
-      status: 'cancelled',
-      cancelledAt: new Date(),
-      cancelReason: reason || 'Sin razón especificada'
-    }, { transaction });
-    
-    await transaction.commit();
-    
-    // Emitir evento via Socket.io
-    if (req.io) {
-      req.io.emit('sale-cancelled', {
-        saleId: sale.id,
-        timestamp: new Date().toISOString()
-      });
-    }
-    
-    res.json({
-      success: true,
-      message: 'Ticket cancelado correctamente'
-    });
-    
-  } catch (error) {
-    await transaction.rollback();
-    console.error('Error cancelando ticket:', error);
-    res.status(500).json({
-      error: 'Error interno del servidor'
-    });
-  }
-});
-
@@ -2,6 +2,7 @@ const express = require('express');
 const { Op } = require('sequelize');
 const { Shift, Sale, User, sequelize } = require('../database/init');
 const { authenticateToken } = require('./auth');
+const { getShiftTotals, formatShiftStats, closeShift } = require('../services/shiftTotals');
 
 const router = express.Router();
 
@@ -79,39 +80,14 @@ router.get('/active', async (req, res) => {
       });
     }
     
-    // Calcular estadísticas del turno actual
-    const sales = await Sale.findAll({
-      where: {
-        shiftId: shift.id,
-        status: 'completed'
-      }
-    });
-    
-    let totalSales = 0;
-    let cashSales = 0;
-    let cardSales = 0;
-    
-    sales.forEach(sale => {
-      const amount = parseFloat(sale.total);
-      totalSales += amount;
-      
-      if (sale.paymentMethod === 'cash' || sale.paymentMethod === 'efectivo') {
-        cashSales += amount;
-      } else {
-        cardSales += amount;
-      }
-    });
+    // Estadísticas desde los contadores del turno (no recorre sus ventas)
+    const totals = await getShiftTotals(shift.id);
     
     res.json({
       success: true,
       shift: {
         ...shift.toJSON(),
-        currentStats: {
-          totalSales: totalSales.toFixed(2),
-          cashSales: cashSales.toFixed(2),
-          cardSales: cardSales.toFixed(2),
-          totalTransactions: sales.length
-        }
+        currentStats: formatShiftStats(totals)
       }
     });
     
@@ -131,7 +107,7 @@ router.put('/:id/close', async (req, res) => {
     const { id } = req.params;
     const { endingCash, notes } = req.body;
     
-    const shift = await Shift.findByPk(id);
+    const shift = await Shift.findByPk(id, { transaction });
     
     if (!shift) {
       await transaction.rollback();
@@ -155,44 +131,8 @@ router.put('/:id/close', async (req, res) => {
       });
     }
     
-    // Calcular totales del turno
-    const sales = await Sale.findAll({
-      where: {
-        shiftId: shift.id,
-        status: 'completed'
-      }
-    });
-    
-    let totalSales = 0;
-    let cashSales = 0;
-    let cardSales = 0;
-    
-    sales.forEach(sale => {
-      const amount = parseFloat(sale.total);
-      totalSales += amount;
-      
-      if (sale.paymentMethod === 'cash' || sale.paymentMethod === 'efectivo') {
-        cashSales += amount;
-      } else {
-        cardSales += amount;
-      }
-    });
-    
-    // Calcular efectivo esperado
-    const expectedCash = parseFloat(shift.startingCash) + cashSales;
-    
-    // Actualizar turno
-    await shift.update({
-      endTime: new Date(),
-      endingCash: endingCash || 0,
-      expectedCash: expectedCash.toFixed(2),
-      totalSales: totalSales.toFixed(2),
-      cashSales: cashSales.toFixed(2),
-      cardSales: cardSales.toFixed(2),
-      totalTransactions: sales.length,
-      status: 'closed',
-      notes: notes ? `${shift.notes || ''}\n[CIERRE] ${notes}`.trim() : shift.notes
-    }, { transaction });
+    // Totales y efectivo esperado desde los contadores del turno
+    await closeShift(shift, { endingCash, notes, transaction });
     
     await transaction.commit();
     
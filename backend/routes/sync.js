@@ -1,8 +1,10 @@
 // backend/routes/sync.js
 const express = require('express');
 const { Op } = require('sequelize');
-const { Sale, SaleItem, MenuItem, User, Table, sequelize } = require('../database/init');
+const { Sale, SaleItem, MenuItem, User, Table } = require('../database/init');
 const { authenticateToken } = require('./auth');
+const { SyncError, ingestSales } = require('../services/syncIngest');
+const { parseLimit } = require('../services/pagination');
 
 const router = express.Router();
 
@@ -10,89 +12,44 @@ const router = express.Router();
 router.use(authenticateToken);
 
 // POST /api/sync/sales - Sincronizar ventas
+// Idempotente por clientId: reenviar el mismo lote no duplica ventas.
 router.post('/sales', async (req, res) => {
-  const transaction = await models.sequelize.transaction();
-  
   try {
-    const { sales } = req.body;
-    
-    if (!Array.isArray(sales)) {
-      await transaction.rollback();
-      return res.status(400).json({
-        error: 'Se requiere un array de ventas'
-      });
-    }
-    
-    const syncedSales = [];
-    const errors = [];
-    
-    for (const saleData of sales) {
-      try {
-        // Verificar si la venta ya existe
-        const existingSale = await Sale.findOne({
-          where: {
-            id: saleData.id
-          }
-        });
-        
-        if (existingSale) {
-          // Marcar como sincronizada
-          await existingSale.update({
-            synced: true,
-            syncedAt: new Date()
-          }, { transaction });
-          
-          syncedSales.push(existingSale);
-          continue;
-        }
-        
-        // Crear nueva venta
-        const sale = await Sale.create({
-          ...saleData,
-          synced: true,
-          syncedAt: new Date()
-        }, { transaction });
-        
-        // Crear items de la venta
-        if (saleData.items) {
-          for (const itemData of saleData.items) {
-            await SaleItem.create({
-              ...itemData,
-              saleId: sale.id
-            }, { transaction });
-          }
-        }
-        
-        syncedSales.push(sale);
-        
-      } catch (error) {
-        errors.push({
-          saleId: saleData.id,
-          error: error.message
-        });
-      }
-    }
-    
-    await transaction.commit();
-    
-    // Emitir evento de sincronización
-    if (req.io) {
-      req.io.emit('sales-synced', {
-        synced: syncedSales.length,
-        errors: errors.length,
-        timestamp: new Date().toISOString()
+    const { sales, deviceId } = req.body;
+
+    const { manifest, counts } = await ingestSales(sales, {
+      deviceId,
+      currentUser: req.user
+    });
+
+    const synced = counts.created + counts.duplicate;
+    const errors = manifest
+      .filter(entry => entry.status === 'rejected')
+      .map(entry => ({ index: entry.index, clientId: entry.clientId, error: entry.error }));
+
+    // Publicar resumen de la sincronización (las ventas se consultan por REST)
+    if (req.events && counts.created > 0) {
+      req.events.publish('sales-synced', {
+        deviceId: deviceId || null,
+        created: counts.created
       });
     }
-    
+
     res.json({
       success: true,
-      message: `${syncedSales.length} ventas sincronizadas`,
-      synced: syncedSales.length,
+      message: `${synced} ventas sincronizadas`,
+      synced,
+      created: counts.created,
+      duplicates: counts.duplicate,
+      rejected: counts.rejected,
+      results: manifest,
       errors
     });
-    
+
   } catch (error) {
-    await transaction.rollback();
+    if (error instanceof SyncError) {
+      return res.status(error.status).json({ error: error.message });
+    }
     console.error('Error sincronizando ventas:', error);
     res.status(500).json({
       error: 'Error interno del servidor'
@@ -100,20 +57,28 @@ router.post('/sales', async (req, res) => {
   }
 });
 
-// GET /api/sync/pending - Obtener datos pendientes de sincronización
+// GET /api/sync/pending?cursor=&limit= - Ventas registradas después del cursor
+// El cursor es el id de la última venta entregada: el id se asigna al
+// insertar (con el escritor serializado), así que incluye tanto ventas en
+// línea como las subidas offline, sin depender del reloj de los dispositivos.
+// Sin cursor (dispositivo nuevo) no se mandan ventas, solo el cursor actual.
 router.get('/pending', async (req, res) => {
   try {
-    const { lastSync } = req.query;
-    
-    const where = { synced: false };
-    if (lastSync) {
-      where.createdAt = {
-        [Op.gt]: new Date(lastSync)
-      };
+    if (req.query.cursor === undefined || req.query.cursor === '') {
+      const current = (await Sale.max('id')) || 0;
+      return res.json({ success: true, pendingSales: [], count: 0, cursor: String(current), hasMore: false });
     }
-    
-    const pendingSales = await Sale.findAll({
-      where,
+
+    const after = parseInt(req.query.cursor);
+    if (!Number.isInteger(after) || after < 0) {
+      return res.status(400).json({ error: 'Cursor inválido' });
+    }
+    const limit = parseLimit(req.query.limit, 100);
+
+    const rows = await Sale.findAll({
+      where: { id: { [Op.gt]: after } },
+      order: [['id', 'ASC']],
+      limit: limit + 1,
       include: [
         {
           model: SaleItem,
@@ -129,11 +94,16 @@ router.get('/pending', async (req, res) => {
         }
       ]
     });
-    
+
+    const hasMore = rows.length > limit;
+    const pendingSales = hasMore ? rows.slice(0, limit) : rows;
+
     res.json({
       success: true,
       pendingSales,
-      count: pendingSales.length
+      count: pendingSales.length,
+      cursor: String(pendingSales.length ? pendingSales[pendingSales.length - 1].id : after),
+      hasMore
     });
     
   } catch (error) {
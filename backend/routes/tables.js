@@ -1,7 +1,8 @@
 // backend/routes/tables.js
 const express = require('express');
-const { Table, Sale } = require('../database/init');
+const { Table, Sale, sequelize } = require('../database/init');
 const { authenticateToken } = require('./auth');
+const { tableState, TableStateError } = require('../services/tableState');
 const { Op } = require('sequelize');
 
 const router = express.Router();
@@ -49,6 +50,37 @@ router.get('/', async (req, res) => {
   }
 });
 
+// GET /api/tables/state - Foto versionada del salón (desde memoria)
+router.get('/state', async (req, res) => {
+  try {
+    res.json({
+      success: true,
+      ...(await tableState.snapshot())
+    });
+  } catch (error) {
+    console.error('Error obteniendo estado del salón:', error);
+    res.status(500).json({
+      error: 'Error interno del servidor'
+    });
+  }
+});
+
+// GET /api/tables/changes?since=N - Cambios desde la versión N; si ya no
+// están disponibles responde la foto completa con reset: true
+router.get('/changes', async (req, res) => {
+  try {
+    res.json({
+      success: true,
+      ...(await tableState.changesSince(req.query.since))
+    });
+  } catch (error) {
+    console.error('Error obteniendo cambios del salón:', error);
+    res.status(500).json({
+      error: 'Error interno del servidor'
+    });
+  }
+});
+
 // GET /api/tables/:id - Obtener mesa específica
 router.get('/:id', async (req, res) => {
   try {
@@ -85,58 +117,35 @@ router.get('/:id', async (req, res) => {
   }
 });
 
+// Responde un error del motor de mesas o un 500
+function handleTableError(res, error, context) {
+  if (error instanceof TableStateError) {
+    return res.status(error.status).json({ error: error.message });
+  }
+  console.error(`Error ${context}:`, error);
+  res.status(500).json({
+    error: 'Error interno del servidor'
+  });
+}
+
 // PUT /api/tables/:id/status - Cambiar estado de mesa
+// (admin/manager pueden forzar cualquier transición con { force: true })
 router.put('/:id/status', async (req, res) => {
   try {
     const { id } = req.params;
-    const { status, userId } = req.body;
+    const { status, force = false } = req.body;
+    const canForce = req.user.role === 'admin' || req.user.role === 'manager';
     
-    // Validar estado
-    const validStatuses = ['available', 'occupied', 'reserved', 'cleaning'];
-    if (!validStatuses.includes(status)) {
-      return res.status(400).json({
-        error: 'Estado de mesa inválido'
-      });
-    }
-    
-    const table = await Table.findByPk(id);
-    if (!table) {
-      return res.status(404).json({
-        error: 'Mesa no encontrada'
-      });
-    }
-    
-    const oldStatus = table.status;
-    await table.update({ status });
-    
-    // Emitir evento via Socket.io
-    if (req.io) {
-      req.io.emit('table-status-changed', {
-        tableId: table.id,
-        tableNumber: table.number,
-        oldStatus,
-        newStatus: status,
-        updatedBy: req.user.username,
-        timestamp: new Date().toISOString()
-      });
-    }
+    const { table } = await tableState.transition(id, status, { force: force && canForce });
     
     res.json({
       success: true,
       message: 'Estado de mesa actualizado',
-      table: {
-        id: table.id,
-        number: table.number,
-        status: table.status,
-        capacity: table.capacity
-      }
+      table
     });
     
   } catch (error) {
-    console.error('Error actualizando estado de mesa:', error);
-    res.status(500).json({
-      error: 'Error interno del servidor'
-    });
+    handleTableError(res, error, 'actualizando estado de mesa');
   }
 });
 
@@ -146,35 +155,17 @@ router.post('/:id/reserve', async (req, res) => {
     const { id } = req.params;
     const { customerName, customerPhone, reservationTime, notes } = req.body;
     
-    const table = await Table.findByPk(id);
-    if (!table) {
-      return res.status(404).json({
-        error: 'Mesa no encontrada'
-      });
-    }
-    
-    if (table.status !== 'available') {
+    const current = await tableState.get(id);
+    if (current && current.status !== 'available') {
       return res.status(400).json({
         error: 'La mesa no está disponible para reserva'
       });
     }
     
-    await table.update({ 
-      status: 'reserved',
-      // Aquí podrías agregar campos adicionales para la reserva
+    const { table } = await tableState.transition(id, 'reserved', {
+      meta: { customerName, customerPhone, reservationTime, notes }
     });
     
-    // Emitir evento via Socket.io
-    if (req.io) {
-      req.io.emit('table-reserved', {
-        tableId: table.id,
-        tableNumber: table.number,
-        customerName,
-        reservedBy: req.user.username,
-        timestamp: new Date().toISOString()
-      });
-    }
-    
     res.json({
       success: true,
       message: 'Mesa reservada correctamente',
@@ -182,10 +173,7 @@ router.post('/:id/reserve', async (req, res) => {
     });
     
   } catch (error) {
-    console.error('Error reservando mesa:', error);
-    res.status(500).json({
-      error: 'Error interno del servidor'
-    });
+    handleTableError(res, error, 'reservando mesa');
   }
 });
 
@@ -195,37 +183,20 @@ router.post('/:id/occupy', async (req, res) => {
     const { id } = req.params;
     const { customerCount } = req.body;
     
-    const table = await Table.findByPk(id);
-    if (!table) {
-      return res.status(404).json({
-        error: 'Mesa no encontrada'
-      });
-    }
-    
-    if (table.status !== 'available' && table.status !== 'reserved') {
+    const current = await tableState.get(id);
+    if (current && current.status !== 'available' && current.status !== 'reserved') {
       return res.status(400).json({
         error: 'La mesa no está disponible'
       });
     }
     
-    if (customerCount && customerCount > table.capacity) {
+    if (current && customerCount && customerCount > current.capacity) {
       return res.status(400).json({
         error: 'El número de clientes excede la capacidad de la mesa'
       });
     }
     
-    await table.update({ status: 'occupied' });
-    
-    // Emitir evento via Socket.io
-    if (req.io) {
-      req.io.emit('table-occupied', {
-        tableId: table.id,
-        tableNumber: table.number,
-        customerCount,
-        occupiedBy: req.user.username,
-        timestamp: new Date().toISOString()
-      });
-    }
+    const { table } = await tableState.transition(id, 'occupied', { meta: { customerCount } });
     
     res.json({
       success: true,
@@ -234,10 +205,7 @@ router.post('/:id/occupy', async (req, res) => {
     });
     
   } catch (error) {
-    console.error('Error ocupando mesa:', error);
-    res.status(500).json({
-      error: 'Error interno del servidor'
-    });
+    handleTableError(res, error, 'ocupando mesa');
   }
 });
 
@@ -247,26 +215,8 @@ router.post('/:id/free', async (req, res) => {
     const { id } = req.params;
     const { requiresCleaning = false } = req.body;
     
-    const table = await Table.findByPk(id);
-    if (!table) {
-      return res.status(404).json({
-        error: 'Mesa no encontrada'
-      });
-    }
-    
     const newStatus = requiresCleaning ? 'cleaning' : 'available';
-    await table.update({ status: newStatus });
-    
-    // Emitir evento via Socket.io
-    if (req.io) {
-      req.io.emit('table-freed', {
-        tableId: table.id,
-        tableNumber: table.number,
-        newStatus,
-        freedBy: req.user.username,
-        timestamp: new Date().toISOString()
-      });
-    }
+    const { table } = await tableState.transition(id, newStatus);
     
     res.json({
       success: true,
@@ -275,30 +225,14 @@ router.post('/:id/free', async (req, res) => {
     });
     
   } catch (error) {
-    console.error('Error liberando mesa:', error);
-    res.status(500).json({
-      error: 'Error interno del servidor'
-    });
+    handleTableError(res, error, 'liberando mesa');
   }
 });
 
-// GET /api/tables/stats/occupancy - Estadísticas de ocupación
+// GET /api/tables/stats/occupancy - Estadísticas de ocupación (contadores en memoria)
 router.get('/stats/occupancy', async (req, res) => {
   try {
-    const tables = await Table.findAll({
-      where: { isActive: true }
-    });
-    
-    const stats = {
-      total: tables.length,
-      available: tables.filter(t => t.status === 'available').length,
-      occupied: tables.filter(t => t.status === 'occupied').length,
-      reserved: tables.filter(t => t.status === 'reserved').length,
-      cleaning: tables.filter(t => t.status === 'cleaning').length
-    };
-    
-    stats.occupancyRate = stats.total > 0 ? 
-      ((stats.occupied + stats.reserved) / stats.total * 100).toFixed(1) : 0;
+    const { stats, tables } = await tableState.snapshot();
     
     res.json({
       success: true,
@@ -346,11 +280,15 @@ router.post('/', async (req, res) => {
       });
     }
     
-    const table = await Table.create({
-      number: parseInt(number),
-      capacity: parseInt(capacity),
-      location,
-      status: 'available'
+    const table = await sequelize.transaction(async (transaction) => {
+      const created = await Table.create({
+        number: parseInt(number),
+        capacity: parseInt(capacity),
+        location,
+        status: 'available'
+      }, { transaction });
+      await tableState.record(created, { transaction });
+      return created;
     });
     
     res.status(201).json({
@@ -402,7 +340,12 @@ router.put('/:id', async (req, res) => {
       }
     }
     
-    await table.update(updates);
+    // El estado solo cambia por las transiciones del motor de mesas
+    delete updates.status;
+    await sequelize.transaction(async (transaction) => {
+      await table.update(updates, { transaction });
+      await tableState.record(table, { transaction });
+    });
     
     res.json({
       success: true,
@@ -445,7 +388,10 @@ router.delete('/:id', async (req, res) => {
     }
     
     // En lugar de eliminar, desactivar
-    await table.update({ isActive: false });
+    await sequelize.transaction(async (transaction) => {
+      await table.update({ isActive: false }, { transaction });
+      await tableState.record(table, { transaction });
+    });
     
     res.json({
       success: true,
@@ -0,0 +1,49 @@
+// backend/scripts/archive-sales.js
+// Mueve las ventas frías a los archivos mensuales (ver services/archive.js)
+// y muestra el registro de meses archivados.
+//   node scripts/archive-sales.js [--dry-run]
+const path = require('path');
+
+if (!process.env.DB_PATH) {
+  process.env.DB_PATH = path.join(__dirname, '../database/pos.sqlite');
+}
+
+const { initDatabase, sequelize } = require('../database/init');
+const { archiveSales, archivedMonths, archiveConfig } = require('../services/archive');
+
+async function main() {
+  try {
+    await initDatabase();
+    const dryRun = process.argv.includes('--dry-run');
+
+    console.log(`📦 Archivando ventas de más de ${archiveConfig.afterDays} días en ${archiveConfig.dir}${dryRun ? ' (simulación)' : ''}...`);
+    const result = await archiveSales({ dryRun });
+
+    if (result.disabled) {
+      console.log('⚠️  Archivo desactivado (ARCHIVE_AFTER_DAYS=0)');
+    } else {
+      for (const month of result.months) {
+        console.log(`   ${month.month}: ${month.sales} ventas${month.elapsedMs !== undefined ? ` en ${month.elapsedMs} ms` : ''}`);
+      }
+      console.log(`✅ ${result.sales} ventas ${dryRun ? 'por archivar' : 'archivadas'} (anteriores a ${result.cutoff}) en ${result.elapsedMs} ms`);
+    }
+
+    const months = await archivedMonths();
+    if (months.length) {
+      console.log('\n🗂️  Meses archivados:');
+      for (const entry of months) {
+        console.log(`   ${entry.month}: ${entry.saleCount} ventas, ${entry.itemCount} líneas${entry.moving ? ' (traslado pendiente)' : ''} → ${entry.file}`);
+      }
+    }
+
+    await sequelize.close();
+    process.exit(0);
+  } catch (error) {
+    console.error('❌ Error archivando ventas:', error);
+    process.exit(1);
+  }
+}
+
+if (require.main === module) {
+  main();
+}
@@ -0,0 +1,32 @@
+// backend/scripts/backup.js
+// Respaldo en línea de la base principal y de los meses archivados que
+// cambiaron (ver services/backup.js). Se puede correr con el servidor arriba.
+const path = require('path');
+
+if (!process.env.DB_PATH) {
+  process.env.DB_PATH = path.join(__dirname, '../database/pos.sqlite');
+}
+
+const { initDatabase, sequelize } = require('../database/init');
+const { backupDatabase } = require('../services/backup');
+
+async function main() {
+  try {
+    await initDatabase();
+
+    console.log('💾 Respaldando base de datos...');
+    const { file, pages, archives, pruned, elapsedMs } = await backupDatabase();
+    console.log(`✅ ${file} (${pages} páginas) en ${elapsedMs} ms`);
+    console.log(`   ${archives} meses archivados copiados, ${pruned} respaldos antiguos eliminados`);
+
+    await sequelize.close();
+    process.exit(0);
+  } catch (error) {
+    console.error('❌ Error respaldando la base de datos:', error);
+    process.exit(1);
+  }
+}
+
+if (require.main === module) {
+  main();
+}
@@ -0,0 +1,124 @@
+// backend/scripts/bench/auth-burst.js
+// Latencia del resto del tráfico durante una ráfaga de logins (cambio de
+// turno). Compara el comportamiento anterior (bcryptjs en el hilo principal
+// y jwt.verify en cada petición) contra el pool de contraseñas y la caché de
+// tokens. Cada modo corre en su propio proceso con el servidor completo.
+//
+// Uso: node scripts/bench/auth-burst.js [peticiones] [concurrencia] [logins]
+const { fork } = require('child_process');
+const { useTempDatabase, runConcurrent, printTable } = require('./stats');
+
+const REQUESTS = parseInt(process.argv[2] || '3000');
+const CONCURRENCY = parseInt(process.argv[3] || '20');
+const LOGINS = parseInt(process.argv[4] || '12');
+
+const MODES = {
+  'anterior (hilo principal, sin caché)': { PASSWORD_POOL_SIZE: '0', JWT_CACHE_SIZE: '0' },
+  'pool + caché de tokens': {}
+};
+
+// Proceso hijo: levanta el servidor y mide tráfico de fondo con y sin ráfaga
+async function child() {
+  const tempDb = useTempDatabase('pos-bench-auth');
+  process.env.JWT_SECRET = process.env.JWT_SECRET || 'bench-secret';
+
+  const { initDatabase, sequelize } = require('../../database/init');
+  const { server } = require('../../server');
+  const { passwordHasher } = require('../../services/passwordHasher');
+  const { tokenCache } = require('../../services/tokenCache');
+
+  await initDatabase();
+  await new Promise(resolve => server.listen(0, resolve));
+  const base = `http://localhost:${server.address().port}/api`;
+
+  const login = async () => {
+    const response = await fetch(`${base}/auth/login`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ username: 'admin', password: 'admin123', deviceId: 'bench' })
+    });
+    const body = await response.json();
+    if (!body.token) throw new Error(`Login falló: ${JSON.stringify(body)}`);
+    return body.token;
+  };
+
+  const token = await login();
+  const headers = { Authorization: `Bearer ${token}` };
+  const paths = ['/auth/verify', '/menu', '/tables'];
+  const background = () => runConcurrent(REQUESTS, CONCURRENCY, async (i) => {
+    const response = await fetch(`${base}${paths[i % paths.length]}`, { headers });
+    await response.arrayBuffer();
+  });
+
+  await background(); // calentamiento
+  const steady = await background();
+
+  // Misma carga de fondo mientras llegan LOGINS logins simultáneos en oleadas
+  let stop = false;
+  const logins = (async () => {
+    const latencies = [];
+    while (!stop) {
+      const wave = await runConcurrent(LOGINS, LOGINS, login);
+      latencies.push(wave.p99);
+    }
+    return Math.max(...latencies);
+  })();
+  const burst = await background();
+  stop = true;
+  const loginP99 = await logins;
+
+  process.send({
+    steady,
+    burst,
+    loginP99,
+    hasher: passwordHasher.stats(),
+    tokenCache: tokenCache.stats
+  });
+
+  await sequelize.close();
+  tempDb.cleanup();
+  process.exit(0);
+}
+
+function runMode(env) {
+  return new Promise((resolve, reject) => {
+    const proc = fork(__filename, process.argv.slice(2), {
+      env: { ...process.env, ...env, BENCH_AUTH_CHILD: 'true' },
+      stdio: ['ignore', 'ignore', 'inherit', 'ipc']
+    });
+    let result = null;
+    proc.on('message', message => { result = message; });
+    proc.on('exit', code => (result ? resolve(result) : reject(new Error(`Proceso terminó con código ${code}`))));
+  });
+}
+
+async function main() {
+  const rows = {};
+
+  for (const [label, env] of Object.entries(MODES)) {
+    const result = await runMode(env);
+    rows[label] = {
+      'p50 sin logins': result.steady.p50,
+      'p99 sin logins': result.steady.p99,
+      'p50 con logins': result.burst.p50,
+      'p99 con logins': result.burst.p99,
+      'login p99 ms': result.loginP99,
+      'req/s con logins': result.burst.throughput,
+      'hits caché JWT': result.tokenCache.hits
+    };
+  }
+
+  printTable(`Ráfaga de logins — ${REQUESTS} peticiones de fondo (${CONCURRENCY} clientes), oleadas de ${LOGINS} logins`, rows);
+}
+
+if (process.env.BENCH_AUTH_CHILD === 'true') {
+  child().catch(error => {
+    console.error('❌ Error en benchmark:', error);
+    process.exit(1);
+  });
+} else {
+  main().catch(error => {
+    console.error('❌ Error en benchmark:', error);
+    process.exit(1);
+  });
+}
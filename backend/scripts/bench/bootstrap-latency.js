@@ -0,0 +1,299 @@
+// backend/scripts/bench/bootstrap-latency.js
+// Arranque en frío y reconexión de una tableta por una red lenta: las seis
+// peticiones de antes (perfil, turno, categorías, menú, mesas y clientes)
+// contra una sola petición a /api/bootstrap.
+//
+// El servidor real corre en este proceso sobre una base temporal; el tráfico
+// pasa por un proxy TCP que agrega `--rtt` ms de ida y vuelta (más
+// `--jitter` aleatorio con semilla fija) y `--handshake-rtts` viajes al abrir
+// cada conexión (TCP + TLS). El proxy cuenta los bytes que llegan al cliente,
+// ya comprimidos.
+//
+// - frío: conexiones nuevas, sin nada guardado
+// - reconexión: conexiones nuevas (el Wi-Fi se cayó), con ETags, versión de
+//   mesas y versiones del arranque anterior; entre una y otra cambia una mesa
+//
+// No hay resultados registrados: cualquier comparación entre antes y el
+// arranque sale de correr este script, no de estimaciones del emulador.
+//
+// Uso: node scripts/bench/bootstrap-latency.js [--rtt 80] [--jitter 40] [--handshake-rtts 2]
+//   [--iterations 20] [--menu-items 250] [--customers 5000] [--tables 30] [--seed 1]
+const http = require('http');
+const net = require('net');
+const path = require('path');
+const zlib = require('zlib');
+const { useTempDatabase, summarize, printTable } = require('./stats');
+const { createRandom, seedCatalog, seedTables, seedCustomers } = require('./fixtures');
+const { parseOptions } = require('./seed-restaurant');
+
+const options = parseOptions(process.argv.slice(2), {
+  rtt: 80,
+  jitter: 40,
+  handshakeRtts: 2,
+  iterations: 20,
+  menuItems: 250,
+  customers: 5000,
+  tables: 30,
+  seed: 1
+});
+
+const tempDb = useTempDatabase('pos-bench-bootstrap');
+process.env.JWT_SECRET = process.env.JWT_SECRET || 'bench-secret';
+process.env.LOG_FILE = path.join(path.dirname(tempDb.dbPath), 'access.log');
+
+const { server, prepareServer, closeServer } = require('../../server');
+const { sequelize } = require('../../database/init');
+const { tableState } = require('../../services/tableState');
+
+// Lo que pedían los clientes antes, en este orden
+const LEGACY_PATHS = {
+  profile: '/api/auth/profile',
+  shift: '/api/shifts/active',
+  categories: '/api/menu/categories',
+  menu: '/api/menu',
+  tables: '/api/tables/changes?since=',
+  customers: '/api/customers'
+};
+
+/**
+ * Proxy TCP con latencia: cada trozo se entrega rtt/2 (+ jitter) después de
+ * recibirlo, sin reordenar; la conexión nueva espera `handshakeRtts` viajes
+ * antes de pasar datos.
+ */
+function startLink(targetPort, { rtt, jitter, handshakeRtts, random }) {
+  const stats = { down: 0, connections: 0 };
+  const sockets = new Set();
+
+  const relay = (from, to, count) => {
+    let ready = 0;
+    from.on('data', (chunk) => {
+      if (count) stats.down += chunk.length;
+      ready = Math.max(Date.now() + rtt / 2 + random() * jitter, ready);
+      setTimeout(() => { if (!to.destroyed) to.write(chunk); }, ready - Date.now());
+    });
+    from.on('end', () => setTimeout(() => to.end(), Math.max(0, ready - Date.now())));
+    from.on('error', () => to.destroy());
+  };
+
+  const proxy = net.createServer((client) => {
+    stats.connections += 1;
+    client.pause();
+    const upstream = net.connect(targetPort, '127.0.0.1');
+    sockets.add(client);
+    sockets.add(upstream);
+    client.on('close', () => { sockets.delete(client); upstream.destroy(); });
+    upstream.on('close', () => { sockets.delete(upstream); client.destroy(); });
+
+    relay(client, upstream, false);
+    relay(upstream, client, true);
+    setTimeout(() => client.resume(), handshakeRtts * rtt);
+  });
+
+  return new Promise(resolve => proxy.listen(0, () => resolve({
+    port: proxy.address().port,
+    stats,
+    close: () => {
+      sockets.forEach(socket => socket.destroy());
+      return new Promise(done => proxy.close(done));
+    }
+  })));
+}
+
+// GET con gzip por el proxy; devuelve { status, headers, json }
+function get(agent, port, pathname, headers = {}) {
+  return new Promise((resolve, reject) => {
+    const request = http.get({
+      host: '127.0.0.1',
+      port,
+      path: pathname,
+      agent,
+      headers: { 'Accept-Encoding': 'gzip', ...headers }
+    }, (response) => {
+      const chunks = [];
+      response.on('data', chunk => chunks.push(chunk));
+      response.on('end', () => {
+        let body = Buffer.concat(chunks);
+        if (response.headers['content-encoding'] === 'gzip') body = zlib.gunzipSync(body);
+        resolve({
+          status: response.statusCode,
+          headers: response.headers,
+          json: body.length > 0 ? JSON.parse(body) : null
+        });
+      });
+      response.on('error', reject);
+    });
+    request.on('error', reject);
+  });
+}
+
+// Sesión de cliente: conexiones nuevas (hasta 6 simultáneas, como un navegador)
+async function session(link, fn) {
+  const agent = new http.Agent({ keepAlive: true, maxSockets: 6 });
+  const bytesBefore = link.stats.down;
+  const start = process.hrtime.bigint();
+  try {
+    const state = await fn(agent);
+    return {
+      ms: Number(process.hrtime.bigint() - start) / 1e6,
+      bytes: link.stats.down - bytesBefore,
+      state
+    };
+  } finally {
+    agent.destroy();
+  }
+}
+
+// Antes: una petición por recurso, secuenciales o en paralelo
+function legacyClient(port, token, { parallel }) {
+  const auth = { Authorization: `Bearer ${token}` };
+
+  const fetchAll = async (agent, known) => {
+    const fetchOne = async ([name, pathname]) => {
+      const headers = { ...auth };
+      if (known && known.etags[name]) headers['If-None-Match'] = known.etags[name];
+      const target = name === 'tables' ? `${pathname}${known ? known.tablesVersion : ''}` : pathname;
+      const response = await get(agent, port, target, headers);
+      if (response.status >= 400) throw new Error(`${target}: HTTP ${response.status}`);
+      return [name, response];
+    };
+
+    const entries = Object.entries(LEGACY_PATHS);
+    const responses = [];
+    if (parallel) {
+      responses.push(...await Promise.all(entries.map(fetchOne)));
+    } else {
+      for (const entry of entries) responses.push(await fetchOne(entry));
+    }
+
+    const byName = Object.fromEntries(responses);
+    return {
+      etags: { menu: byName.menu.headers.etag, categories: byName.categories.headers.etag },
+      tablesVersion: byName.tables.json.version,
+      requests: entries.length
+    };
+  };
+
+  return {
+    cold: (agent) => fetchAll(agent, null),
+    reconnect: (agent, known) => fetchAll(agent, known)
+  };
+}
+
+// Ahora: una sola petición con las versiones conocidas
+function bootstrapClient(port, token) {
+  const auth = { Authorization: `Bearer ${token}` };
+
+  const fetchBootstrap = async (agent, known) => {
+    const query = known
+      ? `?known=${Object.entries(known.versions).map(([name, version]) => `${name}:${version}`).join(',')}`
+      : '';
+    const response = await get(agent, port, `/api/bootstrap${query}`, auth);
+    if (response.status >= 400) throw new Error(`/api/bootstrap: HTTP ${response.status}`);
+
+    const sections = response.json.sections;
+    return {
+      versions: Object.fromEntries(Object.entries(sections).map(([name, section]) => [name, section.version])),
+      unchanged: Object.values(sections).filter(section => section.unchanged).length,
+      requests: 1
+    };
+  };
+
+  return {
+    cold: (agent) => fetchBootstrap(agent, null),
+    reconnect: (agent, known) => fetchBootstrap(agent, known)
+  };
+}
+
+async function main() {
+  const log = console.log;
+  const random = createRandom(options.seed);
+
+  // El servidor escribe una línea por cada petición; durante la corrida
+  // solo se muestran los mensajes del benchmark
+  console.log = () => {};
+  await prepareServer();
+  await seedCatalog(sequelize, { menuItems: options.menuItems, random: createRandom(7) });
+  await seedTables(sequelize, { count: options.tables });
+  await seedCustomers(sequelize, { count: options.customers, random: createRandom(11) });
+  await tableState.reload();
+  console.log = log;
+
+  await new Promise(resolve => server.listen(0, resolve));
+  const link = await startLink(server.address().port, { ...options, random });
+
+  // Login directo (fuera de la medición)
+  const login = await fetch(`http://localhost:${server.address().port}/api/auth/login`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ username: 'admin', password: 'admin123', deviceId: 'bench-bootstrap' })
+  }).then(response => response.json());
+  if (!login.token) throw new Error(`Login falló: ${JSON.stringify(login)}`);
+
+  const clients = {
+    'antes: 6 peticiones en serie': legacyClient(link.port, login.token, { parallel: false }),
+    'antes: 6 peticiones en paralelo': legacyClient(link.port, login.token, { parallel: true }),
+    'bootstrap (1 petición)': bootstrapClient(link.port, login.token)
+  };
+
+  // Cambio de una mesa entre el arranque y la reconexión
+  const tables = [...tableState.tables.keys()];
+  let flip = 0;
+  const changeTable = async () => {
+    const id = tables[flip++ % tables.length];
+    const current = await tableState.get(id);
+    await tableState.transition(id, current.status === 'available' ? 'occupied' : 'available', { force: true });
+  };
+
+  const rows = {};
+  for (const [label, client] of Object.entries(clients)) {
+    // Calentamiento: vistas del catálogo en caché y conexiones lectoras abiertas
+    await session(link, agent => client.cold(agent));
+
+    const cold = [];
+    const reconnect = [];
+    let coldBytes = 0;
+    let reconnectBytes = 0;
+    let requests = 0;
+    for (let i = 0; i < options.iterations; i++) {
+      const first = await session(link, agent => client.cold(agent));
+      await changeTable();
+      const again = await session(link, agent => client.reconnect(agent, first.state));
+
+      cold.push(first.ms);
+      reconnect.push(again.ms);
+      coldBytes += first.bytes;
+      reconnectBytes += again.bytes;
+      requests = first.state.requests;
+    }
+
+    const coldStats = summarize(cold, cold.reduce((a, b) => a + b, 0));
+    const reconnectStats = summarize(reconnect, reconnect.reduce((a, b) => a + b, 0));
+    rows[label] = {
+      peticiones: requests,
+      'frío p50 ms': coldStats.p50,
+      'frío p95 ms': coldStats.p95,
+      'frío KB': Math.round(coldBytes / options.iterations / 1024 * 10) / 10,
+      'reconexión p50 ms': reconnectStats.p50,
+      'reconexión p95 ms': reconnectStats.p95,
+      'reconexión KB': Math.round(reconnectBytes / options.iterations / 1024 * 10) / 10
+    };
+  }
+
+  printTable(
+    `Arranque de tableta — RTT ${options.rtt}±${options.jitter} ms, ${options.handshakeRtts} viajes por conexión, ` +
+    `${options.menuItems} productos, ${options.tables} mesas (${options.iterations} corridas)`,
+    rows
+  );
+
+  await link.close();
+  console.log = () => {};
+  await closeServer();
+  console.log = log;
+  tempDb.cleanup();
+  process.exit(0);
+}
+
+main().catch(error => {
+  console.error('❌ Error en benchmark:', error);
+  process.exit(1);
+});
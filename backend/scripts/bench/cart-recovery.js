@@ -0,0 +1,78 @@
+// backend/scripts/bench/cart-recovery.js
+// Carritos persistentes: mide el ritmo de escritura del log de operaciones y
+// el tiempo de recuperación al reiniciar (objetivo: < 1 s para 100 mesas),
+// tanto con el log completo como después de compactar.
+//
+// Uso: node scripts/bench/cart-recovery.js [mesas] [operacionesPorMesa] [concurrencia]
+const { useTempDatabase, runConcurrent, printTable } = require('./stats');
+
+const TABLES = parseInt(process.argv[2] || '100');
+const OPS_PER_TABLE = parseInt(process.argv[3] || '200');
+const CONCURRENCY = parseInt(process.argv[4] || '20');
+const TARGET_MS = 1000;
+
+const tempDb = useTempDatabase('pos-bench-carts');
+
+const { initDatabase, sequelize } = require('../../database/init');
+const { CartStore } = require('../../services/cartStore');
+const { seedCatalog } = require('./fixtures');
+
+// Operación i de una mesa: sobre todo altas, algunas correcciones y bajas
+function buildOp(index, menuItems) {
+  const menuItem = menuItems[(index * 7) % menuItems.length];
+  const data = { name: menuItem.name, price: menuItem.price };
+
+  if (index % 10 === 9) return { op: 'remove', menuItemId: menuItem.id };
+  if (index % 5 === 4) return { op: 'set', menuItemId: menuItem.id, quantity: 1 + (index % 4), data };
+  return { op: 'add', menuItemId: menuItem.id, quantity: 1, data };
+}
+
+async function recover() {
+  const store = new CartStore({ compactIntervalMs: 0 });
+  const result = await store.load();
+  return { store, ...result };
+}
+
+async function main() {
+  await initDatabase();
+  const menuItems = await seedCatalog(sequelize, { categories: 10, menuItems: 200 });
+
+  // Escritura: mesas en paralelo, sin compactar para dejar el log completo
+  const writer = new CartStore({ compactEvery: Infinity, compactIntervalMs: 0 });
+  await writer.load();
+
+  const total = TABLES * OPS_PER_TABLE;
+  const writes = await runConcurrent(total, CONCURRENCY, (i) =>
+    writer.apply(`mesa-${i % TABLES}`, buildOp(Math.floor(i / TABLES), menuItems))
+  );
+
+  const expected = JSON.stringify(writer.openCarts().map(cart => cart.toJSON()));
+
+  // Reinicio con el log completo
+  const fullLog = await recover();
+  const fullLogOk = JSON.stringify(fullLog.store.openCarts().map(cart => cart.toJSON())) === expected;
+
+  // Reinicio tras compactar (snapshots + log vacío)
+  await writer.compactAll();
+  const compacted = await recover();
+  const compactedOk = JSON.stringify(compacted.store.openCarts().map(cart => cart.toJSON())) === expected;
+
+  printTable(`Carritos — ${TABLES} mesas × ${OPS_PER_TABLE} operaciones, ${CONCURRENCY} dispositivos`, {
+    escritura: { 'ops/s': writes.throughput, 'p50 ms': writes.p50, 'p99 ms': writes.p99, flushes: writer.stats.flushes },
+    'recuperación (log completo)': { filas: fullLog.rows, carritos: fullLog.carts, ms: fullLog.elapsedMs, correcto: fullLogOk },
+    'recuperación (compactado)': { filas: compacted.rows, carritos: compacted.carts, ms: compacted.elapsedMs, correcto: compactedOk }
+  });
+
+  const ok = fullLogOk && compactedOk && fullLog.elapsedMs < TARGET_MS && compacted.elapsedMs < TARGET_MS;
+  console.log(`${ok ? '✅' : '❌'} Recuperación de ${TABLES} mesas por debajo de ${TARGET_MS} ms`);
+
+  await sequelize.close();
+  tempDb.cleanup();
+  if (!ok) process.exit(1);
+}
+
+main().catch(error => {
+  console.error('❌ Error en benchmark:', error);
+  tempDb.cleanup();
+  process.exit(1);
+});
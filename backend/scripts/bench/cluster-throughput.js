@@ -0,0 +1,136 @@
+// backend/scripts/bench/cluster-throughput.js
+// Compara el servidor de un solo proceso (server.js) contra el modo cluster
+// (cluster.js) con N workers: throughput y latencia de GET /api/menu y de
+// POST /api/sales sobre HTTP real, con la misma base de datos sembrada.
+//
+// Uso: node scripts/bench/cluster-throughput.js [peticiones] [concurrencia] [workers]
+const path = require('path');
+const os = require('os');
+const { spawn } = require('child_process');
+const jwt = require('jsonwebtoken');
+const { useTempDatabase, runConcurrent, printTable } = require('./stats');
+
+const REQUESTS = parseInt(process.argv[2] || '2000');
+const CONCURRENCY = parseInt(process.argv[3] || '50');
+const WORKERS = parseInt(process.argv[4] || String(os.cpus().length));
+const LINES = 5;
+
+const tempDb = useTempDatabase('pos-bench-cluster');
+process.env.JWT_SECRET = process.env.JWT_SECRET || 'bench-secret';
+
+const { initDatabase, sequelize, User } = require('../../database/init');
+const { seedCatalog } = require('./fixtures');
+
+const BACKEND_DIR = path.join(__dirname, '../..');
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+// Levanta server.js o cluster.js en un puerto libre y espera a /api/health
+async function startProcess(entry, port, workers) {
+  const child = spawn(process.execPath, [entry], {
+    cwd: BACKEND_DIR,
+    env: {
+      ...process.env,
+      PORT: String(port),
+      NODE_ENV: 'benchmark',
+      CLUSTER_WORKERS: String(workers)
+    },
+    stdio: ['ignore', 'ignore', 'inherit']
+  });
+
+  const deadline = Date.now() + 60000;
+  while (Date.now() < deadline) {
+    if (child.exitCode !== null) throw new Error(`${entry} terminó con código ${child.exitCode}`);
+    try {
+      const response = await fetch(`http://localhost:${port}/api/health`);
+      if (response.ok) return child;
+    } catch (error) {
+      // Aún no escucha
+    }
+    await sleep(200);
+  }
+  child.kill('SIGKILL');
+  throw new Error(`${entry} no respondió en 60 s`);
+}
+
+function stopProcess(child) {
+  return new Promise(resolve => {
+    child.once('exit', resolve);
+    child.kill('SIGTERM');
+  });
+}
+
+async function run(label, entry, workers, { port, token, menuItems }) {
+  const child = await startProcess(entry, port, workers);
+  const base = `http://localhost:${port}/api`;
+  const headers = { Authorization: `Bearer ${token}`, 'Content-Type': 'application/json' };
+  let failures = 0;
+
+  const request = async (url, options) => {
+    const response = await fetch(url, options);
+    await response.arrayBuffer();
+    if (!response.ok) failures += 1;
+  };
+
+  // Calentamiento: vistas del catálogo y conexiones lectoras de cada worker
+  await runConcurrent(CONCURRENCY * 2, CONCURRENCY, () => request(`${base}/menu`, { headers }));
+
+  const menu = await runConcurrent(REQUESTS, CONCURRENCY, () => request(`${base}/menu`, { headers }));
+  const sales = await runConcurrent(REQUESTS, CONCURRENCY, (i) => request(`${base}/sales`, {
+    method: 'POST',
+    headers,
+    body: JSON.stringify({
+      orderType: 'takeaway',
+      paymentMethod: i % 3 === 0 ? 'card' : 'cash',
+      items: Array.from({ length: LINES }, (_, line) => ({
+        id: menuItems[(i * 7 + line * 13) % menuItems.length].id,
+        quantity: 1 + (line % 3)
+      }))
+    })
+  }));
+
+  await stopProcess(child);
+
+  return [
+    [`${label} — GET /api/menu`, { 'req/s': menu.throughput, 'p50 ms': menu.p50, 'p99 ms': menu.p99 }],
+    [`${label} — POST /api/sales`, { 'req/s': sales.throughput, 'p50 ms': sales.p50, 'p99 ms': sales.p99 }],
+    failures
+  ];
+}
+
+async function main() {
+  await initDatabase();
+  const menuItems = await seedCatalog(sequelize, { categories: 10, menuItems: 200 });
+  const admin = await User.findOne({ where: { username: 'admin' } });
+  await sequelize.close();
+
+  const context = {
+    port: 3900 + Math.floor(Math.random() * 100),
+    token: jwt.sign({ userId: admin.id, username: 'admin', role: 'admin' }, process.env.JWT_SECRET),
+    menuItems
+  };
+
+  const rows = {};
+  let failures = 0;
+  for (const [label, entry, workers] of [
+    ['1 proceso', 'server.js', 1],
+    [`${WORKERS} workers`, 'cluster.js', WORKERS]
+  ]) {
+    const [menu, sales, failed] = await run(label, entry, workers, context);
+    rows[menu[0]] = menu[1];
+    rows[sales[0]] = sales[1];
+    failures += failed;
+  }
+
+  printTable(`Cluster — ${REQUESTS} peticiones por endpoint, ${CONCURRENCY} clientes, ${LINES} líneas por venta`, rows);
+  if (failures > 0) {
+    console.log(`⚠️  ${failures} respuestas con error`);
+  }
+
+  tempDb.cleanup();
+}
+
+main().catch(error => {
+  console.error('❌ Error en benchmark:', error);
+  tempDb.cleanup();
+  process.exit(1);
+});
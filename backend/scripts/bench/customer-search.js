@@ -0,0 +1,97 @@
+// backend/scripts/bench/customer-search.js
+// Latencia del autocompletado de clientes: LIKE '%q%' sobre cuatro columnas
+// (búsqueda anterior) contra services/customerSearch (FTS5 + prefijo de
+// teléfono), simulando lo que teclea el cajero letra por letra.
+//
+// Uso: node scripts/bench/customer-search.js [clientes] [--out reporte.json]
+const fs = require('fs');
+const { QueryTypes } = require('sequelize');
+const { useTempDatabase, summarize, timed, printTable } = require('./stats');
+
+const CUSTOMERS = parseInt(process.argv[2] || '100000');
+const REPEAT = 5;
+const outIndex = process.argv.indexOf('--out');
+const OUT_FILE = outIndex !== -1 ? process.argv[outIndex + 1] : null;
+
+const tempDb = useTempDatabase('pos-bench-customers');
+
+const { initDatabase, sequelize } = require('../../database/init');
+const { searchCustomers } = require('../../services/customerSearch');
+const { seedCustomers } = require('./fixtures');
+
+// Lo que llega al servidor con cada tecla (sin espera entre teclas)
+const KEYSTROKES = {
+  'teléfono 3415550042': '3415550042',
+  'nombre "martinez"': 'martinez',
+  'nombre + apellido "jose gar"': 'jose gar',
+  'dirección "reforma 12"': 'reforma 12'
+};
+
+const typed = (text) => Array.from({ length: text.length - 1 }, (_, i) => text.slice(0, i + 2));
+
+async function legacySearch(query) {
+  const like = `%${query}%`;
+  return sequelize.query(
+    `SELECT * FROM customers
+      WHERE isActive = 1 AND (phone LIKE ? OR name LIKE ? OR address1 LIKE ? OR city LIKE ?)
+      ORDER BY name ASC LIMIT 10`,
+    { replacements: [like, like, like, like], type: QueryTypes.SELECT }
+  );
+}
+
+async function measure(search) {
+  const results = {};
+
+  for (const [name, text] of Object.entries(KEYSTROKES)) {
+    const latencies = [];
+    const start = process.hrtime.bigint();
+    for (let i = 0; i < REPEAT; i++) {
+      for (const query of typed(text)) {
+        latencies.push(await timed(() => search(query)));
+      }
+    }
+    results[name] = summarize(latencies, Number(process.hrtime.bigint() - start) / 1e6);
+  }
+
+  return results;
+}
+
+async function main() {
+  await initDatabase();
+
+  console.log(`🌱 Sembrando ${CUSTOMERS} clientes...`);
+  const seedStart = Date.now();
+  await seedCustomers(sequelize, { count: CUSTOMERS });
+  await sequelize.query('ANALYZE');
+  console.log(`✅ Clientes e índices listos en ${Date.now() - seedStart} ms`);
+
+  const before = await measure(legacySearch);
+  const after = await measure((query) => searchCustomers(query, { limit: 10 }));
+
+  const rows = {};
+  for (const name of Object.keys(KEYSTROKES)) {
+    rows[name] = {
+      'LIKE p50 ms': before[name].p50,
+      'índice p50 ms': after[name].p50,
+      'LIKE p95 ms': before[name].p95,
+      'índice p95 ms': after[name].p95,
+      'LIKE p99 ms': before[name].p99,
+      'índice p99 ms': after[name].p99
+    };
+  }
+  printTable(`Autocompletado con ${CUSTOMERS} clientes (por tecla)`, rows);
+
+  if (OUT_FILE) {
+    fs.writeFileSync(OUT_FILE, JSON.stringify({ customers: CUSTOMERS, before, after }, null, 2));
+    console.log(`\n💾 Reporte guardado en ${OUT_FILE}`);
+  }
+
+  await sequelize.close();
+  tempDb.cleanup();
+}
+
+main().catch(error => {
+  console.error('❌ Error en benchmark:', error);
+  tempDb.cleanup();
+  process.exit(1);
+});
@@ -0,0 +1,302 @@
+// backend/scripts/bench/fixtures.js
+// Generadores de datos para benchmarks: catálogo, mesas e historial de ventas.
+// Las inserciones se hacen con INSERT multi-fila en transacciones grandes para
+// poder sembrar un año de ventas en segundos.
+const { QueryTypes } = require('sequelize');
+
+const PAYMENT_METHODS = ['cash', 'cash', 'cash', 'card', 'card', 'transfer'];
+const ORDER_TYPES = ['dine-in', 'dine-in', 'dine-in', 'takeaway', 'delivery'];
+
+const FIRST_NAMES = ['José', 'María', 'Juan', 'Guadalupe', 'Francisco', 'Verónica', 'Jesús', 'Ana', 'Ramón', 'Sofía', 'Andrés', 'Mónica'];
+const LAST_NAMES = ['García', 'Hernández', 'López', 'Martínez', 'González', 'Pérez', 'Rodríguez', 'Sánchez', 'Ramírez', 'Núñez', 'Cárdenas', 'Ibáñez'];
+const STREETS = ['Av. Constitución', 'Calle Reforma', 'Calle Colón', 'Av. Juárez', 'Calle Hidalgo', 'Prol. Moctezuma', 'Calle Obregón', 'Av. Lázaro Cárdenas'];
+const CITIES = ['Ciudad Guzmán', 'Zapotlán', 'Gómez Farías', 'Tuxpan'];
+
+// Mismo formato con el que Sequelize guarda DATE en SQLite
+function toSqliteDate(date) {
+  return date.toISOString().replace('T', ' ').replace('Z', ' +00:00');
+}
+
+// Generador pseudoaleatorio determinista (mulberry32) para corridas reproducibles
+function createRandom(seed = 42) {
+  let state = seed >>> 0;
+  return () => {
+    state = (state + 0x6D2B79F5) >>> 0;
+    let t = state;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+// Inserta filas en bloques con valores escapados (sin límite de parámetros)
+async function insertRows(sequelize, table, columns, rows, { chunkSize = 500, transaction } = {}) {
+  const columnSql = columns.map(column => `\`${column}\``).join(', ');
+
+  for (let i = 0; i < rows.length; i += chunkSize) {
+    const values = rows.slice(i, i + chunkSize)
+      .map(row => `(${columns.map(column => sequelize.escape(row[column] ?? null)).join(', ')})`)
+      .join(',\n');
+    await sequelize.query(`INSERT INTO \`${table}\` (${columnSql}) VALUES ${values}`, { transaction });
+  }
+}
+
+// Catálogo: categorías y productos con precios y stock variados
+async function seedCatalog(sequelize, { categories = 10, menuItems = 200, random = createRandom(7) } = {}) {
+  const now = toSqliteDate(new Date());
+
+  return sequelize.transaction(async (transaction) => {
+    const [{ maxCategory }] = await sequelize.query(
+      'SELECT COALESCE(MAX(id), 0) AS maxCategory FROM categories',
+      { type: QueryTypes.SELECT, transaction }
+    );
+    const categoryRows = Array.from({ length: categories }, (_, i) => ({
+      id: maxCategory + i + 1,
+      name: `Categoría bench ${maxCategory + i + 1}`,
+      isActive: 1,
+      sortOrder: i,
+      createdAt: now,
+      updatedAt: now
+    }));
+    await insertRows(sequelize, 'categories', ['id', 'name', 'isActive', 'sortOrder', 'createdAt', 'updatedAt'], categoryRows, { transaction });
+
+    const [{ maxItem }] = await sequelize.query(
+      'SELECT COALESCE(MAX(id), 0) AS maxItem FROM menu_items',
+      { type: QueryTypes.SELECT, transaction }
+    );
+    const itemRows = Array.from({ length: menuItems }, (_, i) => {
+      const price = Math.round((20 + random() * 180) * 100) / 100;
+      return {
+        id: maxItem + i + 1,
+        name: `Producto bench ${maxItem + i + 1}`,
+        price,
+        cost: Math.round(price * 45) / 100,
+        isActive: 1,
+        stock: random() < 0.3 ? 100000 : -1,
+        categoryId: categoryRows[i % categories].id,
+        createdAt: now,
+        updatedAt: now
+      };
+    });
+    await insertRows(sequelize, 'menu_items', ['id', 'name', 'price', 'cost', 'isActive', 'stock', 'categoryId', 'createdAt', 'updatedAt'], itemRows, { transaction });
+
+    return itemRows;
+  });
+}
+
+// Mesas numeradas a partir de la última existente
+async function seedTables(sequelize, { count = 30 } = {}) {
+  const now = toSqliteDate(new Date());
+
+  return sequelize.transaction(async (transaction) => {
+    const [{ maxId, maxNumber }] = await sequelize.query(
+      'SELECT COALESCE(MAX(id), 0) AS maxId, COALESCE(MAX(number), 0) AS maxNumber FROM tables',
+      { type: QueryTypes.SELECT, transaction }
+    );
+    const rows = Array.from({ length: count }, (_, i) => ({
+      id: maxId + i + 1,
+      number: maxNumber + i + 1,
+      capacity: [2, 4, 4, 6, 8][i % 5],
+      status: 'available',
+      isActive: 1,
+      createdAt: now,
+      updatedAt: now
+    }));
+    await insertRows(sequelize, 'tables', ['id', 'number', 'capacity', 'status', 'isActive', 'createdAt', 'updatedAt'], rows, { transaction });
+    return rows;
+  });
+}
+
+// Clientes con teléfono único (341-xxx-xxxx), nombres y direcciones con acentos;
+// devuelve los ids de los activos
+async function seedCustomers(sequelize, { count = 50000, random = createRandom(11) } = {}) {
+  const pick = (list) => list[Math.floor(random() * list.length)];
+  const now = toSqliteDate(new Date());
+  const rows = [];
+
+  for (let i = 0; i < count; i++) {
+    const number = String(3410000000 + i * 7).slice(0, 10);
+    rows.push({
+      phone: `${number.slice(0, 3)}-${number.slice(3, 6)}-${number.slice(6)}`,
+      name: `${pick(FIRST_NAMES)} ${pick(LAST_NAMES)} ${pick(LAST_NAMES)}`,
+      address1: `${pick(STREETS)} ${1 + Math.floor(random() * 900)}`,
+      address2: random() < 0.3 ? `Int. ${1 + Math.floor(random() * 20)}` : '',
+      city: pick(CITIES),
+      isActive: random() < 0.95 ? 1 : 0,
+      totalOrders: Math.floor(random() * 40),
+      createdAt: now,
+      updatedAt: now
+    });
+  }
+
+  await sequelize.transaction(async (transaction) => {
+    await insertRows(sequelize, 'customers', Object.keys(rows[0]), rows, { chunkSize: 1000, transaction });
+  });
+
+  const active = await sequelize.query('SELECT id FROM customers WHERE isActive = 1', { type: QueryTypes.SELECT });
+  return active.map(row => row.id);
+}
+
+// Personal de benchmark (`bench-<rol>-<n>`) con la misma contraseña; se
+// hashea una sola vez
+async function seedStaff(sequelize, { roles = { waiter: 8, cashier: 2, admin: 1 }, passwordHash }) {
+  const now = toSqliteDate(new Date());
+  const rows = [];
+
+  for (const [role, count] of Object.entries(roles)) {
+    for (let i = 1; i <= count; i++) {
+      rows.push({
+        username: `bench-${role}-${i}`,
+        password: passwordHash,
+        name: `Bench ${role} ${i}`,
+        role,
+        isActive: 1,
+        createdAt: now,
+        updatedAt: now
+      });
+    }
+  }
+
+  await sequelize.transaction(async (transaction) => {
+    await insertRows(sequelize, 'users', Object.keys(rows[0]), rows, { transaction });
+  });
+
+  return sequelize.query(
+    "SELECT id, username, role FROM users WHERE username LIKE 'bench-%' ORDER BY id",
+    { type: QueryTypes.SELECT }
+  );
+}
+
+/**
+ * Historial de ventas: `days` días hacia atrás, `salesPerDay` ventas diarias
+ * repartidas entre 12:00 y 23:00, un turno diario por usuario.
+ * Devuelve conteos de lo insertado.
+ */
+async function seedSalesHistory(sequelize, {
+  days = 365,
+  salesPerDay = 120,
+  menuItems,
+  userIds,
+  tableIds = [],
+  customerIds = [],
+  random = createRandom(42),
+  onProgress = () => {}
+}) {
+  const [{ maxSale }] = await sequelize.query('SELECT COALESCE(MAX(id), 0) AS maxSale FROM sales', { type: QueryTypes.SELECT });
+  const [{ maxShift }] = await sequelize.query('SELECT COALESCE(MAX(id), 0) AS maxShift FROM shifts', { type: QueryTypes.SELECT });
+
+  let saleId = maxSale;
+  let shiftId = maxShift;
+  let totalItems = 0;
+  const pick = (list) => list[Math.floor(random() * list.length)];
+  const today = new Date();
+  today.setHours(0, 0, 0, 0);
+
+  for (let day = days; day >= 1; day--) {
+    const dayStart = new Date(today.getTime() - day * 86400000);
+    const shifts = [];
+    const sales = [];
+    const saleItems = [];
+
+    const shiftByUser = new Map();
+    for (const userId of userIds) {
+      shiftId += 1;
+      shiftByUser.set(userId, { id: shiftId, total: 0, count: 0 });
+    }
+
+    for (let n = 0; n < salesPerDay; n++) {
+      saleId += 1;
+      const createdAt = new Date(dayStart.getTime() + (12 + random() * 11) * 3600000);
+      const userId = pick(userIds);
+      const orderType = pick(ORDER_TYPES);
+      const lines = 1 + Math.floor(random() * 5);
+      let subtotal = 0;
+
+      for (let l = 0; l < lines; l++) {
+        const menuItem = pick(menuItems);
+        const quantity = 1 + Math.floor(random() * 3);
+        const price = parseFloat(menuItem.price);
+        subtotal += price * quantity;
+        saleItems.push({
+          quantity,
+          unitPrice: price.toFixed(2),
+          totalPrice: (price * quantity).toFixed(2),
+          saleId,
+          menuItemId: menuItem.id,
+          createdAt: toSqliteDate(createdAt),
+          updatedAt: toSqliteDate(createdAt)
+        });
+      }
+
+      const cancelled = random() < 0.02;
+      const shift = shiftByUser.get(userId);
+      if (!cancelled) {
+        shift.total += subtotal;
+        shift.count += 1;
+      }
+
+      sales.push({
+        id: saleId,
+        total: subtotal.toFixed(2),
+        subtotal: subtotal.toFixed(2),
+        tax: '0.00',
+        discount: '0.00',
+        deliveryFee: '0.00',
+        paymentMethod: pick(PAYMENT_METHODS),
+        orderType,
+        status: cancelled ? 'cancelled' : 'completed',
+        tableId: orderType === 'dine-in' && tableIds.length ? pick(tableIds) : null,
+        customerId: orderType === 'delivery' && customerIds.length ? pick(customerIds) : null,
+        userId,
+        shiftId: shift.id,
+        deviceId: `tablet-${userId}`,
+        synced: random() < 0.97 ? 1 : 0,
+        syncedAt: toSqliteDate(createdAt),
+        cancelledAt: cancelled ? toSqliteDate(createdAt) : null,
+        createdAt: toSqliteDate(createdAt),
+        updatedAt: toSqliteDate(createdAt)
+      });
+    }
+
+    for (const [userId, shift] of shiftByUser) {
+      shifts.push({
+        id: shift.id,
+        startTime: toSqliteDate(new Date(dayStart.getTime() + 11 * 3600000)),
+        endTime: toSqliteDate(new Date(dayStart.getTime() + 23.5 * 3600000)),
+        startingCash: '500.00',
+        totalSales: shift.total.toFixed(2),
+        totalTransactions: shift.count,
+        status: 'closed',
+        userId,
+        createdAt: toSqliteDate(dayStart),
+        updatedAt: toSqliteDate(dayStart)
+      });
+    }
+
+    await sequelize.transaction(async (transaction) => {
+      await insertRows(sequelize, 'shifts', Object.keys(shifts[0]), shifts, { transaction });
+      await insertRows(sequelize, 'sales', Object.keys(sales[0]), sales, { transaction });
+      await insertRows(sequelize, 'sale_items', Object.keys(saleItems[0]), saleItems, { transaction });
+    });
+
+    totalItems += saleItems.length;
+    onProgress(days - day + 1, days);
+  }
+
+  return {
+    sales: saleId - maxSale,
+    saleItems: totalItems,
+    shifts: shiftId - maxShift
+  };
+}
+
+module.exports = {
+  toSqliteDate,
+  createRandom,
+  insertRows,
+  seedCatalog,
+  seedTables,
+  seedCustomers,
+  seedStaff,
+  seedSalesHistory
+};
@@ -0,0 +1,173 @@
+// backend/scripts/bench/query-plans.js
+// Reporte antes/después de los índices de database/migrations.js sobre una
+// base con un año de ventas: plan de consulta (EXPLAIN QUERY PLAN) y latencia.
+//
+// Uso: node scripts/bench/query-plans.js [ventasPorDia] [--out reporte.json]
+const fs = require('fs');
+const { QueryTypes } = require('sequelize');
+const { useTempDatabase, summarize, timed, printTable } = require('./stats');
+
+const SALES_PER_DAY = parseInt(process.argv[2] || '120');
+const REPEAT = 20;
+const outIndex = process.argv.indexOf('--out');
+const OUT_FILE = outIndex !== -1 ? process.argv[outIndex + 1] : null;
+
+const tempDb = useTempDatabase('pos-bench-plans');
+
+const { initDatabase, sequelize, User, Table } = require('../../database/init');
+const { INDEXES, createIndexes, dropIndexes } = require('../../database/migrations');
+const { toSqliteDate, seedCatalog, seedSalesHistory } = require('./fixtures');
+
+// Consultas con la misma forma que generan las rutas
+function buildQueries({ userId, shiftId }) {
+  const now = new Date();
+  const monthAgo = toSqliteDate(new Date(now.getTime() - 30 * 86400000));
+  const weekAgo = toSqliteDate(new Date(now.getTime() - 7 * 86400000));
+  const end = toSqliteDate(now);
+
+  return [
+    {
+      name: 'dashboard: completadas 30 días',
+      sql: "SELECT * FROM sales WHERE status = 'completed' AND createdAt BETWEEN ? AND ?",
+      params: [monthAgo, end]
+    },
+    {
+      name: 'dashboard: top productos 30 días',
+      sql: `SELECT si.menuItemId, SUM(si.quantity) AS totalQuantity, SUM(si.totalPrice) AS totalRevenue
+              FROM sale_items si JOIN sales s ON s.id = si.saleId
+             WHERE s.status = 'completed' AND s.createdAt BETWEEN ? AND ?
+             GROUP BY si.menuItemId ORDER BY totalQuantity DESC LIMIT 10`,
+      params: [monthAgo, end]
+    },
+    {
+      name: 'by-payment-method 7 días',
+      sql: `SELECT paymentMethod, COUNT(id), SUM(total) FROM sales
+             WHERE status = 'completed' AND createdAt BETWEEN ? AND ? GROUP BY paymentMethod`,
+      params: [weekAgo, end]
+    },
+    {
+      name: 'GET /api/sales página 1',
+      sql: "SELECT * FROM sales WHERE status = 'completed' ORDER BY createdAt DESC LIMIT 50 OFFSET 0",
+      params: []
+    },
+    {
+      name: 'GET /api/sales por usuario',
+      sql: "SELECT * FROM sales WHERE status = 'completed' AND userId = ? ORDER BY createdAt DESC LIMIT 50",
+      params: [userId]
+    },
+    {
+      name: 'turno: ventas completadas',
+      sql: "SELECT * FROM sales WHERE shiftId = ? AND status = 'completed'",
+      params: [shiftId]
+    },
+    {
+      name: 'sync: pendientes',
+      sql: 'SELECT * FROM sales WHERE synced = 0 AND createdAt > ?',
+      params: [weekAgo]
+    },
+    {
+      name: 'sync: último sincronizado',
+      sql: 'SELECT syncedAt FROM sales WHERE synced = 1 ORDER BY syncedAt DESC LIMIT 1',
+      params: []
+    },
+    {
+      name: 'líneas de una venta',
+      sql: 'SELECT * FROM sale_items WHERE saleId = (SELECT MAX(id) FROM sales)',
+      params: []
+    },
+    {
+      name: 'turno activo del usuario',
+      sql: "SELECT * FROM shifts WHERE userId = ? AND status = 'active' LIMIT 1",
+      params: [userId]
+    }
+  ];
+}
+
+async function measure(queries) {
+  const results = {};
+
+  for (const query of queries) {
+    const plan = await sequelize.query(`EXPLAIN QUERY PLAN ${query.sql}`, {
+      replacements: query.params,
+      type: QueryTypes.SELECT
+    });
+
+    const latencies = [];
+    const start = process.hrtime.bigint();
+    for (let i = 0; i < REPEAT; i++) {
+      latencies.push(await timed(() => sequelize.query(query.sql, {
+        replacements: query.params,
+        type: QueryTypes.SELECT
+      })));
+    }
+    const stats = summarize(latencies, Number(process.hrtime.bigint() - start) / 1e6);
+
+    results[query.name] = {
+      plan: plan.map(step => step.detail).join(' | '),
+      p50: stats.p50,
+      p99: stats.p99
+    };
+  }
+
+  return results;
+}
+
+async function main() {
+  await initDatabase();
+
+  console.log(`🌱 Sembrando 365 días × ${SALES_PER_DAY} ventas...`);
+  const menuItems = await seedCatalog(sequelize, { menuItems: 200 });
+  const users = await User.findAll({ attributes: ['id'], raw: true });
+  const tables = await Table.findAll({ attributes: ['id'], raw: true });
+  const seeded = await seedSalesHistory(sequelize, {
+    days: 365,
+    salesPerDay: SALES_PER_DAY,
+    menuItems,
+    userIds: users.map(u => u.id),
+    tableIds: tables.map(t => t.id)
+  });
+  console.log(`✅ ${seeded.sales} ventas, ${seeded.saleItems} líneas, ${seeded.shifts} turnos`);
+
+  const [{ shiftId }] = await sequelize.query('SELECT MAX(shiftId) AS shiftId FROM sales', { type: QueryTypes.SELECT });
+  const queries = buildQueries({ userId: users[0].id, shiftId });
+
+  await dropIndexes(sequelize, INDEXES);
+  await sequelize.query('ANALYZE');
+  const before = await measure(queries);
+
+  await createIndexes(sequelize, INDEXES);
+  await sequelize.query('ANALYZE');
+  const after = await measure(queries);
+
+  const rows = {};
+  for (const query of queries) {
+    rows[query.name] = {
+      'antes p50 ms': before[query.name].p50,
+      'después p50 ms': after[query.name].p50,
+      'antes p99 ms': before[query.name].p99,
+      'después p99 ms': after[query.name].p99
+    };
+  }
+  printTable('Latencia por consulta (sin índices → con índices)', rows);
+
+  console.log('\n🔎 Planes de consulta');
+  for (const query of queries) {
+    console.log(`\n• ${query.name}`);
+    console.log(`  antes:   ${before[query.name].plan}`);
+    console.log(`  después: ${after[query.name].plan}`);
+  }
+
+  if (OUT_FILE) {
+    fs.writeFileSync(OUT_FILE, JSON.stringify({ seeded, salesPerDay: SALES_PER_DAY, before, after }, null, 2));
+    console.log(`\n💾 Reporte guardado en ${OUT_FILE}`);
+  }
+
+  await sequelize.close();
+  tempDb.cleanup();
+}
+
+main().catch(error => {
+  console.error('❌ Error en benchmark:', error);
+  tempDb.cleanup();
+  process.exit(1);
+});
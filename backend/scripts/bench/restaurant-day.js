@@ -0,0 +1,460 @@
+// backend/scripts/bench/restaurant-day.js
+// Hora pico de un restaurante contra el servidor real (server.js levantado
+// dentro de este proceso, sobre una base temporal): varias tabletas
+// simuladas hablan con la API por HTTP y escuchan el bus de eventos por
+// Socket.io, como lo haría la app.
+//
+// Perfiles de tableta (elegidos con una semilla fija, así cada corrida hace
+// la misma secuencia de operaciones):
+// - mesero: ocupa una mesa de su sección, arma el carrito, cobra y libera la
+//   mesa; pedidos para llevar, alguna cancelación, consulta de cambios de mesas
+// - caja: domicilios (autocompletado de cliente letra por letra + venta),
+//   para llevar, cancelaciones y subida de ventas offline en bloque
+// - admin: dashboard, reportes por método de pago, resumen del día y turno
+//
+// Reporte: throughput y p50/p95/p99 por endpoint (medidos en el cliente y en
+// el servidor), espera y retención del candado del escritor de SQLite,
+// retraso del event loop y entrega de eventos por Socket.io. Con --out se
+// guarda en JSON; con --compare se compara contra un reporte anterior.
+//
+// Uso:
+//   node scripts/bench/restaurant-day.js [--tablets 10] [--orders 30] [--think-ms 0] [--seed 1]
+//     [--template base.sqlite | --days 365 --customers 50000 --menu-items 200 --sales-per-day 120]
+//     [--out reporte.json] [--compare anterior.json] [--max-regression 25]
+//
+// Sembrar un año de ventas tarda; para comparar commits conviene generar la
+// plantilla una vez (seed-restaurant.js --out) y pasarla con --template.
+const fs = require('fs');
+const path = require('path');
+const { execSync } = require('child_process');
+const { useTempDatabase, summarize, printTable } = require('./stats');
+const { createRandom } = require('./fixtures');
+const { BENCH_PASSWORD, DEFAULT_VOLUMES, parseOptions, seedRestaurant, loadRestaurant } = require('./seed-restaurant');
+
+const options = parseOptions(process.argv.slice(2), {
+  tablets: 10,
+  orders: 30,
+  thinkMs: 0,
+  seed: 1,
+  template: '',
+  days: DEFAULT_VOLUMES.days,
+  customers: DEFAULT_VOLUMES.customers,
+  menuItems: DEFAULT_VOLUMES.menuItems,
+  salesPerDay: DEFAULT_VOLUMES.salesPerDay,
+  out: '',
+  compare: '',
+  maxRegression: 0
+});
+
+const tempDb = useTempDatabase('pos-bench-day');
+if (options.template) {
+  fs.copyFileSync(path.resolve(options.template), tempDb.dbPath);
+}
+process.env.JWT_SECRET = process.env.JWT_SECRET || 'bench-secret';
+process.env.LOG_FILE = path.join(path.dirname(tempDb.dbPath), 'access.log');
+
+const ioClient = require('socket.io-client');
+const { server, prepareServer, closeServer } = require('../../server');
+const { registry } = require('../../services/metrics');
+
+const SYNC_BATCH = 25;
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+// Latencias y errores por operación (método + patrón de ruta)
+class Recorder {
+  constructor() {
+    this.endpoints = new Map();
+  }
+
+  record(name, ms, status) {
+    let entry = this.endpoints.get(name);
+    if (!entry) {
+      entry = { latencies: [], errors: 0, serverErrors: 0 };
+      this.endpoints.set(name, entry);
+    }
+    entry.latencies.push(ms);
+    if (status >= 400) entry.errors += 1;
+    if (status >= 500 || status === 0) entry.serverErrors += 1;
+  }
+
+  summary(elapsedMs) {
+    const result = {};
+    for (const [name, entry] of [...this.endpoints].sort(([a], [b]) => a.localeCompare(b))) {
+      result[name] = { ...summarize(entry.latencies, elapsedMs), errors: entry.errors, serverErrors: entry.serverErrors };
+    }
+    return result;
+  }
+}
+
+class Tablet {
+  constructor({ index, user, base, recorder, restaurant, section }) {
+    this.index = index;
+    this.user = user;
+    this.base = base;
+    this.recorder = recorder;
+    this.restaurant = restaurant;
+    this.section = section;
+    this.random = createRandom(options.seed * 1000 + index);
+    this.deviceId = `bench-tablet-${index}`;
+    this.token = null;
+    this.socket = null;
+    this.ownSales = [];
+    this.syncCount = 0;
+    this.tableVersion = 0;
+    this.events = { received: 0, latencies: [] };
+  }
+
+  pick(list) {
+    return list[Math.floor(this.random() * list.length)];
+  }
+
+  async request(name, method, url, body) {
+    const start = process.hrtime.bigint();
+    let status = 0;
+    let data = null;
+    try {
+      const response = await fetch(`${this.base}${url}`, {
+        method,
+        headers: {
+          'Content-Type': 'application/json',
+          ...(this.token ? { Authorization: `Bearer ${this.token}` } : {})
+        },
+        body: body ? JSON.stringify(body) : undefined
+      });
+      status = response.status;
+      data = await response.json().catch(() => null);
+    } catch (error) {
+      // Conexión rechazada o cortada: cuenta como error del servidor (status 0)
+    } finally {
+      this.recorder.record(name, Number(process.hrtime.bigint() - start) / 1e6, status);
+    }
+    return { status, data };
+  }
+
+  // Login (abre el turno si no hay uno activo) y suscripción al bus de eventos
+  async start() {
+    const { status, data } = await this.request('POST /api/auth/login', 'POST', '/api/auth/login', {
+      username: this.user.username,
+      password: BENCH_PASSWORD,
+      deviceId: this.deviceId
+    });
+    if (status !== 200) throw new Error(`Login de ${this.user.username} falló (${status})`);
+    this.token = data.token;
+
+    await this.request('GET /api/shifts/active', 'GET', '/api/shifts/active');
+
+    this.socket = ioClient(this.base, { auth: { token: this.token }, transports: ['websocket'], forceNew: true });
+    this.socket.on('events', ({ events }) => {
+      const now = Date.now();
+      for (const envelope of events) {
+        this.events.received += 1;
+        if (envelope.at) this.events.latencies.push(now - envelope.at);
+      }
+    });
+    await new Promise((resolve, reject) => {
+      this.socket.once('connect', resolve);
+      this.socket.once('connect_error', reject);
+    });
+  }
+
+  stop() {
+    if (this.socket) this.socket.close();
+  }
+
+  lines(count) {
+    return Array.from({ length: count }, () => ({
+      id: this.pick(this.restaurant.menuItems).id,
+      quantity: 1 + Math.floor(this.random() * 3)
+    }));
+  }
+
+  async createSale(body) {
+    const { status, data } = await this.request('POST /api/sales', 'POST', '/api/sales', {
+      paymentMethod: this.pick(['cash', 'cash', 'card', 'transfer']),
+      deviceId: this.deviceId,
+      ...body
+    });
+    if (status === 201 && data.sale) this.ownSales.push(data.sale.id);
+    return status;
+  }
+
+  // ----- escenarios ------------------------------------------------------
+
+  async dineIn() {
+    const table = this.pick(this.section);
+    const occupied = await this.request('POST /api/tables/:id/occupy', 'POST', `/api/tables/${table.id}/occupy`, {
+      customerCount: 1 + Math.floor(this.random() * Math.min(4, table.capacity))
+    });
+    if (occupied.status !== 200) return;
+
+    const items = this.lines(2 + Math.floor(this.random() * 4));
+    for (const item of items) {
+      await this.request('POST /api/carts/:tableId/items', 'POST', `/api/carts/${table.id}/items`, {
+        item: { menuItemId: item.id },
+        quantity: item.quantity
+      });
+    }
+    await this.request('GET /api/carts/:tableId', 'GET', `/api/carts/${table.id}`);
+
+    await this.createSale({ orderType: 'dine-in', tableId: table.id, items });
+    await this.request('DELETE /api/carts/:tableId', 'DELETE', `/api/carts/${table.id}`);
+    await this.request('POST /api/tables/:id/free', 'POST', `/api/tables/${table.id}/free`, {});
+  }
+
+  async takeaway() {
+    await this.createSale({ orderType: 'takeaway', items: this.lines(1 + Math.floor(this.random() * 4)) });
+  }
+
+  async delivery() {
+    const customer = this.pick(this.restaurant.customers);
+    const digits = customer.phone.replace(/\D/g, '');
+    for (const length of [3, 5, 7, 10]) {
+      await this.request('GET /api/customers/search/:query', 'GET', `/api/customers/search/${digits.slice(0, length)}`);
+    }
+    await this.createSale({ orderType: 'delivery', customerId: customer.id, items: this.lines(1 + Math.floor(this.random() * 4)) });
+  }
+
+  async cancel() {
+    const saleId = this.ownSales.shift();
+    if (!saleId) return this.takeaway();
+    await this.request('PUT /api/sales/:id/cancel', 'PUT', `/api/sales/${saleId}/cancel`, { reason: 'Benchmark' });
+  }
+
+  async tableChanges() {
+    const { data } = await this.request('GET /api/tables/changes', 'GET', `/api/tables/changes?since=${this.tableVersion}`);
+    if (data && data.version) this.tableVersion = data.version;
+  }
+
+  // Cola offline acumulada mientras no hubo red, subida en un solo bloque
+  async bulkSync() {
+    const createdAt = Date.now() - SYNC_BATCH * 60000;
+    const sales = Array.from({ length: SYNC_BATCH }, (_, n) => {
+      this.syncCount += 1;
+      return {
+        clientId: `${this.deviceId}-offline-${this.syncCount}`,
+        deviceId: this.deviceId,
+        items: this.lines(1 + (n % 4)).map(line => ({ menuItemId: line.id, quantity: line.quantity })),
+        paymentMethod: n % 3 === 0 ? 'card' : 'cash',
+        orderType: 'takeaway',
+        createdAt: new Date(createdAt + n * 60000).toISOString()
+      };
+    });
+    await this.request('POST /api/sync/sales', 'POST', '/api/sync/sales', { deviceId: this.deviceId, sales });
+  }
+
+  async reports() {
+    const end = new Date();
+    const start = new Date(end.getTime() - 30 * 86400000);
+    const range = `startDate=${start.toISOString()}&endDate=${end.toISOString()}`;
+    await this.request('GET /api/reports/dashboard', 'GET', `/api/reports/dashboard?${range}`);
+    await this.request('GET /api/reports/by-payment-method', 'GET', `/api/reports/by-payment-method?${range}`);
+    await this.request('GET /api/sales/stats/summary', 'GET', '/api/sales/stats/summary?period=today');
+    await this.request('GET /api/shifts/active', 'GET', '/api/shifts/active');
+  }
+
+  // Mezcla de escenarios por rol: [peso, escenario]
+  mix() {
+    switch (this.user.role) {
+      case 'admin':
+        return [[1, 'reports']];
+      case 'cashier':
+        return [[40, 'delivery'], [30, 'takeaway'], [10, 'cancel'], [20, 'bulkSync']];
+      default:
+        return [[70, 'dineIn'], [20, 'takeaway'], [5, 'cancel'], [5, 'tableChanges']];
+    }
+  }
+
+  async run(orders) {
+    const mix = this.mix();
+    const total = mix.reduce((sum, [weight]) => sum + weight, 0);
+    for (let n = 0; n < orders; n++) {
+      let roll = this.random() * total;
+      const [, scenario] = mix.find(([weight]) => (roll -= weight) < 0) || mix[mix.length - 1];
+      await this[scenario]();
+      if (options.thinkMs) await sleep(this.random() * options.thinkMs * 2);
+    }
+  }
+}
+
+// ----- métricas del servidor ----------------------------------------------
+
+function resetServerMetrics() {
+  for (const name of ['pos_http_request_duration_ms', 'pos_db_query_duration_ms', 'pos_db_write_lock_wait_ms', 'pos_db_write_lock_hold_ms']) {
+    registry.metrics.get(name).series.clear();
+  }
+  registry.metrics.get('pos_event_loop_lag_ms').values(); // leerlo lo reinicia
+}
+
+function serverMetrics() {
+  const metrics = registry.toJSON();
+  const byLabels = (series, key) => Object.fromEntries(series.map(({ labels, ...rest }) => [key(labels), rest]));
+  const only = (series) => series[0] || { count: 0 };
+
+  return {
+    routes: byLabels(metrics.pos_http_request_duration_ms, labels => `${labels.method} ${labels.route}`),
+    slowestQueries: metrics.pos_db_query_duration_ms
+      .sort((a, b) => b.p99 - a.p99)
+      .slice(0, 10)
+      .map(({ labels, ...rest }) => ({ query: `${labels.model}.${labels.operation}`, ...rest })),
+    writeLock: {
+      wait: only(metrics.pos_db_write_lock_wait_ms),
+      hold: only(metrics.pos_db_write_lock_hold_ms)
+    },
+    eventLoopLagMs: Object.fromEntries(metrics.pos_event_loop_lag_ms.map(({ labels, value }) => [labels.stat, value]))
+  };
+}
+
+function gitCommit() {
+  try {
+    return execSync('git rev-parse --short HEAD', { cwd: __dirname, stdio: ['ignore', 'pipe', 'ignore'] }).toString().trim();
+  } catch (error) {
+    return null;
+  }
+}
+
+// Cambio de p99 y throughput por endpoint contra un reporte anterior
+function compare(previous, current) {
+  const rows = {};
+  const regressions = [];
+  const change = (before, after) => (before ? Math.round(((after - before) / before) * 1000) / 10 : null);
+
+  for (const [name, now] of Object.entries(current.endpoints)) {
+    const before = previous.endpoints[name];
+    if (!before) continue;
+    const p99 = change(before.p99, now.p99);
+    rows[name] = {
+      'p99 antes': before.p99,
+      'p99 ahora': now.p99,
+      'p99 %': p99,
+      'ops/s antes': before.throughput,
+      'ops/s ahora': now.throughput
+    };
+    if (options.maxRegression && p99 !== null && p99 > options.maxRegression) regressions.push(name);
+  }
+  return { rows, regressions };
+}
+
+async function main() {
+  const log = console.log;
+  const started = Date.now();
+
+  // El servidor escribe una línea por cada conexión y petición; durante la
+  // corrida solo se muestran los mensajes del benchmark
+  console.log = () => {};
+  await prepareServer();
+  console.log = log;
+
+  let seeding = null;
+  if (!options.template) {
+    seeding = await seedRestaurant(options, { log });
+  }
+  const restaurant = await loadRestaurant();
+
+  await new Promise(resolve => server.listen(0, resolve));
+  const base = `http://localhost:${server.address().port}`;
+
+  // Tabletas: la mayoría meseros, luego caja y un admin; cada mesero atiende
+  // su sección del salón para no pelear por las mismas mesas
+  const staff = [...restaurant.staff].sort((a, b) => ['waiter', 'cashier', 'admin'].indexOf(a.role) - ['waiter', 'cashier', 'admin'].indexOf(b.role));
+  const users = staff.slice(0, options.tablets);
+  const waiters = users.filter(user => user.role === 'waiter').length || 1;
+  const recorder = new Recorder();
+  const tablets = users.map((user, index) => new Tablet({
+    index,
+    user,
+    base,
+    recorder,
+    restaurant,
+    section: restaurant.tables.filter((_, i) => i % waiters === index % waiters)
+  }));
+
+  log(`🍽️  ${tablets.length} tabletas (${users.map(user => user.role).join(', ')}), ${options.orders} operaciones cada una`);
+  console.log = () => {};
+  await Promise.all(tablets.map(tablet => tablet.start()));
+
+  resetServerMetrics();
+  const runStart = process.hrtime.bigint();
+  await Promise.all(tablets.map(tablet => tablet.run(options.orders)));
+  const elapsedMs = Number(process.hrtime.bigint() - runStart) / 1e6;
+  await sleep(200); // últimos eventos agrupados del bus
+  console.log = log;
+
+  const endpoints = recorder.summary(elapsedMs);
+  const totals = Object.values(endpoints).reduce((sum, entry) => ({
+    requests: sum.requests + entry.count,
+    errors: sum.errors + entry.errors,
+    serverErrors: sum.serverErrors + entry.serverErrors
+  }), { requests: 0, errors: 0, serverErrors: 0 });
+  const eventLatencies = tablets.flatMap(tablet => tablet.events.latencies);
+
+  const report = {
+    commit: gitCommit(),
+    date: new Date().toISOString(),
+    node: process.version,
+    options: { tablets: tablets.length, orders: options.orders, thinkMs: options.thinkMs, seed: options.seed, template: options.template || null },
+    seeding: seeding && { counts: seeding.counts, timingsMs: seeding.timings },
+    run: {
+      elapsedMs: Math.round(elapsedMs),
+      ...totals,
+      throughput: Math.round((totals.requests / (elapsedMs / 1000)) * 100) / 100
+    },
+    endpoints,
+    server: serverMetrics(),
+    sockets: {
+      events: eventLatencies.length,
+      perTablet: Math.round(eventLatencies.length / tablets.length),
+      deliveryMs: summarize(eventLatencies, elapsedMs)
+    }
+  };
+
+  printTable(`Hora pico — ${report.run.requests} peticiones en ${report.run.elapsedMs} ms (${report.run.throughput} req/s)`,
+    Object.fromEntries(Object.entries(endpoints).map(([name, entry]) => [name, {
+      peticiones: entry.count,
+      'ops/s': entry.throughput,
+      'p50 ms': entry.p50,
+      'p99 ms': entry.p99,
+      errores: entry.errors
+    }])));
+  printTable('Candado del escritor de SQLite y event loop', {
+    'espera candado': { n: report.server.writeLock.wait.count, 'p50 ms': report.server.writeLock.wait.p50 || 0, 'p99 ms': report.server.writeLock.wait.p99 || 0 },
+    'retención candado': { n: report.server.writeLock.hold.count, 'p50 ms': report.server.writeLock.hold.p50 || 0, 'p99 ms': report.server.writeLock.hold.p99 || 0 },
+    'retraso event loop': { n: '-', 'p50 ms': report.server.eventLoopLagMs.p50, 'p99 ms': report.server.eventLoopLagMs.p99 },
+    'entrega de eventos': { n: report.sockets.events, 'p50 ms': report.sockets.deliveryMs.p50, 'p99 ms': report.sockets.deliveryMs.p99 }
+  });
+
+  let regressions = [];
+  if (options.compare) {
+    const previous = JSON.parse(fs.readFileSync(options.compare, 'utf8'));
+    const result = compare(previous, report);
+    regressions = result.regressions;
+    printTable(`Contra ${previous.commit || options.compare}`, result.rows);
+  }
+
+  if (options.out) {
+    fs.writeFileSync(options.out, JSON.stringify(report, null, 2));
+    log(`💾 Reporte en ${options.out}`);
+  }
+
+  tablets.forEach(tablet => tablet.stop());
+  console.log = () => {};
+  await closeServer();
+  console.log = log;
+  tempDb.cleanup();
+
+  log(`⏱️  Total con siembra y arranque: ${Math.round((Date.now() - started) / 1000)} s`);
+  if (totals.serverErrors > 0) {
+    console.error(`❌ ${totals.serverErrors} respuestas 5xx o sin respuesta`);
+    process.exit(1);
+  }
+  if (regressions.length > 0) {
+    console.error(`❌ p99 empeoró más de ${options.maxRegression}% en: ${regressions.join(', ')}`);
+    process.exit(1);
+  }
+  process.exit(0);
+}
+
+main().catch(error => {
+  console.error('❌ Error en benchmark:', error);
+  tempDb.cleanup();
+  process.exit(1);
+});
@@ -0,0 +1,153 @@
+// backend/scripts/bench/sale-commit.js
+// Compara la ruta anterior de POST /api/sales (una consulta por línea) contra
+// services/saleCommit (lecturas y escrituras por lotes).
+//
+// Uso: node scripts/bench/sale-commit.js [tickets] [lineas] [tablets]
+const { useTempDatabase, runConcurrent, printTable } = require('./stats');
+
+const TICKETS = parseInt(process.argv[2] || '500');
+const LINES = parseInt(process.argv[3] || '15');
+const TABLETS = parseInt(process.argv[4] || '10');
+
+const tempDb = useTempDatabase('pos-bench-sales');
+
+const {
+  initDatabase, sequelize, Sale, SaleItem, MenuItem, User, Table, Customer, Shift, Category
+} = require('../../database/init');
+const { commitSale } = require('../../services/saleCommit');
+
+// Ruta anterior, conservada aquí solo como referencia de comparación
+async function legacyCreateSale(data, currentUser) {
+  const transaction = await sequelize.transaction();
+  try {
+    const { items, tableId, orderType = 'dine-in', paymentMethod, notes, deviceId } = data;
+
+    await Table.findByPk(tableId);
+
+    let subtotal = 0;
+    const saleItems = [];
+    for (const item of items) {
+      const menuItem = await MenuItem.findByPk(item.id);
+      if (menuItem.stock !== -1 && menuItem.stock < item.quantity) {
+        throw new Error(`Stock insuficiente para ${menuItem.name}`);
+      }
+      const totalPrice = parseFloat(menuItem.price) * item.quantity;
+      subtotal += totalPrice;
+      saleItems.push({
+        menuItemId: menuItem.id,
+        quantity: item.quantity,
+        unitPrice: menuItem.price,
+        totalPrice,
+        notes: item.notes || null
+      });
+    }
+
+    const activeShift = await Shift.findOne({ where: { userId: currentUser.userId, status: 'active' } });
+
+    const sale = await Sale.create({
+      subtotal: subtotal.toFixed(2),
+      tax: '0.00',
+      deliveryFee: '0.00',
+      total: subtotal.toFixed(2),
+      paymentMethod: paymentMethod || 'cash',
+      orderType,
+      notes,
+      tableId,
+      userId: currentUser.userId,
+      shiftId: activeShift ? activeShift.id : null,
+      deviceId: deviceId || null,
+      synced: false
+    }, { transaction });
+
+    for (const item of saleItems) {
+      await SaleItem.create({ ...item, saleId: sale.id }, { transaction });
+      const menuItem = await MenuItem.findByPk(item.menuItemId);
+      if (menuItem.stock !== -1) {
+        await menuItem.update({ stock: menuItem.stock - item.quantity }, { transaction });
+      }
+    }
+
+    const table = await Table.findByPk(tableId);
+    await table.update({ status: 'occupied' }, { transaction });
+
+    await transaction.commit();
+
+    return Sale.findByPk(sale.id, {
+      include: [
+        { model: SaleItem, include: [MenuItem] },
+        { model: User, attributes: ['id', 'name', 'username'] },
+        { model: Table, attributes: ['id', 'number'] },
+        { model: Customer, attributes: ['id', 'name', 'phone', 'address1', 'address2', 'city'] }
+      ]
+    });
+  } catch (error) {
+    await transaction.rollback();
+    throw error;
+  }
+}
+
+async function seed() {
+  const category = await Category.create({ name: 'Benchmark', sortOrder: 99 });
+  const menuItems = await MenuItem.bulkCreate(
+    Array.from({ length: 200 }, (_, i) => ({
+      name: `Producto ${i + 1}`,
+      price: 20 + (i % 50),
+      cost: 10,
+      categoryId: category.id,
+      // La mitad con stock controlado para ejercitar el descuento
+      stock: i % 2 === 0 ? 1000000 : -1
+    }))
+  );
+  const tables = await Table.bulkCreate(
+    Array.from({ length: 30 }, (_, i) => ({ number: 100 + i, capacity: 4 }))
+  );
+  const user = await User.findOne({ where: { username: 'admin' } });
+  await Shift.create({ userId: user.id, startTime: new Date(), status: 'active' });
+
+  return { menuItemIds: menuItems.map(m => m.id), tableIds: tables.map(t => t.id), user };
+}
+
+function buildTicket(index, fixtures) {
+  const items = Array.from({ length: LINES }, (_, line) => ({
+    id: fixtures.menuItemIds[(index * 7 + line * 13) % fixtures.menuItemIds.length],
+    quantity: 1 + (line % 3)
+  }));
+
+  return {
+    items,
+    tableId: fixtures.tableIds[index % fixtures.tableIds.length],
+    orderType: 'dine-in',
+    paymentMethod: index % 2 === 0 ? 'cash' : 'card',
+    deviceId: `tablet-${index % TABLETS}`
+  };
+}
+
+async function main() {
+  await initDatabase();
+  const fixtures = await seed();
+  const currentUser = { userId: fixtures.user.id, username: 'admin', role: 'admin' };
+
+  // Calentamiento para que ambas rutas partan con la caché de páginas caliente
+  await commitSale(buildTicket(0, fixtures), currentUser);
+
+  const legacy = await runConcurrent(TICKETS, TABLETS, (i) =>
+    legacyCreateSale(buildTicket(i, fixtures), currentUser)
+  );
+  const batched = await runConcurrent(TICKETS, TABLETS, (i) =>
+    commitSale(buildTicket(i, fixtures), currentUser)
+  );
+
+  printTable(`POST /api/sales — ${TICKETS} tickets × ${LINES} líneas, ${TABLETS} tablets`, {
+    'anterior (por línea)': { 'tickets/s': legacy.throughput, 'p50 ms': legacy.p50, 'p99 ms': legacy.p99 },
+    'saleCommit (lotes)': { 'tickets/s': batched.throughput, 'p50 ms': batched.p50, 'p99 ms': batched.p99 }
+  });
+
+  await sequelize.close();
+  tempDb.cleanup();
+}
+
+main().catch(error => {
+  console.error('❌ Error en benchmark:', error);
+  tempDb.cleanup();
+  process.exit(1);
+});
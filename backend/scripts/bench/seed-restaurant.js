@@ -0,0 +1,165 @@
+// backend/scripts/bench/seed-restaurant.js
+// Generador de un restaurante con volumen real: catálogo, mesas, personal,
+// clientes y un año de ventas, con acumulados de reportes y totales de
+// turnos reconstruidos (como quedarían tras meses de operación).
+//
+// Todo es determinista (mismas semillas → mismos datos), así dos corridas
+// del benchmark en commits distintos parten de la misma base.
+//
+// Uso como plantilla para restaurant-day.js (se siembra una vez y se copia):
+//   node scripts/bench/seed-restaurant.js --out /tmp/restaurante.sqlite [--days 365] [--customers 50000]
+//     [--menu-items 200] [--sales-per-day 120] [--tables 30]
+const fs = require('fs');
+const path = require('path');
+
+const BENCH_PASSWORD = 'bench123';
+
+const DEFAULT_VOLUMES = {
+  days: 365,
+  salesPerDay: 120,
+  customers: 50000,
+  menuItems: 200,
+  categories: 12,
+  tables: 30,
+  staff: { waiter: 8, cashier: 2, admin: 1 }
+};
+
+// Lee `--nombre valor` de argv con los valores por defecto dados
+function parseOptions(argv, defaults) {
+  const options = { ...defaults };
+  for (let i = 0; i < argv.length; i++) {
+    if (!argv[i].startsWith('--')) continue;
+    const key = argv[i].slice(2).replace(/-([a-z])/g, (_, letter) => letter.toUpperCase());
+    const next = argv[i + 1];
+    const value = next === undefined || next.startsWith('--') ? true : argv[++i];
+    options[key] = typeof defaults[key] === 'number' ? parseFloat(value) : value;
+  }
+  return options;
+}
+
+/**
+ * Siembra la base ya inicializada (initDatabase) con los volúmenes dados.
+ * Devuelve la configuración usada, lo insertado y el tiempo de cada fase.
+ */
+async function seedRestaurant(volumes = {}, { log = console.log } = {}) {
+  const { sequelize } = require('../../database/init');
+  const { passwordHasher } = require('../../services/passwordHasher');
+  const { rebuildRollups } = require('../../services/salesRollup');
+  const { rebuildShiftTotals } = require('../../services/shiftTotals');
+  const { createRandom, seedCatalog, seedTables, seedCustomers, seedStaff, seedSalesHistory } = require('./fixtures');
+
+  const config = { ...DEFAULT_VOLUMES, ...volumes };
+  const timings = {};
+  const phase = async (name, fn) => {
+    const start = Date.now();
+    const result = await fn();
+    timings[name] = Date.now() - start;
+    log(`   ${name}: ${timings[name]} ms`);
+    return result;
+  };
+
+  log(`🌱 Sembrando restaurante: ${config.days} días × ${config.salesPerDay} ventas, ${config.customers} clientes, ${config.menuItems} productos`);
+
+  const menuItems = await phase('catálogo', () => seedCatalog(sequelize, {
+    categories: config.categories,
+    menuItems: config.menuItems,
+    random: createRandom(7)
+  }));
+  const tables = await phase('mesas', () => seedTables(sequelize, { count: config.tables }));
+  const staff = await phase('personal', async () => seedStaff(sequelize, {
+    roles: config.staff,
+    passwordHash: await passwordHasher.hash(BENCH_PASSWORD)
+  }));
+  const customerIds = await phase('clientes', () => seedCustomers(sequelize, {
+    count: config.customers,
+    random: createRandom(11)
+  }));
+
+  const history = await phase('ventas', () => seedSalesHistory(sequelize, {
+    days: config.days,
+    salesPerDay: config.salesPerDay,
+    menuItems,
+    userIds: staff.filter(user => user.role !== 'admin').map(user => user.id),
+    tableIds: tables.map(table => table.id),
+    customerIds,
+    random: createRandom(42),
+    onProgress: (done, total) => {
+      if (done % 60 === 0 || done === total) log(`   ventas: día ${done}/${total}`);
+    }
+  }));
+
+  await phase('acumulados', () => rebuildRollups());
+  await phase('turnos', () => rebuildShiftTotals());
+
+  return {
+    config,
+    timings,
+    counts: { ...history, customers: customerIds.length, menuItems: menuItems.length, tables: tables.length, staff: staff.length }
+  };
+}
+
+// Ids que usan los escenarios, leídos de una base ya sembrada (p. ej. una
+// copia de la plantilla generada con --out)
+async function loadRestaurant() {
+  const { sequelize } = require('../../database/init');
+  const { QueryTypes } = require('sequelize');
+  const select = (sql) => sequelize.query(sql, { type: QueryTypes.SELECT });
+
+  const [menuItems, tables, staff, customers] = await Promise.all([
+    select('SELECT id, price, stock FROM menu_items WHERE isActive = 1 ORDER BY id'),
+    select('SELECT id, number, capacity FROM tables WHERE isActive = 1 ORDER BY id'),
+    select("SELECT id, username, role FROM users WHERE username LIKE 'bench-%' AND isActive = 1 ORDER BY id"),
+    select('SELECT id, phone, name FROM customers WHERE isActive = 1 ORDER BY id')
+  ]);
+  if (staff.length === 0) {
+    throw new Error('La base no tiene personal de benchmark; genérala con seed-restaurant.js');
+  }
+  return { menuItems, tables, staff, customers };
+}
+
+async function main() {
+  const options = parseOptions(process.argv.slice(2), {
+    out: '',
+    days: DEFAULT_VOLUMES.days,
+    salesPerDay: DEFAULT_VOLUMES.salesPerDay,
+    customers: DEFAULT_VOLUMES.customers,
+    menuItems: DEFAULT_VOLUMES.menuItems,
+    tables: DEFAULT_VOLUMES.tables
+  });
+  if (!options.out) {
+    console.error('Uso: node scripts/bench/seed-restaurant.js --out archivo.sqlite [--days N] [--customers N] ...');
+    process.exit(1);
+  }
+
+  const target = path.resolve(options.out);
+  if (fs.existsSync(target)) fs.rmSync(target);
+  process.env.DB_PATH = target;
+  process.env.NODE_ENV = process.env.NODE_ENV || 'benchmark';
+
+  const { initDatabase, sequelize } = require('../../database/init');
+  const start = Date.now();
+  await initDatabase();
+  const { counts } = await seedRestaurant(options);
+
+  // Dejar todo en el archivo principal (sin -wal) para poder copiarlo
+  await sequelize.query('PRAGMA wal_checkpoint(TRUNCATE)');
+  await sequelize.close();
+
+  console.log(`✅ ${target}: ${counts.sales} ventas, ${counts.customers} clientes activos en ${Date.now() - start} ms`);
+  process.exit(0);
+}
+
+if (require.main === module) {
+  main().catch(error => {
+    console.error('❌ Error sembrando el restaurante:', error);
+    process.exit(1);
+  });
+}
+
+module.exports = {
+  BENCH_PASSWORD,
+  DEFAULT_VOLUMES,
+  parseOptions,
+  seedRestaurant,
+  loadRestaurant
+};
@@ -0,0 +1,181 @@
+// backend/scripts/bench/socket-fanout.js
+// Compara la difusión anterior (io.emit del ticket completo a todos, más el
+// reenvío del cliente) contra services/eventBus (deltas por canal, agrupación
+// de ráfagas y seq) con 50 clientes simulados en un servidor Socket.io local.
+// Mide bytes recibidos por segundo y latencia publicación → recepción.
+//
+// Uso: node scripts/bench/socket-fanout.js [ventas] [clientes] [intervaloMs]
+const http = require('http');
+const jwt = require('jsonwebtoken');
+const socketIo = require('socket.io');
+const ioClient = require('socket.io-client');
+const { summarize, printTable } = require('./stats');
+
+const SALES = parseInt(process.argv[2] || '300');
+const CLIENTS = parseInt(process.argv[3] || '50');
+const INTERVAL_MS = parseInt(process.argv[4] || '5');
+const LINES = 12;
+
+process.env.JWT_SECRET = process.env.JWT_SECRET || 'bench-secret';
+const { EventBus, saleDelta } = require('../../services/eventBus');
+
+// Reparto de dispositivos: cocina, caja, admin y meseros
+function clientProfile(index) {
+  if (index % 10 < 2) return { deviceType: 'kitchen' };
+  if (index % 10 < 4) return { role: 'cashier' };
+  if (index % 10 < 5) return { role: 'admin' };
+  return { role: 'waiter' };
+}
+
+// Venta con el mismo grafo que devuelve commitSale (SaleItems + MenuItem, etc.)
+function buildCompleteSale(id) {
+  return {
+    id,
+    subtotal: '480.00', tax: '0.00', discount: '0.00', deliveryFee: '0.00', total: '480.00',
+    paymentMethod: 'cash', orderType: 'dine-in', status: 'completed',
+    notes: null, tableId: (id % 30) + 1, customerId: null, userId: 2, shiftId: 1,
+    deviceId: `tablet-${id % 10}`, deliveryAddress: null, synced: false, syncedAt: null,
+    createdAt: new Date().toISOString(), updatedAt: new Date().toISOString(),
+    SaleItems: Array.from({ length: LINES }, (_, line) => ({
+      id: id * 100 + line, saleId: id, menuItemId: line + 1, quantity: 1 + (line % 3),
+      unitPrice: '40.00', totalPrice: '40.00', notes: line === 0 ? 'Sin cebolla' : null,
+      createdAt: new Date().toISOString(), updatedAt: new Date().toISOString(),
+      MenuItem: {
+        id: line + 1, name: `Producto ${line + 1}`, description: 'Descripción del producto de prueba',
+        price: '40.00', cost: '15.00', categoryId: 1, image: null, stock: -1, isActive: true,
+        createdAt: new Date().toISOString(), updatedAt: new Date().toISOString()
+      }
+    })),
+    User: { id: 2, name: 'Mesero Uno', username: 'mesero1' },
+    Table: { id: (id % 30) + 1, number: (id % 30) + 1 },
+    Customer: null
+  };
+}
+
+async function startServer(mode) {
+  const server = http.createServer();
+  const io = socketIo(server);
+  let bus = null;
+
+  if (mode === 'bus') {
+    bus = new EventBus(io);
+    io.on('connection', socket => bus.attach(socket));
+  } else {
+    io.on('connection', socket => {
+      // Reenvío que hacía el servidor de lo que mandaba el cliente
+      socket.on('new-sale', saleData => socket.broadcast.emit('sale-synced', saleData));
+    });
+  }
+
+  await new Promise(resolve => server.listen(0, resolve));
+  return { server, io, bus, port: server.address().port };
+}
+
+async function connectClients(port) {
+  const clients = [];
+
+  for (let i = 0; i < CLIENTS; i++) {
+    const profile = clientProfile(i);
+    const token = profile.role ? jwt.sign({ userId: i + 1, role: profile.role }, process.env.JWT_SECRET) : undefined;
+    const socket = ioClient(`http://localhost:${port}`, {
+      transports: ['websocket'],
+      auth: { token, deviceType: profile.deviceType }
+    });
+    const client = { socket, bytes: 0, messages: 0, events: 0, latencies: [] };
+
+    socket.onAny((event, ...args) => {
+      const now = Date.now();
+      client.bytes += Buffer.byteLength(JSON.stringify([event, ...args]));
+      client.messages += 1;
+
+      if (event === 'events') {
+        for (const envelope of args[0].events) {
+          client.events += 1;
+          client.latencies.push(now - envelope.at);
+        }
+      } else if (args[0] && args[0].sentAt) {
+        client.events += 1;
+        client.latencies.push(now - args[0].sentAt);
+      }
+    });
+
+    await new Promise(resolve => socket.on('connect', resolve));
+    clients.push(client);
+  }
+
+  return clients;
+}
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+// Misma carga para ambos modos: venta + ocupar mesa + dos cambios de estado
+async function publishLoad(mode, { io, bus }, clients) {
+  const origin = clients[clients.length - 1].socket;
+
+  for (let id = 1; id <= SALES; id++) {
+    const sale = buildCompleteSale(id);
+    const statuses = ['occupied', 'cleaning', 'occupied'];
+
+    if (mode === 'bus') {
+      bus.publish('new-sale', saleDelta(sale));
+      for (const status of statuses) {
+        bus.publish('table-updated', { id: sale.tableId, status }, { key: `table:${sale.tableId}` });
+      }
+    } else {
+      const sentAt = Date.now();
+      io.emit('new-sale', { sale, timestamp: new Date(sentAt).toISOString(), sentAt });
+      origin.emit('new-sale', { ...sale, sentAt });
+      for (const status of statuses) {
+        io.emit('table-updated', { tableId: sale.tableId, status, timestamp: new Date().toISOString(), sentAt: Date.now() });
+      }
+    }
+
+    await sleep(INTERVAL_MS);
+  }
+}
+
+async function run(mode) {
+  const context = await startServer(mode);
+  const clients = await connectClients(context.port);
+  clients.forEach(client => { client.bytes = 0; client.messages = 0; });
+
+  const start = Date.now();
+  await publishLoad(mode, context, clients);
+  await sleep(500);
+  const elapsedMs = Date.now() - start;
+
+  const latencies = clients.flatMap(client => client.latencies);
+  const bytes = clients.reduce((sum, client) => sum + client.bytes, 0);
+  const messages = clients.reduce((sum, client) => sum + client.messages, 0);
+  const events = clients.reduce((sum, client) => sum + client.events, 0);
+  const latency = summarize(latencies, elapsedMs);
+
+  clients.forEach(client => client.socket.close());
+  context.io.close();
+  context.server.close();
+
+  return {
+    'KB/s': Math.round(bytes / 1024 / (elapsedMs / 1000)),
+    'MB total': Math.round(bytes / 1024 / 1024 * 100) / 100,
+    mensajes: messages,
+    eventos: events,
+    'p50 ms': latency.p50,
+    'p99 ms': latency.p99
+  };
+}
+
+async function main() {
+  const legacy = await run('legacy');
+  const bus = await run('bus');
+
+  printTable(`Socket.io — ${SALES} ventas × ${LINES} líneas, ${CLIENTS} clientes, cada ${INTERVAL_MS} ms`, {
+    'io.emit (anterior)': legacy,
+    eventBus: bus
+  });
+  process.exit(0);
+}
+
+main().catch(error => {
+  console.error('❌ Error en benchmark:', error);
+  process.exit(1);
+});
@@ -0,0 +1,81 @@
+// backend/scripts/bench/stats.js
+// Utilidades compartidas por los benchmarks: percentiles, resúmenes y BD temporal
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+// Percentil sobre un arreglo ya ordenado (método nearest-rank)
+function percentile(sorted, p) {
+  if (sorted.length === 0) return 0;
+  const rank = Math.ceil((p / 100) * sorted.length) - 1;
+  return sorted[Math.min(sorted.length - 1, Math.max(0, rank))];
+}
+
+// Resume latencias (ms) y duración total (ms) en métricas comparables
+function summarize(latencies, elapsedMs) {
+  const sorted = [...latencies].sort((a, b) => a - b);
+  const round = (value) => Math.round(value * 100) / 100;
+
+  return {
+    count: sorted.length,
+    throughput: round(sorted.length / (elapsedMs / 1000)),
+    p50: round(percentile(sorted, 50)),
+    p95: round(percentile(sorted, 95)),
+    p99: round(percentile(sorted, 99)),
+    max: round(sorted[sorted.length - 1] || 0)
+  };
+}
+
+// Mide una función asíncrona y devuelve su latencia en ms
+async function timed(fn) {
+  const start = process.hrtime.bigint();
+  await fn();
+  return Number(process.hrtime.bigint() - start) / 1e6;
+}
+
+// Ejecuta `total` tareas con `concurrency` trabajadores simultáneos
+async function runConcurrent(total, concurrency, task) {
+  const latencies = [];
+  let next = 0;
+  const start = process.hrtime.bigint();
+
+  const worker = async () => {
+    while (next < total) {
+      const index = next++;
+      latencies.push(await timed(() => task(index)));
+    }
+  };
+
+  await Promise.all(Array.from({ length: concurrency }, worker));
+  const elapsedMs = Number(process.hrtime.bigint() - start) / 1e6;
+
+  return summarize(latencies, elapsedMs);
+}
+
+// Configura DB_PATH a un archivo temporal; debe llamarse antes de cargar database/init
+function useTempDatabase(prefix = 'pos-bench') {
+  const dir = fs.mkdtempSync(path.join(os.tmpdir(), `${prefix}-`));
+  const dbPath = path.join(dir, 'pos.sqlite');
+  process.env.DB_PATH = dbPath;
+  process.env.NODE_ENV = process.env.NODE_ENV || 'benchmark';
+
+  return {
+    dbPath,
+    cleanup: () => fs.rmSync(dir, { recursive: true, force: true })
+  };
+}
+
+// Imprime una tabla simple con los resultados
+function printTable(title, rows) {
+  console.log(`\n📊 ${title}`);
+  console.table(rows);
+}
+
+module.exports = {
+  percentile,
+  summarize,
+  timed,
+  runConcurrent,
+  useTempDatabase,
+  printTable
+};
@@ -0,0 +1,123 @@
+// backend/scripts/bench/sync-load.js
+// Prueba de carga de POST /api/sync/sales: varios dispositivos suben su cola
+// offline al mismo tiempo y después la reenvían completa (reintento tras
+// reconexión). Verifica que el reenvío no cree duplicados.
+//
+// Uso: node scripts/bench/sync-load.js [ventas] [dispositivos] [ventasPorPeticion]
+const { useTempDatabase, runConcurrent, printTable } = require('./stats');
+
+const SALES = parseInt(process.argv[2] || '1000');
+const DEVICES = parseInt(process.argv[3] || '5');
+const BATCH = parseInt(process.argv[4] || '100');
+
+const tempDb = useTempDatabase('pos-bench-sync');
+
+const { initDatabase, sequelize, Sale, SaleItem, MenuItem, User, Category } = require('../../database/init');
+const { ingestSales } = require('../../services/syncIngest');
+
+async function seed() {
+  const category = await Category.create({ name: 'Benchmark', sortOrder: 99 });
+  const menuItems = await MenuItem.bulkCreate(
+    Array.from({ length: 100 }, (_, i) => ({
+      name: `Producto ${i + 1}`,
+      price: 20 + (i % 40),
+      cost: 10,
+      categoryId: category.id,
+      stock: i % 2 === 0 ? 1000000 : -1
+    }))
+  );
+  const user = await User.findOne({ where: { username: 'admin' } });
+  return { menuItems, user };
+}
+
+// Cola offline de cada dispositivo, partida en peticiones de BATCH ventas
+function buildRequests({ menuItems }) {
+  const perDevice = Math.ceil(SALES / DEVICES);
+  const requests = [];
+  const start = Date.now() - SALES * 60000;
+
+  for (let device = 0; device < DEVICES; device++) {
+    const deviceId = `tablet-${device}`;
+    const queue = [];
+
+    for (let n = 0; n < perDevice && device * perDevice + n < SALES; n++) {
+      const items = Array.from({ length: 1 + (n % 6) }, (_, line) => {
+        const menuItem = menuItems[(n * 7 + line * 11 + device) % menuItems.length];
+        return { menuItemId: menuItem.id, quantity: 1 + (line % 3), unitPrice: menuItem.price };
+      });
+      queue.push({
+        clientId: `${deviceId}-${n}`,
+        deviceId,
+        items,
+        paymentMethod: n % 3 === 0 ? 'card' : 'cash',
+        orderType: 'takeaway',
+        createdAt: new Date(start + (device * perDevice + n) * 60000).toISOString()
+      });
+    }
+
+    for (let i = 0; i < queue.length; i += BATCH) {
+      requests.push({ deviceId, sales: queue.slice(i, i + BATCH) });
+    }
+  }
+
+  return requests;
+}
+
+async function upload(requests, currentUser) {
+  const totals = { created: 0, duplicate: 0, rejected: 0 };
+  const summary = await runConcurrent(requests.length, DEVICES, async (i) => {
+    const { counts } = await ingestSales(requests[i].sales, { deviceId: requests[i].deviceId, currentUser });
+    totals.created += counts.created;
+    totals.duplicate += counts.duplicate;
+    totals.rejected += counts.rejected;
+  });
+  return { summary, totals };
+}
+
+async function main() {
+  await initDatabase();
+  const fixtures = await seed();
+  const currentUser = { userId: fixtures.user.id, username: 'admin', role: 'admin' };
+  const requests = buildRequests(fixtures);
+
+  const first = await upload(requests, currentUser);
+  const replay = await upload(requests, currentUser);
+
+  const saleCount = await Sale.count();
+  const itemCount = await SaleItem.count();
+
+  const salesPerSecond = (totals, summary) =>
+    Math.round((totals.created + totals.duplicate) / (summary.count / summary.throughput));
+
+  printTable(`POST /api/sync/sales — ${SALES} ventas, ${DEVICES} dispositivos, ${BATCH} por petición`, {
+    'primera subida': {
+      'ventas/s': salesPerSecond(first.totals, first.summary),
+      'p50 ms': first.summary.p50,
+      'p99 ms': first.summary.p99,
+      creadas: first.totals.created,
+      duplicadas: first.totals.duplicate,
+      rechazadas: first.totals.rejected
+    },
+    reenvío: {
+      'ventas/s': salesPerSecond(replay.totals, replay.summary),
+      'p50 ms': replay.summary.p50,
+      'p99 ms': replay.summary.p99,
+      creadas: replay.totals.created,
+      duplicadas: replay.totals.duplicate,
+      rechazadas: replay.totals.rejected
+    }
+  });
+
+  const ok = saleCount === SALES && replay.totals.created === 0 && replay.totals.duplicate === SALES;
+  console.log(`${ok ? '✅' : '❌'} ${saleCount} ventas y ${itemCount} líneas en la base tras el reenvío`);
+
+  await sequelize.close();
+  tempDb.cleanup();
+  if (!ok) process.exit(1);
+}
+
+main().catch(error => {
+  console.error('❌ Error en benchmark:', error);
+  tempDb.cleanup();
+  process.exit(1);
+});
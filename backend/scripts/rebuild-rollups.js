@@ -0,0 +1,34 @@
+// backend/scripts/rebuild-rollups.js
+// Reconstruye los acumulados de reportes (sales_rollup, sales_item_rollup)
+// a partir de las ventas crudas.
+const path = require('path');
+
+if (!process.env.DB_PATH) {
+  process.env.DB_PATH = path.join(__dirname, '../database/pos.sqlite');
+}
+
+const { initDatabase, sequelize } = require('../database/init');
+const { rebuildRollups } = require('../services/salesRollup');
+
+async function main() {
+  try {
+    await initDatabase();
+
+    console.log('🔄 Reconstruyendo acumulados de ventas...');
+    const start = Date.now();
+    await rebuildRollups();
+
+    const [[{ buckets }]] = await sequelize.query('SELECT COUNT(*) AS buckets FROM sales_rollup');
+    console.log(`✅ ${buckets} buckets reconstruidos en ${Date.now() - start} ms`);
+
+    await sequelize.close();
+    process.exit(0);
+  } catch (error) {
+    console.error('❌ Error reconstruyendo acumulados:', error);
+    process.exit(1);
+  }
+}
+
+if (require.main === module) {
+  main();
+}
@@ -0,0 +1,50 @@
+// backend/scripts/verify-shift-totals.js
+// Compara los contadores de turno (shift_totals y los totales de `shifts`)
+// con las ventas crudas. Con --repair reconstruye los turnos que no cuadran.
+//   npm run shifts:verify
+//   npm run shifts:verify -- --repair
+const path = require('path');
+
+if (!process.env.DB_PATH) {
+  process.env.DB_PATH = path.join(__dirname, '../database/pos.sqlite');
+}
+
+const { initDatabase, sequelize } = require('../database/init');
+const { verifyShiftTotals } = require('../services/shiftTotals');
+
+async function main() {
+  const repair = process.argv.includes('--repair');
+
+  try {
+    await initDatabase();
+
+    console.log(`🔍 Verificando contadores de turno${repair ? ' (con reparación)' : ''}...`);
+    const start = Date.now();
+    const { shifts, repaired, mismatches } = await verifyShiftTotals({ repair });
+
+    for (const mismatch of mismatches.slice(0, 50)) {
+      console.log(`  turno ${mismatch.shiftId} [${mismatch.paymentMethod}] ${mismatch.field}: esperado ${mismatch.expected}, registrado ${mismatch.actual}`);
+    }
+    if (mismatches.length > 50) {
+      console.log(`  ... y ${mismatches.length - 50} diferencias más`);
+    }
+
+    if (mismatches.length === 0) {
+      console.log(`✅ ${shifts} turnos verificados sin diferencias en ${Date.now() - start} ms`);
+    } else if (repair) {
+      console.log(`🔧 ${repaired} turnos reconstruidos en ${Date.now() - start} ms`);
+    } else {
+      console.log(`⚠️  ${mismatches.length} diferencias; ejecuta con --repair para reconstruir esos turnos`);
+    }
+
+    await sequelize.close();
+    process.exit(mismatches.length > 0 && !repair ? 2 : 0);
+  } catch (error) {
+    console.error('❌ Error verificando contadores de turno:', error);
+    process.exit(1);
+  }
+}
+
+if (require.main === module) {
+  main();
+}
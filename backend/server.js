@@ -2,7 +2,6 @@
 const express = require('express');
 const cors = require('cors');
 const helmet = require('helmet');
-const morgan = require('morgan');
 const compression = require('compression');
 const http = require('http');
 const socketIo = require('socket.io');
@@ -20,14 +19,30 @@ const tablesRoutes = require('./routes/tables');
 const customersRoutes = require('./routes/customers'); // ✅ AGREGAR ESTA LÍNEA
 const reportsRoutes = require('./routes/reports');
 const syncRoutes = require('./routes/sync');
+const cartsRoutes = require('./routes/carts');
+const metricsRoutes = require('./routes/metrics');
+const inventoryRoutes = require('./routes/inventory');
+const bootstrapRoutes = require('./routes/bootstrap');
 
 // Importar modelos de base de datos
 const { initDatabase, sequelize } = require('./database/init');
+const { readReplicaMiddleware } = require('./database/storage');
+const { createEventBus } = require('./services/eventBus');
+const { catalogCache } = require('./services/catalogCache');
+const { cartStore } = require('./services/cartStore');
+const { tableState, TableStateError } = require('./services/tableState');
+const ipc = require('./services/clusterIpc');
+const { registry, httpMetrics, instrumentSocketIo } = require('./services/metrics');
+const { logger } = require('./services/logger');
+const { passwordHasher } = require('./services/passwordHasher');
+const { tokenCache } = require('./services/tokenCache');
+const { maintenance } = require('./services/maintenance');
 
 // Configuración
 const PORT = process.env.PORT || 3001;
 const SOCKET_PORT = process.env.SOCKET_PORT || 3002;
 const NODE_ENV = process.env.NODE_ENV || 'development';
+const SHUTDOWN_TIMEOUT_MS = parseInt(process.env.SHUTDOWN_TIMEOUT_MS || '10000');
 
 // Crear aplicación Express
 const app = express();
@@ -39,9 +54,41 @@ const io = socketIo(server, {
     origin: process.env.CORS_ORIGIN?.split(',') || ["http://localhost:3000"],
     methods: ["GET", "POST", "PUT", "DELETE"],
     credentials: true
-  }
+  },
+  // En modo cluster cada conexión llega a cualquier worker: solo WebSocket
+  // (una sola conexión TCP) evita sesiones de polling repartidas
+  ...(ipc.isClusterWorker ? { transports: ['websocket'] } : {})
+});
+
+// Difusiones de Socket.io (rooms, io.emit) entre todos los workers
+if (ipc.isClusterWorker) {
+  const { createAdapter } = require('@socket.io/cluster-adapter');
+  io.adapter(createAdapter());
+}
+
+// Bus de eventos: deltas por canal (rol / tipo de dispositivo) con agrupación
+const events = createEventBus(io);
+
+// Avisar a los clientes cuando cambia el catálogo para que recarguen el menú
+catalogCache.on('change', ({ version, reason }) => {
+  events.publish('menu-version', { version, reason }, { key: 'menu-version' });
 });
 
+// Cambios de mesa confirmados en este proceso, con la versión del salón
+tableState.on('change', ({ version, table, meta }) => {
+  events.publish('table-updated', { ...meta, ...table, version }, { key: `table:${table.id}` });
+});
+
+// Métricas de Socket.io y de los servicios en /api/metrics
+instrumentSocketIo(io);
+registry.stats('pos_event_bus', 'Estadísticas del bus de eventos', () => events.stats);
+registry.stats('pos_catalog_cache', 'Estadísticas de la caché del catálogo', () => catalogCache.stats);
+registry.stats('pos_cart_store', 'Estadísticas de los carritos persistentes', () => cartStore.stats);
+registry.stats('pos_table_state', 'Motor de estado de mesas', () => ({ ...tableState.stats, version: tableState.version, tables: tableState.tables.size }));
+registry.stats('pos_password_pool', 'Pool de hash de contraseñas', () => passwordHasher.stats());
+registry.stats('pos_maintenance', 'Archivo de ventas y respaldos', () => maintenance.stats);
+registry.stats('pos_token_cache', 'Caché de tokens verificados', () => ({ ...tokenCache.stats, size: tokenCache.entries.size }));
+
 // Middleware de seguridad
 app.use(helmet({
   contentSecurityPolicy: false, // Deshabilitado para desarrollo
@@ -51,8 +98,8 @@ app.use(helmet({
 // Middleware de compresión
 app.use(compression());
 
-// Middleware de logging
-app.use(morgan(NODE_ENV === 'production' ? 'combined' : 'dev'));
+// Latencia por ruta y log de acceso con escritura en bloque (services/logger)
+app.use(httpMetrics((req, res, durationMs) => logger.access(req, res, durationMs)));
 
 // Middleware de parsing
 app.use(express.json({ limit: '10mb' }));
@@ -83,18 +130,13 @@ const corsOptions = {
 
 app.use(cors(corsOptions));
 
-// Middleware para agregar Socket.io a las requests
-app.use((req, res, next) => {
-  req.io = io;
-  next();
-});
+// Las peticiones GET usan conexiones de solo lectura (ver database/storage.js)
+app.use(readReplicaMiddleware);
 
-// Middleware de logging personalizado
+// Middleware para agregar Socket.io y el bus de eventos a las requests
 app.use((req, res, next) => {
-  const timestamp = new Date().toISOString();
-  const deviceId = req.headers['x-device-id'] || 'unknown';
-  
-  console.log(`[${timestamp}] ${req.method} ${req.path} - Device: ${deviceId}`);
+  req.io = io;
+  req.events = events;
   next();
 });
 
@@ -107,18 +149,34 @@ app.use('/api/tables', tablesRoutes);
 app.use('/api/customers', customersRoutes); // ✅ AGREGAR ESTA LÍNEA
 app.use('/api/reports', reportsRoutes);
 app.use('/api/sync', syncRoutes);
+app.use('/api/carts', cartsRoutes);
 app.use('/api/categories', categoriesRoutes);
+app.use('/api/metrics', metricsRoutes);
+app.use('/api/inventory', inventoryRoutes);
+app.use('/api/bootstrap', bootstrapRoutes);
 
-// Ruta de salud del servidor
-app.get('/api/health', (req, res) => {
-  res.json({
-    status: 'OK',
+// Ruta de salud del servidor (consulta real a la base de datos)
+app.get('/api/health', async (req, res) => {
+  const start = process.hrtime.bigint();
+  let database = 'Connected';
+  try {
+    await sequelize.query('SELECT 1');
+  } catch (error) {
+    console.error('Error verificando base de datos:', error);
+    database = 'Error';
+  }
+  const databaseMs = Math.round(Number(process.hrtime.bigint() - start) / 1e4) / 100;
+
+  res.status(database === 'Connected' ? 200 : 503).json({
+    status: database === 'Connected' ? 'OK' : 'ERROR',
     timestamp: new Date().toISOString(),
     uptime: process.uptime(),
     version: '1.0.0',
     environment: NODE_ENV,
-    database: 'Connected', // TODO: Verificar conexión real
-    sockets: io.engine.clientsCount
+    database,
+    databaseMs,
+    sockets: io.engine.clientsCount,
+    worker: ipc.workerId
   });
 });
 
@@ -145,7 +203,9 @@ app.get('/api/info', (req, res) => {
       tables: '/api/tables',
       customers: '/api/customers', // ✅ AGREGAR ESTA LÍNEA
       reports: '/api/reports',
-      sync: '/api/sync'
+      sync: '/api/sync',
+      carts: '/api/carts',
+      metrics: '/api/metrics'
     }
   });
 });
@@ -189,6 +249,11 @@ io.on('connection', (socket) => {
   socket.on('join-device-type', (deviceType) => {
     socket.join(deviceType);
     console.log(`📱 Dispositivo ${socket.id} se unió a sala: ${deviceType}`);
+
+    // Las pantallas de cocina reciben solo el canal de cocina
+    if (deviceType === 'kitchen') {
+      events.subscribe(socket, deviceType);
+    }
     
     // Notificar a otros dispositivos
     socket.to(deviceType).emit('device-connected', {
@@ -197,20 +262,22 @@ io.on('connection', (socket) => {
     });
   });
   
-  // Sincronizar venta nueva
-  socket.on('new-sale', (saleData) => {
-    console.log('💰 Nueva venta recibida:', saleData.id);
-    
-    // Broadcast a todos los dispositivos excepto el emisor
-    socket.broadcast.emit('sale-synced', saleData);
-  });
-  
-  // Sincronizar cambio de mesa
+  // Las ventas ya se publican desde POST /api/sales; reenviar lo que manda
+  // el cliente solo duplicaba el ticket completo en todas las pantallas
+
+  // Cambio de mesa hecho en el cliente: pasa por el motor de mesas (valida la
+  // transición y lo publica con su versión)
   socket.on('table-status-change', (tableData) => {
-    console.log('🪑 Estado de mesa actualizado:', tableData);
-    
-    // Broadcast a todos los dispositivos
-    socket.broadcast.emit('table-updated', tableData);
+    const tableId = tableData && (tableData.tableId || tableData.id);
+    if (!tableId || !tableData.status) return;
+
+    tableState.transition(tableId, tableData.status).catch(error => {
+      if (error instanceof TableStateError) {
+        socket.emit('table-status-rejected', { id: tableId, error: error.message });
+      } else {
+        console.error('Error cambiando estado de mesa:', error);
+      }
+    });
   });
   
   // Ping/Pong para mantener conexión
@@ -224,22 +291,36 @@ io.on('connection', (socket) => {
   });
 });
 
+// Prepara todo lo que el servidor necesita antes de escuchar (también lo usan
+// los benchmarks que levantan el servidor dentro de su propio proceso)
+async function prepareServer() {
+  // Inicializar base de datos
+  console.log('🗄️  Inicializando base de datos...');
+  await initDatabase();
+  console.log('✅ Base de datos inicializada correctamente');
+  
+  // Recuperar carritos abiertos desde el log de operaciones
+  const recovered = await cartStore.load();
+  console.log(`🛒 ${recovered.carts} carritos abiertos recuperados en ${recovered.elapsedMs} ms`);
+  
+  // Estado del salón en memoria
+  await tableState.ready();
+  console.log(`🍽️  ${tableState.tables.size} mesas cargadas (versión ${tableState.version})`);
+  
+  // Crear carpetas necesarias si no existen
+  const dirs = ['./logs', './database/backups', './uploads'];
+  dirs.forEach(dir => {
+    if (!fs.existsSync(dir)) {
+      fs.mkdirSync(dir, { recursive: true });
+      console.log(`📁 Carpeta creada: ${dir}`);
+    }
+  });
+}
+
 // Función para inicializar el servidor
 async function startServer() {
   try {
-    // Inicializar base de datos
-    console.log('🗄️  Inicializando base de datos...');
-    await initDatabase();
-    console.log('✅ Base de datos inicializada correctamente');
-    
-    // Crear carpetas necesarias si no existen
-    const dirs = ['./logs', './database/backups', './uploads'];
-    dirs.forEach(dir => {
-      if (!fs.existsSync(dir)) {
-        fs.mkdirSync(dir, { recursive: true });
-        console.log(`📁 Carpeta creada: ${dir}`);
-      }
-    });
+    await prepareServer();
     
     // Iniciar servidor HTTP
     server.listen(PORT, () => {
@@ -251,12 +332,19 @@ async function startServer() {
       console.log(`⚙️  Entorno: ${NODE_ENV}`);
       console.log(`📊 API Info: http://localhost:${PORT}/api/info`);
       console.log(`❤️  Health: http://localhost:${PORT}/api/health`);
+      if (ipc.isClusterWorker) {
+        console.log(`🧩 Worker ${ipc.workerId} (pid ${process.pid})`);
+      }
       console.log('========================================\n');
     });
     
-    // Manejo de cierre grácil
+    // Archivo de ventas frías y respaldos periódicos
+    maintenance.start();
+    
+    // Manejo de cierre grácil (el primario lo pide en reinicios escalonados)
     process.on('SIGTERM', gracefulShutdown);
     process.on('SIGINT', gracefulShutdown);
+    ipc.on('shutdown', ({ reason }) => gracefulShutdown(reason));
     
   } catch (error) {
     console.error('❌ Error al iniciar el servidor:', error);
@@ -264,28 +352,51 @@ async function startServer() {
   }
 }
 
+// Deja de aceptar conexiones, espera las peticiones en curso y cierra
+// eventos, carritos, base de datos y log de acceso
+async function closeServer() {
+  // Dejar de aceptar conexiones (en cluster el primario deja de enviar
+  // peticiones a este worker); las peticiones en curso terminan
+  const drained = new Promise(resolve => server.close(() => resolve()));
+  server.closeIdleConnections();
+  
+  // Enviar eventos pendientes y cerrar conexiones de Socket.io (los
+  // clientes se reconectan a otro worker y piden el replay desde su seq)
+  events.close();
+  io.close();
+  await drained;
+  
+  // Cancelar archivo o respaldo en curso (se retoman en la siguiente corrida)
+  await maintenance.stop();
+  
+  // Escribir operaciones de carritos pendientes y compactar
+  await cartStore.close();
+  
+  // Cerrar conexión de base de datos
+  await sequelize.close();
+  
+  // Escribir el log de acceso pendiente
+  await logger.close();
+}
+
 // Función de cierre grácil
+let shuttingDown = false;
 async function gracefulShutdown(signal) {
+  if (shuttingDown) return;
+  shuttingDown = true;
   console.log(`\n🛑 Recibida señal ${signal}. Cerrando servidor...`);
   
+  // Forzar cierre si algo no termina a tiempo
+  setTimeout(() => {
+    console.log('⚠️  Forzando cierre del servidor...');
+    process.exit(1);
+  }, SHUTDOWN_TIMEOUT_MS).unref();
+  
   try {
-    // Cerrar conexiones de Socket.io
-    io.close();
-    
-    // Cerrar conexión de base de datos
-    await sequelize.close();
-    
-    // Cerrar servidor HTTP
-    server.close(() => {
-      console.log('✅ Servidor cerrado correctamente');
-      process.exit(0);
-    });
+    await closeServer();
     
-    // Forzar cierre después de 10 segundos
-    setTimeout(() => {
-      console.log('⚠️  Forzando cierre del servidor...');
-      process.exit(1);
-    }, 10000);
+    console.log('✅ Servidor cerrado correctamente');
+    process.exit(0);
     
   } catch (error) {
     console.error('❌ Error durante el cierre:', error);
@@ -298,4 +409,4 @@ if (require.main === module) {
   startServer();
 }
 
-module.exports = { app, io, server };
\ No newline at end of file
+module.exports = { app, io, events, server, prepareServer, closeServer };
\ No newline at end of file
@@ -0,0 +1,503 @@
+// backend/services/archive.js
+// Ventas frías en archivos SQLite mensuales.
+//
+// La base principal (nivel caliente) guarda las ventas recientes. Las de
+// turnos cerrados (o sin turno) con más de ARCHIVE_AFTER_DAYS días se mueven
+// con sus líneas a un archivo por mes (ARCHIVE_DIR/sales-YYYY-MM.sqlite),
+// registrado en `archive_months`. Los acumulados de reportes y los contadores
+// de turno se quedan en la base principal: los reportes por día u hora no
+// necesitan los archivos.
+//
+// Lecturas: withTiers y eachTierWindow abren una conexión que adjunta
+// (ATTACH) solo los meses archivados que toca el rango, con vistas temporales
+// `sales` y `sale_items` que unen ambos niveles; las consultas existentes
+// (Sequelize o SQL) no cambian. SQLite adjunta como máximo MAX_ATTACHED bases
+// por conexión, así que los recorridos largos van por ventanas de meses.
+//
+// Traslado de un lote, cada paso en su propia transacción:
+//   1. el mes se registra con moving = 1
+//   2. las ventas y sus líneas se copian al archivo (INSERT OR REPLACE)
+//   3. se borran de la base principal las que siguen idénticas a su copia y
+//      se suman a los contadores del mes (el mes se vuelve visible)
+//   4. al terminar el mes se borran del archivo las copias que siguen en la
+//      base principal (cambiaron a medio traslado) y se pone moving = 0
+// Con la base principal en WAL una transacción sobre dos archivos no es
+// atómica entre ellos; con este orden una interrupción solo deja copias
+// duplicadas en un mes con moving = 1, que las vistas descartan, y la
+// siguiente corrida termina el traslado.
+const fs = require('fs');
+const path = require('path');
+const { QueryTypes } = require('sequelize');
+const { sequelize } = require('../database/init');
+const { withConnectionSetup } = require('../database/storage');
+const { HttpError } = require('./errors');
+
+const DAY = 86400000;
+
+// SQLITE_MAX_ATTACHED con el que se compila sqlite3 para Node
+const MAX_ATTACHED = 10;
+
+const archiveConfig = {
+  dir: path.resolve(process.env.ARCHIVE_DIR || path.join(path.dirname(sequelize.options.storage), 'archive')),
+  afterDays: parseInt(process.env.ARCHIVE_AFTER_DAYS || '180'),   // 0 = no archivar
+  batchSize: parseInt(process.env.ARCHIVE_BATCH_SIZE || '500')
+};
+
+// Tablas que se archivan y la columna que las liga a la venta
+const ARCHIVED_TABLES = [
+  { table: 'sales', saleColumn: 'id' },
+  { table: 'sale_items', saleColumn: 'saleId' }
+];
+
+// Índices de cada archivo (rangos de fechas, estado y líneas por venta)
+const ARCHIVE_INDEXES = [
+  { name: 'sales_created_at', table: 'sales', columns: ['createdAt'] },
+  { name: 'sales_status_created_at', table: 'sales', columns: ['status', 'createdAt'] },
+  { name: 'sales_shift_status', table: 'sales', columns: ['shiftId', 'status'] },
+  { name: 'sale_items_sale_id', table: 'sale_items', columns: ['saleId'] }
+];
+
+// Ventas que ya no pueden cambiar por la operación del turno
+const ARCHIVABLE = "(shiftId IS NULL OR shiftId IN (SELECT id FROM main.shifts WHERE status = 'closed'))";
+
+class ArchiveError extends HttpError {
+  static status = 500;
+}
+
+const quote = (text) => `'${String(text).replace(/'/g, "''")}'`;
+const ident = (name) => `\`${name}\``;
+
+// 'YYYY-MM' → límite inferior del mes en el formato de createdAt (UTC)
+const monthBoundary = (month) => `${month}-01 00:00:00.000 +00:00`;
+
+function monthRange(month) {
+  const [year, number] = month.split('-').map(Number);
+  return { start: Date.UTC(year, number - 1, 1), end: Date.UTC(year, number, 1) };
+}
+
+function nextMonth(month) {
+  return new Date(monthRange(month).end).toISOString().slice(0, 7);
+}
+
+function query(sql, replacements = [], transaction = null) {
+  return sequelize.query(sql, { replacements, type: QueryTypes.SELECT, transaction });
+}
+
+function run(sql, replacements = [], transaction = null) {
+  return sequelize.query(sql, { replacements, transaction });
+}
+
+// ----- registro de meses ---------------------------------------------------
+
+// Columnas de las tablas archivadas en la base principal (el esquema solo
+// cambia con migraciones, al arrancar)
+let mainColumns = null;
+
+async function loadMainColumns() {
+  if (!mainColumns) {
+    const columns = {};
+    for (const { table } of ARCHIVED_TABLES) {
+      const info = await query(`PRAGMA main.table_info(${ident(table)})`);
+      columns[table] = info.map(column => column.name);
+    }
+    mainColumns = columns;
+  }
+  return mainColumns;
+}
+
+// Meses archivados (visibles: con al menos un lote trasladado). Se lee en
+// cada consulta que lo necesita: es una fila por mes y así los traslados de
+// otro proceso (cluster, npm run archive) se ven de inmediato
+async function archivedMonths() {
+  const rows = await query('SELECT * FROM archive_months ORDER BY month');
+  return rows.map(row => ({
+    ...row,
+    columns: row.columns ? JSON.parse(row.columns) : null
+  }));
+}
+
+// Meses visibles que se cruzan con alguno de los rangos ({ start, end }
+// inclusivos, null = abierto); ranges null = todo el historial
+async function monthsFor(ranges) {
+  if (ranges && ranges.length === 0) return [];
+
+  const months = (await archivedMonths()).filter(entry => entry.saleCount > 0 && entry.columns);
+  if (!ranges) return months;
+
+  return months.filter(entry => {
+    const { start, end } = monthRange(entry.month);
+    return ranges.some(range => (
+      (!range.start || new Date(range.start).getTime() < end) &&
+      (!range.end || new Date(range.end).getTime() >= start)
+    ));
+  });
+}
+
+// ----- lecturas sobre ambos niveles -----------------------------------------
+
+// Columnas del miembro de la vista; las que el mes no tenga salen en NULL
+function memberColumns(columns, available) {
+  const have = new Set(available || columns);
+  return columns.map(column => (have.has(column) ? `a.${ident(column)}` : `NULL AS ${ident(column)}`)).join(', ');
+}
+
+// ATTACH de los meses y vistas temporales con la unión de ambos niveles. Las
+// copias de un mes con traslado a medias se descartan si la venta sigue en
+// la base principal
+function tierSetup(months, columns) {
+  const statements = months.map((entry, i) => `ATTACH DATABASE ${quote(entry.file)} AS a${i}`);
+
+  for (const { table, saleColumn } of ARCHIVED_TABLES) {
+    const members = [`SELECT ${columns[table].map(ident).join(', ')} FROM main.${ident(table)}`];
+    months.forEach((entry, i) => {
+      members.push(
+        `SELECT ${memberColumns(columns[table], entry.columns[table])} FROM a${i}.${ident(table)} AS a
+          WHERE NOT EXISTS (SELECT 1 FROM main.archive_months WHERE month = ${quote(entry.month)} AND moving = 1)
+             OR NOT EXISTS (SELECT 1 FROM main.sales h WHERE h.id = a.${ident(saleColumn)})`
+      );
+    });
+    statements.push(`CREATE TEMP VIEW ${ident(table)} AS ${members.join('\nUNION ALL ')}`);
+  }
+
+  return statements.join(';\n');
+}
+
+function checkFiles(months) {
+  const missing = months.find(entry => !fs.existsSync(entry.file));
+  if (missing) {
+    throw new ArchiveError(`Falta el archivo de ventas de ${missing.month} (${missing.file})`);
+  }
+}
+
+/**
+ * Ejecuta fn con `sales` y `sale_items` sobre la base principal y los meses
+ * archivados que tocan los rangos ({ start, end }, null = abierto). Si no
+ * toca ninguno, fn corre tal cual. Para listados y consultas puntuales; los
+ * recorridos de historial completo van con eachTierWindow.
+ */
+async function withTiers(ranges, fn) {
+  const months = await monthsFor(ranges);
+  if (months.length === 0) {
+    return fn();
+  }
+  if (months.length > MAX_ATTACHED) {
+    throw new ArchiveError(
+      `El rango abarca ${months.length} meses archivados; el máximo por consulta es ${MAX_ATTACHED}`,
+      400
+    );
+  }
+
+  checkFiles(months);
+  const setup = tierSetup(months, await loadMainColumns());
+  return withConnectionSetup(setup, fn, { reader: true });
+}
+
+// Venta archivada por id: solo se adjuntan los meses cuyo rango de ids la incluye
+async function withSaleTiers(saleId, fn) {
+  const id = parseInt(saleId);
+  const months = (await monthsFor(null))
+    .filter(entry => entry.minSaleId <= id && id <= entry.maxSaleId)
+    .slice(-MAX_ATTACHED);
+  if (months.length === 0) {
+    return null;
+  }
+
+  checkFiles(months);
+  return withConnectionSetup(tierSetup(months, await loadMainColumns()), fn, { reader: true });
+}
+
+/**
+ * Recorre el rango (null = todo el historial) por ventanas de hasta
+ * MAX_ATTACHED meses archivados, en orden de fecha, y devuelve el resultado
+ * de cada una. fn(window) corre con las vistas de esa ventana y debe
+ * filtrar por ella (tierFilter): window.from / window.to son los límites
+ * [from, to) en el formato de createdAt (null = abierto). Cada venta cae en
+ * una sola ventana.
+ *
+ * Con { write: true } el ATTACH se aplica a las transacciones que abra fn
+ * (todas sus consultas deben ir en ellas) en lugar de a una conexión lectora.
+ */
+async function eachTierWindow(range, fn, { write = false } = {}) {
+  const months = await monthsFor(range ? [range] : null);
+  if (months.length === 0) {
+    return [await fn({ from: null, to: null, months: [] })];
+  }
+
+  checkFiles(months);
+  const columns = await loadMainColumns();
+  const results = [];
+
+  for (let i = 0; i < months.length; i += MAX_ATTACHED) {
+    const chunk = months.slice(i, i + MAX_ATTACHED);
+    const following = months[i + MAX_ATTACHED];
+    const window = {
+      from: i === 0 ? null : monthBoundary(chunk[0].month),
+      to: following ? monthBoundary(following.month) : null,
+      months: chunk.map(entry => entry.month)
+    };
+    results.push(await withConnectionSetup(tierSetup(chunk, columns), () => fn(window), { reader: !write }));
+  }
+  return results;
+}
+
+// Condición WHERE de una ventana de eachTierWindow
+function tierFilter(window, column = 'createdAt') {
+  const clauses = [];
+  const replacements = [];
+  if (window.from) {
+    clauses.push(`${column} >= ?`);
+    replacements.push(window.from);
+  }
+  if (window.to) {
+    clauses.push(`${column} < ?`);
+    replacements.push(window.to);
+  }
+  return { sql: clauses.length ? clauses.join(' AND ') : '1', replacements };
+}
+
+// ----- traslado al archivo --------------------------------------------------
+
+async function tableInfo(schema, table, transaction) {
+  return query(`PRAGMA ${schema}.table_info(${ident(table)})`, [], transaction);
+}
+
+// Crea (o completa con columnas nuevas) las tablas del archivo adjunto como
+// `arch`; devuelve las columnas que se copian. Sin llaves foráneas: usuarios,
+// mesas y productos siguen en la base principal
+async function ensureArchiveSchema(transaction) {
+  const columns = {};
+
+  for (const { table } of ARCHIVED_TABLES) {
+    const main = await tableInfo('main', table, transaction);
+    const archived = await tableInfo('arch', table, transaction);
+
+    if (archived.length === 0) {
+      const primaryKey = main.filter(column => column.pk > 0).sort((a, b) => a.pk - b.pk).map(column => ident(column.name));
+      const definitions = main.map(column => `${ident(column.name)} ${column.type}`);
+      if (primaryKey.length) definitions.push(`PRIMARY KEY (${primaryKey.join(', ')})`);
+      await run(`CREATE TABLE arch.${ident(table)} (${definitions.join(', ')})`, [], transaction);
+    } else {
+      const have = new Set(archived.map(column => column.name));
+      for (const column of main.filter(info => !have.has(info.name))) {
+        await run(`ALTER TABLE arch.${ident(table)} ADD COLUMN ${ident(column.name)} ${column.type}`, [], transaction);
+      }
+    }
+    columns[table] = main.map(column => column.name);
+  }
+
+  for (const index of ARCHIVE_INDEXES) {
+    await run(
+      `CREATE INDEX IF NOT EXISTS arch.${ident(index.name)} ON ${ident(index.table)} (${index.columns.map(ident).join(', ')})`,
+      [],
+      transaction
+    );
+  }
+  return columns;
+}
+
+const placeholders = (values) => values.map(() => '?').join(', ');
+
+// Paso 4: descarta del archivo las copias de ventas que siguen en la base
+// principal y cierra el traslado del mes
+async function finishMonth(entry) {
+  const setup = `ATTACH DATABASE ${quote(entry.file)} AS arch`;
+  const bounds = [monthBoundary(entry.month), monthBoundary(nextMonth(entry.month))];
+
+  if (fs.existsSync(entry.file)) {
+    await withConnectionSetup(setup, () => sequelize.transaction(async (transaction) => {
+      const [schema] = await query("SELECT COUNT(*) AS tables FROM arch.sqlite_master WHERE type = 'table' AND name = 'sales'", [], transaction);
+      if (!schema.tables) return;
+
+      const stale = 'SELECT id FROM main.sales WHERE createdAt >= ? AND createdAt < ?';
+      await run(`DELETE FROM arch.sale_items WHERE saleId IN (${stale})`, bounds, transaction);
+      await run(`DELETE FROM arch.sales WHERE id IN (${stale})`, bounds, transaction);
+    }));
+  }
+
+  await sequelize.transaction(async (transaction) => {
+    await run('UPDATE archive_months SET moving = 0 WHERE month = ?', [entry.month], transaction);
+    await run('DELETE FROM archive_months WHERE month = ? AND saleCount = 0', [entry.month], transaction);
+  });
+
+  // Un mes sin ventas trasladadas no deja archivo
+  const [kept] = await query('SELECT COUNT(*) AS count FROM archive_months WHERE month = ?', [entry.month]);
+  if (!kept.count) {
+    fs.rmSync(entry.file, { force: true });
+  }
+}
+
+// Traslada las ventas archivables del mes en lotes
+async function archiveMonth(month, cutoff, { signal } = {}) {
+  const started = Date.now();
+  const file = path.join(archiveConfig.dir, `sales-${month}.sqlite`);
+  const [known] = await query('SELECT file FROM archive_months WHERE month = ?', [month]);
+
+  // Un archivo sin registrar viene de otra base (p. ej. tras DB_RESET)
+  if (!known && fs.existsSync(file)) {
+    const aside = `${file}.stale-${Date.now()}`;
+    fs.renameSync(file, aside);
+    console.warn(`⚠️  Archivo sin registrar apartado: ${aside}`);
+  }
+  const entry = { month, file: known ? known.file : file };
+
+  // 1. registrar el mes con el traslado en curso
+  await sequelize.transaction(transaction => run(
+    `INSERT INTO archive_months (month, file, moving) VALUES (?, ?, 1)
+     ON CONFLICT (month) DO UPDATE SET moving = 1`,
+    [month, entry.file],
+    transaction
+  ));
+
+  const setup = `ATTACH DATABASE ${quote(entry.file)} AS arch`;
+  const bounds = [monthBoundary(month), monthBoundary(nextMonth(month)), cutoff];
+  let columns = null;
+  let lastId = 0;
+  let sales = 0;
+  let items = 0;
+
+  while (!(signal && signal.aborted)) {
+    // 2. copiar el lote al archivo
+    const ids = await withConnectionSetup(setup, () => sequelize.transaction(async (transaction) => {
+      columns = columns || await ensureArchiveSchema(transaction);
+
+      const rows = await query(
+        `SELECT id FROM main.sales
+          WHERE createdAt >= ? AND createdAt < ? AND createdAt < ? AND id > ? AND ${ARCHIVABLE}
+          ORDER BY id LIMIT ?`,
+        [...bounds, lastId, archiveConfig.batchSize],
+        transaction
+      );
+      const batch = rows.map(row => row.id);
+      if (batch.length === 0) return batch;
+
+      const saleColumns = columns.sales.map(ident).join(', ');
+      const itemColumns = columns.sale_items.map(ident).join(', ');
+      await run(
+        `INSERT OR REPLACE INTO arch.sales (${saleColumns})
+         SELECT ${saleColumns} FROM main.sales WHERE id IN (${placeholders(batch)})`,
+        batch,
+        transaction
+      );
+      await run(
+        `INSERT OR REPLACE INTO arch.sale_items (${itemColumns})
+         SELECT ${itemColumns} FROM main.sale_items WHERE saleId IN (${placeholders(batch)})`,
+        batch,
+        transaction
+      );
+      return batch;
+    }));
+
+    if (ids.length === 0) break;
+    lastId = ids[ids.length - 1];
+
+    // 3. borrar de la base principal las ventas que siguen idénticas a su copia
+    const moved = await withConnectionSetup(setup, () => sequelize.transaction(async (transaction) => {
+      const same = (await query(
+        `SELECT s.id FROM main.sales s JOIN arch.sales a ON a.id = s.id
+          WHERE s.id IN (${placeholders(ids)}) AND a.updatedAt IS s.updatedAt AND a.status IS s.status`,
+        ids,
+        transaction
+      )).map(row => row.id);
+      if (same.length === 0) return { sales: 0, items: 0 };
+
+      const [counts] = await query(
+        `SELECT COUNT(*) AS items FROM main.sale_items WHERE saleId IN (${placeholders(same)})`,
+        same,
+        transaction
+      );
+      await run(`DELETE FROM main.sale_items WHERE saleId IN (${placeholders(same)})`, same, transaction);
+      await run(`DELETE FROM main.sales WHERE id IN (${placeholders(same)})`, same, transaction);
+
+      await run(
+        `UPDATE archive_months
+            SET saleCount = saleCount + ?, itemCount = itemCount + ?,
+                minSaleId = MIN(COALESCE(minSaleId, ?), ?), maxSaleId = MAX(COALESCE(maxSaleId, ?), ?),
+                columns = ?, archivedAt = ?
+          WHERE month = ?`,
+        [
+          same.length, counts.items,
+          same[0], same[0], same[same.length - 1], same[same.length - 1],
+          JSON.stringify(columns), new Date().toISOString(), month
+        ],
+        transaction
+      );
+      return { sales: same.length, items: Number(counts.items) };
+    }));
+
+    sales += moved.sales;
+    items += moved.items;
+    if (ids.length < archiveConfig.batchSize) break;
+  }
+
+  // 4. cerrar el traslado (si se interrumpió, lo termina la siguiente corrida)
+  if (!(signal && signal.aborted)) {
+    await finishMonth(entry);
+  }
+  return { month, sales, items, elapsedMs: Date.now() - started };
+}
+
+/**
+ * Mueve a los archivos mensuales las ventas de turnos cerrados (o sin turno)
+ * con más de ARCHIVE_AFTER_DAYS días. Con { dryRun: true } solo cuenta
+ * cuántas se moverían por mes. Devuelve { cutoff, months, sales, elapsedMs }.
+ */
+async function archiveSales({ now = new Date(), dryRun = false, signal = null } = {}) {
+  // Import diferido: salesRollup consulta los archivos a través de este módulo
+  const { formatDbDate } = require('./salesRollup');
+  const started = Date.now();
+
+  if (archiveConfig.afterDays <= 0) {
+    return { cutoff: null, months: [], sales: 0, elapsedMs: 0, disabled: true };
+  }
+
+  const cutoff = formatDbDate(now.getTime() - archiveConfig.afterDays * DAY);
+  const candidates = await query(
+    `SELECT substr(createdAt, 1, 7) AS month, COUNT(*) AS sales FROM main.sales
+      WHERE createdAt < ? AND ${ARCHIVABLE}
+      GROUP BY 1 ORDER BY 1`,
+    [cutoff]
+  );
+
+  if (dryRun) {
+    return {
+      cutoff,
+      months: candidates.map(row => ({ month: row.month, sales: Number(row.sales) })),
+      sales: candidates.reduce((sum, row) => sum + Number(row.sales), 0),
+      elapsedMs: Date.now() - started
+    };
+  }
+
+  fs.mkdirSync(archiveConfig.dir, { recursive: true });
+
+  // Traslados interrumpidos en una corrida anterior
+  for (const entry of (await archivedMonths()).filter(row => row.moving)) {
+    if (!candidates.some(row => row.month === entry.month)) {
+      await finishMonth(entry);
+    }
+  }
+
+  const months = [];
+  for (const { month } of candidates) {
+    if (signal && signal.aborted) break;
+    months.push(await archiveMonth(month, cutoff, { signal }));
+  }
+
+  return {
+    cutoff,
+    months,
+    sales: months.reduce((sum, month) => sum + month.sales, 0),
+    elapsedMs: Date.now() - started
+  };
+}
+
+module.exports = {
+  MAX_ATTACHED,
+  archiveConfig,
+  ArchiveError,
+  archivedMonths,
+  withTiers,
+  withSaleTiers,
+  eachTierWindow,
+  tierFilter,
+  archiveSales
+};
@@ -0,0 +1,148 @@
+// backend/services/backup.js
+// Respaldos en línea con la API de backup de SQLite.
+//
+// La copia avanza BACKUP_STEP_PAGES páginas por paso con una pausa entre
+// pasos, desde una conexión de solo lectura propia: las ventas se siguen
+// registrando durante el respaldo. Para la base principal esa conexión
+// mantiene abierta una transacción de lectura, así en WAL la copia es la foto
+// del momento en que empezó y no se reinicia con cada escritura.
+//
+// Los archivos mensuales (services/archive.js) solo cambian al archivar; se
+// copian una vez por cambio a BACKUP_DIR/archive y no en cada respaldo.
+const fs = require('fs');
+const path = require('path');
+const sqlite3 = require('sqlite3');
+const { sequelize } = require('../database/init');
+const { archivedMonths } = require('./archive');
+
+const backupConfig = {
+  dir: path.resolve(process.env.BACKUP_DIR || path.join(path.dirname(sequelize.options.storage), 'backups')),
+  keep: parseInt(process.env.BACKUP_KEEP || '7'),
+  stepPages: parseInt(process.env.BACKUP_STEP_PAGES || '100'),
+  stepPauseMs: parseInt(process.env.BACKUP_STEP_PAUSE_MS || '10')
+};
+
+const BACKUP_PATTERN = /^pos-.+\.sqlite$/;
+
+const pause = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+function promisify(target, method, ...args) {
+  return new Promise((resolve, reject) => {
+    target[method](...args, (error, result) => (error ? reject(error) : resolve(result)));
+  });
+}
+
+function openReadOnly(file) {
+  return new Promise((resolve, reject) => {
+    const db = new sqlite3.Database(file, sqlite3.OPEN_READONLY, error => (error ? reject(error) : resolve(db)));
+  });
+}
+
+/**
+ * Copia `source` a `target` por pasos. Escribe en `target.tmp` y renombra al
+ * terminar, así nunca queda un respaldo a medias con el nombre final.
+ * Devuelve { pages, steps, elapsedMs }.
+ */
+async function onlineBackup(source, target, { holdSnapshot = false, signal = null } = {}) {
+  const started = Date.now();
+  const tmp = `${target}.tmp`;
+  fs.rmSync(tmp, { force: true });
+
+  const db = await openReadOnly(source);
+  let steps = 0;
+  let pages = 0;
+
+  try {
+    if (holdSnapshot) {
+      await promisify(db, 'exec', 'BEGIN');
+      await promisify(db, 'get', 'SELECT COUNT(*) FROM sqlite_master');
+    }
+
+    const backup = await new Promise((resolve, reject) => {
+      const handle = db.backup(tmp, error => (error ? reject(error) : resolve(handle)));
+    });
+
+    try {
+      while (!backup.completed) {
+        if (signal && signal.aborted) {
+          throw new Error('Respaldo cancelado');
+        }
+        await promisify(backup, 'step', backupConfig.stepPages);
+        if (backup.failed) {
+          throw new Error(`Falló el respaldo de ${source}`);
+        }
+        steps += 1;
+        pages = backup.pageCount;
+        if (!backup.completed) {
+          await pause(backupConfig.stepPauseMs);
+        }
+      }
+    } finally {
+      await promisify(backup, 'finish');
+    }
+
+    if (holdSnapshot) {
+      await promisify(db, 'exec', 'COMMIT');
+    }
+  } catch (error) {
+    fs.rmSync(tmp, { force: true });
+    throw error;
+  } finally {
+    await promisify(db, 'close');
+  }
+
+  fs.renameSync(tmp, target);
+  return { pages, steps, elapsedMs: Date.now() - started };
+}
+
+// Conserva solo los `keep` respaldos más recientes de la base principal
+function pruneBackups(dir, keep) {
+  const files = fs.readdirSync(dir).filter(name => BACKUP_PATTERN.test(name)).sort();
+  const removed = files.slice(0, Math.max(0, files.length - keep));
+  for (const name of removed) {
+    fs.rmSync(path.join(dir, name), { force: true });
+  }
+  return removed.length;
+}
+
+/**
+ * Respalda la base principal y los meses archivados que cambiaron desde su
+ * última copia. Devuelve { file, pages, archives, pruned, elapsedMs }.
+ */
+async function backupDatabase({ signal = null } = {}) {
+  const started = Date.now();
+  const archiveDir = path.join(backupConfig.dir, 'archive');
+  fs.mkdirSync(archiveDir, { recursive: true });
+
+  const stamp = new Date().toISOString().replace(/[:.]/g, '-');
+  const file = path.join(backupConfig.dir, `pos-${stamp}.sqlite`);
+  const main = await onlineBackup(sequelize.options.storage, file, { holdSnapshot: true, signal });
+  const pruned = pruneBackups(backupConfig.dir, backupConfig.keep);
+
+  // Meses con traslado terminado que no tienen copia al día
+  let archives = 0;
+  for (const entry of await archivedMonths()) {
+    if (signal && signal.aborted) break;
+    if (entry.moving || !fs.existsSync(entry.file)) continue;
+
+    const target = path.join(archiveDir, path.basename(entry.file));
+    const current = entry.backedUpAt && entry.archivedAt && entry.backedUpAt >= entry.archivedAt && fs.existsSync(target);
+    if (current) continue;
+
+    const backedUpAt = new Date().toISOString();
+    await onlineBackup(entry.file, target, { signal });
+    await sequelize.transaction(transaction => sequelize.query(
+      'UPDATE archive_months SET backedUpAt = ? WHERE month = ?',
+      { replacements: [backedUpAt, entry.month], transaction }
+    ));
+    archives += 1;
+  }
+
+  return { file, pages: main.pages, archives, pruned, elapsedMs: Date.now() - started };
+}
+
+module.exports = {
+  backupConfig,
+  onlineBackup,
+  backupDatabase
+};
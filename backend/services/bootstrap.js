@@ -0,0 +1,197 @@
+// backend/services/bootstrap.js
+// Arranque de clientes en una sola petición (GET /api/bootstrap).
+//
+// - Cada sección trae el mismo cuerpo que su endpoint (menu = /api/menu,
+//   tables = /api/tables/changes, shift = /api/shifts/active, ...) junto con
+//   una versión. El cliente manda las versiones que ya tiene
+//   (?known=menu:abc,tables:12) y las secciones sin cambios llegan solo como
+//   { version, unchanged: true }.
+// - Menú y categorías salen ya serializados de la caché del catálogo (su
+//   ETag es la versión); la respuesta se arma concatenando Buffers, sin
+//   volver a serializar el catálogo.
+// - Mesas: la versión es la del salón y, con una versión conocida, solo se
+//   manda el delta desde ella (tableState.changesSince).
+// - Perfil, turno, clientes y stock bajo son consultas pequeñas; su versión
+//   es un hash del cuerpo, así que ahorran bytes pero no la consulta.
+// - Qué recibe cada rol lo dice SECTIONS[].roles. La compresión la pone el
+//   middleware de server.js como en el resto de respuestas.
+const crypto = require('crypto');
+const { User, Shift, Customer } = require('../database/init');
+const { catalogCache, buildMenu, buildMenuCategories } = require('./catalogCache');
+const { tableState } = require('./tableState');
+const { getShiftTotals, formatShiftStats } = require('./shiftTotals');
+const { lowStock } = require('./inventory');
+
+const ALL_ROLES = ['admin', 'manager', 'cashier', 'waiter'];
+const CUSTOMERS_PAGE = 50;
+
+// Versión corta a partir del cuerpo serializado
+const hashVersion = (body) => crypto.createHash('sha1').update(body).digest('base64url').slice(0, 16);
+
+function jsonSection(payload) {
+  const body = Buffer.from(JSON.stringify(payload));
+  return { version: hashVersion(body), body };
+}
+
+async function catalogSection(key, build) {
+  const entry = await catalogCache.view(key, build);
+  return { version: entry.etag.replace(/"/g, ''), body: entry.body };
+}
+
+// Turno activo del usuario, compartido por las secciones profile y shift
+function activeShift(context) {
+  if (!context.shift) {
+    context.shift = Shift.findOne({
+      where: { userId: context.user.userId, status: 'active' },
+      include: [{ model: User, attributes: ['id', 'name', 'username'] }]
+    });
+  }
+  return context.shift;
+}
+
+const SECTIONS = {
+  // Mismo cuerpo que GET /api/auth/profile
+  profile: {
+    roles: ALL_ROLES,
+    async build(context) {
+      const [user, shift] = await Promise.all([
+        User.findByPk(context.user.userId, { attributes: { exclude: ['password'] } }),
+        activeShift(context)
+      ]);
+      if (!user) return jsonSection({ success: false, user: null, shift: null });
+
+      return jsonSection({
+        success: true,
+        user: {
+          id: user.id,
+          username: user.username,
+          name: user.name,
+          role: user.role,
+          isActive: user.isActive,
+          lastLogin: user.lastLogin,
+          deviceId: user.deviceId
+        },
+        shift: shift ? {
+          id: shift.id,
+          startTime: shift.startTime,
+          totalSales: shift.totalSales,
+          totalTransactions: shift.totalTransactions
+        } : null
+      });
+    }
+  },
+
+  // Mismas vistas cacheadas que GET /api/menu y /api/menu/categories
+  menu: {
+    roles: ALL_ROLES,
+    build: () => catalogSection('menu:true:', buildMenu({ active: true }))
+  },
+  categories: {
+    roles: ALL_ROLES,
+    build: () => catalogSection('menu-categories', buildMenuCategories())
+  },
+
+  // Mismo cuerpo que GET /api/tables/changes?since=<versión conocida>
+  tables: {
+    roles: ALL_ROLES,
+    async build(context, known) {
+      await tableState.ready();
+      if (known !== undefined && known === String(tableState.version)) {
+        return { version: known, body: null };
+      }
+      const data = known !== undefined
+        ? await tableState.changesSince(known)
+        : { ...(await tableState.snapshot()), reset: true };
+      return { version: String(data.version), body: Buffer.from(JSON.stringify({ success: true, ...data })) };
+    }
+  },
+
+  // Mismo cuerpo que GET /api/shifts/active
+  shift: {
+    roles: ALL_ROLES,
+    async build(context) {
+      const shift = await activeShift(context);
+      if (!shift) return jsonSection({ success: true, shift: null });
+
+      const totals = await getShiftTotals(shift.id);
+      return jsonSection({
+        success: true,
+        shift: { ...shift.toJSON(), currentStats: formatShiftStats(totals) }
+      });
+    }
+  },
+
+  // Primera página de GET /api/customers (la búsqueda sigue en su endpoint)
+  customers: {
+    roles: ALL_ROLES,
+    async build() {
+      const { count, rows } = await Customer.findAndCountAll({
+        where: { isActive: true },
+        order: [['name', 'ASC']],
+        limit: CUSTOMERS_PAGE
+      });
+      return jsonSection({
+        success: true,
+        customers: rows,
+        pagination: { total: count, page: 1, limit: CUSTOMERS_PAGE, pages: Math.ceil(count / CUSTOMERS_PAGE) }
+      });
+    }
+  },
+
+  // Mismo cuerpo que GET /api/inventory/low-stock
+  lowStock: {
+    roles: ['admin', 'manager'],
+    build: async () => jsonSection({ success: true, items: await lowStock() })
+  }
+};
+
+// 'menu:abc,tables:12' → { menu: 'abc', tables: '12' }
+function parseKnown(value) {
+  const known = {};
+  for (const pair of String(value || '').split(',')) {
+    const separator = pair.indexOf(':');
+    if (separator > 0) {
+      known[pair.slice(0, separator).trim()] = pair.slice(separator + 1).trim();
+    }
+  }
+  return known;
+}
+
+// Secciones disponibles para un rol
+function sectionsFor(role) {
+  return Object.keys(SECTIONS).filter(name => SECTIONS[name].roles.includes(role));
+}
+
+/**
+ * Arma la respuesta de arranque para `user` (el payload del JWT).
+ * - known: { seccion: versión } que el cliente ya tiene
+ * - only: lista de secciones a incluir (por defecto todas las del rol)
+ * Devuelve { body: Buffer, sections, unchanged }.
+ */
+async function buildBootstrap(user, { known = {}, only = null } = {}) {
+  const names = sectionsFor(user.role).filter(name => !only || only.includes(name));
+  const context = { user, shift: null };
+  const built = await Promise.all(names.map(name => SECTIONS[name].build(context, known[name])));
+
+  let unchanged = 0;
+  const parts = [Buffer.from(`{"success":true,"serverTime":"${new Date().toISOString()}","sections":{`)];
+  built.forEach(({ version, body }, i) => {
+    const head = `${i > 0 ? ',' : ''}"${names[i]}":{"version":${JSON.stringify(version)},`;
+    if (known[names[i]] === version) {
+      unchanged += 1;
+      parts.push(Buffer.from(`${head}"unchanged":true}`));
+    } else {
+      parts.push(Buffer.from(`${head}"data":`), body, Buffer.from('}'));
+    }
+  });
+  parts.push(Buffer.from('}}'));
+
+  return { body: Buffer.concat(parts), sections: names.length, unchanged };
+}
+
+module.exports = {
+  SECTIONS,
+  parseKnown,
+  sectionsFor,
+  buildBootstrap
+};
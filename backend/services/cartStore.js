@@ -0,0 +1,320 @@
+// backend/services/cartStore.js
+// Carritos abiertos (por mesa o clave de pedido) persistidos en SQLite.
+//
+// - Cada cambio se agrega a `cart_ops` (log que solo crece); el estado en
+//   memoria es el resultado de aplicar el log en orden de id.
+// - Las operaciones que llegan en el mismo tick se escriben juntas en un solo
+//   INSERT multi-fila (group commit).
+// - Cada COMPACT_EVERY operaciones, y periódicamente, el carrito se compacta:
+//   su estado se guarda en `cart_snapshots` y se borran las operaciones ya
+//   cubiertas.
+// - Al arrancar (y antes de leer) se aplican los snapshots y operaciones
+//   nuevos con una sola consulta, así varios procesos comparten los carritos.
+// - Las líneas se indexan por menuItemId (Map), cada cambio es O(1).
+const { QueryTypes } = require('sequelize');
+const { sequelize } = require('../database/init');
+const { HttpError } = require('./errors');
+
+const COMPACT_EVERY = parseInt(process.env.CART_COMPACT_EVERY || '50');
+const COMPACT_INTERVAL_MS = parseInt(process.env.CART_COMPACT_INTERVAL_MS || '60000');
+
+const CART_KEY_PATTERN = /^[\w-]{1,64}$/;
+const OPS = ['add', 'set', 'remove', 'clear'];
+
+class CartError extends HttpError {}
+
+class Cart {
+  constructor(cartKey) {
+    this.cartKey = cartKey;
+    this.opId = 0;
+    this.lines = new Map();
+    this.uncompacted = 0;
+    this.compacting = false;
+  }
+
+  // Aplica una operación del log (misma función en vivo y al recuperar)
+  apply({ id, op, menuItemId, quantity, data }) {
+    const line = this.lines.get(menuItemId);
+
+    if (op === 'clear') {
+      this.lines.clear();
+    } else if (op === 'remove') {
+      this.lines.delete(menuItemId);
+    } else {
+      const next = op === 'add' ? (line ? line.quantity : 0) + quantity : quantity;
+      if (next <= 0) {
+        this.lines.delete(menuItemId);
+      } else {
+        this.lines.set(menuItemId, { ...(line || {}), ...(data || {}), id: menuItemId, menuItemId, quantity: next });
+      }
+    }
+
+    this.opId = id;
+    this.uncompacted += 1;
+  }
+
+  restore(opId, lines) {
+    this.lines = new Map(lines.map(line => [line.menuItemId, line]));
+    this.opId = opId;
+    this.uncompacted = 0;
+  }
+
+  line(menuItemId) {
+    return this.lines.get(menuItemId) || null;
+  }
+
+  toJSON() {
+    const items = [...this.lines.values()];
+    return {
+      cartKey: this.cartKey,
+      seq: this.opId,
+      items,
+      total: Math.round(items.reduce((sum, item) => sum + parseFloat(item.price || 0) * item.quantity, 0) * 100) / 100
+    };
+  }
+}
+
+class CartStore {
+  constructor({ compactEvery = COMPACT_EVERY, compactIntervalMs = COMPACT_INTERVAL_MS } = {}) {
+    this.compactEvery = compactEvery;
+    this.compactIntervalMs = compactIntervalMs;
+    this.carts = new Map();
+    this.lastOpId = 0;
+    this.queue = [];
+    this.flushScheduled = false;
+    // Cadena que serializa escrituras y lecturas del log dentro del proceso
+    this.chain = Promise.resolve();
+    this.timer = null;
+    this.stats = { ops: 0, flushes: 0, compactions: 0 };
+  }
+
+  // Clave única en servidor y clientes: 'table-5', 'takeaway'... Un número
+  // solo es el id de una mesa ('5' → 'table-5')
+  static validateKey(cartKey) {
+    const raw = String(cartKey);
+    const key = /^\d+$/.test(raw) ? `table-${raw}` : raw;
+    if (!CART_KEY_PATTERN.test(key)) {
+      throw new CartError('Clave de carrito inválida');
+    }
+    return key;
+  }
+
+  cart(cartKey) {
+    if (!this.carts.has(cartKey)) {
+      this.carts.set(cartKey, new Cart(cartKey));
+    }
+    return this.carts.get(cartKey);
+  }
+
+  serialize(task) {
+    const result = this.chain.then(task);
+    this.chain = result.catch(() => {});
+    return result;
+  }
+
+  // Aplica snapshots y operaciones posteriores a lo ya visto (una consulta)
+  async catchUp() {
+    const rows = await sequelize.query(
+      `SELECT 's' AS kind, cartKey, opId AS id, NULL AS op, NULL AS menuItemId, NULL AS quantity, lines AS data
+         FROM cart_snapshots WHERE opId > ?
+       UNION ALL
+       SELECT 'o' AS kind, cartKey, id, op, menuItemId, quantity, data
+         FROM cart_ops WHERE id > ?`,
+      { replacements: [this.lastOpId, this.lastOpId], type: QueryTypes.SELECT }
+    );
+    if (rows.length === 0) return 0;
+
+    const snapshots = rows.filter(row => row.kind === 's');
+    const ops = rows.filter(row => row.kind === 'o').sort((a, b) => a.id - b.id);
+
+    for (const snapshot of snapshots) {
+      const cart = this.cart(snapshot.cartKey);
+      if (snapshot.id > cart.opId) {
+        cart.restore(snapshot.id, JSON.parse(snapshot.data));
+      }
+      this.lastOpId = Math.max(this.lastOpId, snapshot.id);
+    }
+
+    for (const op of ops) {
+      const cart = this.cart(op.cartKey);
+      if (op.id > cart.opId) {
+        cart.apply({ ...op, data: op.data ? JSON.parse(op.data) : null });
+        if (cart.uncompacted >= this.compactEvery && !cart.compacting) {
+          cart.compacting = true;
+          this.scheduleCompaction(cart.cartKey);
+        }
+      }
+      this.lastOpId = Math.max(this.lastOpId, op.id);
+    }
+
+    return rows.length;
+  }
+
+  // Recupera todos los carritos abiertos e inicia la compactación periódica
+  async load() {
+    const start = process.hrtime.bigint();
+    const rows = await this.serialize(() => this.catchUp());
+    const elapsedMs = Number(process.hrtime.bigint() - start) / 1e6;
+
+    if (this.compactIntervalMs > 0 && !this.timer) {
+      this.timer = setInterval(() => {
+        this.compactAll().catch(error => console.error('Error compactando carritos:', error));
+      }, this.compactIntervalMs);
+      if (this.timer.unref) this.timer.unref();
+    }
+
+    return { carts: this.openCarts().length, rows, elapsedMs: Math.round(elapsedMs * 100) / 100 };
+  }
+
+  // Carrito actualizado con lo que hayan escrito otros procesos
+  async get(cartKey) {
+    const key = CartStore.validateKey(cartKey);
+    await this.serialize(() => this.catchUp());
+    return this.cart(key).toJSON();
+  }
+
+  openCarts() {
+    return [...this.carts.values()].filter(cart => cart.lines.size > 0);
+  }
+
+  async list() {
+    await this.serialize(() => this.catchUp());
+    return this.openCarts().map(cart => cart.toJSON());
+  }
+
+  /**
+   * Registra una operación y resuelve con { opId, cart, line } ya aplicada.
+   * op: 'add' (suma quantity), 'set' (cantidad absoluta; 0 quita la línea),
+   * 'remove' o 'clear'. `data` lleva lo que se muestra de la línea
+   * (name, price, notes).
+   */
+  apply(cartKey, { op, menuItemId = null, quantity = null, data = null }, userId = null) {
+    const key = CartStore.validateKey(cartKey);
+    if (!OPS.includes(op)) {
+      return Promise.reject(new CartError(`Operación inválida: ${op}`));
+    }
+    if (op !== 'clear' && !Number.isInteger(menuItemId)) {
+      return Promise.reject(new CartError('menuItemId requerido'));
+    }
+    if ((op === 'add' || op === 'set') && !Number.isInteger(quantity)) {
+      return Promise.reject(new CartError('Cantidad inválida'));
+    }
+
+    return new Promise((resolve, reject) => {
+      this.queue.push({
+        row: {
+          cartKey: key,
+          op,
+          menuItemId,
+          quantity,
+          data: data ? JSON.stringify(data) : null,
+          userId,
+          createdAt: new Date().toISOString()
+        },
+        resolve,
+        reject
+      });
+
+      if (!this.flushScheduled) {
+        this.flushScheduled = true;
+        setImmediate(() => {
+          this.flushScheduled = false;
+          this.serialize(() => this.flush());
+        });
+      }
+    });
+  }
+
+  // Escribe la cola en un solo INSERT y aplica el log en orden de id
+  async flush() {
+    const batch = this.queue.splice(0);
+    if (batch.length === 0) return;
+
+    try {
+      const columns = ['cartKey', 'op', 'menuItemId', 'quantity', 'data', 'userId', 'createdAt'];
+      const lastId = await sequelize.transaction(async (transaction) => {
+        await sequelize.query(
+          `INSERT INTO cart_ops (${columns.join(', ')})
+           VALUES ${batch.map(() => `(${columns.map(() => '?').join(', ')})`).join(', ')}`,
+          { replacements: batch.flatMap(({ row }) => columns.map(column => row[column])), transaction }
+        );
+        const [{ id }] = await sequelize.query('SELECT last_insert_rowid() AS id', { type: QueryTypes.SELECT, transaction });
+        return id;
+      });
+
+      await this.catchUp();
+      this.stats.ops += batch.length;
+      this.stats.flushes += 1;
+
+      // Un INSERT multi-fila asigna ids consecutivos en orden
+      batch.forEach(({ row, resolve }, index) => {
+        const cart = this.cart(row.cartKey);
+        resolve({
+          opId: lastId - batch.length + 1 + index,
+          cart: cart.toJSON(),
+          line: row.menuItemId !== null ? cart.line(row.menuItemId) : null
+        });
+      });
+    } catch (error) {
+      batch.forEach(({ reject }) => reject(error));
+    }
+  }
+
+  scheduleCompaction(cartKey) {
+    setImmediate(() => {
+      this.compact(cartKey)
+        .catch(error => console.error('Error compactando carrito:', error))
+        .finally(() => { this.cart(cartKey).compacting = false; });
+    });
+  }
+
+  // Guarda el estado del carrito y borra las operaciones que ya cubre
+  async compact(cartKey) {
+    const cart = this.carts.get(cartKey);
+    if (!cart || cart.uncompacted === 0) return;
+
+    const opId = cart.opId;
+    const lines = JSON.stringify([...cart.lines.values()]);
+
+    await sequelize.transaction(async (transaction) => {
+      await sequelize.query(
+        `INSERT INTO cart_snapshots (cartKey, opId, lines, updatedAt) VALUES (?, ?, ?, ?)
+         ON CONFLICT (cartKey) DO UPDATE SET opId = excluded.opId, lines = excluded.lines, updatedAt = excluded.updatedAt
+         WHERE excluded.opId > cart_snapshots.opId`,
+        { replacements: [cartKey, opId, lines, new Date().toISOString()], transaction }
+      );
+      await sequelize.query(
+        'DELETE FROM cart_ops WHERE cartKey = ? AND id <= ?',
+        { replacements: [cartKey, opId], transaction }
+      );
+    });
+
+    // Lo aplicado después del snapshot sigue pendiente de compactar
+    if (cart.opId === opId) cart.uncompacted = 0;
+    this.stats.compactions += 1;
+  }
+
+  async compactAll() {
+    for (const cart of [...this.carts.values()]) {
+      if (cart.uncompacted > 0) {
+        await this.compact(cart.cartKey);
+      }
+    }
+  }
+
+  // Cierre ordenado: escribe lo pendiente y compacta todo
+  async close() {
+    clearInterval(this.timer);
+    this.timer = null;
+    await this.serialize(() => this.flush());
+    await this.compactAll();
+  }
+}
+
+const cartStore = new CartStore();
+
+module.exports = {
+  CartError,
+  CartStore,
+  cartStore
+};
@@ -0,0 +1,175 @@
+// backend/services/catalogCache.js
+// Caché en proceso del catálogo (menú y categorías).
+//
+// Cada vista (menú activo, menú por categoría, categorías) se guarda ya
+// serializada como Buffer junto con su ETag, así una petición repetida no
+// toca la base de datos ni vuelve a serializar; con If-None-Match responde
+// 304 sin cuerpo.
+//
+// Las escrituras de menú/categorías llaman a invalidate(): sube la versión,
+// descarta las vistas y emite 'change' (server.js lo publica como
+// 'menu-version' para que los clientes recarguen solo cuando algo cambió).
+// Los cambios de stock por ventas también descartan las vistas, pero sin
+// aviso a los clientes: el stock se actualiza en su siguiente consulta.
+//
+// En modo cluster cada invalidación se reenvía a los demás workers (vía el
+// primario) para que descarten también sus vistas.
+const crypto = require('crypto');
+const { EventEmitter } = require('events');
+const { MenuItem, Category } = require('../database/init');
+const ipc = require('./clusterIpc');
+
+class CatalogCache extends EventEmitter {
+  constructor() {
+    super();
+    this.version = 1;
+    this.views = new Map();
+    this.building = new Map();
+    this.itemsById = null;
+    this.stats = { hits: 0, misses: 0, notModified: 0, invalidations: 0 };
+  }
+
+  /**
+   * Descarta todo lo cacheado.
+   * - reason: 'menu' | 'category' | 'stock' (solo informativo)
+   * - notify: false para no avisar a los clientes (cambios de stock)
+   * - broadcast: false cuando la invalidación viene de otro worker
+   */
+  invalidate({ reason = 'menu', notify = true, broadcast = true } = {}) {
+    this.version += 1;
+    this.views.clear();
+    this.building.clear();
+    this.itemsById = null;
+    this.stats.invalidations += 1;
+
+    if (broadcast) {
+      ipc.send('catalog:invalidate', { reason });
+    }
+    if (notify) {
+      this.emit('change', { version: this.version, reason });
+    }
+  }
+
+  // Invalida al confirmar la transacción (o de inmediato si no hay)
+  invalidateAfterCommit(transaction, options) {
+    if (transaction && typeof transaction.afterCommit === 'function') {
+      transaction.afterCommit(() => this.invalidate(options));
+    } else {
+      this.invalidate(options);
+    }
+  }
+
+  // Devuelve { body, etag } de la vista, construyéndola una sola vez por versión
+  async view(key, build) {
+    const cached = this.views.get(key);
+    if (cached) {
+      this.stats.hits += 1;
+      return cached;
+    }
+
+    // Peticiones simultáneas comparten la misma construcción
+    if (this.building.has(key)) {
+      return this.building.get(key);
+    }
+
+    this.stats.misses += 1;
+    const version = this.version;
+    const promise = build().then(payload => {
+      const body = Buffer.from(JSON.stringify(payload));
+      const etag = `"${crypto.createHash('sha1').update(body).digest('base64url')}"`;
+      const entry = { body, etag, version };
+
+      // Si hubo una invalidación mientras se construía, no se guarda
+      if (this.version === version) {
+        this.views.set(key, entry);
+      }
+      return entry;
+    }).finally(() => {
+      if (this.building.get(key) === promise) this.building.delete(key);
+    });
+
+    this.building.set(key, promise);
+    return promise;
+  }
+
+  // Responde una vista cacheada con ETag / 304
+  async send(req, res, key, build) {
+    const entry = await this.view(key, build);
+
+    res.set('ETag', entry.etag);
+    res.set('X-Menu-Version', String(this.version));
+    res.set('Cache-Control', 'private, no-cache');
+
+    const ifNoneMatch = req.headers['if-none-match'];
+    if (ifNoneMatch && ifNoneMatch.split(',').some(tag => tag.trim().replace(/^W\//, '') === entry.etag)) {
+      this.stats.notModified += 1;
+      return res.status(304).end();
+    }
+
+    res.type('application/json').send(entry.body);
+  }
+
+  // Productos por id (activos e inactivos) para precios de las ventas
+  async getItemsById() {
+    if (!this.itemsById) {
+      const version = this.version;
+      const rows = await MenuItem.findAll({ raw: true });
+      const itemsById = new Map(rows.map(row => [row.id, row]));
+      if (this.version !== version) return itemsById;
+      this.itemsById = itemsById;
+    }
+    return this.itemsById;
+  }
+}
+
+const catalogCache = new CatalogCache();
+
+ipc.on('catalog:invalidate', ({ reason }) => {
+  catalogCache.invalidate({ reason, notify: false, broadcast: false });
+});
+
+// Vistas del catálogo (mismas consultas y formas de respuesta que antes)
+function buildMenu({ active = true, category = null } = {}) {
+  return async () => {
+    const where = {};
+    if (active) where.isActive = true;
+    if (category) where.categoryId = category;
+
+    const menuItems = await MenuItem.findAll({
+      where,
+      include: [
+        {
+          model: Category,
+          where: active ? { isActive: true } : {}
+        }
+      ],
+      order: [
+        [Category, 'sortOrder', 'ASC'],
+        ['name', 'ASC']
+      ]
+    });
+
+    return { success: true, menuItems };
+  };
+}
+
+function buildMenuCategories() {
+  return async () => {
+    const categories = await Category.findAll({
+      where: { isActive: true },
+      order: [['sortOrder', 'ASC']]
+    });
+    return { success: true, categories };
+  };
+}
+
+function buildCategoryList() {
+  return () => Category.findAll({ where: { isActive: true } });
+}
+
+module.exports = {
+  catalogCache,
+  buildMenu,
+  buildMenuCategories,
+  buildCategoryList
+};
@@ -0,0 +1,39 @@
+// backend/services/clusterIpc.js
+// Mensajes entre un worker y el proceso primario en modo cluster (ver
+// cluster.js). Fuera del modo cluster `send` y `on` no hacen nada, así el
+// resto del código no necesita distinguir cómo se arrancó el servidor.
+const cluster = require('cluster');
+
+const isClusterWorker = cluster.isWorker && process.env.POS_CLUSTER === 'true';
+const workerId = isClusterWorker ? cluster.worker.id : null;
+
+const handlers = new Map();
+
+if (isClusterWorker) {
+  // Un solo listener para todos los tipos de mensaje
+  process.on('message', (message) => {
+    const handler = message && handlers.get(message.type);
+    if (handler) handler(message);
+  });
+}
+
+// Envía un mensaje al primario
+function send(type, payload = {}) {
+  if (isClusterWorker && process.connected) {
+    process.send({ ...payload, type });
+  }
+}
+
+// Registra el handler de un tipo de mensaje del primario (uno por tipo)
+function on(type, handler) {
+  if (isClusterWorker) {
+    handlers.set(type, handler);
+  }
+}
+
+module.exports = {
+  isClusterWorker,
+  workerId,
+  send,
+  on
+};
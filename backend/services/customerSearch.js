@@ -0,0 +1,103 @@
+// backend/services/customerSearch.js
+// Búsqueda indexada de clientes para el autocompletado de domicilio.
+//
+// - Texto (nombre, dirección, ciudad): tabla FTS5 `customers_fts` con
+//   tokenizador unicode61 sin acentos ("jose" encuentra "José") e índices de
+//   prefijo, de modo que cada tecla es una búsqueda por prefijo en el índice.
+// - Teléfono: columna `phoneDigits` (solo dígitos) con índice, consultada como
+//   rango [prefijo, prefijo + 1) para que SQLite recorra solo los candidatos.
+// Ambos se mantienen con triggers sobre `customers` (migración
+// 007-customer-search), así que no dependen de que la escritura pase por
+// esta API.
+const { QueryTypes } = require('sequelize');
+const { sequelize, Customer } = require('../database/init');
+
+const MAX_LIMIT = 50;
+
+// Expresión SQL que deja solo los dígitos de un teléfono; debe coincidir con
+// normalizePhone para que el prefijo de la búsqueda y el índice cuadren
+function phoneDigitsSql(column) {
+  return ["' '", "'-'", "'('", "')'", "'+'", "'.'"]
+    .reduce((expression, char) => `REPLACE(${expression}, ${char}, '')`, column);
+}
+
+const normalizePhone = (value) => String(value || '').replace(/[\s\-()+.]/g, '');
+
+// Solo dígitos y separadores de teléfono
+const looksLikePhone = (query) => /^[\d\s\-()+.]+$/.test(query) && /\d/.test(query);
+
+// Términos del usuario como prefijos FTS5 ("jos gar" → "jos"* "gar"*);
+// se citan para que la sintaxis de FTS5 (AND, NEAR, *, :) no se interprete
+function ftsQuery(query) {
+  const terms = query
+    .normalize('NFC')
+    .split(/[^\p{L}\p{N}]+/u)
+    .filter(Boolean)
+    .slice(0, 8);
+  return terms.map(term => `"${term}"*`).join(' ');
+}
+
+function activeFilter(isActive) {
+  if (isActive === null || isActive === undefined) return { sql: '', replacements: [] };
+  return { sql: 'AND c.isActive = ?', replacements: [isActive ? 1 : 0] };
+}
+
+/**
+ * Clientes que coinciden con `query`, ordenados por relevancia (por prefijo
+ * de teléfono o por bm25 en nombre > dirección > ciudad) y, a igualdad, por
+ * número de pedidos. Devuelve { customers, total }; `total` solo se calcula
+ * con { count: true } (listados paginados).
+ */
+async function searchCustomers(query, { limit = 10, offset = 0, isActive = true, count = false } = {}) {
+  const text = String(query || '').trim();
+  const size = Math.min(MAX_LIMIT, Math.max(1, parseInt(limit) || 10));
+  const skip = Math.max(0, parseInt(offset) || 0);
+  const active = activeFilter(isActive);
+
+  let from;
+  let order;
+  let replacements;
+
+  if (looksLikePhone(text)) {
+    const prefix = normalizePhone(text);
+    // El siguiente carácter después de '9' en ASCII es ':', así el rango
+    // cubre exactamente los teléfonos que empiezan con el prefijo
+    const upper = prefix.slice(0, -1) + String.fromCharCode(prefix.charCodeAt(prefix.length - 1) + 1);
+    from = `customers c WHERE c.phoneDigits >= ? AND c.phoneDigits < ? ${active.sql}`;
+    order = 'c.phoneDigits, c.totalOrders DESC';
+    replacements = [prefix, upper, ...active.replacements];
+  } else {
+    const match = ftsQuery(text);
+    if (!match) return { customers: [], total: 0 };
+    from = `customers_fts f JOIN customers c ON c.id = f.rowid
+            WHERE customers_fts MATCH ? ${active.sql}`;
+    order = 'bm25(customers_fts, 10.0, 3.0, 2.0, 1.0), c.totalOrders DESC';
+    replacements = [match, ...active.replacements];
+  }
+
+  // Solo las columnas del modelo (phoneDigits es interna del índice)
+  const columns = Object.keys(Customer.rawAttributes).map(name => `c.\`${name}\``).join(', ');
+  const customers = await sequelize.query(
+    `SELECT ${columns} FROM ${from} ORDER BY ${order} LIMIT ? OFFSET ?`,
+    { replacements: [...replacements, size, skip], model: Customer, mapToModel: true }
+  );
+
+  let total = null;
+  if (count) {
+    const [row] = await sequelize.query(`SELECT COUNT(*) AS total FROM ${from}`, {
+      replacements,
+      type: QueryTypes.SELECT
+    });
+    total = Number(row.total);
+  }
+
+  return { customers, total };
+}
+
+module.exports = {
+  MAX_LIMIT,
+  phoneDigitsSql,
+  normalizePhone,
+  ftsQuery,
+  searchCustomers
+};
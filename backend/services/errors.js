@@ -0,0 +1,15 @@
+// backend/services/errors.js
+// Base de los errores de negocio de los servicios: llevan el código HTTP con
+// el que responde la ruta. Cada servicio declara su subclase y, si no es 400,
+// su código por defecto (static status).
+class HttpError extends Error {
+  constructor(message, status = new.target.status) {
+    super(message);
+    this.name = new.target.name;
+    this.status = status;
+  }
+}
+
+HttpError.status = 400;
+
+module.exports = { HttpError };
@@ -0,0 +1,311 @@
+// backend/services/eventBus.js
+// Capa de eventos delante de Socket.io.
+//
+// - Cada socket se suscribe a un solo canal según su rol o tipo de
+//   dispositivo (admin, cashier, waiter, kitchen, public) y solo recibe los
+//   eventos que ese canal necesita (EVENT_AUDIENCES).
+// - Los eventos llevan deltas compactos (ids + campos cambiados), no el grafo
+//   completo de la venta.
+// - Las publicaciones se agrupan en ventanas cortas (EVENT_COALESCE_MS): los
+//   eventos con la misma `key` dentro de la ventana se fusionan (una mesa que
+//   cambia de estado tres veces se envía una sola vez) y cada canal recibe un
+//   único mensaje 'events' por ventana.
+// - Cada canal numera sus eventos (seq) y guarda los últimos en un buffer; el
+//   cliente detecta huecos y pide 'events-resync' desde su último seq. Si el
+//   hueco ya no está en el buffer (o el servidor reinició, epoch distinto) se
+//   le indica recargar por REST.
+// - En modo cluster el primario numera y agrupa lo que publican todos los
+//   workers (EventSequencer) y cada worker entrega los lotes a sus sockets
+//   (ClusterEventBus), así seq y replay coinciden en cualquier worker.
+const ipc = require('./clusterIpc');
+const { tokenCache } = require('./tokenCache');
+
+const COALESCE_MS = parseInt(process.env.EVENT_COALESCE_MS || '25');
+const BUFFER_SIZE = parseInt(process.env.EVENT_BUFFER_SIZE || '500');
+
+const CHANNELS = ['admin', 'cashier', 'waiter', 'kitchen', 'public'];
+
+const ROLE_CHANNELS = {
+  admin: 'admin',
+  manager: 'admin',
+  cashier: 'cashier',
+  waiter: 'waiter'
+};
+
+const ALL = CHANNELS;
+const FLOOR = ['admin', 'cashier', 'waiter', 'public'];
+
+// Qué canales reciben cada evento; los no listados van a todos
+const EVENT_AUDIENCES = {
+  'new-sale': ['admin', 'cashier', 'kitchen'],
+  'sale-cancelled': ['admin', 'cashier', 'kitchen'],
+  'sales-synced': ['admin', 'cashier'],
+  'table-updated': FLOOR,
+  'cart-line': FLOOR,
+  'cart-cleared': FLOOR,
+  'menu-version': ALL,
+  'menu-item-created': ALL,
+  'menu-item-updated': ALL,
+  'menu-item-deleted': ALL,
+  'category-created': ALL,
+  'category-updated': ALL,
+  'category-deleted': ALL,
+  'user-connected': ['admin'],
+  'user-disconnected': ['admin']
+};
+
+const roomFor = (channel) => `channel:${channel}`;
+
+// Delta de una venta: cabecera + líneas (el cliente ya tiene el menú)
+function saleDelta(sale) {
+  return {
+    id: sale.id,
+    status: sale.status,
+    orderType: sale.orderType,
+    paymentMethod: sale.paymentMethod,
+    total: sale.total,
+    tableId: sale.tableId || null,
+    customerId: sale.customerId || null,
+    userId: sale.userId,
+    createdAt: sale.createdAt,
+    items: (sale.SaleItems || sale.items || []).map(item => ({
+      menuItemId: item.menuItemId,
+      quantity: item.quantity,
+      ...(item.notes ? { notes: item.notes } : {})
+    }))
+  };
+}
+
+// Solo los campos presentes en `source` (para deltas de actualizaciones)
+function pickDefined(source, keys) {
+  const delta = {};
+  for (const key of keys) {
+    if (source[key] !== undefined) delta[key] = source[key];
+  }
+  return delta;
+}
+
+// Canal de un socket a partir del token del handshake o del tipo de dispositivo
+function channelForHandshake(handshake) {
+  const auth = handshake.auth || {};
+  const deviceType = auth.deviceType || handshake.query.deviceType;
+  if (deviceType === 'kitchen') return 'kitchen';
+
+  const token = auth.token || (handshake.headers.authorization || '').split(' ')[1];
+  if (token) {
+    try {
+      const user = tokenCache.verify(token);
+      return ROLE_CHANNELS[user.role] || 'public';
+    } catch (error) {
+      return 'public';
+    }
+  }
+  return 'public';
+}
+
+class EventBus {
+  constructor(io, { coalesceMs = COALESCE_MS, bufferSize = BUFFER_SIZE } = {}) {
+    this.io = io;
+    this.coalesceMs = coalesceMs;
+    this.bufferSize = bufferSize;
+    // Identifica este arranque; un epoch distinto obliga al cliente a recargar
+    this.epoch = Date.now().toString(36);
+    this.seq = new Map(CHANNELS.map(channel => [channel, 0]));
+    this.buffers = new Map(CHANNELS.map(channel => [channel, []]));
+    this.pending = new Map();
+    this.timer = null;
+    this.stats = { published: 0, coalesced: 0, batches: 0, delivered: 0 };
+  }
+
+  /**
+   * Publica un evento. Opciones:
+   * - key: eventos con la misma key dentro de la ventana se fusionan
+   *   (gana el último nombre de evento; los campos se combinan)
+   * - channels: sobrescribe la audiencia por defecto del evento
+   */
+  publish(event, data, { key, channels } = {}) {
+    this.stats.published += 1;
+    const audience = channels || EVENT_AUDIENCES[event] || ALL;
+    const pendingKey = key || Symbol(event);
+    const previous = key ? this.pending.get(key) : null;
+
+    if (previous) {
+      this.stats.coalesced += 1;
+      previous.event = event;
+      previous.data = { ...previous.data, ...data };
+      previous.channels = [...new Set([...previous.channels, ...audience])];
+    } else {
+      this.pending.set(pendingKey, { event, data, channels: audience, at: Date.now() });
+    }
+
+    this.schedule();
+  }
+
+  schedule() {
+    if (this.coalesceMs <= 0) {
+      this.flush();
+      return;
+    }
+    if (!this.timer) {
+      this.timer = setTimeout(() => this.flush(), this.coalesceMs);
+      if (this.timer.unref) this.timer.unref();
+    }
+  }
+
+  // Numera lo pendiente por canal y envía un mensaje por canal
+  flush() {
+    clearTimeout(this.timer);
+    this.timer = null;
+    if (this.pending.size === 0) return;
+
+    const byChannel = new Map();
+    for (const { event, data, channels, at } of this.pending.values()) {
+      for (const channel of channels) {
+        if (!this.seq.has(channel)) continue;
+        const envelope = { seq: this.seq.get(channel) + 1, event, data, at };
+        this.record(channel, envelope);
+
+        if (!byChannel.has(channel)) byChannel.set(channel, []);
+        byChannel.get(channel).push(envelope);
+      }
+    }
+    this.pending.clear();
+
+    this.deliver(byChannel);
+  }
+
+  // Avanza el seq del canal y guarda el evento en su buffer de replay
+  record(channel, envelope) {
+    this.seq.set(channel, envelope.seq);
+    const buffer = this.buffers.get(channel);
+    buffer.push(envelope);
+    if (buffer.length > this.bufferSize) buffer.shift();
+  }
+
+  // Un mensaje 'events' por canal
+  deliver(byChannel, target = this.io) {
+    for (const [channel, events] of byChannel) {
+      this.stats.batches += 1;
+      this.stats.delivered += events.length;
+      target.to(roomFor(channel)).emit('events', { channel, epoch: this.epoch, events });
+    }
+  }
+
+  // Cambia el canal del socket y le informa el seq actual como punto de partida
+  subscribe(socket, channel) {
+    if (!this.seq.has(channel)) channel = 'public';
+    if (socket.data.channel) socket.leave(roomFor(socket.data.channel));
+
+    socket.data.channel = channel;
+    socket.join(roomFor(channel));
+    socket.emit('events-hello', { channel, epoch: this.epoch, seq: this.seq.get(channel) });
+  }
+
+  // Reenvía al socket los eventos posteriores a `since` si siguen en el buffer
+  resync(socket, { epoch, since } = {}) {
+    const channel = socket.data.channel;
+    if (!channel) return;
+
+    const current = this.seq.get(channel);
+    const buffer = this.buffers.get(channel);
+    const oldest = buffer.length ? buffer[0].seq : current + 1;
+    const from = parseInt(since);
+
+    if (epoch !== this.epoch || Number.isNaN(from) || from > current || from < oldest - 1) {
+      socket.emit('events-reset', { channel, epoch: this.epoch, seq: current });
+      return;
+    }
+
+    const events = buffer.filter(envelope => envelope.seq > from);
+    if (events.length) {
+      socket.emit('events', { channel, epoch: this.epoch, events, replay: true });
+    }
+  }
+
+  // Registra los handlers del bus en un socket recién conectado
+  attach(socket) {
+    this.subscribe(socket, channelForHandshake(socket.handshake));
+
+    // Tras iniciar sesión el cliente vuelve a identificarse con su token
+    socket.on('events-auth', (auth) => {
+      this.subscribe(socket, channelForHandshake({ auth: auth || {}, query: {}, headers: {} }));
+    });
+    socket.on('events-resync', (request) => this.resync(socket, request));
+  }
+
+  close() {
+    this.flush();
+  }
+}
+
+// Modo cluster (worker): las publicaciones se reenvían al primario y los
+// lotes numerados que devuelve se registran y entregan a los sockets locales
+class ClusterEventBus extends EventBus {
+  constructor(io, options) {
+    super(io, options);
+    ipc.on('events:state', (state) => this.restore(state));
+    ipc.on('events:batch', ({ epoch, batches }) => this.receive(epoch, new Map(batches)));
+    ipc.send('events:state');
+  }
+
+  publish(event, data, { key, channels } = {}) {
+    this.stats.published += 1;
+    ipc.send('events:publish', { event, data, key, channels });
+  }
+
+  // seq y buffers vigentes en el primario al arrancar este worker
+  restore({ epoch, seq, buffers }) {
+    this.epoch = epoch;
+    this.seq = new Map(seq);
+    this.buffers = new Map(buffers);
+  }
+
+  receive(epoch, byChannel) {
+    this.epoch = epoch;
+    for (const [channel, events] of byChannel) {
+      if (!this.seq.has(channel)) continue;
+      events.forEach(envelope => this.record(channel, envelope));
+    }
+    // Cada worker recibe el lote: solo se emite a sus propios sockets
+    this.deliver(byChannel, this.io.local);
+  }
+
+  close() {}
+}
+
+// Modo cluster (primario): numera y agrupa lo que publican todos los workers
+// y reparte cada lote con `broadcast`
+class EventSequencer extends EventBus {
+  constructor(broadcast, options) {
+    super(null, options);
+    this.broadcast = broadcast;
+  }
+
+  deliver(byChannel) {
+    for (const events of byChannel.values()) {
+      this.stats.batches += 1;
+      this.stats.delivered += events.length;
+    }
+    this.broadcast({ type: 'events:batch', epoch: this.epoch, batches: [...byChannel] });
+  }
+
+  state() {
+    return { epoch: this.epoch, seq: [...this.seq], buffers: [...this.buffers] };
+  }
+}
+
+function createEventBus(io, options) {
+  const bus = ipc.isClusterWorker ? new ClusterEventBus(io, options) : new EventBus(io, options);
+  io.on('connection', socket => bus.attach(socket));
+  return bus;
+}
+
+module.exports = {
+  CHANNELS,
+  EVENT_AUDIENCES,
+  EventBus,
+  EventSequencer,
+  createEventBus,
+  saleDelta,
+  pickDefined
+};
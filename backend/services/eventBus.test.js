@@ -0,0 +1,231 @@
+// backend/services/eventBus.test.js
+// Bus de eventos: audiencias por canal, agrupación por ventana, numeración
+// (seq) por canal y resync desde el buffer o reset por epoch/hueco.
+const { EventBus, EventSequencer, EVENT_AUDIENCES } = require('./eventBus');
+
+// io mínimo: registra cada emit con su room
+function fakeIo() {
+  const sent = [];
+  return {
+    sent,
+    to: (room) => ({ emit: (event, payload) => sent.push({ room, event, payload }) })
+  };
+}
+
+function fakeSocket(handshake = {}) {
+  const emitted = [];
+  return {
+    data: {},
+    emitted,
+    handshake: { auth: {}, query: {}, headers: {}, ...handshake },
+    join: jest.fn(),
+    leave: jest.fn(),
+    on: jest.fn(),
+    emit: (event, payload) => emitted.push({ event, payload })
+  };
+}
+
+// Socket ya suscrito a `channel`, sin el 'events-hello' inicial
+function subscribed(bus, channel) {
+  const socket = fakeSocket();
+  bus.subscribe(socket, channel);
+  socket.emitted.length = 0;
+  return socket;
+}
+
+const seqs = (events) => events.map(envelope => envelope.seq);
+
+describe('EventBus', () => {
+  test('al suscribirse informa canal, epoch y seq actual', () => {
+    const bus = new EventBus(fakeIo(), { coalesceMs: 0 });
+    bus.publish('new-sale', { id: 1 });
+
+    const socket = fakeSocket();
+    bus.subscribe(socket, 'cashier');
+    expect(socket.join).toHaveBeenCalledWith('channel:cashier');
+    expect(socket.emitted).toEqual([
+      { event: 'events-hello', payload: { channel: 'cashier', epoch: bus.epoch, seq: 1 } }
+    ]);
+
+    bus.subscribe(socket, 'nope');
+    expect(socket.leave).toHaveBeenCalledWith('channel:cashier');
+    expect(socket.data.channel).toBe('public');
+  });
+
+  test('cada canal recibe solo su audiencia y numera sus eventos', () => {
+    const io = fakeIo();
+    const bus = new EventBus(io, { coalesceMs: 0 });
+
+    bus.publish('new-sale', { id: 1 });
+    bus.publish('table-updated', { id: 4, status: 'occupied' });
+
+    const rooms = io.sent.map(message => message.room);
+    expect(rooms.filter(room => room === 'channel:kitchen')).toHaveLength(1);
+    expect(rooms.filter(room => room === 'channel:waiter')).toHaveLength(1);
+    expect(rooms).toHaveLength(EVENT_AUDIENCES['new-sale'].length + EVENT_AUDIENCES['table-updated'].length);
+
+    expect(bus.seq.get('admin')).toBe(2);
+    expect(bus.seq.get('waiter')).toBe(1);
+    expect(bus.seq.get('kitchen')).toBe(1);
+
+    const waiter = io.sent.find(message => message.room === 'channel:waiter');
+    expect(waiter.event).toBe('events');
+    expect(waiter.payload).toMatchObject({ channel: 'waiter', epoch: bus.epoch });
+    expect(waiter.payload.events).toEqual([
+      expect.objectContaining({ seq: 1, event: 'table-updated', data: { id: 4, status: 'occupied' } })
+    ]);
+  });
+
+  test('agrupa por ventana y fusiona eventos con la misma key', () => {
+    jest.useFakeTimers();
+    try {
+      const io = fakeIo();
+      const bus = new EventBus(io, { coalesceMs: 25 });
+
+      bus.publish('table-updated', { id: 4, status: 'occupied' }, { key: 'table:4' });
+      bus.publish('table-updated', { id: 4, status: 'cleaning', customerCount: 3 }, { key: 'table:4' });
+      bus.publish('cart-line', { cartKey: 'table-4' });
+      expect(io.sent).toHaveLength(0);
+
+      jest.advanceTimersByTime(25);
+
+      const waiter = io.sent.filter(message => message.room === 'channel:waiter');
+      expect(waiter).toHaveLength(1);
+      expect(waiter[0].payload.events).toEqual([
+        expect.objectContaining({ seq: 1, event: 'table-updated', data: { id: 4, status: 'cleaning', customerCount: 3 } }),
+        expect.objectContaining({ seq: 2, event: 'cart-line' })
+      ]);
+      expect(bus.stats).toMatchObject({ published: 3, coalesced: 1 });
+    } finally {
+      jest.useRealTimers();
+    }
+  });
+});
+
+describe('resync', () => {
+  let bus;
+
+  beforeEach(() => {
+    bus = new EventBus(fakeIo(), { coalesceMs: 0, bufferSize: 3 });
+  });
+
+  const publishN = (n) => {
+    for (let i = 0; i < n; i++) bus.publish('new-sale', { id: i + 1 });
+  };
+
+  test('reenvía desde el buffer los eventos posteriores a `since`', () => {
+    publishN(3);
+    const socket = subscribed(bus, 'cashier');
+
+    bus.resync(socket, { epoch: bus.epoch, since: 1 });
+
+    expect(socket.emitted).toHaveLength(1);
+    expect(socket.emitted[0].event).toBe('events');
+    expect(socket.emitted[0].payload).toMatchObject({ channel: 'cashier', epoch: bus.epoch, replay: true });
+    expect(seqs(socket.emitted[0].payload.events)).toEqual([2, 3]);
+  });
+
+  test('al día no recibe nada', () => {
+    publishN(2);
+    const socket = subscribed(bus, 'cashier');
+
+    bus.resync(socket, { epoch: bus.epoch, since: 2 });
+    expect(socket.emitted).toEqual([]);
+  });
+
+  test('el hueco más viejo que sigue en el buffer todavía se reenvía', () => {
+    publishN(5);
+    const socket = subscribed(bus, 'cashier');
+
+    // Buffer de 3: quedan 3, 4 y 5
+    bus.resync(socket, { epoch: bus.epoch, since: 2 });
+    expect(seqs(socket.emitted[0].payload.events)).toEqual([3, 4, 5]);
+  });
+
+  test('un hueco que ya salió del buffer pide recargar', () => {
+    publishN(5);
+    const socket = subscribed(bus, 'cashier');
+
+    bus.resync(socket, { epoch: bus.epoch, since: 1 });
+    expect(socket.emitted).toEqual([
+      { event: 'events-reset', payload: { channel: 'cashier', epoch: bus.epoch, seq: 5 } }
+    ]);
+  });
+
+  test('seq adelantado o inválido pide recargar', () => {
+    publishN(2);
+    const socket = subscribed(bus, 'cashier');
+
+    for (const since of [3, 'abc', undefined]) {
+      socket.emitted.length = 0;
+      bus.resync(socket, { epoch: bus.epoch, since });
+      expect(socket.emitted.map(message => message.event)).toEqual(['events-reset']);
+    }
+  });
+
+  test('tras un reinicio (otro epoch) pide recargar aunque el seq coincida', () => {
+    jest.useFakeTimers();
+    try {
+      jest.setSystemTime(new Date('2024-05-01T12:00:00Z'));
+      const before = new EventBus(fakeIo(), { coalesceMs: 0 });
+      jest.setSystemTime(new Date('2024-05-01T12:05:00Z'));
+      const after = new EventBus(fakeIo(), { coalesceMs: 0 });
+      expect(after.epoch).not.toBe(before.epoch);
+
+      after.publish('new-sale', { id: 1 });
+      const socket = subscribed(after, 'cashier');
+      after.resync(socket, { epoch: before.epoch, since: 0 });
+
+      expect(socket.emitted).toEqual([
+        { event: 'events-reset', payload: { channel: 'cashier', epoch: after.epoch, seq: 1 } }
+      ]);
+    } finally {
+      jest.useRealTimers();
+    }
+  });
+
+  test('un socket sin canal se ignora', () => {
+    const socket = fakeSocket();
+    bus.resync(socket, { epoch: bus.epoch, since: 0 });
+    expect(socket.emitted).toEqual([]);
+  });
+
+  test('attach registra el resync del socket en su canal', () => {
+    publishN(2);
+    const socket = fakeSocket({ auth: { deviceType: 'kitchen' } });
+    bus.attach(socket);
+    expect(socket.emitted[0].payload).toMatchObject({ channel: 'kitchen', seq: 2 });
+
+    const [, handler] = socket.on.mock.calls.find(([event]) => event === 'events-resync');
+    handler({ epoch: bus.epoch, since: 1 });
+    expect(seqs(socket.emitted[1].payload.events)).toEqual([2]);
+  });
+});
+
+describe('EventSequencer', () => {
+  test('numera lo publicado y reparte un lote con su epoch', () => {
+    const broadcast = jest.fn();
+    const sequencer = new EventSequencer(broadcast, { coalesceMs: 0 });
+
+    sequencer.publish('sales-synced', { count: 3 });
+    sequencer.publish('sales-synced', { count: 1 });
+
+    expect(broadcast).toHaveBeenCalledTimes(2);
+    const message = broadcast.mock.calls[1][0];
+    expect(message).toMatchObject({ type: 'events:batch', epoch: sequencer.epoch });
+    expect(new Map(message.batches).get('admin')).toEqual([
+      expect.objectContaining({ seq: 2, event: 'sales-synced', data: { count: 1 } })
+    ]);
+  });
+
+  test('el estado permite a un worker nuevo continuar el mismo seq y buffer', () => {
+    const sequencer = new EventSequencer(() => {}, { coalesceMs: 0 });
+    sequencer.publish('new-sale', { id: 1 });
+    sequencer.publish('new-sale', { id: 2 });
+
+    const state = sequencer.state();
+    expect(state.epoch).toBe(sequencer.epoch);
+    expect(new Map(state.seq).get('cashier')).toBe(2);
+    expect(seqs(new Map(state.buffers).get('cashier'))).toEqual([1, 2]);
+  });
+});
@@ -0,0 +1,636 @@
+// backend/services/inventory.js
+// Inventario de insumos con libro de movimientos.
+//
+// - stock_movements solo crece: venta, cancelación, ajuste y entrada. Cada
+//   movimiento se agrega en la misma transacción que lo origina (la venta,
+//   su cancelación o el lote sincronizado) y la existencia vigente de cada
+//   insumo (inventory_items.level) se actualiza con un solo UPDATE por lote.
+// - Las recetas (recipe_lines) dicen cuánto de cada insumo consume una unidad
+//   de un producto del menú; una venta se explota en un movimiento por
+//   insumo. Los insumos pueden quedar en negativo: la venta ya ocurrió y el
+//   faltante aparece en stock bajo.
+// - stock_snapshots guarda la existencia de cada insumo cada
+//   INVENTORY_SNAPSHOT_HOURS (services/maintenance.js). La existencia a una
+//   fecha es la foto anterior más los movimientos posteriores a ella, sin
+//   recorrer el historial completo.
+// - Las tabletas registran movimientos sin conexión y los suben con
+//   syncMovements, idempotente por clientId como /api/sync/sales.
+const { QueryTypes } = require('sequelize');
+const { sequelize } = require('../database/init');
+const { formatDbDate } = require('./salesRollup');
+const { HttpError } = require('./errors');
+
+const MAX_SYNC_BATCH = parseInt(process.env.INVENTORY_SYNC_MAX_BATCH || '1000');
+
+// Tipos que se registran a mano o desde una tableta (venta y cancelación
+// los genera el servidor)
+const MANUAL_TYPES = ['receipt', 'adjustment'];
+
+const MOVEMENT_COLUMNS = ['inventoryItemId', 'type', 'delta', 'saleId', 'userId', 'deviceId', 'clientId', 'reason', 'occurredAt', 'createdAt'];
+const ITEM_FIELDS = ['name', 'category', 'unit', 'minLevel', 'isActive'];
+
+class InventoryError extends HttpError {}
+
+// Cantidades fraccionarias (kg, l) sin arrastrar error de punto flotante
+const roundQuantity = (value) => Math.round(Number(value) * 1e6) / 1e6;
+
+const placeholders = (values) => values.map(() => '?').join(', ');
+
+function select(sql, replacements = [], transaction = null) {
+  return sequelize.query(sql, { replacements, type: QueryTypes.SELECT, transaction });
+}
+
+function formatItem(row) {
+  return {
+    id: row.id,
+    name: row.name,
+    category: row.category,
+    unit: row.unit,
+    minLevel: Number(row.minLevel),
+    level: roundQuantity(row.level),
+    low: Number(row.level) <= Number(row.minLevel),
+    clientId: row.clientId,
+    isActive: Boolean(row.isActive),
+    updatedAt: row.updatedAt
+  };
+}
+
+// ----- libro de movimientos -------------------------------------------------
+
+/**
+ * Agrega movimientos y aplica sus deltas a la existencia de cada insumo:
+ * un INSERT multi-fila por bloque y un solo UPDATE para todos los insumos.
+ * Debe llamarse dentro de la transacción (el candado del escritor garantiza
+ * que los ids posteriores a `lastId` son los de este lote).
+ */
+async function appendMovements(rows, { transaction }) {
+  const movements = rows.filter(row => row.delta !== 0);
+  if (movements.length === 0) return 0;
+
+  const [{ lastId }] = await select('SELECT COALESCE(MAX(id), 0) AS lastId FROM stock_movements', [], transaction);
+  const createdAt = formatDbDate(new Date());
+  const rowSql = `(${placeholders(MOVEMENT_COLUMNS)})`;
+
+  // Bloques de 50 filas para no exceder el límite de parámetros de SQLite
+  for (let i = 0; i < movements.length; i += 50) {
+    const chunk = movements.slice(i, i + 50);
+    await sequelize.query(
+      `INSERT INTO stock_movements (${MOVEMENT_COLUMNS.join(', ')}) VALUES ${chunk.map(() => rowSql).join(', ')}`,
+      {
+        replacements: chunk.flatMap(row => MOVEMENT_COLUMNS.map(column => (
+          column === 'createdAt' ? createdAt : row[column] === undefined ? null : row[column]
+        ))),
+        transaction
+      }
+    );
+  }
+
+  await sequelize.query(
+    `UPDATE inventory_items
+        SET level = ROUND(level + moved.delta, 6), lastMovementId = moved.lastId, updatedAt = ?
+       FROM (SELECT inventoryItemId, SUM(delta) AS delta, MAX(id) AS lastId
+               FROM stock_movements WHERE id > ? GROUP BY inventoryItemId) AS moved
+      WHERE inventory_items.id = moved.inventoryItemId`,
+    { replacements: [createdAt, lastId], transaction }
+  );
+  return movements.length;
+}
+
+// Recetas de los productos dados: menuItemId → [{ inventoryItemId, quantity }]
+async function loadRecipes(menuItemIds, transaction) {
+  const recipes = new Map();
+  for (let i = 0; i < menuItemIds.length; i += 500) {
+    const ids = menuItemIds.slice(i, i + 500);
+    const rows = await select(
+      `SELECT menuItemId, inventoryItemId, quantity FROM recipe_lines WHERE menuItemId IN (${placeholders(ids)})`,
+      ids,
+      transaction
+    );
+    for (const row of rows) {
+      if (!recipes.has(row.menuItemId)) recipes.set(row.menuItemId, []);
+      recipes.get(row.menuItemId).push({ inventoryItemId: row.inventoryItemId, quantity: Number(row.quantity) });
+    }
+  }
+  return recipes;
+}
+
+/**
+ * Descuenta los insumos de las recetas de una o varias ventas:
+ * sales = [{ saleId, lines: [{ menuItemId, quantity }], userId?, deviceId?, occurredAt? }].
+ * Los productos sin receta no generan movimientos.
+ */
+async function consumeForSales(sales, { transaction }) {
+  const menuItemIds = [...new Set(sales.flatMap(sale => sale.lines.map(line => line.menuItemId)))];
+  if (menuItemIds.length === 0) return 0;
+
+  const recipes = await loadRecipes(menuItemIds, transaction);
+  if (recipes.size === 0) return 0;
+
+  const rows = [];
+  for (const sale of sales) {
+    const consumed = new Map();
+    for (const line of sale.lines) {
+      for (const ingredient of recipes.get(line.menuItemId) || []) {
+        const current = consumed.get(ingredient.inventoryItemId) || 0;
+        consumed.set(ingredient.inventoryItemId, current + ingredient.quantity * line.quantity);
+      }
+    }
+    for (const [inventoryItemId, quantity] of consumed) {
+      rows.push({
+        inventoryItemId,
+        type: 'sale',
+        delta: roundQuantity(-quantity),
+        saleId: sale.saleId,
+        userId: sale.userId,
+        deviceId: sale.deviceId,
+        occurredAt: sale.occurredAt ? formatDbDate(sale.occurredAt) : null
+      });
+    }
+  }
+
+  return appendMovements(rows, { transaction });
+}
+
+/**
+ * Devuelve los insumos de una venta cancelada: revierte lo que sus
+ * movimientos dejaron descontado (la receta pudo cambiar desde la venta).
+ * Cancelar dos veces no devuelve dos veces.
+ */
+async function reverseSaleConsumption(saleId, { transaction, userId = null }) {
+  const net = await select(
+    `SELECT inventoryItemId, ROUND(SUM(delta), 6) AS delta FROM stock_movements
+      WHERE saleId = ? GROUP BY inventoryItemId HAVING ROUND(SUM(delta), 6) <> 0`,
+    [saleId],
+    transaction
+  );
+
+  return appendMovements(net.map(row => ({
+    inventoryItemId: row.inventoryItemId,
+    type: 'cancel',
+    delta: roundQuantity(-row.delta),
+    saleId,
+    userId
+  })), { transaction });
+}
+
+// ----- insumos y recetas ----------------------------------------------------
+
+function normalizeItem(data, { partial = false } = {}) {
+  const item = {};
+  if (data.name !== undefined || !partial) {
+    const name = String(data.name || '').trim();
+    if (!name) throw new InventoryError('El nombre del insumo es requerido');
+    item.name = name.slice(0, 255);
+  }
+  if (data.category !== undefined) item.category = data.category ? String(data.category).slice(0, 100) : null;
+  if (data.unit !== undefined) item.unit = data.unit ? String(data.unit).slice(0, 20) : null;
+  if (data.minLevel !== undefined) {
+    const minLevel = Number(data.minLevel);
+    if (!Number.isFinite(minLevel) || minLevel < 0) throw new InventoryError('Cantidad mínima inválida');
+    item.minLevel = minLevel;
+  }
+  if (data.isActive !== undefined) item.isActive = data.isActive ? 1 : 0;
+  return item;
+}
+
+async function getItem(id, transaction = null) {
+  const [row] = await select('SELECT * FROM inventory_items WHERE id = ?', [id], transaction);
+  return row ? formatItem(row) : null;
+}
+
+async function listItems({ active = true } = {}) {
+  const rows = await select(
+    `SELECT * FROM inventory_items ${active ? 'WHERE isActive = 1' : ''} ORDER BY name`
+  );
+  return rows.map(formatItem);
+}
+
+/**
+ * Crea un insumo. La existencia inicial (`level`) entra al libro como ajuste,
+ * así la suma de movimientos siempre cuadra con la existencia.
+ */
+async function createItem(data, { userId = null } = {}) {
+  const item = { minLevel: 0, ...normalizeItem(data) };
+  const level = data.level !== undefined ? Number(data.level) : 0;
+  if (!Number.isFinite(level)) {
+    throw new InventoryError('Existencia inicial inválida');
+  }
+
+  return sequelize.transaction(async (transaction) => {
+    const now = formatDbDate(new Date());
+    const columns = ['name', 'category', 'unit', 'minLevel', 'createdAt', 'updatedAt'];
+    const values = [item.name, item.category || null, item.unit || null, item.minLevel, now, now];
+    await sequelize.query(
+      `INSERT INTO inventory_items (${columns.join(', ')}) VALUES (${placeholders(columns)})`,
+      { replacements: values, transaction }
+    );
+    const [{ id }] = await select('SELECT last_insert_rowid() AS id', [], transaction);
+
+    await appendMovements([{
+      inventoryItemId: id,
+      type: 'adjustment',
+      delta: roundQuantity(level),
+      userId,
+      reason: 'Existencia inicial'
+    }], { transaction });
+
+    return getItem(id, transaction);
+  });
+}
+
+// Datos del insumo; la existencia solo cambia con movimientos
+async function updateItem(id, data) {
+  const changes = normalizeItem(data, { partial: true });
+  const fields = Object.keys(changes).filter(field => ITEM_FIELDS.includes(field));
+
+  return sequelize.transaction(async (transaction) => {
+    const current = await getItem(id, transaction);
+    if (!current) {
+      throw new InventoryError('Insumo no encontrado', 404);
+    }
+    if (fields.length === 0) {
+      return current;
+    }
+
+    await sequelize.query(
+      `UPDATE inventory_items SET ${fields.map(field => `${field} = ?`).join(', ')}, updatedAt = ? WHERE id = ?`,
+      { replacements: [...fields.map(field => changes[field]), formatDbDate(new Date()), id], transaction }
+    );
+    return getItem(id, transaction);
+  });
+}
+
+async function getRecipe(menuItemId) {
+  const rows = await select(
+    `SELECT r.inventoryItemId, r.quantity, i.name, i.unit
+       FROM recipe_lines r JOIN inventory_items i ON i.id = r.inventoryItemId
+      WHERE r.menuItemId = ? ORDER BY i.name`,
+    [menuItemId]
+  );
+  return rows.map(row => ({ ...row, quantity: Number(row.quantity) }));
+}
+
+// Reemplaza la receta completa del producto (lines vacío la elimina)
+async function setRecipe(menuItemId, lines) {
+  if (!Array.isArray(lines)) {
+    throw new InventoryError('Se requiere un array de insumos');
+  }
+
+  const byItem = new Map();
+  for (const line of lines) {
+    const inventoryItemId = parseInt(line.inventoryItemId);
+    const quantity = Number(line.quantity);
+    if (!Number.isInteger(inventoryItemId)) {
+      throw new InventoryError(`Insumo inválido: ${line.inventoryItemId}`);
+    }
+    if (!Number.isFinite(quantity) || quantity <= 0) {
+      throw new InventoryError(`Cantidad inválida para el insumo ${inventoryItemId}`);
+    }
+    byItem.set(inventoryItemId, roundQuantity((byItem.get(inventoryItemId) || 0) + quantity));
+  }
+
+  await sequelize.transaction(async (transaction) => {
+    const [menuItem] = await select('SELECT id FROM menu_items WHERE id = ?', [menuItemId], transaction);
+    if (!menuItem) {
+      throw new InventoryError('Producto no encontrado', 404);
+    }
+
+    const ids = [...byItem.keys()];
+    if (ids.length) {
+      const found = await select(`SELECT id FROM inventory_items WHERE id IN (${placeholders(ids)})`, ids, transaction);
+      if (found.length !== ids.length) {
+        const known = new Set(found.map(row => row.id));
+        throw new InventoryError(`Insumo no encontrado: ${ids.find(id => !known.has(id))}`, 404);
+      }
+    }
+
+    await sequelize.query('DELETE FROM recipe_lines WHERE menuItemId = ?', { replacements: [menuItemId], transaction });
+    if (ids.length) {
+      await sequelize.query(
+        `INSERT INTO recipe_lines (menuItemId, inventoryItemId, quantity) VALUES ${ids.map(() => '(?, ?, ?)').join(', ')}`,
+        { replacements: ids.flatMap(id => [menuItemId, id, byItem.get(id)]), transaction }
+      );
+    }
+  });
+
+  return getRecipe(menuItemId);
+}
+
+// ----- consultas ------------------------------------------------------------
+
+// Insumos activos en o por debajo de su mínimo, los de mayor faltante primero
+// (índice sobre level - minLevel: no recorre los insumos con existencia)
+async function lowStock() {
+  const rows = await select(
+    `SELECT * FROM inventory_items
+      WHERE isActive = 1 AND level - minLevel <= 0
+      ORDER BY level - minLevel`
+  );
+  return rows.map(formatItem);
+}
+
+/**
+ * Existencia de los insumos a la fecha `at`: la última foto anterior al
+ * último movimiento registrado hasta esa fecha, más los movimientos entre
+ * ambos (a lo más los de un intervalo de fotos por insumo).
+ */
+async function levelsAt(at, { itemIds = null } = {}) {
+  const date = new Date(at);
+  if (Number.isNaN(date.getTime())) {
+    throw new InventoryError('Fecha inválida');
+  }
+  const until = formatDbDate(date);
+
+  const [last] = await select(
+    'SELECT id FROM stock_movements WHERE createdAt <= ? ORDER BY createdAt DESC, id DESC LIMIT 1',
+    [until]
+  );
+  const movementId = last ? last.id : 0;
+  const filter = itemIds && itemIds.length ? `AND i.id IN (${placeholders(itemIds)})` : '';
+
+  const rows = await select(
+    `SELECT i.id, i.name, i.unit, i.minLevel,
+            COALESCE(s.level, 0) + COALESCE((
+              SELECT SUM(m.delta) FROM stock_movements m
+               WHERE m.inventoryItemId = i.id AND m.id > COALESCE(s.movementId, 0) AND m.id <= ?
+            ), 0) AS level
+       FROM inventory_items i
+       LEFT JOIN stock_snapshots s
+         ON s.inventoryItemId = i.id
+        AND s.movementId = (
+              SELECT movementId FROM stock_snapshots
+               WHERE inventoryItemId = i.id AND movementId <= ?
+               ORDER BY movementId DESC LIMIT 1
+            )
+      WHERE i.createdAt <= ? ${filter}
+      ORDER BY i.name`,
+    [movementId, movementId, until, ...(itemIds || [])]
+  );
+
+  return {
+    at: date.toISOString(),
+    movementId,
+    items: rows.map(row => ({
+      id: row.id,
+      name: row.name,
+      unit: row.unit,
+      minLevel: Number(row.minLevel),
+      level: roundQuantity(row.level)
+    }))
+  };
+}
+
+// Movimientos de un insumo, del más reciente al más antiguo (?before=id)
+async function listMovements(inventoryItemId, { before = null, limit = 50 } = {}) {
+  const pageLimit = Math.min(Math.max(parseInt(limit) || 50, 1), 500);
+  const rows = await select(
+    `SELECT id, type, delta, saleId, userId, deviceId, clientId, reason, occurredAt, createdAt
+       FROM stock_movements
+      WHERE inventoryItemId = ? ${before ? 'AND id < ?' : ''}
+      ORDER BY id DESC LIMIT ?`,
+    [inventoryItemId, ...(before ? [parseInt(before)] : []), pageLimit + 1]
+  );
+
+  const hasMore = rows.length > pageLimit;
+  const movements = rows.slice(0, pageLimit).map(row => ({ ...row, delta: Number(row.delta) }));
+  return {
+    movements,
+    nextBefore: hasMore ? movements[movements.length - 1].id : null
+  };
+}
+
+/**
+ * Guarda una foto de la existencia de cada insumo que tuvo movimientos desde
+ * su última foto (un solo INSERT ... SELECT). Devuelve cuántas fotos guardó.
+ */
+async function takeSnapshots() {
+  const started = Date.now();
+  const snapshots = await sequelize.transaction(transaction => sequelize.query(
+    `INSERT OR IGNORE INTO stock_snapshots (inventoryItemId, movementId, level, takenAt)
+     SELECT i.id, i.lastMovementId, i.level, ? FROM inventory_items i
+      WHERE i.lastMovementId > COALESCE((
+              SELECT movementId FROM stock_snapshots s
+               WHERE s.inventoryItemId = i.id ORDER BY movementId DESC LIMIT 1
+            ), 0)`,
+    { replacements: [formatDbDate(new Date())], type: QueryTypes.BULKUPDATE, transaction }
+  ));
+  return { snapshots, elapsedMs: Date.now() - started };
+}
+
+// ----- sincronización de tabletas -------------------------------------------
+
+// Valida un movimiento de la tableta; lanza InventoryError si no sirve
+function normalizeMovement(data) {
+  const clientId = data.clientId ? String(data.clientId).slice(0, 64) : null;
+  const type = data.type;
+  if (!MANUAL_TYPES.includes(type)) {
+    throw new InventoryError(`Tipo de movimiento inválido: ${type}`);
+  }
+
+  const movement = {
+    clientId,
+    type,
+    inventoryItemId: data.inventoryItemId !== undefined && data.inventoryItemId !== null ? parseInt(data.inventoryItemId) : null,
+    itemClientId: data.itemClientId ? String(data.itemClientId).slice(0, 64) : null,
+    reason: data.reason ? String(data.reason).slice(0, 500) : null,
+    occurredAt: null
+  };
+  if (!Number.isInteger(movement.inventoryItemId) && !movement.itemClientId) {
+    throw new InventoryError('Insumo requerido');
+  }
+
+  if (type === 'receipt') {
+    const quantity = Number(data.quantity);
+    if (!Number.isFinite(quantity) || quantity <= 0) {
+      throw new InventoryError('Cantidad de entrada inválida');
+    }
+    movement.delta = roundQuantity(quantity);
+  } else if (data.count !== undefined && data.count !== null) {
+    // Conteo físico: la existencia pasa a ser `count`
+    const count = Number(data.count);
+    if (!Number.isFinite(count) || count < 0) {
+      throw new InventoryError('Conteo inválido');
+    }
+    movement.count = roundQuantity(count);
+  } else {
+    const delta = Number(data.delta);
+    if (!Number.isFinite(delta) || delta === 0) {
+      throw new InventoryError('Ajuste inválido');
+    }
+    movement.delta = roundQuantity(delta);
+  }
+
+  if (data.occurredAt) {
+    const occurredAt = new Date(data.occurredAt);
+    if (Number.isNaN(occurredAt.getTime())) {
+      throw new InventoryError('Fecha de movimiento inválida');
+    }
+    movement.occurredAt = formatDbDate(occurredAt);
+  }
+  return movement;
+}
+
+// Crea o actualiza los insumos que la tableta creó (por clientId)
+async function upsertClientItems(items, transaction) {
+  if (items.length === 0) return;
+
+  const now = formatDbDate(new Date());
+  const columns = ['clientId', 'name', 'category', 'unit', 'minLevel', 'isActive', 'createdAt', 'updatedAt'];
+  for (let i = 0; i < items.length; i += 50) {
+    const chunk = items.slice(i, i + 50);
+    await sequelize.query(
+      `INSERT INTO inventory_items (${columns.join(', ')})
+       VALUES ${chunk.map(() => `(${placeholders(columns)})`).join(', ')}
+       ON CONFLICT (clientId) WHERE clientId IS NOT NULL DO UPDATE SET
+         name = excluded.name, category = excluded.category, unit = excluded.unit,
+         minLevel = excluded.minLevel, isActive = excluded.isActive, updatedAt = excluded.updatedAt`,
+      {
+        replacements: chunk.flatMap(item => [
+          item.clientId, item.name, item.category || null, item.unit || null,
+          item.minLevel || 0, item.isActive === undefined ? 1 : item.isActive, now, now
+        ]),
+        transaction
+      }
+    );
+  }
+}
+
+/**
+ * Aplica un lote de movimientos de una tableta (y los insumos que creó o
+ * editó) en una sola transacción. Idempotente por clientId.
+ * Devuelve { manifest: [{ index, clientId, status, movementId?, error? }],
+ * items: [existencia vigente de los insumos tocados], counts }.
+ */
+async function syncMovements({ items = [], movements = [], deviceId = null }, currentUser) {
+  if (!Array.isArray(items) || !Array.isArray(movements)) {
+    throw new InventoryError('Se requieren arrays de insumos y movimientos');
+  }
+  if (items.length + movements.length > MAX_SYNC_BATCH) {
+    throw new InventoryError(`Máximo ${MAX_SYNC_BATCH} registros por petición`, 413);
+  }
+
+  const clientItems = [];
+  for (const data of items) {
+    if (!data || !data.clientId) {
+      throw new InventoryError('clientId requerido en cada insumo');
+    }
+    clientItems.push({ clientId: String(data.clientId).slice(0, 64), ...normalizeItem(data) });
+  }
+
+  // 1. Validación local (sin tocar la base de datos)
+  const manifest = new Array(movements.length);
+  const accepted = [];
+  const seen = new Map();
+  movements.forEach((data, index) => {
+    try {
+      const movement = { index, ...normalizeMovement(data || {}) };
+      if (movement.clientId && seen.has(movement.clientId)) {
+        manifest[index] = { index, clientId: movement.clientId, status: 'duplicate' };
+        return;
+      }
+      if (movement.clientId) seen.set(movement.clientId, index);
+      accepted.push(movement);
+    } catch (error) {
+      manifest[index] = { index, clientId: data && data.clientId, status: 'rejected', error: error.message };
+    }
+  });
+
+  // 2. Todo el lote en una transacción: los conteos dependen del orden
+  const touched = await sequelize.transaction(async (transaction) => {
+    await upsertClientItems(clientItems, transaction);
+
+    const clientIds = accepted.filter(movement => movement.clientId).map(movement => movement.clientId);
+    const existing = new Map();
+    for (let i = 0; i < clientIds.length; i += 500) {
+      const ids = clientIds.slice(i, i + 500);
+      const rows = await select(`SELECT id, clientId FROM stock_movements WHERE clientId IN (${placeholders(ids)})`, ids, transaction);
+      rows.forEach(row => existing.set(row.clientId, row.id));
+    }
+
+    // Insumos referenciados, por id del servidor o por clientId de la tableta
+    const itemClientIds = [...new Set([...accepted.map(m => m.itemClientId).filter(Boolean), ...clientItems.map(item => item.clientId)])];
+    const itemIds = [...new Set(accepted.map(m => m.inventoryItemId).filter(Number.isInteger))];
+    const rows = [];
+    for (let i = 0; i < itemClientIds.length; i += 500) {
+      const ids = itemClientIds.slice(i, i + 500);
+      rows.push(...await select(`SELECT id, clientId, level FROM inventory_items WHERE clientId IN (${placeholders(ids)})`, ids, transaction));
+    }
+    for (let i = 0; i < itemIds.length; i += 500) {
+      const ids = itemIds.slice(i, i + 500);
+      rows.push(...await select(`SELECT id, clientId, level FROM inventory_items WHERE id IN (${placeholders(ids)})`, ids, transaction));
+    }
+    const byClient = new Map(rows.filter(row => row.clientId).map(row => [row.clientId, row.id]));
+    const levels = new Map(rows.map(row => [row.id, Number(row.level)]));
+
+    const fresh = [];
+    for (const movement of accepted) {
+      if (movement.clientId && existing.has(movement.clientId)) {
+        manifest[movement.index] = { index: movement.index, clientId: movement.clientId, status: 'duplicate', movementId: existing.get(movement.clientId) };
+        continue;
+      }
+      const inventoryItemId = Number.isInteger(movement.inventoryItemId) ? movement.inventoryItemId : byClient.get(movement.itemClientId);
+      if (!levels.has(inventoryItemId)) {
+        manifest[movement.index] = { index: movement.index, clientId: movement.clientId, status: 'rejected', error: 'Insumo no encontrado' };
+        continue;
+      }
+
+      const level = levels.get(inventoryItemId);
+      const delta = movement.count !== undefined ? roundQuantity(movement.count - level) : movement.delta;
+      levels.set(inventoryItemId, roundQuantity(level + delta));
+      fresh.push({
+        ...movement,
+        inventoryItemId,
+        delta,
+        userId: currentUser ? currentUser.userId : null,
+        deviceId: deviceId ? String(deviceId).slice(0, 100) : null
+      });
+      manifest[movement.index] = { index: movement.index, clientId: movement.clientId, status: 'created' };
+    }
+
+    await appendMovements(fresh, { transaction });
+
+    // Ids asignados, resueltos por la llave de idempotencia
+    const freshIds = fresh.filter(movement => movement.clientId).map(movement => movement.clientId);
+    for (let i = 0; i < freshIds.length; i += 500) {
+      const ids = freshIds.slice(i, i + 500);
+      const inserted = await select(`SELECT id, clientId FROM stock_movements WHERE clientId IN (${placeholders(ids)})`, ids, transaction);
+      const idByClient = new Map(inserted.map(row => [row.clientId, row.id]));
+      for (const movement of fresh) {
+        if (idByClient.has(movement.clientId)) {
+          manifest[movement.index].movementId = idByClient.get(movement.clientId);
+        }
+      }
+    }
+
+    return [...levels.keys()];
+  });
+
+  const current = [];
+  for (let i = 0; i < touched.length; i += 500) {
+    const ids = touched.slice(i, i + 500);
+    const rows = await select(`SELECT * FROM inventory_items WHERE id IN (${placeholders(ids)})`, ids);
+    current.push(...rows.map(formatItem));
+  }
+
+  const counts = { created: 0, duplicate: 0, rejected: 0 };
+  manifest.forEach(entry => { counts[entry.status] += 1; });
+  return { manifest, items: current, counts };
+}
+
+module.exports = {
+  InventoryError,
+  appendMovements,
+  consumeForSales,
+  reverseSaleConsumption,
+  listItems,
+  getItem,
+  createItem,
+  updateItem,
+  getRecipe,
+  setRecipe,
+  lowStock,
+  levelsAt,
+  listMovements,
+  takeSnapshots,
+  syncMovements
+};
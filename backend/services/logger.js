@@ -0,0 +1,121 @@
+// backend/services/logger.js
+// Log de peticiones con escritura asíncrona en bloque.
+//
+// Antes cada petición escribía una línea con console.log (escritura
+// síncrona a la terminal o al pipe de PM2). Aquí las líneas se acumulan en
+// memoria y se escriben juntas cada LOG_FLUSH_MS o al pasar de 64 KB, con un
+// WriteStream hacia LOG_FILE (o stdout si no está configurado).
+// - LOG_LEVEL: debug | info | warn | error (el acceso se registra en info)
+// - si la cola supera LOG_MAX_BUFFER líneas sin poder escribir, se descartan
+//   las nuevas y se cuentan en stats.dropped.
+const fs = require('fs');
+const path = require('path');
+
+const LEVELS = { debug: 10, info: 20, warn: 30, error: 40 };
+const FLUSH_MS = parseInt(process.env.LOG_FLUSH_MS || '1000');
+const FLUSH_BYTES = 64 * 1024;
+const MAX_BUFFER = parseInt(process.env.LOG_MAX_BUFFER || '10000');
+
+class BufferedLogger {
+  constructor({ file = process.env.LOG_FILE, level = process.env.LOG_LEVEL || 'info' } = {}) {
+    this.file = file;
+    this.level = LEVELS[level] || LEVELS.info;
+    this.lines = [];
+    this.bytes = 0;
+    this.stream = null;
+    this.timer = null;
+    this.writing = false;
+    this.stats = { written: 0, dropped: 0, flushes: 0 };
+  }
+
+  open() {
+    if (this.stream) return this.stream;
+
+    if (this.file) {
+      fs.mkdirSync(path.dirname(this.file), { recursive: true });
+      this.stream = fs.createWriteStream(this.file, { flags: 'a' });
+      this.stream.on('error', (error) => {
+        console.error('Error escribiendo log:', error);
+        this.stream = process.stdout;
+      });
+    } else {
+      this.stream = process.stdout;
+    }
+    return this.stream;
+  }
+
+  log(level, message) {
+    if (LEVELS[level] < this.level) return;
+    if (this.lines.length >= MAX_BUFFER) {
+      this.stats.dropped += 1;
+      return;
+    }
+
+    const line = `[${new Date().toISOString()}] ${level.toUpperCase()} ${message}\n`;
+    this.lines.push(line);
+    this.bytes += line.length;
+
+    if (this.bytes >= FLUSH_BYTES) {
+      this.flush();
+    } else if (!this.timer) {
+      this.timer = setTimeout(() => this.flush(), FLUSH_MS);
+      if (this.timer.unref) this.timer.unref();
+    }
+  }
+
+  debug(message) { this.log('debug', message); }
+  info(message) { this.log('info', message); }
+  warn(message) { this.log('warn', message); }
+  error(message) { this.log('error', message); }
+
+  // Línea de acceso: método, ruta, código, duración y dispositivo
+  access(req, res, durationMs) {
+    const deviceId = req.headers['x-device-id'] || 'unknown';
+    this.info(`${req.method} ${req.originalUrl} ${res.statusCode} ${durationMs.toFixed(1)}ms - Device: ${deviceId}`);
+  }
+
+  // Escribe lo acumulado en una sola llamada; respeta la contrapresión
+  flush() {
+    clearTimeout(this.timer);
+    this.timer = null;
+    if (this.lines.length === 0 || this.writing) return;
+
+    const chunk = this.lines.join('');
+    const count = this.lines.length;
+    this.lines = [];
+    this.bytes = 0;
+
+    const stream = this.open();
+    this.stats.written += count;
+    this.stats.flushes += 1;
+
+    if (!stream.write(chunk)) {
+      this.writing = true;
+      stream.once('drain', () => {
+        this.writing = false;
+        if (this.lines.length > 0) this.flush();
+      });
+    }
+  }
+
+  // Cierre ordenado: escribe lo pendiente y cierra el archivo
+  close() {
+    this.writing = false;
+    this.flush();
+    return new Promise(resolve => {
+      if (this.stream && this.stream !== process.stdout) {
+        this.stream.end(resolve);
+        this.stream = null;
+      } else {
+        resolve();
+      }
+    });
+  }
+}
+
+const logger = new BufferedLogger();
+
+module.exports = {
+  BufferedLogger,
+  logger
+};
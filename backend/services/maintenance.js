@@ -0,0 +1,103 @@
+// backend/services/maintenance.js
+// Tareas periódicas de mantenimiento: archivar ventas frías
+// (services/archive.js), respaldar la base (services/backup.js) y tomar las
+// fotos de existencias de insumos (services/inventory.js).
+//
+// Con un solo proceso las programa este módulo con temporizadores. En modo
+// cluster las programa el primario y las manda a un solo worker
+// ('maintenance:run'), así no corren dos veces. Una tarea no se encima con
+// otra corrida de sí misma y stop() la cancela entre lotes.
+const ipc = require('./clusterIpc');
+
+const HOUR = 3600000;
+
+// Intervalos en ms (0 = tarea desactivada); también los usa cluster.js
+function maintenanceSchedule() {
+  return {
+    delayMs: parseInt(process.env.MAINTENANCE_DELAY_MS || '60000'),
+    intervals: {
+      archive: parseFloat(process.env.ARCHIVE_INTERVAL_HOURS || '24') * HOUR,
+      backup: parseFloat(process.env.BACKUP_INTERVAL_HOURS || '24') * HOUR,
+      inventory: parseFloat(process.env.INVENTORY_SNAPSHOT_HOURS || '1') * HOUR
+    }
+  };
+}
+
+// Imports diferidos: el primario del cluster lee el calendario sin abrir la base
+const JOBS = {
+  archive: (signal) => require('./archive').archiveSales({ signal }),
+  backup: (signal) => require('./backup').backupDatabase({ signal }),
+  inventory: () => require('./inventory').takeSnapshots()
+};
+
+class Maintenance {
+  constructor() {
+    this.timers = [];
+    this.running = new Map();
+    this.controller = new AbortController();
+    this.stats = { runs: 0, failures: 0, skipped: 0, lastRun: {} };
+  }
+
+  // Corre la tarea si no está corriendo ya; devuelve su resultado (o null)
+  async run(job) {
+    if (!JOBS[job] || this.controller.signal.aborted) return null;
+    if (this.running.has(job)) {
+      this.stats.skipped += 1;
+      return null;
+    }
+
+    const started = Date.now();
+    const execution = JOBS[job](this.controller.signal);
+    this.running.set(job, execution);
+
+    try {
+      const result = await execution;
+      this.stats.runs += 1;
+      this.stats.lastRun[job] = { at: new Date(started).toISOString(), elapsedMs: Date.now() - started, ok: true };
+      return result;
+    } catch (error) {
+      this.stats.failures += 1;
+      this.stats.lastRun[job] = { at: new Date(started).toISOString(), elapsedMs: Date.now() - started, ok: false };
+      console.error(`❌ Error en mantenimiento (${job}):`, error.message);
+      return null;
+    } finally {
+      this.running.delete(job);
+    }
+  }
+
+  start() {
+    if (ipc.isClusterWorker) {
+      ipc.on('maintenance:run', ({ job }) => this.run(job));
+      return;
+    }
+
+    const { delayMs, intervals } = maintenanceSchedule();
+    for (const [job, intervalMs] of Object.entries(intervals)) {
+      if (intervalMs <= 0) continue;
+
+      const first = setTimeout(() => {
+        this.run(job);
+        const interval = setInterval(() => this.run(job), intervalMs);
+        interval.unref();
+        this.timers.push(interval);
+      }, delayMs);
+      first.unref();
+      this.timers.push(first);
+    }
+  }
+
+  // Cancela las tareas en curso (terminan en el siguiente lote) y las espera
+  async stop() {
+    for (const timer of this.timers) clearTimeout(timer);
+    this.timers = [];
+    this.controller.abort();
+    await Promise.allSettled([...this.running.values()]);
+  }
+}
+
+const maintenance = new Maintenance();
+
+module.exports = {
+  maintenance,
+  maintenanceSchedule
+};
@@ -0,0 +1,330 @@
+// backend/services/metrics.js
+// Métricas del proceso en formato de texto de Prometheus (GET /api/metrics).
+//
+// - Latencia por ruta (histograma por método + patrón de ruta de Express).
+// - Tiempo de cada consulta de Sequelize por modelo y operación.
+// - Espera y retención del candado del escritor de SQLite (database/storage).
+// - Retraso del event loop (perf_hooks.monitorEventLoopDelay).
+// - Emisiones de Socket.io por evento y bytes enviados a los clientes.
+// - Estadísticas de los servicios (cachés, pool de contraseñas, bus, etc.)
+//   como gauges que se leen al momento de responder.
+//
+// Registrar una observación es O(1) (buckets fijos, sin asignaciones por
+// petición salvo la primera vez que aparece una combinación de etiquetas).
+// En modo cluster cada respuesta corresponde al worker que la atendió (la
+// etiqueta `worker` lo identifica).
+const { monitorEventLoopDelay } = require('perf_hooks');
+const ipc = require('./clusterIpc');
+
+// Límites de los buckets en ms
+const LATENCY_BUCKETS = [1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000];
+
+const escapeLabel = (value) => String(value).replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n');
+
+function formatLabels(labels) {
+  const entries = Object.entries(labels);
+  if (entries.length === 0) return '';
+  return `{${entries.map(([key, value]) => `${key}="${escapeLabel(value)}"`).join(',')}}`;
+}
+
+class Counter {
+  constructor(name, help, labelNames = []) {
+    this.name = name;
+    this.help = help;
+    this.labelNames = labelNames;
+    this.series = new Map();
+  }
+
+  inc(labels = {}, amount = 1) {
+    const key = this.labelNames.map(name => labels[name]).join('\u0001');
+    const series = this.series.get(key);
+    if (series) {
+      series.value += amount;
+    } else {
+      this.series.set(key, { labels: pickLabels(labels, this.labelNames), value: amount });
+    }
+  }
+
+  render() {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} counter`];
+    for (const { labels, value } of this.series.values()) {
+      lines.push(`${this.name}${formatLabels(labels)} ${value}`);
+    }
+    return lines;
+  }
+
+  toJSON() {
+    return [...this.series.values()];
+  }
+}
+
+class Histogram {
+  constructor(name, help, labelNames = [], buckets = LATENCY_BUCKETS) {
+    this.name = name;
+    this.help = help;
+    this.labelNames = labelNames;
+    this.buckets = buckets;
+    this.series = new Map();
+  }
+
+  observe(labels, value) {
+    const key = this.labelNames.map(name => labels[name]).join('\u0001');
+    let series = this.series.get(key);
+    if (!series) {
+      series = { labels: pickLabels(labels, this.labelNames), counts: new Array(this.buckets.length + 1).fill(0), sum: 0, count: 0 };
+      this.series.set(key, series);
+    }
+
+    let index = 0;
+    while (index < this.buckets.length && value > this.buckets[index]) index++;
+    series.counts[index] += 1;
+    series.sum += value;
+    series.count += 1;
+  }
+
+  // Percentil estimado por interpolación lineal dentro del bucket
+  quantile(series, q) {
+    if (series.count === 0) return 0;
+    const rank = q * series.count;
+    let seen = 0;
+
+    for (let i = 0; i < series.counts.length; i++) {
+      if (seen + series.counts[i] >= rank) {
+        const lower = i === 0 ? 0 : this.buckets[i - 1];
+        const upper = i < this.buckets.length ? this.buckets[i] : lower;
+        const within = series.counts[i] ? (rank - seen) / series.counts[i] : 0;
+        return Math.round((lower + (upper - lower) * within) * 100) / 100;
+      }
+      seen += series.counts[i];
+    }
+    return this.buckets[this.buckets.length - 1];
+  }
+
+  render() {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} histogram`];
+    for (const series of this.series.values()) {
+      let cumulative = 0;
+      this.buckets.forEach((bound, i) => {
+        cumulative += series.counts[i];
+        lines.push(`${this.name}_bucket${formatLabels({ ...series.labels, le: bound })} ${cumulative}`);
+      });
+      lines.push(`${this.name}_bucket${formatLabels({ ...series.labels, le: '+Inf' })} ${series.count}`);
+      lines.push(`${this.name}_sum${formatLabels(series.labels)} ${Math.round(series.sum * 1000) / 1000}`);
+      lines.push(`${this.name}_count${formatLabels(series.labels)} ${series.count}`);
+    }
+    return lines;
+  }
+
+  toJSON() {
+    return [...this.series.values()].map(series => ({
+      labels: series.labels,
+      count: series.count,
+      avg: series.count ? Math.round((series.sum / series.count) * 100) / 100 : 0,
+      p50: this.quantile(series, 0.5),
+      p95: this.quantile(series, 0.95),
+      p99: this.quantile(series, 0.99)
+    }));
+  }
+}
+
+// Gauge que se calcula al responder: collect() devuelve un número o
+// una lista de [labels, valor]
+class Gauge {
+  constructor(name, help, collect) {
+    this.name = name;
+    this.help = help;
+    this.collect = collect;
+  }
+
+  values() {
+    const result = this.collect();
+    if (typeof result === 'number') return [[{}, result]];
+    return result || [];
+  }
+
+  render() {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} gauge`];
+    for (const [labels, value] of this.values()) {
+      lines.push(`${this.name}${formatLabels(labels)} ${Number(value) || 0}`);
+    }
+    return lines;
+  }
+
+  toJSON() {
+    return this.values().map(([labels, value]) => ({ labels, value }));
+  }
+}
+
+function pickLabels(labels, names) {
+  const picked = {};
+  for (const name of names) picked[name] = labels[name] ?? '';
+  return picked;
+}
+
+class MetricsRegistry {
+  constructor() {
+    this.metrics = new Map();
+  }
+
+  counter(name, help, labelNames) {
+    return this.register(new Counter(name, help, labelNames));
+  }
+
+  histogram(name, help, labelNames, buckets) {
+    return this.register(new Histogram(name, help, labelNames, buckets));
+  }
+
+  gauge(name, help, collect) {
+    return this.register(new Gauge(name, help, collect));
+  }
+
+  // Un gauge por campo numérico del objeto de estadísticas de un servicio
+  stats(name, help, read) {
+    return this.gauge(name, help, () => Object.entries(read() || {})
+      .filter(([, value]) => typeof value === 'number' && Number.isFinite(value))
+      .map(([stat, value]) => [{ stat }, value]));
+  }
+
+  register(metric) {
+    this.metrics.set(metric.name, metric);
+    return metric;
+  }
+
+  render() {
+    const lines = [];
+    for (const metric of this.metrics.values()) {
+      try {
+        lines.push(...metric.render());
+      } catch (error) {
+        console.error(`Error leyendo métrica ${metric.name}:`, error);
+      }
+    }
+    return `${lines.join('\n')}\n`;
+  }
+
+  toJSON() {
+    const result = {};
+    for (const [name, metric] of this.metrics) {
+      result[name] = metric.toJSON();
+    }
+    return result;
+  }
+}
+
+const registry = new MetricsRegistry();
+
+const httpDuration = registry.histogram('pos_http_request_duration_ms', 'Duración de las peticiones HTTP por ruta', ['method', 'route']);
+const httpRequests = registry.counter('pos_http_requests_total', 'Peticiones HTTP por ruta y código', ['method', 'route', 'status']);
+const queryDuration = registry.histogram('pos_db_query_duration_ms', 'Duración de las consultas de Sequelize', ['model', 'operation']);
+const lockWait = registry.histogram('pos_db_write_lock_wait_ms', 'Espera por el candado del escritor de SQLite', []);
+const lockHold = registry.histogram('pos_db_write_lock_hold_ms', 'Tiempo con el candado del escritor de SQLite', []);
+const socketEmits = registry.counter('pos_socket_emits_total', 'Eventos emitidos a sockets (por socket destino)', ['event']);
+const socketBytes = registry.counter('pos_socket_sent_bytes_total', 'Bytes enviados a los clientes de Socket.io', []);
+
+// Retraso del event loop desde la última lectura de /api/metrics
+const loopDelay = monitorEventLoopDelay({ resolution: 10 });
+loopDelay.enable();
+registry.gauge('pos_event_loop_lag_ms', 'Retraso del event loop desde la última lectura', () => {
+  const toMs = (ns) => Math.round(ns / 1e4) / 100;
+  const values = [
+    [{ stat: 'p50' }, toMs(loopDelay.percentile(50))],
+    [{ stat: 'p99' }, toMs(loopDelay.percentile(99))],
+    [{ stat: 'max' }, toMs(loopDelay.max)]
+  ];
+  loopDelay.reset();
+  return values;
+});
+
+registry.gauge('pos_process_memory_bytes', 'Memoria del proceso', () => {
+  const usage = process.memoryUsage();
+  return [[{ type: 'rss' }, usage.rss], [{ type: 'heapUsed' }, usage.heapUsed]];
+});
+
+registry.gauge('pos_process_info', 'Proceso que atendió la lectura', () => [
+  [{ worker: ipc.workerId || 0, pid: process.pid }, 1]
+]);
+
+// Middleware: latencia por patrón de ruta (no por URL, para no multiplicar
+// las series con ids)
+function httpMetrics(onFinish) {
+  return (req, res, next) => {
+    const start = process.hrtime.bigint();
+
+    res.on('finish', () => {
+      const durationMs = Number(process.hrtime.bigint() - start) / 1e6;
+      const route = req.route ? `${req.baseUrl}${req.route.path}` : 'unmatched';
+
+      httpDuration.observe({ method: req.method, route }, durationMs);
+      httpRequests.inc({ method: req.method, route, status: res.statusCode });
+      if (onFinish) onFinish(req, res, durationMs);
+    });
+
+    next();
+  };
+}
+
+// Operación de una consulta: tipo de Sequelize o primera palabra del SQL
+function queryOperation(options, sql) {
+  const type = options && options.type;
+  if (type && type !== 'RAW') return type.toLowerCase();
+  const match = /^\s*(\w+)/.exec(sql || '');
+  return match ? match[1].toLowerCase() : 'raw';
+}
+
+// Mide cada consulta con los hooks beforeQuery/afterQuery de Sequelize
+function instrumentQueries(sequelize) {
+  const started = new WeakMap();
+
+  sequelize.addHook('beforeQuery', (options, query) => {
+    started.set(query, process.hrtime.bigint());
+  });
+
+  sequelize.addHook('afterQuery', (options, query) => {
+    const start = started.get(query);
+    if (start === undefined) return;
+
+    queryDuration.observe({
+      model: query.model ? query.model.name : 'raw',
+      operation: queryOperation(options, query.sql)
+    }, Number(process.hrtime.bigint() - start) / 1e6);
+  });
+}
+
+function observeLockWait(ms) {
+  lockWait.observe({}, ms);
+}
+
+function observeLockHold(ms) {
+  lockHold.observe({}, ms);
+}
+
+// Cuenta emisiones por evento (en cada socket destino) y bytes escritos
+function instrumentSocketIo(io) {
+  io.engine.on('connection', (rawSocket) => {
+    rawSocket.on('packetCreate', (packet) => {
+      if (packet.type === 'message' && packet.data) {
+        socketBytes.inc({}, typeof packet.data === 'string' ? Buffer.byteLength(packet.data) : packet.data.length);
+      }
+    });
+  });
+
+  io.on('connection', (socket) => {
+    socket.onAnyOutgoing((event) => socketEmits.inc({ event }));
+  });
+
+  registry.gauge('pos_socket_connections', 'Sockets conectados a este proceso', () => io.engine.clientsCount);
+}
+
+module.exports = {
+  LATENCY_BUCKETS,
+  Counter,
+  Histogram,
+  Gauge,
+  MetricsRegistry,
+  registry,
+  httpMetrics,
+  instrumentQueries,
+  instrumentSocketIo,
+  observeLockWait,
+  observeLockHold
+};
@@ -0,0 +1,78 @@
+// backend/services/pagination.js
+// Paginación por cursor (keyset) sobre (createdAt, id). A diferencia de
+// OFFSET, cada página cuesta lo mismo sin importar qué tan profunda sea y no
+// requiere un COUNT por petición.
+const { Op } = require('sequelize');
+
+const MAX_LIMIT = 500;
+
+// Cursor opaco: base64url de { t: createdAt ISO, id }
+function encodeCursor(row) {
+  if (!row) return null;
+  const createdAt = row.createdAt instanceof Date ? row.createdAt.toISOString() : new Date(row.createdAt).toISOString();
+  return Buffer.from(JSON.stringify({ t: createdAt, id: row.id })).toString('base64url');
+}
+
+function decodeCursor(cursor) {
+  if (!cursor) return null;
+
+  try {
+    const { t, id } = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'));
+    const createdAt = new Date(t);
+    if (Number.isNaN(createdAt.getTime()) || !Number.isInteger(id)) {
+      return undefined;
+    }
+    return { createdAt, id };
+  } catch (error) {
+    return undefined;
+  }
+}
+
+// ¿La petición pidió paginación por cursor? (?cursor= o ?paginate=keyset)
+function wantsKeyset(query) {
+  return query.cursor !== undefined || query.paginate === 'keyset';
+}
+
+function parseLimit(limit, fallback = 50) {
+  const parsed = parseInt(limit);
+  if (Number.isNaN(parsed) || parsed < 1) return fallback;
+  return Math.min(parsed, MAX_LIMIT);
+}
+
+// Condición "después del cursor" para orden createdAt DESC, id DESC
+function keysetWhere(position, direction = 'DESC') {
+  if (!position) return {};
+
+  const op = direction === 'DESC' ? Op.lt : Op.gt;
+  return {
+    [Op.or]: [
+      { createdAt: { [op]: position.createdAt } },
+      { createdAt: position.createdAt, id: { [op]: position.id } }
+    ]
+  };
+}
+
+// Recorta la fila extra (limit + 1) y arma la metadata de la página
+function keysetPage(rows, limit) {
+  const hasMore = rows.length > limit;
+  const page = hasMore ? rows.slice(0, limit) : rows;
+
+  return {
+    rows: page,
+    pagination: {
+      mode: 'keyset',
+      limit,
+      hasMore,
+      nextCursor: hasMore ? encodeCursor(page[page.length - 1]) : null
+    }
+  };
+}
+
+module.exports = {
+  encodeCursor,
+  decodeCursor,
+  wantsKeyset,
+  parseLimit,
+  keysetWhere,
+  keysetPage
+};
@@ -0,0 +1,170 @@
+// backend/services/passwordHasher.js
+// Hash y verificación de contraseñas (bcryptjs) fuera del event loop.
+//
+// bcryptjs es JavaScript puro: un hash con costo 10 ocupa el hilo ~50-100 ms.
+// En el cambio de turno una docena de logins detenían todas las demás
+// peticiones. Aquí el trabajo corre en un pool de worker_threads:
+// - PASSWORD_POOL_SIZE hilos (0 = en el hilo principal, como antes);
+// - cola acotada (PASSWORD_QUEUE_MAX); si se llena la petición falla con
+//   HashPoolError 503 en lugar de acumular latencia sin límite;
+// - métricas de espera en cola y tiempo de cálculo (stats()).
+//
+// Los hilos solo mantienen vivo el proceso mientras tienen trabajo, así los
+// scripts que llaman a initDatabase terminan normalmente.
+const os = require('os');
+const bcrypt = require('bcryptjs');
+const { Worker, isMainThread, parentPort } = require('worker_threads');
+const { HttpError } = require('./errors');
+
+const SALT_ROUNDS = 10;
+
+// Código del hilo: recibe { id, op, args } y responde { id, result | error }
+if (!isMainThread) {
+  parentPort.on('message', async ({ id, op, args }) => {
+    try {
+      const result = op === 'hash' ? await bcrypt.hash(...args) : await bcrypt.compare(...args);
+      parentPort.postMessage({ id, result });
+    } catch (error) {
+      parentPort.postMessage({ id, error: error.message });
+    }
+  });
+  return;
+}
+
+const POOL_SIZE = parseInt(process.env.PASSWORD_POOL_SIZE || String(Math.max(1, Math.min(4, os.cpus().length - 1))));
+const QUEUE_MAX = parseInt(process.env.PASSWORD_QUEUE_MAX || '64');
+
+class HashPoolError extends HttpError {
+  static status = 503;
+}
+
+class PasswordHasher {
+  constructor({ size = POOL_SIZE, queueMax = QUEUE_MAX } = {}) {
+    this.size = size;
+    this.queueMax = queueMax;
+    this.workers = [];
+    this.idle = [];
+    this.queue = [];
+    this.running = new Map();
+    this.nextId = 0;
+    this.metrics = { hash: 0, compare: 0, completed: 0, rejected: 0, failed: 0, maxQueue: 0, waitMs: 0, runMs: 0 };
+  }
+
+  hash(password, rounds = SALT_ROUNDS) {
+    return this.run('hash', [password, rounds]);
+  }
+
+  compare(password, hashed) {
+    return this.run('compare', [password, hashed]);
+  }
+
+  run(op, args) {
+    if (this.size <= 0) {
+      this.metrics[op] += 1;
+      return op === 'hash' ? bcrypt.hash(...args) : bcrypt.compare(...args);
+    }
+
+    if (this.queue.length >= this.queueMax) {
+      this.metrics.rejected += 1;
+      return Promise.reject(new HashPoolError('Servidor ocupado, intenta de nuevo en unos segundos'));
+    }
+    this.metrics[op] += 1;
+
+    return new Promise((resolve, reject) => {
+      this.queue.push({ id: ++this.nextId, op, args, resolve, reject, queuedAt: process.hrtime.bigint() });
+      this.metrics.maxQueue = Math.max(this.metrics.maxQueue, this.queue.length);
+      this.dispatch();
+    });
+  }
+
+  // Asigna tareas de la cola a hilos libres (creándolos hasta `size`)
+  dispatch() {
+    while (this.queue.length > 0) {
+      let worker = this.idle.pop();
+      if (!worker && this.workers.length < this.size) {
+        worker = this.spawn();
+      }
+      if (!worker) return;
+
+      const task = this.queue.shift();
+      task.startedAt = process.hrtime.bigint();
+      this.metrics.waitMs += Number(task.startedAt - task.queuedAt) / 1e6;
+      this.running.set(worker, task);
+      worker.ref();
+      worker.postMessage({ id: task.id, op: task.op, args: task.args });
+    }
+  }
+
+  spawn() {
+    const worker = new Worker(__filename);
+    this.workers.push(worker);
+
+    worker.on('message', ({ error, result }) => {
+      const task = this.running.get(worker);
+      this.running.delete(worker);
+      this.metrics.runMs += Number(process.hrtime.bigint() - task.startedAt) / 1e6;
+      this.metrics.completed += 1;
+
+      if (error) {
+        this.metrics.failed += 1;
+        task.reject(new Error(error));
+      } else {
+        task.resolve(result);
+      }
+
+      worker.unref();
+      this.idle.push(worker);
+      this.dispatch();
+    });
+
+    // Un hilo caído se descarta; su tarea falla y la cola sigue con otro
+    worker.on('error', (error) => {
+      console.error('Error en hilo de contraseñas:', error);
+      const task = this.running.get(worker);
+      this.running.delete(worker);
+      this.workers = this.workers.filter(w => w !== worker);
+      this.idle = this.idle.filter(w => w !== worker);
+      if (task) {
+        this.metrics.failed += 1;
+        task.reject(error);
+      }
+      this.dispatch();
+    });
+
+    return worker;
+  }
+
+  stats() {
+    const done = this.metrics.completed;
+    const round = (value) => Math.round(value * 100) / 100;
+    return {
+      size: this.size,
+      threads: this.workers.length,
+      busy: this.running.size,
+      queued: this.queue.length,
+      maxQueue: this.metrics.maxQueue,
+      hash: this.metrics.hash,
+      compare: this.metrics.compare,
+      rejected: this.metrics.rejected,
+      failed: this.metrics.failed,
+      avgWaitMs: done > 0 ? round(this.metrics.waitMs / done) : 0,
+      avgRunMs: done > 0 ? round(this.metrics.runMs / done) : 0
+    };
+  }
+
+  async close() {
+    const workers = this.workers;
+    this.workers = [];
+    this.idle = [];
+    await Promise.all(workers.map(worker => worker.terminate()));
+  }
+}
+
+const passwordHasher = new PasswordHasher();
+
+module.exports = {
+  SALT_ROUNDS,
+  HashPoolError,
+  PasswordHasher,
+  passwordHasher
+};
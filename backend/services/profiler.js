@@ -0,0 +1,81 @@
+// backend/services/profiler.js
+// Perfilador de CPU por muestreo, activable por una ventana de tiempo sin
+// reiniciar (POST /api/metrics/profile). Usa el inspector de V8 del propio
+// proceso y guarda un .cpuprofile en PROFILE_DIR que se abre en Chrome
+// DevTools (pestaña Performance) o en VS Code.
+//
+// Solo puede haber un perfil a la vez y la ventana está acotada para no
+// dejar el muestreo encendido por error.
+const fs = require('fs');
+const path = require('path');
+const inspector = require('inspector');
+const { HttpError } = require('./errors');
+
+const PROFILE_DIR = process.env.PROFILE_DIR || './logs/profiles';
+const MAX_SECONDS = 120;
+
+class ProfilerError extends HttpError {
+  static status = 409;
+}
+
+let current = null;
+
+function post(session, method, params) {
+  return new Promise((resolve, reject) => {
+    session.post(method, params, (error, result) => (error ? reject(error) : resolve(result)));
+  });
+}
+
+/**
+ * Inicia el muestreo por `seconds` segundos (1..120). `intervalUs` es el
+ * intervalo de muestreo en microsegundos. Resuelve al iniciar con
+ * { file, seconds, endsAt }; el archivo se escribe al terminar la ventana.
+ */
+async function startProfile({ seconds = 30, intervalUs = 1000 } = {}) {
+  if (current) {
+    throw new ProfilerError(`Ya hay un perfil en curso hasta ${current.endsAt}`);
+  }
+
+  const duration = Math.min(MAX_SECONDS, Math.max(1, parseInt(seconds) || 30));
+  const file = path.join(PROFILE_DIR, `cpu-${process.pid}-${Date.now()}.cpuprofile`);
+  const session = new inspector.Session();
+  session.connect();
+
+  current = { file, endsAt: new Date(Date.now() + duration * 1000).toISOString() };
+
+  try {
+    await post(session, 'Profiler.enable');
+    await post(session, 'Profiler.setSamplingInterval', { interval: Math.max(100, parseInt(intervalUs) || 1000) });
+    await post(session, 'Profiler.start');
+  } catch (error) {
+    session.disconnect();
+    current = null;
+    throw error;
+  }
+
+  setTimeout(async () => {
+    try {
+      const { profile } = await post(session, 'Profiler.stop');
+      await fs.promises.mkdir(PROFILE_DIR, { recursive: true });
+      await fs.promises.writeFile(file, JSON.stringify(profile));
+      console.log(`🔬 Perfil de CPU guardado en ${file}`);
+    } catch (error) {
+      console.error('Error guardando perfil de CPU:', error);
+    } finally {
+      session.disconnect();
+      current = null;
+    }
+  }, duration * 1000).unref();
+
+  return { file, seconds: duration, endsAt: current.endsAt };
+}
+
+function profileStatus() {
+  return current ? { running: true, ...current } : { running: false };
+}
+
+module.exports = {
+  ProfilerError,
+  startProfile,
+  profileStatus
+};
@@ -0,0 +1,244 @@
+// backend/services/saleCommit.js
+// Ruta rápida para registrar ventas: todas las lecturas se hacen en una sola
+// pasada antes de abrir la transacción y las escrituras son por lotes, así el
+// candado de escritura de SQLite se mantiene el menor tiempo posible.
+const { Op, UniqueConstraintError } = require('sequelize');
+const { Sale, SaleItem, MenuItem, User, Customer, Shift, sequelize } = require('../database/init');
+const { RollupDelta, applyRollupDelta } = require('./salesRollup');
+const { decrementStock, quantitiesByItem } = require('./stock');
+const { consumeForSales } = require('./inventory');
+const { catalogCache } = require('./catalogCache');
+const { tableState } = require('./tableState');
+const { HttpError } = require('./errors');
+
+// Error de negocio con código HTTP (400 por defecto)
+class SaleError extends HttpError {}
+
+const CUSTOMER_ATTRIBUTES = ['id', 'name', 'phone', 'address1', 'address2', 'city'];
+
+// Normaliza las líneas del carrito y valida cantidades
+function normalizeLines(items) {
+  if (!items || !Array.isArray(items) || items.length === 0) {
+    throw new SaleError('Los items de la venta son requeridos');
+  }
+
+  return items.map(item => {
+    const menuItemId = parseInt(item.id);
+    const quantity = parseInt(item.quantity);
+
+    if (!Number.isInteger(menuItemId)) {
+      throw new SaleError(`Item del menú no encontrado: ${item.id}`);
+    }
+    if (!Number.isInteger(quantity) || quantity < 1) {
+      throw new SaleError(`Cantidad inválida para el item ${item.id}`);
+    }
+
+    return { menuItemId, quantity, notes: item.notes || null };
+  });
+}
+
+// Carga en paralelo todo lo que la venta necesita leer. Nombres y precios
+// salen de la caché del catálogo; solo el stock de los productos con stock
+// controlado se lee de la base de datos.
+async function loadSaleContext({ menuItemIds, tableId, customerId, userId }) {
+  const [itemsById, table, customer, shift, user] = await Promise.all([
+    catalogCache.getItemsById(),
+    tableId ? tableState.get(tableId).then(table => table && { id: table.id, number: table.number }) : null,
+    customerId ? Customer.findByPk(customerId, { attributes: CUSTOMER_ATTRIBUTES, raw: true }) : null,
+    Shift.findOne({ where: { userId, status: 'active' }, attributes: ['id'], raw: true }),
+    User.findByPk(userId, { attributes: ['id', 'name', 'username'], raw: true })
+  ]);
+
+  const stockedIds = menuItemIds.filter(id => itemsById.has(id) && itemsById.get(id).stock !== -1);
+  const liveStock = stockedIds.length
+    ? await MenuItem.findAll({ where: { id: { [Op.in]: stockedIds } }, attributes: ['id', 'stock'], raw: true })
+    : [];
+  const stockById = new Map(liveStock.map(row => [row.id, row.stock]));
+
+  const menuById = new Map();
+  for (const id of menuItemIds) {
+    const menuItem = itemsById.get(id);
+    if (menuItem) {
+      menuById.set(id, stockById.has(id) ? { ...menuItem, stock: stockById.get(id) } : menuItem);
+    }
+  }
+
+  return { menuById, table, customer, shift, user };
+}
+
+// Arma la venta completa (misma forma que el include de Sequelize) sin releerla
+function buildCompleteSale(sale, saleItems, context) {
+  return {
+    ...sale.toJSON(),
+    SaleItems: saleItems.map(saleItem => ({
+      ...saleItem.toJSON(),
+      MenuItem: context.menuById.get(saleItem.menuItemId)
+    })),
+    User: context.user,
+    Table: context.table,
+    Customer: context.customer
+  };
+}
+
+/**
+ * Registra una venta completa.
+ * Lecturas: menú desde la caché del catálogo (+ stock vivo de los productos
+ * controlados) y 1 consulta por entidad (mesa, cliente, turno, usuario).
+ * Escrituras: venta + líneas (bulk) + stock (set-based) + acumulados +
+ * mesa + cliente.
+ * Con `clientId` (llave del dispositivo) la venta queda ligada al outbox:
+ * si ya llegó por /api/sync/sales lanza SaleError 409.
+ * Devuelve la venta armada en memoria, lista para responder y emitir.
+ */
+async function commitSale(data, currentUser) {
+  const {
+    items,
+    tableId,
+    customerId,
+    orderType = 'dine-in',
+    paymentMethod,
+    notes,
+    deviceId,
+    clientId,
+    deliveryFee = 0,
+    discount = 0
+  } = data;
+
+  const lines = normalizeLines(items);
+
+  // Validaciones según tipo de pedido
+  if (orderType === 'dine-in' && !tableId) {
+    throw new SaleError('Mesa es requerida para pedidos en restaurante');
+  }
+  if (orderType === 'delivery' && !customerId) {
+    throw new SaleError('Cliente es requerido para pedidos a domicilio');
+  }
+
+  const quantities = quantitiesByItem(lines);
+  const context = await loadSaleContext({
+    menuItemIds: [...quantities.keys()],
+    tableId,
+    customerId,
+    userId: currentUser.userId
+  });
+
+  if (tableId && !context.table) {
+    throw new SaleError('Mesa no encontrada');
+  }
+  if (customerId && !context.customer) {
+    throw new SaleError('Cliente no encontrado');
+  }
+
+  // Validar productos y stock contra la lectura previa
+  for (const [menuItemId, quantity] of quantities) {
+    const menuItem = context.menuById.get(menuItemId);
+    if (!menuItem) {
+      throw new SaleError(`Item del menú no encontrado: ${menuItemId}`);
+    }
+    if (menuItem.stock !== -1 && menuItem.stock < quantity) {
+      throw new SaleError(`Stock insuficiente para ${menuItem.name}`);
+    }
+  }
+
+  // Calcular totales
+  let subtotal = 0;
+  const saleItemRows = lines.map(line => {
+    const unitPrice = parseFloat(context.menuById.get(line.menuItemId).price);
+    const totalPrice = unitPrice * line.quantity;
+    subtotal += totalPrice;
+
+    return {
+      menuItemId: line.menuItemId,
+      quantity: line.quantity,
+      unitPrice,
+      totalPrice,
+      notes: line.notes
+    };
+  });
+
+  const taxRate = parseFloat(process.env.TAX_RATE || '0');
+  const tax = subtotal * taxRate;
+  const deliveryFeeAmount = parseFloat(deliveryFee || 0);
+  const discountAmount = Math.min(Math.max(parseFloat(discount) || 0, 0), subtotal);
+  const total = subtotal + tax + deliveryFeeAmount - discountAmount;
+
+  const customer = context.customer;
+  const deliveryAddress = customer
+    ? `${customer.address1}${customer.address2 ? ', ' + customer.address2 : ''}, ${customer.city}`
+    : null;
+
+  const now = new Date();
+
+  const result = await sequelize.transaction(async (transaction) => {
+    const sale = await Sale.create({
+      clientId: clientId ? String(clientId).slice(0, 64) : null,
+      subtotal: subtotal.toFixed(2),
+      tax: tax.toFixed(2),
+      discount: discountAmount.toFixed(2),
+      deliveryFee: deliveryFeeAmount.toFixed(2),
+      total: total.toFixed(2),
+      paymentMethod: paymentMethod || 'cash',
+      orderType,
+      notes,
+      tableId: tableId || null,
+      customerId: customerId || null,
+      userId: currentUser.userId,
+      shiftId: context.shift ? context.shift.id : null,
+      deviceId: deviceId || null,
+      deliveryAddress,
+      synced: false
+    }, { transaction });
+
+    const saleItems = await SaleItem.bulkCreate(
+      saleItemRows.map(row => ({ ...row, saleId: sale.id })),
+      { transaction }
+    );
+
+    // Un solo UPDATE condicional; si otra venta consumió el stock entre la
+    // lectura y la escritura, lanza StockError y la transacción se revierte
+    await decrementStock(quantities, {
+      transaction,
+      strict: true,
+      stockedIds: new Set([...quantities.keys()].filter(id => context.menuById.get(id).stock !== -1))
+    });
+
+    // Insumos según receta; pueden quedar en negativo, no frenan la venta
+    await consumeForSales([{
+      saleId: sale.id,
+      lines: saleItemRows,
+      userId: currentUser.userId,
+      deviceId: deviceId || null
+    }], { transaction });
+
+    const rollup = new RollupDelta();
+    rollup.addSale(sale, saleItems);
+    await applyRollupDelta(rollup, transaction);
+
+    // La mesa queda ocupada al confirmar la venta (motor de mesas)
+    if (tableId && orderType === 'dine-in') {
+      await tableState.transition(tableId, 'occupied', { force: true, transaction });
+    }
+
+    if (customer) {
+      await Customer.update({
+        lastOrderDate: now,
+        totalOrders: sequelize.literal('totalOrders + 1')
+      }, { where: { id: customer.id }, transaction });
+    }
+
+    return { sale, saleItems };
+  }).catch(error => {
+    // clientId ya registrado (la venta llegó antes, p. ej. por /api/sync/sales)
+    if (error instanceof UniqueConstraintError) {
+      throw new SaleError('La venta ya estaba registrada', 409);
+    }
+    throw error;
+  });
+
+  return buildCompleteSale(result.sale, result.saleItems, context);
+}
+
+module.exports = {
+  SaleError,
+  commitSale
+};
@@ -0,0 +1,206 @@
+// backend/services/salesExport.js
+// Exportación en streaming de ventas con sus líneas (NDJSON o CSV).
+// Lee la tabla en lotes por keyset (createdAt, id) sobre el índice
+// (status, createdAt) y escribe cada lote en la respuesta respetando la
+// contrapresión HTTP: si el cliente lee lento, no se pide el siguiente lote
+// hasta que el socket drene. La memoria usada es la de un solo lote.
+// Las ventas archivadas salen en el mismo orden, por ventanas de meses
+// (services/archive.js).
+const { QueryTypes } = require('sequelize');
+const { sequelize } = require('../database/init');
+const { formatDbDate } = require('./salesRollup');
+const { eachTierWindow, tierFilter } = require('./archive');
+
+const BATCH_SIZE = parseInt(process.env.EXPORT_BATCH_SIZE || '500');
+
+const SALE_COLUMNS = [
+  'id', 'createdAt', 'status', 'orderType', 'paymentMethod', 'subtotal', 'tax',
+  'discount', 'deliveryFee', 'total', 'userId', 'shiftId', 'tableId', 'customerId',
+  'deviceId', 'cancelledAt', 'cancelReason'
+];
+const ITEM_COLUMNS = ['menuItemId', 'menuItemName', 'quantity', 'unitPrice', 'totalPrice'];
+
+const FORMATS = {
+  ndjson: { contentType: 'application/x-ndjson; charset=utf-8', extension: 'ndjson' },
+  csv: { contentType: 'text/csv; charset=utf-8', extension: 'csv' }
+};
+
+// Filtros de la exportación → cláusula WHERE con parámetros
+function buildWhere({ status, startDate, endDate, userId }) {
+  const clauses = ['status = ?'];
+  const replacements = [status || 'completed'];
+
+  if (startDate) {
+    clauses.push('createdAt >= ?');
+    replacements.push(formatDbDate(startDate));
+  }
+  if (endDate) {
+    clauses.push('createdAt <= ?');
+    replacements.push(formatDbDate(endDate));
+  }
+  if (userId) {
+    clauses.push('userId = ?');
+    replacements.push(parseInt(userId));
+  }
+
+  return { clauses, replacements };
+}
+
+// Siguiente lote de ventas después de `position` (orden createdAt ASC, id ASC)
+async function fetchBatch(where, position) {
+  const clauses = [...where.clauses];
+  const replacements = [...where.replacements];
+
+  if (position) {
+    clauses.push('(createdAt > ? OR (createdAt = ? AND id > ?))');
+    replacements.push(position.createdAt, position.createdAt, position.id);
+  }
+
+  const sales = await sequelize.query(
+    `SELECT ${SALE_COLUMNS.join(', ')} FROM sales
+      WHERE ${clauses.join(' AND ')}
+      ORDER BY createdAt ASC, id ASC
+      LIMIT ?`,
+    { replacements: [...replacements, BATCH_SIZE], type: QueryTypes.SELECT }
+  );
+
+  if (sales.length === 0) {
+    return { sales, itemsBySale: new Map() };
+  }
+
+  const items = await sequelize.query(
+    `SELECT si.saleId, si.menuItemId, m.name AS menuItemName, si.quantity, si.unitPrice, si.totalPrice
+       FROM sale_items si LEFT JOIN menu_items m ON m.id = si.menuItemId
+      WHERE si.saleId IN (${sales.map(() => '?').join(', ')})
+      ORDER BY si.saleId, si.id`,
+    { replacements: sales.map(sale => sale.id), type: QueryTypes.SELECT }
+  );
+
+  const itemsBySale = new Map();
+  for (const item of items) {
+    if (!itemsBySale.has(item.saleId)) itemsBySale.set(item.saleId, []);
+    itemsBySale.get(item.saleId).push(item);
+  }
+
+  return { sales, itemsBySale };
+}
+
+function csvValue(value) {
+  if (value === null || value === undefined) return '';
+  const text = String(value);
+  return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+}
+
+function csvLine(values) {
+  return values.map(csvValue).join(',') + '\r\n';
+}
+
+// Serializa un lote completo a un solo string (una escritura por lote)
+function serializeBatch(format, sales, itemsBySale) {
+  let chunk = '';
+
+  for (const sale of sales) {
+    const items = itemsBySale.get(sale.id) || [];
+
+    if (format === 'csv') {
+      // Una fila por línea de venta; ventas sin líneas salen con columnas vacías
+      const lines = items.length ? items : [{}];
+      for (const item of lines) {
+        chunk += csvLine([
+          ...SALE_COLUMNS.map(column => sale[column]),
+          ...ITEM_COLUMNS.map(column => item[column])
+        ]);
+      }
+    } else {
+      chunk += JSON.stringify({
+        ...sale,
+        items: items.map(({ saleId, ...item }) => item)
+      }) + '\n';
+    }
+  }
+
+  return chunk;
+}
+
+// Espera a que el socket drene o a que el cliente se desconecte
+function waitForDrain(res) {
+  return new Promise(resolve => {
+    const done = () => {
+      res.off('drain', done);
+      res.off('close', done);
+      resolve();
+    };
+    res.on('drain', done);
+    res.on('close', done);
+  });
+}
+
+/**
+ * Escribe la exportación en `res`. Los encabezados se envían antes del
+ * primer lote; si algo falla a mitad del stream la conexión se corta.
+ */
+async function streamSalesExport(req, res, filters, format = 'ndjson') {
+  const spec = FORMATS[format] || FORMATS.ndjson;
+  const where = buildWhere(filters);
+  let aborted = false;
+
+  req.on('close', () => {
+    aborted = true;
+  });
+
+  res.status(200);
+  res.setHeader('Content-Type', spec.contentType);
+  res.setHeader(
+    'Content-Disposition',
+    `attachment; filename="ventas-${new Date().toISOString().slice(0, 10)}.${spec.extension}"`
+  );
+  res.setHeader('Cache-Control', 'no-store');
+
+  if (format === 'csv') {
+    res.write(csvLine([...SALE_COLUMNS, ...ITEM_COLUMNS]));
+  }
+
+  const range = filters.startDate || filters.endDate
+    ? { start: filters.startDate || null, end: filters.endDate || null }
+    : null;
+  let position = null;
+  let exported = 0;
+
+  try {
+    await eachTierWindow(range, async (window) => {
+      const period = tierFilter(window);
+      const scoped = {
+        clauses: [...where.clauses, period.sql],
+        replacements: [...where.replacements, ...period.replacements]
+      };
+
+      while (!aborted) {
+        const { sales, itemsBySale } = await fetchBatch(scoped, position);
+        if (sales.length === 0) break;
+
+        exported += sales.length;
+        const last = sales[sales.length - 1];
+        position = { createdAt: last.createdAt, id: last.id };
+
+        if (!res.write(serializeBatch(format, sales, itemsBySale))) {
+          await waitForDrain(res);
+        }
+
+        if (sales.length < BATCH_SIZE) break;
+      }
+    });
+
+    if (!aborted) {
+      res.end();
+    }
+    return { exported, aborted };
+  } catch (error) {
+    res.destroy(error);
+    throw error;
+  }
+}
+
+module.exports = {
+  FORMATS,
+  streamSalesExport
+};
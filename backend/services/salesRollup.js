@@ -0,0 +1,415 @@
+// backend/services/salesRollup.js
+// Acumulados de ventas por hora y por día (método de pago, usuario, turno y
+// producto). Se mantienen de forma incremental dentro de la misma transacción
+// que crea, cancela o sincroniza una venta, y los reportes los consultan en
+// lugar de recorrer la tabla de ventas completa.
+//
+// También lleva los contadores por turno y método de pago (shift_totals) y
+// los totales del propio turno, para que leer o cerrar un turno no recorra
+// sus ventas (ver services/shiftTotals.js).
+//
+// Los buckets están en UTC, igual que createdAt:
+//   hora → 'YYYY-MM-DD HH'   día → 'YYYY-MM-DD'
+// Un rango arbitrario se resuelve con días completos, horas completas en los
+// bordes y solo los fragmentos de menos de una hora se leen de `sales`
+// (incluidas las ventas archivadas de esos fragmentos, ver services/archive.js).
+const { QueryTypes } = require('sequelize');
+const { sequelize } = require('../database/init');
+const { withTiers, eachTierWindow, tierFilter } = require('./archive');
+
+const HOUR = 3600000;
+const DAY = 86400000;
+
+const toCents = (amount) => Math.round(parseFloat(amount || 0) * 100);
+const fromCents = (cents) => Number(cents || 0) / 100;
+
+// Mismo formato con el que Sequelize guarda DATE en SQLite
+function formatDbDate(date) {
+  return new Date(date).toISOString().replace('T', ' ').replace('Z', ' +00:00');
+}
+
+function bucketsFor(createdAt) {
+  const formatted = formatDbDate(createdAt);
+  return { hour: formatted.slice(0, 13), day: formatted.slice(0, 10) };
+}
+
+// Acumula cambios de varias ventas para aplicarlos con un solo UPSERT por tabla
+class RollupDelta {
+  constructor() {
+    this.sales = new Map();
+    this.items = new Map();
+    this.shifts = new Map();
+  }
+
+  _saleRow(granularity, bucket, sale) {
+    const paymentMethod = sale.paymentMethod || 'cash';
+    const userId = sale.userId || 0;
+    const shiftId = sale.shiftId || 0;
+    const key = `${granularity}|${bucket}|${paymentMethod}|${userId}|${shiftId}`;
+
+    if (!this.sales.has(key)) {
+      this.sales.set(key, {
+        granularity, bucket, paymentMethod, userId, shiftId,
+        saleCount: 0, revenueCents: 0, itemCount: 0, cancelledCount: 0, cancelledCents: 0
+      });
+    }
+    return this.sales.get(key);
+  }
+
+  _itemRow(granularity, bucket, menuItemId) {
+    const key = `${granularity}|${bucket}|${menuItemId}`;
+
+    if (!this.items.has(key)) {
+      this.items.set(key, { granularity, bucket, menuItemId, quantity: 0, revenueCents: 0 });
+    }
+    return this.items.get(key);
+  }
+
+  _shiftRow(sale) {
+    const paymentMethod = sale.paymentMethod || 'cash';
+    const key = `${sale.shiftId}|${paymentMethod}`;
+
+    if (!this.shifts.has(key)) {
+      this.shifts.set(key, {
+        shiftId: sale.shiftId, paymentMethod,
+        saleCount: 0, revenueCents: 0, cancelledCount: 0, cancelledCents: 0
+      });
+    }
+    return this.shifts.get(key);
+  }
+
+  _apply(sale, saleItems, { sign, cancelled }) {
+    const buckets = bucketsFor(sale.createdAt);
+    const totalCents = toCents(sale.total);
+    const itemCount = saleItems.reduce((sum, item) => sum + item.quantity, 0);
+
+    if (sale.shiftId) {
+      const shiftRow = this._shiftRow(sale);
+      shiftRow.saleCount += sign;
+      shiftRow.revenueCents += sign * totalCents;
+      if (cancelled) {
+        shiftRow.cancelledCount += 1;
+        shiftRow.cancelledCents += totalCents;
+      }
+    }
+
+    for (const [granularity, bucket] of Object.entries(buckets)) {
+      const row = this._saleRow(granularity, bucket, sale);
+      if (sign !== 0) {
+        row.saleCount += sign;
+        row.revenueCents += sign * totalCents;
+        row.itemCount += sign * itemCount;
+
+        for (const item of saleItems) {
+          const itemRow = this._itemRow(granularity, bucket, item.menuItemId);
+          itemRow.quantity += sign * item.quantity;
+          itemRow.revenueCents += sign * toCents(item.totalPrice);
+        }
+      }
+      if (cancelled) {
+        row.cancelledCount += 1;
+        row.cancelledCents += totalCents;
+      }
+    }
+  }
+
+  // Venta nueva (o sincronizada) con su estado final
+  addSale(sale, saleItems) {
+    if (sale.status === 'cancelled') {
+      this._apply(sale, saleItems, { sign: 0, cancelled: true });
+    } else if (!sale.status || sale.status === 'completed') {
+      this._apply(sale, saleItems, { sign: 1, cancelled: false });
+    }
+  }
+
+  // Cancelación de una venta que estaba en `previousStatus`
+  addCancellation(sale, saleItems, previousStatus) {
+    this._apply(sale, saleItems, { sign: previousStatus === 'completed' ? -1 : 0, cancelled: true });
+  }
+
+  isEmpty() {
+    return this.sales.size === 0 && this.items.size === 0 && this.shifts.size === 0;
+  }
+}
+
+const SALE_COLUMNS = ['granularity', 'bucket', 'paymentMethod', 'userId', 'shiftId', 'saleCount', 'revenueCents', 'itemCount', 'cancelledCount', 'cancelledCents'];
+const ITEM_COLUMNS = ['granularity', 'bucket', 'menuItemId', 'quantity', 'revenueCents'];
+const SHIFT_COLUMNS = ['shiftId', 'paymentMethod', 'saleCount', 'revenueCents', 'cancelledCount', 'cancelledCents'];
+
+// Cláusula que suma las columnas no clave sobre la fila existente
+function addOnConflict(keyColumns, columns) {
+  const sumColumns = columns.filter(column => !keyColumns.includes(column));
+  return `ON CONFLICT (${keyColumns.join(', ')}) DO UPDATE SET
+         ${sumColumns.map(column => `${column} = ${column} + excluded.${column}`).join(', ')}`;
+}
+
+async function upsert(table, columns, keyColumns, rows, transaction) {
+  if (rows.length === 0) return;
+
+  const placeholders = `(${columns.map(() => '?').join(', ')})`;
+
+  // Bloques de 50 filas para no exceder el límite de parámetros de SQLite
+  for (let i = 0; i < rows.length; i += 50) {
+    const chunk = rows.slice(i, i + 50);
+    await sequelize.query(
+      `INSERT INTO ${table} (${columns.join(', ')})
+       VALUES ${chunk.map(() => placeholders).join(', ')}
+       ${addOnConflict(keyColumns, columns)}`,
+      { replacements: chunk.flatMap(row => columns.map(column => row[column])), transaction }
+    );
+  }
+}
+
+// Aplica el delta acumulado dentro de la transacción dada
+async function applyRollupDelta(delta, transaction) {
+  if (delta.isEmpty()) return;
+
+  await upsert('sales_rollup', SALE_COLUMNS, SALE_COLUMNS.slice(0, 5), [...delta.sales.values()], transaction);
+  await upsert('sales_item_rollup', ITEM_COLUMNS, ITEM_COLUMNS.slice(0, 3), [...delta.items.values()], transaction);
+  await upsert('shift_totals', SHIFT_COLUMNS, SHIFT_COLUMNS.slice(0, 2), [...delta.shifts.values()], transaction);
+
+  // Totales visibles en la fila del turno (perfil, listados)
+  const byShift = new Map();
+  for (const row of delta.shifts.values()) {
+    const current = byShift.get(row.shiftId) || { saleCount: 0, revenueCents: 0 };
+    current.saleCount += row.saleCount;
+    current.revenueCents += row.revenueCents;
+    byShift.set(row.shiftId, current);
+  }
+  for (const [shiftId, { saleCount, revenueCents }] of byShift) {
+    if (saleCount === 0 && revenueCents === 0) continue;
+    await sequelize.query(
+      `UPDATE shifts SET totalSales = ROUND(COALESCE(totalSales, 0) + ?, 2),
+              totalTransactions = COALESCE(totalTransactions, 0) + ?
+        WHERE id = ?`,
+      { replacements: [fromCents(revenueCents), saleCount, shiftId], transaction }
+    );
+  }
+}
+
+// Divide [start, end] (inclusivo) en días, horas y fragmentos crudos
+function splitRange(start, end) {
+  const from = start.getTime();
+  const to = end.getTime() + 1;
+  const h0 = Math.ceil(from / HOUR) * HOUR;
+  const h1 = Math.floor(to / HOUR) * HOUR;
+
+  if (h0 >= h1) {
+    return { raw: [[from, to]], hours: [], days: [] };
+  }
+
+  const raw = [];
+  if (from < h0) raw.push([from, h0]);
+  if (h1 < to) raw.push([h1, to]);
+
+  const d0 = Math.ceil(h0 / DAY) * DAY;
+  const d1 = Math.floor(h1 / DAY) * DAY;
+  if (d0 >= d1) {
+    return { raw, hours: [[h0, h1]], days: [] };
+  }
+
+  const hours = [];
+  if (h0 < d0) hours.push([h0, d0]);
+  if (d1 < h1) hours.push([d1, h1]);
+  return { raw, hours, days: [[d0, d1]] };
+}
+
+// Condición WHERE sobre los buckets del rango (null = todo el historial)
+function bucketFilter(segments) {
+  if (!segments) {
+    return { sql: "granularity = 'day'", replacements: [] };
+  }
+
+  const clauses = [];
+  const replacements = [];
+  for (const [a, b] of segments.days) {
+    clauses.push("(granularity = 'day' AND bucket >= ? AND bucket < ?)");
+    replacements.push(formatDbDate(a).slice(0, 10), formatDbDate(b).slice(0, 10));
+  }
+  for (const [a, b] of segments.hours) {
+    clauses.push("(granularity = 'hour' AND bucket >= ? AND bucket < ?)");
+    replacements.push(formatDbDate(a).slice(0, 13), formatDbDate(b).slice(0, 13));
+  }
+  return { sql: clauses.length ? clauses.join(' OR ') : '0', replacements };
+}
+
+// Fragmentos crudos como rangos inclusivos para withTiers
+function rawRanges(segments) {
+  return segments.raw.map(([a, b]) => ({ start: a, end: b - 1 }));
+}
+
+function rawFilter(segments, column = 'createdAt') {
+  const ranges = segments ? segments.raw : [];
+  return {
+    sql: ranges.length ? ranges.map(() => `(${column} >= ? AND ${column} < ?)`).join(' OR ') : '0',
+    replacements: ranges.flatMap(([a, b]) => [formatDbDate(a), formatDbDate(b)])
+  };
+}
+
+const GROUP_EXPRESSIONS = {
+  all: "'all'",
+  paymentMethod: "COALESCE(paymentMethod, 'cash')",
+  userId: 'COALESCE(userId, 0)',
+  shiftId: 'COALESCE(shiftId, 0)'
+};
+
+function mergeRows(target, rows, fields) {
+  for (const row of rows) {
+    const key = row.groupKey;
+    if (!target.has(key)) {
+      target.set(key, { groupKey: key, ...Object.fromEntries(fields.map(field => [field, 0])) });
+    }
+    const current = target.get(key);
+    for (const field of fields) {
+      current[field] += Number(row[field] || 0);
+    }
+  }
+  return target;
+}
+
+const SALE_FIELDS = ['saleCount', 'revenueCents', 'itemCount', 'cancelledCount', 'cancelledCents'];
+
+/**
+ * Agregados de ventas en el rango (o todo el historial si range es null),
+ * agrupados por 'all' | 'paymentMethod' | 'userId' | 'shiftId'.
+ */
+async function aggregateSales(range, groupBy = 'all') {
+  const expression = GROUP_EXPRESSIONS[groupBy];
+  const segments = range ? splitRange(range.start, range.end) : null;
+  const buckets = bucketFilter(segments);
+  const raw = rawFilter(segments);
+
+  const rolled = await sequelize.query(
+    `SELECT ${expression} AS groupKey, ${SALE_FIELDS.map(field => `SUM(${field}) AS ${field}`).join(', ')}
+       FROM sales_rollup WHERE ${buckets.sql} GROUP BY groupKey`,
+    { replacements: buckets.replacements, type: QueryTypes.SELECT }
+  );
+
+  const result = mergeRows(new Map(), rolled, SALE_FIELDS);
+
+  if (raw.replacements.length) {
+    const edges = await withTiers(rawRanges(segments), () => sequelize.query(
+      `SELECT ${expression} AS groupKey,
+              SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) AS saleCount,
+              SUM(CASE WHEN status = 'completed' THEN CAST(ROUND(total * 100) AS INTEGER) ELSE 0 END) AS revenueCents,
+              SUM(CASE WHEN status = 'completed'
+                       THEN (SELECT COALESCE(SUM(quantity), 0) FROM sale_items WHERE saleId = sales.id)
+                       ELSE 0 END) AS itemCount,
+              SUM(CASE WHEN status = 'cancelled' THEN 1 ELSE 0 END) AS cancelledCount,
+              SUM(CASE WHEN status = 'cancelled' THEN CAST(ROUND(total * 100) AS INTEGER) ELSE 0 END) AS cancelledCents
+         FROM sales WHERE ${raw.sql} GROUP BY groupKey`,
+      { replacements: raw.replacements, type: QueryTypes.SELECT }
+    ));
+    mergeRows(result, edges, SALE_FIELDS);
+  }
+
+  return [...result.values()];
+}
+
+// Cantidad e importe vendidos por producto en el rango
+async function aggregateItems(range) {
+  const segments = range ? splitRange(range.start, range.end) : null;
+  const buckets = bucketFilter(segments);
+  const raw = rawFilter(segments, 's.createdAt');
+  const fields = ['quantity', 'revenueCents'];
+
+  const rolled = await sequelize.query(
+    `SELECT menuItemId AS groupKey, SUM(quantity) AS quantity, SUM(revenueCents) AS revenueCents
+       FROM sales_item_rollup WHERE ${buckets.sql} GROUP BY menuItemId`,
+    { replacements: buckets.replacements, type: QueryTypes.SELECT }
+  );
+
+  const result = mergeRows(new Map(), rolled, fields);
+
+  if (raw.replacements.length) {
+    const edges = await withTiers(rawRanges(segments), () => sequelize.query(
+      `SELECT si.menuItemId AS groupKey, SUM(si.quantity) AS quantity,
+              SUM(CAST(ROUND(si.totalPrice * 100) AS INTEGER)) AS revenueCents
+         FROM sale_items si JOIN sales s ON s.id = si.saleId
+        WHERE s.status = 'completed' AND (${raw.sql})
+        GROUP BY si.menuItemId`,
+      { replacements: raw.replacements, type: QueryTypes.SELECT }
+    ));
+    mergeRows(result, edges, fields);
+  }
+
+  return [...result.values()].filter(row => row.quantity > 0);
+}
+
+/**
+ * Reconstruye los acumulados desde las ventas crudas (set-based), incluidas
+ * las archivadas. Úsese tras importar datos por fuera de la API o si se
+ * sospecha desfase.
+ *
+ * Con options.transaction (migraciones) solo lee la base principal. Si no,
+ * recorre el historial por ventanas de meses archivados, una transacción por
+ * ventana: la primera borra los acumulados y cada una suma los suyos.
+ */
+async function rebuildRollups(options = {}) {
+  const run = async (transaction, window = null) => {
+    const sales = window ? tierFilter(window, 'createdAt') : { sql: '1', replacements: [] };
+    const items = window ? tierFilter(window, 's.createdAt') : sales;
+
+    if (!window || !window.from) {
+      await sequelize.query('DELETE FROM sales_rollup', { transaction });
+      await sequelize.query('DELETE FROM sales_item_rollup', { transaction });
+    }
+
+    for (const [granularity, length] of [['hour', 13], ['day', 10]]) {
+      await sequelize.query(
+        `INSERT INTO sales_rollup (${SALE_COLUMNS.join(', ')})
+         SELECT '${granularity}', substr(createdAt, 1, ${length}), COALESCE(paymentMethod, 'cash'),
+                COALESCE(userId, 0), COALESCE(shiftId, 0),
+                SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END),
+                SUM(CASE WHEN status = 'completed' THEN CAST(ROUND(total * 100) AS INTEGER) ELSE 0 END),
+                SUM(CASE WHEN status = 'completed' THEN COALESCE(items.quantity, 0) ELSE 0 END),
+                SUM(CASE WHEN status = 'cancelled' THEN 1 ELSE 0 END),
+                SUM(CASE WHEN status = 'cancelled' THEN CAST(ROUND(total * 100) AS INTEGER) ELSE 0 END)
+           FROM sales
+           LEFT JOIN (SELECT saleId, SUM(quantity) AS quantity FROM sale_items GROUP BY saleId) items
+             ON items.saleId = sales.id
+          WHERE status IN ('completed', 'cancelled') AND ${sales.sql}
+          GROUP BY 2, 3, 4, 5
+         ${addOnConflict(SALE_COLUMNS.slice(0, 5), SALE_COLUMNS)}`,
+        { replacements: sales.replacements, transaction }
+      );
+
+      await sequelize.query(
+        `INSERT INTO sales_item_rollup (${ITEM_COLUMNS.join(', ')})
+         SELECT '${granularity}', substr(s.createdAt, 1, ${length}), si.menuItemId,
+                SUM(si.quantity), SUM(CAST(ROUND(si.totalPrice * 100) AS INTEGER))
+           FROM sale_items si JOIN sales s ON s.id = si.saleId
+          WHERE s.status = 'completed' AND ${items.sql}
+          GROUP BY 2, 3
+         ${addOnConflict(ITEM_COLUMNS.slice(0, 3), ITEM_COLUMNS)}`,
+        { replacements: items.replacements, transaction }
+      );
+    }
+  };
+
+  if (options.transaction) {
+    return run(options.transaction);
+  }
+  await eachTierWindow(null, window => sequelize.transaction(transaction => run(transaction, window)), { write: true });
+}
+
+// Rango [startDate, endDate] de los query params (null si falta alguno)
+function parseRange(startDate, endDate) {
+  if (!startDate || !endDate) return null;
+  return { start: new Date(startDate), end: new Date(endDate) };
+}
+
+module.exports = {
+  RollupDelta,
+  SHIFT_COLUMNS,
+  addOnConflict,
+  applyRollupDelta,
+  aggregateSales,
+  aggregateItems,
+  rebuildRollups,
+  parseRange,
+  splitRange,
+  formatDbDate,
+  toCents,
+  fromCents
+};
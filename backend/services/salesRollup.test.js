@@ -0,0 +1,330 @@
+// backend/services/salesRollup.test.js
+// Acumulados de ventas: división de rangos en buckets, delta en memoria y
+// UPSERT sobre una base SQLite temporal.
+const { QueryTypes } = require('sequelize');
+const { useTempDatabase } = require('../scripts/bench/stats');
+
+const tempDb = useTempDatabase('pos-test-rollup');
+
+const { initDatabase, sequelize, Shift, User } = require('../database/init');
+const { RollupDelta, applyRollupDelta, aggregateSales, splitRange } = require('./salesRollup');
+
+const HOUR = 3600000;
+const DAY = 86400000;
+const at = (iso) => Date.parse(iso);
+
+// Rango inclusivo como lo recibe splitRange
+const range = (from, to) => splitRange(new Date(at(from)), new Date(at(to)));
+
+describe('splitRange', () => {
+  test('un rango dentro de una misma hora se lee completo de ventas', () => {
+    expect(range('2024-03-10T10:15:00Z', '2024-03-10T10:45:00Z')).toEqual({
+      raw: [[at('2024-03-10T10:15:00Z'), at('2024-03-10T10:45:00Z') + 1]],
+      hours: [],
+      days: []
+    });
+  });
+
+  test('un solo instante queda como fragmento crudo de 1 ms', () => {
+    const t = at('2024-03-10T10:00:00Z');
+    expect(splitRange(new Date(t), new Date(t))).toEqual({ raw: [[t, t + 1]], hours: [], days: [] });
+  });
+
+  test('una hora exacta (fin inclusivo en .999) no deja fragmentos crudos', () => {
+    expect(range('2024-03-10T10:00:00Z', '2024-03-10T10:59:59.999Z')).toEqual({
+      raw: [],
+      hours: [[at('2024-03-10T10:00:00Z'), at('2024-03-10T11:00:00Z')]],
+      days: []
+    });
+  });
+
+  test('un día exacto se resuelve con un bucket diario', () => {
+    expect(range('2024-03-10T00:00:00Z', '2024-03-10T23:59:59.999Z')).toEqual({
+      raw: [],
+      hours: [],
+      days: [[at('2024-03-10T00:00:00Z'), at('2024-03-11T00:00:00Z')]]
+    });
+  });
+
+  test('desde medianoche sin llegar al día siguiente usa solo horas', () => {
+    expect(range('2024-03-10T00:00:00Z', '2024-03-10T04:59:59.999Z')).toEqual({
+      raw: [],
+      hours: [[at('2024-03-10T00:00:00Z'), at('2024-03-10T05:00:00Z')]],
+      days: []
+    });
+  });
+
+  test('bordes de menos de una hora a ambos lados de horas completas', () => {
+    expect(range('2024-03-10T10:30:00Z', '2024-03-10T13:15:00Z')).toEqual({
+      raw: [
+        [at('2024-03-10T10:30:00Z'), at('2024-03-10T11:00:00Z')],
+        [at('2024-03-10T13:00:00Z'), at('2024-03-10T13:15:00Z') + 1]
+      ],
+      hours: [[at('2024-03-10T11:00:00Z'), at('2024-03-10T13:00:00Z')]],
+      days: []
+    });
+  });
+
+  test('varios días: días completos, horas en los bordes y fragmentos crudos', () => {
+    expect(range('2024-01-01T22:30:00Z', '2024-01-04T01:15:00Z')).toEqual({
+      raw: [
+        [at('2024-01-01T22:30:00Z'), at('2024-01-01T23:00:00Z')],
+        [at('2024-01-04T01:00:00Z'), at('2024-01-04T01:15:00Z') + 1]
+      ],
+      hours: [
+        [at('2024-01-01T23:00:00Z'), at('2024-01-02T00:00:00Z')],
+        [at('2024-01-04T00:00:00Z'), at('2024-01-04T01:00:00Z')]
+      ],
+      days: [[at('2024-01-02T00:00:00Z'), at('2024-01-04T00:00:00Z')]]
+    });
+  });
+
+  test('cruzar medianoche sin un día completo no usa buckets diarios', () => {
+    const segments = range('2024-01-01T22:30:00Z', '2024-01-02T01:30:00Z');
+    expect(segments.days).toEqual([]);
+    expect(segments.hours).toEqual([[at('2024-01-01T23:00:00Z'), at('2024-01-02T01:00:00Z')]]);
+  });
+
+  test('los segmentos cubren el rango exactamente, sin huecos ni solapes', () => {
+    const cases = [
+      ['2024-01-01T00:00:00.001Z', '2024-01-01T00:00:00.002Z'],
+      ['2024-01-01T23:59:59.999Z', '2024-01-02T00:00:00Z'],
+      ['2024-01-01T05:00:00Z', '2024-02-15T17:42:10.500Z'],
+      ['2023-12-31T23:00:00Z', '2024-01-01T00:59:59.999Z'],
+      ['2024-02-28T12:34:56.789Z', '2024-03-01T00:00:00Z']
+    ];
+
+    for (const [from, to] of cases) {
+      const { raw, hours, days } = range(from, to);
+      const pieces = [...raw, ...hours, ...days].sort((a, b) => a[0] - b[0]);
+
+      expect(pieces[0][0]).toBe(at(from));
+      expect(pieces[pieces.length - 1][1]).toBe(at(to) + 1);
+      for (let i = 1; i < pieces.length; i++) {
+        expect(pieces[i][0]).toBe(pieces[i - 1][1]);
+      }
+      for (const [a, b] of hours) {
+        expect(a % HOUR).toBe(0);
+        expect(b % HOUR).toBe(0);
+      }
+      for (const [a, b] of days) {
+        expect(a % DAY).toBe(0);
+        expect(b % DAY).toBe(0);
+      }
+      // Ningún fragmento crudo contiene una hora completa
+      for (const [a, b] of raw) {
+        expect(Math.ceil(a / HOUR) * HOUR + HOUR).toBeGreaterThan(b);
+      }
+    }
+  });
+});
+
+describe('RollupDelta', () => {
+  const createdAt = '2024-03-10T10:15:00.000Z';
+  const items = [
+    { menuItemId: 1, quantity: 2, totalPrice: '20.20' },
+    { menuItemId: 2, quantity: 1, totalPrice: '5.05' }
+  ];
+  const sale = (fields = {}) => ({
+    total: '25.25', paymentMethod: 'card', userId: 3, shiftId: 7, status: 'completed', createdAt, ...fields
+  });
+
+  const saleRows = (delta) => [...delta.sales.values()];
+  const rowFor = (delta, granularity) => saleRows(delta).find(row => row.granularity === granularity);
+
+  test('una venta completada suma en la hora, el día, los productos y el turno', () => {
+    const delta = new RollupDelta();
+    delta.addSale(sale(), items);
+
+    expect(saleRows(delta)).toHaveLength(2);
+    expect(rowFor(delta, 'hour')).toMatchObject({
+      bucket: '2024-03-10 10', paymentMethod: 'card', userId: 3, shiftId: 7,
+      saleCount: 1, revenueCents: 2525, itemCount: 3, cancelledCount: 0, cancelledCents: 0
+    });
+    expect(rowFor(delta, 'day')).toMatchObject({ bucket: '2024-03-10', saleCount: 1, revenueCents: 2525 });
+
+    expect([...delta.items.values()]).toEqual(expect.arrayContaining([
+      { granularity: 'hour', bucket: '2024-03-10 10', menuItemId: 1, quantity: 2, revenueCents: 2020 },
+      { granularity: 'day', bucket: '2024-03-10', menuItemId: 2, quantity: 1, revenueCents: 505 }
+    ]));
+    expect([...delta.shifts.values()]).toEqual([
+      { shiftId: 7, paymentMethod: 'card', saleCount: 1, revenueCents: 2525, cancelledCount: 0, cancelledCents: 0 }
+    ]);
+  });
+
+  test('ventas del mismo bucket se agrupan y los importes no pierden centavos', () => {
+    const delta = new RollupDelta();
+    delta.addSale(sale({ total: '10.10' }), []);
+    delta.addSale(sale({ total: '20.20', createdAt: '2024-03-10T10:59:59.999Z' }), []);
+    delta.addSale(sale({ total: '1.00', paymentMethod: 'cash' }), []);
+
+    expect(saleRows(delta)).toHaveLength(4);
+    expect(rowFor(delta, 'hour')).toMatchObject({ paymentMethod: 'card', saleCount: 2, revenueCents: 3030 });
+  });
+
+  test('sin método, usuario ni turno se usan los valores por defecto y no hay fila de turno', () => {
+    const delta = new RollupDelta();
+    delta.addSale({ total: '3.00', createdAt }, []);
+
+    expect(rowFor(delta, 'day')).toMatchObject({ paymentMethod: 'cash', userId: 0, shiftId: 0, saleCount: 1 });
+    expect(delta.shifts.size).toBe(0);
+  });
+
+  test('una venta que llega cancelada solo cuenta como cancelada', () => {
+    const delta = new RollupDelta();
+    delta.addSale(sale({ status: 'cancelled' }), items);
+
+    expect(rowFor(delta, 'hour')).toMatchObject({
+      saleCount: 0, revenueCents: 0, itemCount: 0, cancelledCount: 1, cancelledCents: 2525
+    });
+    expect(delta.items.size).toBe(0);
+    expect([...delta.shifts.values()][0]).toMatchObject({ saleCount: 0, cancelledCount: 1, cancelledCents: 2525 });
+  });
+
+  test('ventas pendientes o reembolsadas no generan acumulados', () => {
+    const delta = new RollupDelta();
+    delta.addSale(sale({ status: 'pending' }), items);
+    delta.addSale(sale({ status: 'refunded' }), items);
+
+    expect(delta.isEmpty()).toBe(true);
+  });
+
+  test('cancelar una venta completada la resta y la cuenta como cancelada', () => {
+    const delta = new RollupDelta();
+    delta.addSale(sale(), items);
+    delta.addCancellation(sale({ status: 'cancelled' }), items, 'completed');
+
+    expect(rowFor(delta, 'hour')).toMatchObject({
+      saleCount: 0, revenueCents: 0, itemCount: 0, cancelledCount: 1, cancelledCents: 2525
+    });
+    for (const row of delta.items.values()) {
+      expect(row).toMatchObject({ quantity: 0, revenueCents: 0 });
+    }
+    expect([...delta.shifts.values()][0]).toMatchObject({ saleCount: 0, revenueCents: 0, cancelledCount: 1 });
+  });
+
+  test('cancelar una venta pendiente no resta nada', () => {
+    const delta = new RollupDelta();
+    delta.addCancellation(sale({ status: 'cancelled' }), items, 'pending');
+
+    expect(rowFor(delta, 'day')).toMatchObject({ saleCount: 0, revenueCents: 0, cancelledCount: 1 });
+    expect(delta.items.size).toBe(0);
+  });
+});
+
+describe('applyRollupDelta', () => {
+  let shift;
+
+  const rollupRows = () => sequelize.query(
+    'SELECT * FROM sales_rollup ORDER BY granularity, bucket, paymentMethod',
+    { type: QueryTypes.SELECT }
+  );
+
+  beforeAll(async () => {
+    await initDatabase();
+    const admin = await User.findOne({ where: { username: 'admin' } });
+    shift = await Shift.create({ userId: admin.id, startTime: new Date(), startingCash: 0 });
+  });
+
+  beforeEach(async () => {
+    for (const table of ['sales_rollup', 'sales_item_rollup', 'shift_totals']) {
+      await sequelize.query(`DELETE FROM ${table}`);
+    }
+    await Shift.update({ totalSales: 0, totalTransactions: 0 }, { where: { id: shift.id } });
+  });
+
+  afterAll(async () => {
+    await sequelize.close();
+    tempDb.cleanup();
+  });
+
+  const sale = (fields = {}) => ({
+    total: '12.50', paymentMethod: 'cash', userId: 1, shiftId: shift.id, status: 'completed',
+    createdAt: '2024-03-10T10:15:00.000Z', ...fields
+  });
+  const items = [{ menuItemId: 1, quantity: 2, totalPrice: '12.50' }];
+
+  const apply = (build) => {
+    const delta = new RollupDelta();
+    build(delta);
+    return sequelize.transaction(transaction => applyRollupDelta(delta, transaction));
+  };
+
+  test('un delta vacío no ejecuta consultas', async () => {
+    const query = jest.spyOn(sequelize, 'query');
+    try {
+      await applyRollupDelta(new RollupDelta(), null);
+      expect(query).not.toHaveBeenCalled();
+    } finally {
+      query.mockRestore();
+    }
+  });
+
+  test('deltas sucesivos se suman sobre las filas existentes', async () => {
+    await apply(delta => delta.addSale(sale(), items));
+    await apply(delta => {
+      delta.addSale(sale({ total: '7.25' }), []);
+      delta.addSale(sale({ paymentMethod: 'card' }), items);
+    });
+
+    const rows = await rollupRows();
+    expect(rows).toHaveLength(4);
+    expect(rows.find(row => row.granularity === 'day' && row.paymentMethod === 'cash')).toMatchObject({
+      bucket: '2024-03-10', saleCount: 2, revenueCents: 1975, itemCount: 2
+    });
+
+    const [item] = await sequelize.query(
+      "SELECT quantity, revenueCents FROM sales_item_rollup WHERE granularity = 'day' AND menuItemId = 1",
+      { type: QueryTypes.SELECT }
+    );
+    expect(item).toEqual({ quantity: 4, revenueCents: 2500 });
+  });
+
+  test('mantiene shift_totals y los totales de la fila del turno', async () => {
+    await apply(delta => {
+      delta.addSale(sale(), items);
+      delta.addSale(sale({ paymentMethod: 'card', total: '3.10' }), []);
+    });
+
+    const totals = await sequelize.query(
+      'SELECT paymentMethod, saleCount, revenueCents FROM shift_totals WHERE shiftId = ? ORDER BY paymentMethod',
+      { replacements: [shift.id], type: QueryTypes.SELECT }
+    );
+    expect(totals).toEqual([
+      { paymentMethod: 'card', saleCount: 1, revenueCents: 310 },
+      { paymentMethod: 'cash', saleCount: 1, revenueCents: 1250 }
+    ]);
+
+    await shift.reload();
+    expect(parseFloat(shift.totalSales)).toBe(15.6);
+    expect(shift.totalTransactions).toBe(2);
+  });
+
+  test('una cancelación posterior deja los contadores en cero y la cuenta', async () => {
+    await apply(delta => delta.addSale(sale(), items));
+    await apply(delta => delta.addCancellation(sale({ status: 'cancelled' }), items, 'completed'));
+
+    const day = (await rollupRows()).find(row => row.granularity === 'day');
+    expect(day).toMatchObject({ saleCount: 0, revenueCents: 0, itemCount: 0, cancelledCount: 1, cancelledCents: 1250 });
+
+    await shift.reload();
+    expect(parseFloat(shift.totalSales)).toBe(0);
+    expect(shift.totalTransactions).toBe(0);
+  });
+
+  test('los reportes leen lo acumulado', async () => {
+    await apply(delta => {
+      delta.addSale(sale(), items);
+      delta.addSale(sale({ createdAt: '2024-03-11T08:00:00.000Z' }), items);
+    });
+
+    const [all] = await aggregateSales(null);
+    expect(all).toMatchObject({ groupKey: 'all', saleCount: 2, revenueCents: 2500, itemCount: 4 });
+
+    const [oneDay] = await aggregateSales({
+      start: new Date('2024-03-10T00:00:00.000Z'),
+      end: new Date('2024-03-10T23:59:59.999Z')
+    });
+    expect(oneDay).toMatchObject({ saleCount: 1, revenueCents: 1250 });
+  });
+});
@@ -0,0 +1,254 @@
+// backend/services/shiftTotals.js
+// Estadísticas de turno a partir de contadores incrementales.
+//
+// shift_totals guarda una fila por (turno, método de pago) con ventas,
+// importe y cancelaciones en centavos. La mantiene RollupDelta dentro de la
+// misma transacción que crea, cancela o sincroniza la venta, así que leer el
+// turno activo o cerrarlo cuesta lo mismo al inicio que al final del día.
+// verifyShiftTotals compara los contadores con las ventas crudas y, con
+// { repair: true }, reconstruye los turnos que no cuadran
+// (npm run shifts:verify). Ambos leen también las ventas archivadas.
+const { QueryTypes } = require('sequelize');
+const { sequelize } = require('../database/init');
+const { SHIFT_COLUMNS, addOnConflict, toCents, fromCents } = require('./salesRollup');
+const { eachTierWindow, tierFilter } = require('./archive');
+
+// Métodos de pago que suman al efectivo esperado en caja
+const CASH_METHODS = ['cash', 'efectivo'];
+
+const COUNTER_FIELDS = SHIFT_COLUMNS.slice(2);
+
+// Contadores por método de pago de un turno (una lectura por llave primaria)
+async function getShiftTotals(shiftId, options = {}) {
+  const rows = await sequelize.query(
+    `SELECT ${SHIFT_COLUMNS.join(', ')} FROM shift_totals WHERE shiftId = ?`,
+    { replacements: [shiftId], type: QueryTypes.SELECT, transaction: options.transaction }
+  );
+
+  const totals = {
+    totalCents: 0,
+    cashCents: 0,
+    cardCents: 0,
+    transactions: 0,
+    cancelledTransactions: 0,
+    cancelledCents: 0,
+    byPaymentMethod: []
+  };
+
+  for (const row of rows) {
+    const revenueCents = Number(row.revenueCents);
+    totals.totalCents += revenueCents;
+    totals.transactions += Number(row.saleCount);
+    totals.cancelledTransactions += Number(row.cancelledCount);
+    totals.cancelledCents += Number(row.cancelledCents);
+
+    if (CASH_METHODS.includes(row.paymentMethod)) {
+      totals.cashCents += revenueCents;
+    } else {
+      totals.cardCents += revenueCents;
+    }
+
+    totals.byPaymentMethod.push({
+      paymentMethod: row.paymentMethod,
+      transactions: Number(row.saleCount),
+      total: fromCents(revenueCents).toFixed(2)
+    });
+  }
+
+  return totals;
+}
+
+// Forma de currentStats en GET /api/shifts/active
+function formatShiftStats(totals) {
+  return {
+    totalSales: fromCents(totals.totalCents).toFixed(2),
+    cashSales: fromCents(totals.cashCents).toFixed(2),
+    cardSales: fromCents(totals.cardCents).toFixed(2),
+    totalTransactions: totals.transactions,
+    cancelledTransactions: totals.cancelledTransactions,
+    byPaymentMethod: totals.byPaymentMethod
+  };
+}
+
+/**
+ * Cierra el turno con los contadores actuales. Debe llamarse dentro de la
+ * transacción: el candado del escritor impide que una venta se registre
+ * entre la lectura de los contadores y el cierre.
+ */
+async function closeShift(shift, { endingCash, notes, transaction }) {
+  const totals = await getShiftTotals(shift.id, { transaction });
+  const expectedCents = toCents(shift.startingCash) + totals.cashCents;
+
+  await shift.update({
+    endTime: new Date(),
+    endingCash: endingCash || 0,
+    expectedCash: fromCents(expectedCents).toFixed(2),
+    totalSales: fromCents(totals.totalCents).toFixed(2),
+    cashSales: fromCents(totals.cashCents).toFixed(2),
+    cardSales: fromCents(totals.cardCents).toFixed(2),
+    totalTransactions: totals.transactions,
+    status: 'closed',
+    notes: notes ? `${shift.notes || ''}\n[CIERRE] ${notes}`.trim() : shift.notes
+  }, { transaction });
+
+  return totals;
+}
+
+// Contadores calculados desde `sales` (opcionalmente solo algunos turnos y
+// solo la ventana de eachTierWindow)
+function rawTotalsQuery(shiftIds, window = null) {
+  const period = window ? tierFilter(window) : { sql: '1', replacements: [] };
+  const filter = shiftIds ? `AND shiftId IN (${shiftIds.map(() => '?').join(', ')})` : '';
+  return {
+    sql: `SELECT shiftId, COALESCE(paymentMethod, 'cash') AS paymentMethod,
+                 SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) AS saleCount,
+                 SUM(CASE WHEN status = 'completed' THEN CAST(ROUND(total * 100) AS INTEGER) ELSE 0 END) AS revenueCents,
+                 SUM(CASE WHEN status = 'cancelled' THEN 1 ELSE 0 END) AS cancelledCount,
+                 SUM(CASE WHEN status = 'cancelled' THEN CAST(ROUND(total * 100) AS INTEGER) ELSE 0 END) AS cancelledCents
+            FROM sales
+           WHERE shiftId IS NOT NULL AND status IN ('completed', 'cancelled') AND ${period.sql} ${filter}
+           GROUP BY 1, 2`,
+    replacements: [...period.replacements, ...(shiftIds || [])]
+  };
+}
+
+/**
+ * Reconstruye shift_totals y los totales de la fila del turno desde las
+ * ventas crudas. Sin `shiftIds` reconstruye todos los turnos.
+ *
+ * Con options.transaction (migraciones) solo lee la base principal. Si no,
+ * suma ventana por ventana de meses archivados, una transacción por ventana
+ * (la primera borra los contadores y la última actualiza los turnos).
+ */
+async function rebuildShiftTotals(options = {}) {
+  const ids = options.shiftIds;
+  const placeholders = ids ? ids.map(() => '?').join(', ') : '';
+
+  const run = async (transaction, window = null) => {
+    if (!window || !window.from) {
+      await sequelize.query(
+        `DELETE FROM shift_totals ${ids ? `WHERE shiftId IN (${placeholders})` : ''}`,
+        { replacements: ids || [], transaction }
+      );
+    }
+
+    const raw = rawTotalsQuery(ids, window);
+    await sequelize.query(
+      `INSERT INTO shift_totals (${SHIFT_COLUMNS.join(', ')}) ${raw.sql}
+       ${addOnConflict(SHIFT_COLUMNS.slice(0, 2), SHIFT_COLUMNS)}`,
+      { replacements: raw.replacements, transaction }
+    );
+
+    if (!window || !window.to) {
+      await sequelize.query(
+        `UPDATE shifts
+            SET totalSales = COALESCE((SELECT ROUND(SUM(revenueCents) / 100.0, 2) FROM shift_totals WHERE shiftId = shifts.id), 0),
+                totalTransactions = COALESCE((SELECT SUM(saleCount) FROM shift_totals WHERE shiftId = shifts.id), 0)
+          ${ids ? `WHERE id IN (${placeholders})` : ''}`,
+        { replacements: ids || [], transaction }
+      );
+    }
+  };
+
+  if (options.transaction) {
+    return run(options.transaction);
+  }
+  await eachTierWindow(null, window => sequelize.transaction(transaction => run(transaction, window)), { write: true });
+}
+
+// Contadores esperados de todo el historial (un turno puede cruzar ventanas)
+async function expectedShiftTotals() {
+  const windows = await eachTierWindow(null, (window) => {
+    const raw = rawTotalsQuery(null, window);
+    return sequelize.query(raw.sql, { replacements: raw.replacements, type: QueryTypes.SELECT });
+  });
+
+  const merged = new Map();
+  for (const row of windows.flat()) {
+    const key = `${row.shiftId}|${row.paymentMethod}`;
+    const current = merged.get(key);
+    if (!current) {
+      merged.set(key, { ...row });
+      continue;
+    }
+    for (const field of COUNTER_FIELDS) {
+      current[field] = Number(current[field] || 0) + Number(row[field] || 0);
+    }
+  }
+  return [...merged.values()];
+}
+
+/**
+ * Compara los contadores con las ventas crudas. Devuelve
+ * { shifts, mismatches: [{ shiftId, paymentMethod, field, expected, actual }] }.
+ * Con { repair: true } reconstruye solo los turnos con diferencias.
+ */
+async function verifyShiftTotals(options = {}) {
+  const [expectedRows, actualRows, shiftRows] = await Promise.all([
+    expectedShiftTotals(),
+    sequelize.query(`SELECT ${SHIFT_COLUMNS.join(', ')} FROM shift_totals`, { type: QueryTypes.SELECT }),
+    sequelize.query('SELECT id, totalSales, totalTransactions FROM shifts', { type: QueryTypes.SELECT })
+  ]);
+
+  const byKey = (rows) => new Map(rows.map(row => [`${row.shiftId}|${row.paymentMethod}`, row]));
+  const expected = byKey(expectedRows);
+  const actual = byKey(actualRows);
+  const mismatches = [];
+
+  for (const key of new Set([...expected.keys(), ...actual.keys()])) {
+    const want = expected.get(key) || {};
+    const have = actual.get(key) || {};
+    const [shiftId, paymentMethod] = key.split('|');
+
+    for (const field of COUNTER_FIELDS) {
+      if (Number(want[field] || 0) !== Number(have[field] || 0)) {
+        mismatches.push({
+          shiftId: Number(shiftId),
+          paymentMethod,
+          field,
+          expected: Number(want[field] || 0),
+          actual: Number(have[field] || 0)
+        });
+      }
+    }
+  }
+
+  // Totales de la fila del turno contra la suma de sus ventas
+  const sums = new Map();
+  for (const row of expectedRows) {
+    const current = sums.get(row.shiftId) || { saleCount: 0, revenueCents: 0 };
+    current.saleCount += Number(row.saleCount);
+    current.revenueCents += Number(row.revenueCents);
+    sums.set(row.shiftId, current);
+  }
+  for (const shift of shiftRows) {
+    const sum = sums.get(shift.id) || { saleCount: 0, revenueCents: 0 };
+    if (toCents(shift.totalSales) !== sum.revenueCents) {
+      mismatches.push({ shiftId: shift.id, paymentMethod: '*', field: 'totalSales', expected: fromCents(sum.revenueCents), actual: Number(shift.totalSales || 0) });
+    }
+    if (Number(shift.totalTransactions || 0) !== sum.saleCount) {
+      mismatches.push({ shiftId: shift.id, paymentMethod: '*', field: 'totalTransactions', expected: sum.saleCount, actual: Number(shift.totalTransactions || 0) });
+    }
+  }
+
+  const shiftIds = [...new Set(mismatches.map(mismatch => mismatch.shiftId))];
+
+  if (options.repair && shiftIds.length > 0) {
+    // Bloques para no exceder el límite de parámetros de SQLite; cada bloque
+    // abre sus propias transacciones (el ATTACH no se permite dentro de una)
+    for (let i = 0; i < shiftIds.length; i += 500) {
+      await rebuildShiftTotals({ shiftIds: shiftIds.slice(i, i + 500) });
+    }
+  }
+
+  return { shifts: shiftRows.length, repaired: options.repair ? shiftIds.length : 0, mismatches };
+}
+
+module.exports = {
+  CASH_METHODS,
+  getShiftTotals,
+  formatShiftStats,
+  closeShift,
+  rebuildShiftTotals,
+  verifyShiftTotals
+};
@@ -0,0 +1,99 @@
+// backend/services/stock.js
+// Ajustes de stock set-based: un solo UPDATE con CASE para todos los productos
+// de una venta (o de un lote de ventas). Los productos con stock -1 son
+// ilimitados y nunca se tocan. Al confirmar un cambio de stock se descarta
+// la caché del catálogo (sin aviso 'menu-version' a los clientes).
+const { QueryTypes } = require('sequelize');
+const { sequelize } = require('../database/init');
+const { catalogCache } = require('./catalogCache');
+const { HttpError } = require('./errors');
+
+class StockError extends HttpError {}
+
+function caseExpression(entries) {
+  return `CASE id ${entries.map(() => 'WHEN ? THEN ?').join(' ')} END`;
+}
+
+/**
+ * Descuenta `quantities` (Map menuItemId → cantidad).
+ * - strict: exige stock suficiente en cada producto controlado; si alguno no
+ *   alcanza lanza StockError (la transacción debe revertirse).
+ * - no strict: descuenta hasta 0 (ventas offline que ya ocurrieron).
+ * `stockedIds` limita el UPDATE a los productos con stock controlado cuando
+ * ya se conocen; sin él, se filtra en SQL con stock <> -1.
+ */
+async function decrementStock(quantities, { transaction, strict = false, stockedIds = null } = {}) {
+  const entries = [...quantities].filter(([id, quantity]) =>
+    quantity > 0 && (!stockedIds || stockedIds.has(id))
+  );
+  if (entries.length === 0) {
+    return 0;
+  }
+
+  const caseSql = caseExpression(entries);
+  const caseParams = entries.flat();
+  const ids = entries.map(([id]) => id);
+  const idList = ids.map(() => '?').join(', ');
+
+  const changes = await sequelize.query(
+    strict
+      ? `UPDATE menu_items SET stock = stock - ${caseSql}, updatedAt = ?
+          WHERE id IN (${idList}) AND stock <> -1 AND stock >= ${caseSql}`
+      : `UPDATE menu_items SET stock = MAX(stock - ${caseSql}, 0), updatedAt = ?
+          WHERE id IN (${idList}) AND stock <> -1`,
+    {
+      replacements: strict
+        ? [...caseParams, new Date(), ...ids, ...caseParams]
+        : [...caseParams, new Date(), ...ids],
+      type: QueryTypes.BULKUPDATE,
+      transaction
+    }
+  );
+
+  if (strict && stockedIds && changes !== entries.length) {
+    throw new StockError('Stock insuficiente para uno o más productos');
+  }
+  if (changes > 0) {
+    catalogCache.invalidateAfterCommit(transaction, { reason: 'stock', notify: false });
+  }
+  return changes;
+}
+
+// Devuelve stock (cancelaciones); ignora productos ilimitados
+async function restoreStock(quantities, { transaction } = {}) {
+  const entries = [...quantities].filter(([, quantity]) => quantity > 0);
+  if (entries.length === 0) {
+    return 0;
+  }
+
+  const ids = entries.map(([id]) => id);
+  const changes = await sequelize.query(
+    `UPDATE menu_items SET stock = stock + ${caseExpression(entries)}, updatedAt = ?
+      WHERE id IN (${ids.map(() => '?').join(', ')}) AND stock <> -1`,
+    {
+      replacements: [...entries.flat(), new Date(), ...ids],
+      type: QueryTypes.BULKUPDATE,
+      transaction
+    }
+  );
+
+  if (changes > 0) {
+    catalogCache.invalidateAfterCommit(transaction, { reason: 'stock', notify: false });
+  }
+  return changes;
+}
+
+// Suma cantidades por producto a partir de líneas { menuItemId, quantity }
+function quantitiesByItem(lines, quantities = new Map()) {
+  for (const line of lines) {
+    quantities.set(line.menuItemId, (quantities.get(line.menuItemId) || 0) + line.quantity);
+  }
+  return quantities;
+}
+
+module.exports = {
+  StockError,
+  decrementStock,
+  restoreStock,
+  quantitiesByItem
+};
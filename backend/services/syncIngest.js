@@ -0,0 +1,364 @@
+// backend/services/syncIngest.js
+// Ingesta masiva e idempotente de ventas offline (/api/sync/sales).
+//
+// - Cada venta trae una llave `clientId` generada en el dispositivo; reenviar
+//   el mismo lote no duplica nada.
+// - Precios y existencia de productos salen de la caché del catálogo.
+// - Las ventas se procesan en bloques acotados. Por bloque: una consulta de
+//   existencia, un bulk insert de ventas, uno de líneas, un UPDATE de stock,
+//   el consumo de insumos por receta, un UPSERT de acumulados y la mesa de
+//   las ventas en salón (motor de mesas, como commitSale), todo en una
+//   transacción.
+// - Si un bloque falla, se reintenta venta por venta para aislar a la culpable
+//   sin revertir al resto.
+// - El turno de cada venta es el turno activo de su usuario; un shiftId del
+//   dispositivo solo se respeta si apunta a un turno activo de ese usuario.
+//   Solo administradores y gerentes registran ventas a nombre de otro.
+// - Devuelve un manifiesto con el resultado de cada venta.
+const { Op } = require('sequelize');
+const { Sale, SaleItem, Shift, sequelize } = require('../database/init');
+const { RollupDelta, applyRollupDelta } = require('./salesRollup');
+const { decrementStock, quantitiesByItem } = require('./stock');
+const { consumeForSales } = require('./inventory');
+const { catalogCache } = require('./catalogCache');
+const { tableState } = require('./tableState');
+const { HttpError } = require('./errors');
+
+const CHUNK_SIZE = parseInt(process.env.SYNC_CHUNK_SIZE || '100');
+const MAX_BATCH = parseInt(process.env.SYNC_MAX_BATCH || '5000');
+
+const PAYMENT_METHODS = ['cash', 'card', 'transfer', 'mixed'];
+const ORDER_TYPES = ['dine-in', 'takeaway', 'delivery'];
+const STATUSES = ['pending', 'completed', 'cancelled', 'refunded'];
+const OVERRIDE_ROLES = ['admin', 'manager'];
+const OPEN_STATUSES = ['pending', 'completed'];
+
+class SyncError extends HttpError {}
+
+const money = (value) => (parseFloat(value || 0)).toFixed(2);
+
+// Llave de idempotencia: clientId explícito o deviceId + id local
+function idempotencyKey(saleData, deviceId) {
+  const key = saleData.clientId || saleData.idempotencyKey ||
+    ((saleData.deviceId || deviceId) && saleData.id !== undefined ? `${saleData.deviceId || deviceId}:${saleData.id}` : null);
+  return key ? String(key).slice(0, 64) : null;
+}
+
+// Valida y normaliza una venta del dispositivo; lanza SyncError si no sirve
+function normalizeSale(saleData, { deviceId, currentUser }) {
+  const clientId = idempotencyKey(saleData, deviceId);
+  if (!clientId) {
+    throw new SyncError('clientId requerido');
+  }
+
+  const items = Array.isArray(saleData.items) ? saleData.items : [];
+  if (items.length === 0) {
+    throw new SyncError('La venta no tiene items');
+  }
+
+  const lines = items.map(item => {
+    const menuItemId = parseInt(item.menuItemId ?? item.id);
+    const quantity = parseInt(item.quantity);
+    if (!Number.isInteger(menuItemId)) {
+      throw new SyncError(`Item inválido: ${item.menuItemId ?? item.id}`);
+    }
+    if (!Number.isInteger(quantity) || quantity < 1) {
+      throw new SyncError(`Cantidad inválida para el item ${menuItemId}`);
+    }
+    return {
+      menuItemId,
+      quantity,
+      unitPrice: item.unitPrice ?? item.price,
+      totalPrice: item.totalPrice,
+      notes: item.notes || null
+    };
+  });
+
+  const createdAt = saleData.createdAt ? new Date(saleData.createdAt) : new Date();
+  if (Number.isNaN(createdAt.getTime())) {
+    throw new SyncError('Fecha de venta inválida');
+  }
+
+  const status = saleData.status || 'completed';
+  if (!STATUSES.includes(status)) {
+    throw new SyncError(`Estado inválido: ${status}`);
+  }
+
+  let userId = currentUser.userId;
+  if (saleData.userId && OVERRIDE_ROLES.includes(currentUser.role)) {
+    userId = parseInt(saleData.userId);
+    if (!Number.isInteger(userId)) {
+      throw new SyncError(`Usuario inválido: ${saleData.userId}`);
+    }
+  }
+
+  const requestedShiftId = saleData.shiftId ? parseInt(saleData.shiftId) : null;
+
+  return {
+    clientId,
+    lines,
+    requestedShiftId: Number.isInteger(requestedShiftId) ? requestedShiftId : null,
+    sale: {
+      clientId,
+      subtotal: saleData.subtotal,
+      tax: money(saleData.tax),
+      discount: money(saleData.discount),
+      deliveryFee: money(saleData.deliveryFee),
+      total: saleData.total,
+      paymentMethod: PAYMENT_METHODS.includes(saleData.paymentMethod) ? saleData.paymentMethod : 'cash',
+      orderType: ORDER_TYPES.includes(saleData.orderType) ? saleData.orderType : 'dine-in',
+      status,
+      notes: saleData.notes || null,
+      tableId: saleData.tableId || null,
+      customerId: saleData.customerId || null,
+      userId,
+      shiftId: null,
+      deviceId: saleData.deviceId || deviceId || null,
+      deliveryAddress: saleData.deliveryAddress || null,
+      createdAt,
+      updatedAt: createdAt
+    }
+  };
+}
+
+/**
+ * Asigna el turno de cada venta con una sola consulta de turnos activos: el
+ * shiftId pedido si es un turno activo del usuario de la venta; si no, el
+ * turno activo de ese usuario (o ninguno).
+ */
+async function assignShifts(entries) {
+  const userIds = [...new Set(entries.map(entry => entry.sale.userId))];
+  const requestedIds = [...new Set(entries.map(entry => entry.requestedShiftId).filter(id => id !== null))];
+
+  const where = requestedIds.length
+    ? { status: 'active', [Op.or]: [{ userId: userIds }, { id: requestedIds }] }
+    : { status: 'active', userId: userIds };
+  const active = await Shift.findAll({ where, attributes: ['id', 'userId'], raw: true });
+
+  const ownerById = new Map(active.map(shift => [shift.id, shift.userId]));
+  const activeByUser = new Map(active.map(shift => [shift.userId, shift.id]));
+
+  for (const entry of entries) {
+    const { userId } = entry.sale;
+    entry.sale.shiftId = ownerById.get(entry.requestedShiftId) === userId
+      ? entry.requestedShiftId
+      : activeByUser.get(userId) ?? null;
+  }
+}
+
+// Completa precios faltantes con el menú y calcula totales si no vienen
+function priceSale(entry, menuById) {
+  let subtotal = 0;
+
+  for (const line of entry.lines) {
+    const menuItem = menuById.get(line.menuItemId);
+    const unitPrice = line.unitPrice !== undefined ? parseFloat(line.unitPrice) : parseFloat(menuItem.price);
+    line.unitPrice = unitPrice.toFixed(2);
+    line.totalPrice = money(line.totalPrice !== undefined ? line.totalPrice : unitPrice * line.quantity);
+    subtotal += parseFloat(line.totalPrice);
+  }
+
+  const sale = entry.sale;
+  sale.subtotal = money(sale.subtotal !== undefined ? sale.subtotal : subtotal);
+  sale.total = money(sale.total !== undefined
+    ? sale.total
+    : parseFloat(sale.subtotal) + parseFloat(sale.tax) + parseFloat(sale.deliveryFee) - parseFloat(sale.discount));
+}
+
+/**
+ * Inserta un bloque de ventas ya validadas en una transacción.
+ * Devuelve Map clientId → { saleId, duplicate }.
+ */
+async function ingestChunk(entries, menuById) {
+  const now = new Date();
+
+  return sequelize.transaction(async (transaction) => {
+    const results = new Map();
+
+    // Existencia de todo el bloque en una sola consulta
+    const existing = await Sale.findAll({
+      where: { clientId: { [Op.in]: entries.map(entry => entry.clientId) } },
+      attributes: ['id', 'clientId', 'synced'],
+      raw: true,
+      transaction
+    });
+    const existingByClient = new Map(existing.map(row => [row.clientId, row]));
+
+    const unsynced = existing.filter(row => !row.synced).map(row => row.id);
+    if (unsynced.length) {
+      await Sale.update({ synced: true, syncedAt: now }, { where: { id: unsynced }, transaction });
+    }
+    for (const row of existing) {
+      results.set(row.clientId, { saleId: row.id, duplicate: true });
+    }
+
+    const fresh = entries.filter(entry => !existingByClient.has(entry.clientId));
+    if (fresh.length === 0) {
+      return results;
+    }
+
+    await Sale.bulkCreate(
+      fresh.map(entry => ({ ...entry.sale, synced: true, syncedAt: now })),
+      { transaction }
+    );
+
+    // Ids asignados, resueltos por la llave de idempotencia
+    const inserted = await Sale.findAll({
+      where: { clientId: { [Op.in]: fresh.map(entry => entry.clientId) } },
+      attributes: ['id', 'clientId'],
+      raw: true,
+      transaction
+    });
+    const idByClient = new Map(inserted.map(row => [row.clientId, row.id]));
+
+    const saleItems = [];
+    const quantities = new Map();
+    const rollup = new RollupDelta();
+    const consumed = [];
+
+    for (const entry of fresh) {
+      const saleId = idByClient.get(entry.clientId);
+      const items = entry.lines.map(line => ({
+        ...line,
+        saleId,
+        createdAt: entry.sale.createdAt,
+        updatedAt: entry.sale.createdAt
+      }));
+      saleItems.push(...items);
+
+      if (entry.sale.status === 'completed') {
+        quantitiesByItem(entry.lines, quantities);
+        consumed.push({
+          saleId,
+          lines: entry.lines,
+          userId: entry.sale.userId,
+          deviceId: entry.sale.deviceId,
+          occurredAt: entry.sale.createdAt
+        });
+      }
+      rollup.addSale({ ...entry.sale, id: saleId }, entry.lines);
+      results.set(entry.clientId, { saleId, duplicate: false });
+    }
+
+    await SaleItem.bulkCreate(saleItems, { transaction });
+
+    // Las ventas offline ya ocurrieron: se descuenta hasta 0, sin rechazar
+    await decrementStock(quantities, { transaction });
+    await consumeForSales(consumed, { transaction });
+    await applyRollupDelta(rollup, transaction);
+
+    // La mesa queda ocupada, como en commitSale. Una venta más vieja que el
+    // último cambio de su mesa no la vuelve a ocupar, y una mesa dada de baja
+    // no rechaza una venta que ya ocurrió.
+    const saleAtByTable = new Map();
+    for (const { sale } of fresh) {
+      if (!sale.tableId || sale.orderType !== 'dine-in' || !OPEN_STATUSES.includes(sale.status)) continue;
+      const tableId = parseInt(sale.tableId);
+      if (!(saleAtByTable.get(tableId) >= sale.createdAt)) saleAtByTable.set(tableId, sale.createdAt);
+    }
+    for (const [tableId, saleAt] of saleAtByTable) {
+      const table = await tableState.get(tableId);
+      if (table && !(table.updatedAt && new Date(table.updatedAt) > saleAt)) {
+        await tableState.transition(tableId, 'occupied', { force: true, transaction });
+      }
+    }
+
+    return results;
+  });
+}
+
+/**
+ * Procesa un lote de ventas offline y devuelve el manifiesto por venta:
+ * { index, clientId, status: 'created' | 'duplicate' | 'rejected', saleId?, error? }
+ */
+async function ingestSales(rawSales, { deviceId, currentUser, chunkSize = CHUNK_SIZE } = {}) {
+  if (!Array.isArray(rawSales)) {
+    throw new SyncError('Se requiere un array de ventas');
+  }
+  if (rawSales.length > MAX_BATCH) {
+    throw new SyncError(`Máximo ${MAX_BATCH} ventas por petición`, 413);
+  }
+
+  const manifest = new Array(rawSales.length);
+  const accepted = [];
+  const seen = new Map();
+
+  // 1. Validación local (sin tocar la base de datos)
+  rawSales.forEach((saleData, index) => {
+    try {
+      const entry = { index, ...normalizeSale(saleData || {}, { deviceId, currentUser }) };
+      if (seen.has(entry.clientId)) {
+        manifest[index] = { index, clientId: entry.clientId, status: 'duplicate', duplicateOf: seen.get(entry.clientId) };
+        return;
+      }
+      seen.set(entry.clientId, index);
+      accepted.push(entry);
+    } catch (error) {
+      manifest[index] = { index, clientId: saleData && saleData.clientId, status: 'rejected', error: error.message };
+    }
+  });
+
+  // 2. Productos referenciados por el lote, desde la caché del catálogo, y
+  //    turnos activos de los usuarios del lote
+  const menuById = accepted.length ? await catalogCache.getItemsById() : new Map();
+  if (accepted.length) {
+    await assignShifts(accepted);
+  }
+
+  const valid = [];
+  for (const entry of accepted) {
+    const missing = entry.lines.find(line => !menuById.has(line.menuItemId));
+    if (missing) {
+      manifest[entry.index] = { index: entry.index, clientId: entry.clientId, status: 'rejected', error: `Item del menú no encontrado: ${missing.menuItemId}` };
+      continue;
+    }
+    priceSale(entry, menuById);
+    valid.push(entry);
+  }
+
+  // 3. Bloques con transacción propia; si uno falla se aísla venta por venta
+  const record = (entry, result) => {
+    manifest[entry.index] = {
+      index: entry.index,
+      clientId: entry.clientId,
+      status: result.duplicate ? 'duplicate' : 'created',
+      saleId: result.saleId
+    };
+  };
+
+  for (let i = 0; i < valid.length; i += chunkSize) {
+    const chunk = valid.slice(i, i + chunkSize);
+
+    try {
+      const results = await ingestChunk(chunk, menuById);
+      chunk.forEach(entry => record(entry, results.get(entry.clientId)));
+    } catch (chunkError) {
+      for (const entry of chunk) {
+        try {
+          const results = await ingestChunk([entry], menuById);
+          record(entry, results.get(entry.clientId));
+        } catch (error) {
+          manifest[entry.index] = { index: entry.index, clientId: entry.clientId, status: 'rejected', error: error.message };
+        }
+      }
+    }
+  }
+
+  // Duplicados dentro del mismo lote apuntan a la venta original
+  for (const entry of manifest) {
+    if (entry && entry.duplicateOf !== undefined) {
+      entry.saleId = manifest[entry.duplicateOf].saleId;
+      delete entry.duplicateOf;
+    }
+  }
+
+  const counts = { created: 0, duplicate: 0, rejected: 0 };
+  manifest.forEach(entry => { counts[entry.status] += 1; });
+
+  return { manifest, counts };
+}
+
+module.exports = {
+  SyncError,
+  ingestSales
+};
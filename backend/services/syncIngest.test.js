@@ -0,0 +1,195 @@
+// backend/services/syncIngest.test.js
+// Ingesta de ventas offline: idempotencia por clientId, rechazos por venta y
+// aislamiento de la venta culpable cuando falla un bloque.
+const { QueryTypes } = require('sequelize');
+const { useTempDatabase } = require('../scripts/bench/stats');
+
+const tempDb = useTempDatabase('pos-test-sync');
+
+const { initDatabase, sequelize, Sale, SaleItem, MenuItem, User } = require('../database/init');
+const { ingestSales, SyncError } = require('./syncIngest');
+
+let menuItems;
+let currentUser;
+
+beforeAll(async () => {
+  await initDatabase();
+  menuItems = await MenuItem.findAll({ order: [['id', 'ASC']], limit: 2, raw: true });
+  const admin = await User.findOne({ where: { username: 'admin' } });
+  currentUser = { userId: admin.id, username: admin.username, role: admin.role };
+});
+
+afterAll(async () => {
+  await sequelize.close();
+  tempDb.cleanup();
+});
+
+// Venta offline mínima con la llave de idempotencia dada
+function offlineSale(clientId, fields = {}) {
+  return {
+    clientId,
+    items: [
+      { menuItemId: menuItems[0].id, quantity: 2 },
+      { menuItemId: menuItems[1].id, quantity: 1, unitPrice: '4.50' }
+    ],
+    paymentMethod: 'cash',
+    orderType: 'takeaway',
+    createdAt: '2024-05-01T12:30:00.000Z',
+    ...fields
+  };
+}
+
+const ingest = (sales, options = {}) => ingestSales(sales, { deviceId: 'tablet-1', currentUser, ...options });
+
+const countSales = (clientIds) => Sale.count({ where: { clientId: clientIds } });
+
+describe('ingestSales', () => {
+  test('reenviar el mismo lote no duplica ventas, líneas ni acumulados', async () => {
+    const batch = ['idem-1', 'idem-2', 'idem-3'].map(id => offlineSale(id));
+
+    const first = await ingest(batch);
+    expect(first.counts).toEqual({ created: 3, duplicate: 0, rejected: 0 });
+    const saleIds = first.manifest.map(entry => entry.saleId);
+    expect(new Set(saleIds).size).toBe(3);
+
+    const itemCount = await SaleItem.count({ where: { saleId: saleIds } });
+    const [rollup] = await sequelize.query(
+      "SELECT SUM(saleCount) AS saleCount FROM sales_rollup WHERE granularity = 'day' AND bucket = '2024-05-01'",
+      { type: QueryTypes.SELECT }
+    );
+
+    const replay = await ingest(batch);
+    expect(replay.counts).toEqual({ created: 0, duplicate: 3, rejected: 0 });
+    expect(replay.manifest.map(entry => entry.saleId)).toEqual(saleIds);
+    expect(replay.manifest.every(entry => entry.status === 'duplicate')).toBe(true);
+
+    expect(await countSales(['idem-1', 'idem-2', 'idem-3'])).toBe(3);
+    expect(await SaleItem.count({ where: { saleId: saleIds } })).toBe(itemCount);
+    const [after] = await sequelize.query(
+      "SELECT SUM(saleCount) AS saleCount FROM sales_rollup WHERE granularity = 'day' AND bucket = '2024-05-01'",
+      { type: QueryTypes.SELECT }
+    );
+    expect(after.saleCount).toBe(rollup.saleCount);
+  });
+
+  test('una venta repetida dentro del lote apunta a la original', async () => {
+    const { manifest, counts } = await ingest([
+      offlineSale('twice-1'),
+      offlineSale('twice-2'),
+      offlineSale('twice-1')
+    ]);
+
+    expect(counts).toEqual({ created: 2, duplicate: 1, rejected: 0 });
+    expect(manifest[2]).toEqual({ index: 2, clientId: 'twice-1', status: 'duplicate', saleId: manifest[0].saleId });
+    expect(await countSales(['twice-1'])).toBe(1);
+  });
+
+  test('sin clientId la llave es deviceId + id local', async () => {
+    const sale = offlineSale(undefined, { id: 42 });
+
+    const first = await ingest([sale]);
+    expect(first.manifest[0]).toMatchObject({ clientId: 'tablet-1:42', status: 'created' });
+
+    const replay = await ingest([sale]);
+    expect(replay.manifest[0]).toMatchObject({ status: 'duplicate', saleId: first.manifest[0].saleId });
+
+    const other = await ingest([sale], { deviceId: 'tablet-2' });
+    expect(other.manifest[0]).toMatchObject({ clientId: 'tablet-2:42', status: 'created' });
+  });
+
+  test('las ventas inválidas se rechazan sin afectar al resto', async () => {
+    const { manifest, counts } = await ingest([
+      offlineSale('reject-ok'),
+      offlineSale(undefined),
+      offlineSale('reject-empty', { items: [] }),
+      offlineSale('reject-menu', { items: [{ menuItemId: 999999, quantity: 1 }] }),
+      offlineSale('reject-status', { status: 'lost' }),
+      offlineSale('reject-date', { createdAt: 'ayer' })
+    ]);
+
+    expect(counts).toEqual({ created: 1, duplicate: 0, rejected: 5 });
+    expect(manifest[0].status).toBe('created');
+    expect(manifest.slice(1).map(entry => entry.error)).toEqual([
+      'clientId requerido',
+      'La venta no tiene items',
+      'Item del menú no encontrado: 999999',
+      'Estado inválido: lost',
+      'Fecha de venta inválida'
+    ]);
+    expect(await countSales(['reject-empty', 'reject-menu', 'reject-status', 'reject-date'])).toBe(0);
+  });
+
+  test('calcula precios y totales con el menú cuando no vienen', async () => {
+    const { manifest } = await ingest([offlineSale('priced')]);
+    const sale = await Sale.findByPk(manifest[0].saleId, { include: [SaleItem] });
+
+    const expected = parseFloat(menuItems[0].price) * 2 + 4.5;
+    expect(parseFloat(sale.subtotal)).toBeCloseTo(expected, 2);
+    expect(parseFloat(sale.total)).toBeCloseTo(expected, 2);
+    expect(sale.synced).toBe(true);
+    expect(sale.SaleItems).toHaveLength(2);
+  });
+
+  test('si falla un bloque se reintenta venta por venta y solo se rechaza la culpable', async () => {
+    const bulkCreate = Sale.bulkCreate;
+    const spy = jest.spyOn(Sale, 'bulkCreate').mockImplementation(async function (rows, options) {
+      if (rows.some(row => row.clientId === 'retry-bad')) {
+        throw new Error('fallo simulado');
+      }
+      return bulkCreate.call(this, rows, options);
+    });
+
+    let result;
+    try {
+      result = await ingest(['retry-1', 'retry-bad', 'retry-2'].map(id => offlineSale(id)), { chunkSize: 10 });
+      // Un intento del bloque completo y uno por cada venta
+      expect(spy).toHaveBeenCalledTimes(4);
+    } finally {
+      spy.mockRestore();
+    }
+
+    expect(result.counts).toEqual({ created: 2, duplicate: 0, rejected: 1 });
+    expect(result.manifest.map(entry => entry.status)).toEqual(['created', 'rejected', 'created']);
+    expect(result.manifest[1].error).toBe('fallo simulado');
+    expect(await countSales(['retry-1', 'retry-2'])).toBe(2);
+    expect(await countSales(['retry-bad'])).toBe(0);
+
+    // El bloque revertido no dejó líneas huérfanas
+    const [{ orphans }] = await sequelize.query(
+      'SELECT COUNT(*) AS orphans FROM sale_items WHERE saleId NOT IN (SELECT id FROM sales)',
+      { type: QueryTypes.SELECT }
+    );
+    expect(orphans).toBe(0);
+
+    // Al reenviar, las ya creadas son duplicadas y la rechazada se crea
+    const retry = await ingest(['retry-1', 'retry-bad', 'retry-2'].map(id => offlineSale(id)));
+    expect(retry.manifest.map(entry => entry.status)).toEqual(['duplicate', 'created', 'duplicate']);
+    expect(retry.manifest[0].saleId).toBe(result.manifest[0].saleId);
+  });
+
+  test('los bloques fallidos no afectan a los bloques ya confirmados', async () => {
+    const bulkCreate = Sale.bulkCreate;
+    const spy = jest.spyOn(Sale, 'bulkCreate').mockImplementation(async function (rows, options) {
+      if (rows.some(row => row.clientId === 'chunks-bad')) {
+        throw new Error('fallo simulado');
+      }
+      return bulkCreate.call(this, rows, options);
+    });
+
+    let result;
+    try {
+      result = await ingest(['chunks-1', 'chunks-2', 'chunks-bad', 'chunks-3'].map(id => offlineSale(id)), { chunkSize: 2 });
+      // Primer bloque en un intento; el segundo, completo y venta por venta
+      expect(spy).toHaveBeenCalledTimes(4);
+    } finally {
+      spy.mockRestore();
+    }
+
+    expect(result.manifest.map(entry => entry.status)).toEqual(['created', 'created', 'rejected', 'created']);
+  });
+
+  test('rechaza lotes que no son un array o exceden el máximo', async () => {
+    await expect(ingest({})).rejects.toThrow(SyncError);
+    await expect(ingest(new Array(5001).fill({}))).rejects.toMatchObject({ status: 413 });
+  });
+});
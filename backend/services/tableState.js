@@ -0,0 +1,335 @@
+// backend/services/tableState.js
+// Estado del salón (mesas) en memoria como fuente de verdad.
+//
+// - Las mesas activas viven en un Map; los contadores por estado se
+//   mantienen en cada cambio, así /stats/occupancy no recorre nada.
+// - Cada cambio valida la transición contra el estado en memoria, se escribe
+//   en `tables` (con el estado anterior como guarda) y se agrega a
+//   `table_changes`, cuyo id es la versión del salón. Se aplica en memoria
+//   al confirmar la transacción, de modo que un cambio dentro de una venta
+//   que se revierte nunca se ve.
+// - Los clientes piden una foto versionada (snapshot) y después solo los
+//   cambios desde su versión (changesSince), o reciben 'table-updated' con
+//   la versión por Socket.io. Si la versión ya no está en el log se responde
+//   la foto completa.
+// - Como en cartStore, varios procesos comparten el log: en modo cluster un
+//   worker avisa por IPC y los demás leen del log lo que les falta.
+const { EventEmitter } = require('events');
+const { QueryTypes } = require('sequelize');
+const { sequelize, Table } = require('../database/init');
+const ipc = require('./clusterIpc');
+const { HttpError } = require('./errors');
+
+const STATUSES = ['available', 'occupied', 'reserved', 'cleaning'];
+
+// Transiciones permitidas sin { force: true }
+const TRANSITIONS = {
+  available: ['occupied', 'reserved', 'cleaning'],
+  reserved: ['occupied', 'available'],
+  occupied: ['available', 'cleaning'],
+  cleaning: ['available']
+};
+
+const STATUS_LABELS = {
+  available: 'disponible',
+  occupied: 'ocupada',
+  reserved: 'reservada',
+  cleaning: 'en limpieza'
+};
+
+const KEEP_CHANGES = parseInt(process.env.TABLE_CHANGES_KEEP || '5000');
+const MAX_DELTA = 500;
+
+class TableStateError extends HttpError {
+  static status = 409;
+}
+
+// Forma pública de una mesa (la misma en foto, deltas y eventos)
+function toState(row, version = 0) {
+  return {
+    id: row.id,
+    number: row.number,
+    capacity: row.capacity,
+    location: row.location || null,
+    status: row.status,
+    version,
+    updatedAt: row.updatedAt ? new Date(row.updatedAt).toISOString() : null
+  };
+}
+
+// Fila de table_changes → { version, table }
+function parseChange(row) {
+  return { version: row.id, table: { ...JSON.parse(row.data), version: row.id } };
+}
+
+class TableStateEngine extends EventEmitter {
+  constructor() {
+    super();
+    this.tables = new Map();
+    this.counts = Object.fromEntries(STATUSES.map(status => [status, 0]));
+    this.version = 0;
+    this.loaded = null;
+    this.chain = Promise.resolve();
+    this.stats = { transitions: 0, rejected: 0, conflicts: 0, deltas: 0, resets: 0, catchUps: 0 };
+
+    ipc.on('tables:changed', () => {
+      this.catchUp().catch(error => console.error('Error actualizando mesas desde el log:', error));
+    });
+  }
+
+  // Carga inicial desde `tables`; la versión es el último id del log
+  ready() {
+    if (!this.loaded) {
+      this.loaded = this.reload().catch(error => {
+        this.loaded = null;
+        throw error;
+      });
+    }
+    return this.loaded;
+  }
+
+  async reload() {
+    const [rows, [{ version }]] = await Promise.all([
+      Table.findAll({ where: { isActive: true }, raw: true }),
+      sequelize.query('SELECT COALESCE(MAX(id), 0) AS version FROM table_changes', { type: QueryTypes.SELECT })
+    ]);
+
+    this.tables.clear();
+    for (const status of STATUSES) this.counts[status] = 0;
+    for (const row of rows) {
+      this.put(toState(row, version));
+    }
+    this.version = version;
+  }
+
+  // Mantiene el Map y los contadores
+  put(table) {
+    const previous = this.tables.get(table.id);
+    if (previous) this.counts[previous.status] -= 1;
+
+    if (table.removed) {
+      this.tables.delete(table.id);
+    } else {
+      this.tables.set(table.id, table);
+      this.counts[table.status] = (this.counts[table.status] || 0) + 1;
+    }
+  }
+
+  // Aplica cambios en orden de versión (propios o leídos del log)
+  apply(changes, { local }) {
+    for (const change of changes) {
+      if (change.version <= this.version) continue;
+      this.put(change.table);
+      this.version = change.version;
+      if (local) this.emit('change', change);
+    }
+  }
+
+  // Lee del log lo que escribieron otros procesos
+  catchUp() {
+    const task = async () => {
+      await this.ready();
+      const rows = await sequelize.query(
+        'SELECT id, data FROM table_changes WHERE id > ? ORDER BY id',
+        { replacements: [this.version], type: QueryTypes.SELECT }
+      );
+      if (rows.length === 0) return 0;
+
+      // Si el log ya se recortó más allá de lo visto, se recarga todo
+      if (rows[0].id > this.version + 1) {
+        await this.reload();
+      } else {
+        this.apply(rows.map(parseChange), { local: false });
+      }
+      this.stats.catchUps += 1;
+      return rows.length;
+    };
+
+    const result = this.chain.then(task);
+    this.chain = result.catch(() => {});
+    return result;
+  }
+
+  async get(id) {
+    await this.ready();
+    return this.tables.get(parseInt(id)) || null;
+  }
+
+  // Foto versionada del salón
+  async snapshot() {
+    await this.ready();
+    return {
+      version: this.version,
+      tables: [...this.tables.values()].sort((a, b) => a.number - b.number),
+      stats: this.occupancy()
+    };
+  }
+
+  // Estadísticas desde los contadores (O(1))
+  occupancy() {
+    const total = this.tables.size;
+    return {
+      total,
+      ...this.counts,
+      occupancyRate: total > 0
+        ? ((this.counts.occupied + this.counts.reserved) / total * 100).toFixed(1)
+        : 0
+    };
+  }
+
+  /**
+   * Cambios desde `since`, compactados por mesa (solo el último estado de
+   * cada una). Responde { version, reset: false, changes } o, si `since` ya
+   * no está en el log o son demasiados cambios, la foto con reset: true.
+   */
+  async changesSince(since) {
+    await this.ready();
+    const from = parseInt(since);
+
+    if (Number.isNaN(from) || from > this.version) {
+      return this.resetResponse();
+    }
+    if (from === this.version) {
+      this.stats.deltas += 1;
+      return { version: this.version, reset: false, changes: [] };
+    }
+
+    const rows = await sequelize.query(
+      'SELECT id, tableId, data FROM table_changes WHERE id > ? AND id <= ? ORDER BY id LIMIT ?',
+      { replacements: [from, this.version, MAX_DELTA + 1], type: QueryTypes.SELECT }
+    );
+    if (rows.length === 0 || rows.length > MAX_DELTA || rows[0].id !== from + 1) {
+      return this.resetResponse();
+    }
+
+    const latest = new Map();
+    for (const row of rows) {
+      latest.set(row.tableId, parseChange(row));
+    }
+
+    this.stats.deltas += 1;
+    return {
+      version: rows[rows.length - 1].id,
+      reset: false,
+      changes: [...latest.values()]
+    };
+  }
+
+  async resetResponse() {
+    this.stats.resets += 1;
+    return { ...(await this.snapshot()), reset: true };
+  }
+
+  // Registra el nuevo estado de una mesa en el log; devuelve la versión
+  async log(table, transaction) {
+    await sequelize.query(
+      'INSERT INTO table_changes (tableId, data, createdAt) VALUES (?, ?, ?)',
+      { replacements: [table.id, JSON.stringify(table), table.updatedAt], transaction }
+    );
+    const [{ id }] = await sequelize.query('SELECT last_insert_rowid() AS id', { type: QueryTypes.SELECT, transaction });
+
+    // Recorte periódico del log (se conservan las últimas KEEP_CHANGES)
+    if (id % 500 === 0) {
+      await sequelize.query('DELETE FROM table_changes WHERE id <= ?', { replacements: [id - KEEP_CHANGES], transaction });
+    }
+    return id;
+  }
+
+  // Aplica en memoria y avisa al confirmar la transacción. Si antes hubo
+  // cambios de otro proceso que aún no se leen, se leen del log (incluido
+  // este) para no saltarse ninguna versión.
+  afterCommit(transaction, change) {
+    transaction.afterCommit(() => {
+      if (change.version === this.version + 1) {
+        this.apply([change], { local: true });
+      } else {
+        this.emit('change', change);
+        this.catchUp().catch(error => console.error('Error actualizando mesas desde el log:', error));
+      }
+      ipc.send('tables:changed', { version: change.version });
+    });
+  }
+
+  // Ejecuta `fn` en la transacción dada o en una propia
+  withTransaction(transaction, fn) {
+    return transaction ? fn(transaction) : sequelize.transaction(fn);
+  }
+
+  /**
+   * Cambia el estado de una mesa.
+   * - force: omite la validación de transiciones (venta en una mesa, admin)
+   * - transaction: la del llamador; el cambio se ve al confirmarla
+   * - meta: datos extra para el evento (customerName, customerCount...)
+   * Resuelve con { table, changed }.
+   */
+  async transition(id, status, { force = false, transaction = null, meta = {} } = {}) {
+    await this.ready();
+
+    if (!STATUSES.includes(status)) {
+      throw new TableStateError('Estado de mesa inválido', 400);
+    }
+
+    const current = this.tables.get(parseInt(id));
+    if (!current) {
+      throw new TableStateError('Mesa no encontrada', 404);
+    }
+    if (current.status === status) {
+      return { table: current, changed: false };
+    }
+    if (!force && !TRANSITIONS[current.status].includes(status)) {
+      this.stats.rejected += 1;
+      throw new TableStateError(
+        `La mesa ${current.number} está ${STATUS_LABELS[current.status]} y no puede pasar a ${STATUS_LABELS[status]}`
+      );
+    }
+
+    const next = await this.withTransaction(transaction, async (t) => {
+      // El estado anterior como guarda: si otro proceso ya la cambió, no se
+      // pisa (con force, como en una venta, basta con que la mesa exista)
+      const where = force
+        ? { id: current.id, isActive: true }
+        : { id: current.id, status: current.status, isActive: true };
+      const [affected] = await Table.update({ status }, { where, transaction: t });
+      if (affected === 0) {
+        this.stats.conflicts += 1;
+        this.catchUp().catch(error => console.error('Error actualizando mesas desde el log:', error));
+        throw new TableStateError(`La mesa ${current.number} cambió en otro dispositivo; intenta de nuevo`);
+      }
+
+      const table = { ...current, status, updatedAt: new Date().toISOString() };
+      table.version = await this.log(table, t);
+      this.afterCommit(t, { version: table.version, table, meta });
+      return table;
+    });
+
+    this.stats.transitions += 1;
+    return { table: next, changed: true };
+  }
+
+  /**
+   * Registra un alta, edición o baja de mesa hecha con el modelo (rutas de
+   * administración) para que llegue a la foto y a los deltas.
+   */
+  async record(row, { transaction = null } = {}) {
+    await this.ready();
+
+    return this.withTransaction(transaction, async (t) => {
+      const table = row.isActive === false
+        ? { id: row.id, removed: true, updatedAt: new Date().toISOString() }
+        : toState(row);
+      table.version = await this.log(table, t);
+      this.afterCommit(t, { version: table.version, table, meta: {} });
+      return table;
+    });
+  }
+}
+
+const tableState = new TableStateEngine();
+
+module.exports = {
+  STATUSES,
+  TRANSITIONS,
+  TableStateError,
+  TableStateEngine,
+  tableState
+};
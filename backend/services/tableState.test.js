@@ -0,0 +1,214 @@
+// backend/services/tableState.test.js
+// Motor de mesas: reglas de transición, guarda contra cambios de otro
+// proceso, visibilidad al confirmar y deltas por versión (changesSince).
+const { QueryTypes } = require('sequelize');
+const { useTempDatabase } = require('../scripts/bench/stats');
+
+const tempDb = useTempDatabase('pos-test-tables');
+
+const { initDatabase, sequelize, Table } = require('../database/init');
+const { TableStateEngine, TableStateError } = require('./tableState');
+
+let tables;
+let engine;
+
+beforeAll(async () => {
+  await initDatabase();
+  tables = await Table.bulkCreate([
+    { number: 901, capacity: 2, location: 'Terraza' },
+    { number: 902, capacity: 4, location: 'Terraza' },
+    { number: 903, capacity: 6, location: 'Salón' }
+  ]);
+});
+
+// Cada prueba parte de las mesas disponibles y un motor recién cargado
+beforeEach(async () => {
+  await Table.update({ status: 'available', isActive: true }, { where: { id: tables.map(table => table.id) } });
+  engine = new TableStateEngine();
+  await engine.ready();
+});
+
+afterAll(async () => {
+  await sequelize.close();
+  tempDb.cleanup();
+});
+
+const statusInDb = async (id) => (await Table.findByPk(id, { raw: true })).status;
+
+describe('transition', () => {
+  test('una transición permitida se guarda, sube la versión y avisa', async () => {
+    const [table] = tables;
+    const before = engine.version;
+    const events = [];
+    engine.on('change', change => events.push(change));
+
+    const { table: next, changed } = await engine.transition(table.id, 'occupied', { meta: { customerCount: 2 } });
+
+    expect(changed).toBe(true);
+    expect(next).toMatchObject({ id: table.id, status: 'occupied', version: before + 1 });
+    expect(engine.version).toBe(before + 1);
+    expect((await engine.get(table.id)).status).toBe('occupied');
+    expect(await statusInDb(table.id)).toBe('occupied');
+    expect(events).toEqual([{ version: before + 1, table: next, meta: { customerCount: 2 } }]);
+  });
+
+  test('los contadores de ocupación siguen cada cambio', async () => {
+    const initial = engine.occupancy();
+
+    await engine.transition(tables[0].id, 'occupied');
+    await engine.transition(tables[1].id, 'reserved');
+
+    const stats = engine.occupancy();
+    expect(stats.available).toBe(initial.available - 2);
+    expect(stats.occupied).toBe(initial.occupied + 1);
+    expect(stats.reserved).toBe(initial.reserved + 1);
+    expect(stats.total).toBe(initial.total);
+  });
+
+  test('el mismo estado no escribe ni cambia la versión', async () => {
+    const before = engine.version;
+    const { changed } = await engine.transition(tables[0].id, 'available');
+
+    expect(changed).toBe(false);
+    expect(engine.version).toBe(before);
+  });
+
+  test('una transición no permitida se rechaza con 409 salvo con force', async () => {
+    const [table] = tables;
+    await engine.transition(table.id, 'cleaning');
+
+    const attempt = engine.transition(table.id, 'occupied');
+    await expect(attempt).rejects.toThrow(TableStateError);
+    await expect(attempt).rejects.toMatchObject({ status: 409 });
+    expect(engine.stats.rejected).toBe(1);
+    expect(await statusInDb(table.id)).toBe('cleaning');
+
+    const { changed } = await engine.transition(table.id, 'occupied', { force: true });
+    expect(changed).toBe(true);
+    expect(await statusInDb(table.id)).toBe('occupied');
+  });
+
+  test('estado inválido es 400 y mesa inexistente es 404', async () => {
+    await expect(engine.transition(tables[0].id, 'dirty')).rejects.toMatchObject({ status: 400 });
+    await expect(engine.transition(999999, 'occupied')).rejects.toMatchObject({ status: 404 });
+  });
+
+  test('no pisa un cambio hecho por otro proceso', async () => {
+    const [table] = tables;
+    await Table.update({ status: 'reserved' }, { where: { id: table.id } });
+
+    await expect(engine.transition(table.id, 'cleaning')).rejects.toMatchObject({ status: 409 });
+    expect(engine.stats.conflicts).toBe(1);
+    expect(await statusInDb(table.id)).toBe('reserved');
+  });
+
+  test('un cambio dentro de una transacción revertida nunca se ve', async () => {
+    const [table] = tables;
+    const before = engine.version;
+
+    await expect(sequelize.transaction(async (transaction) => {
+      await engine.transition(table.id, 'occupied', { force: true, transaction });
+      throw new Error('venta revertida');
+    })).rejects.toThrow('venta revertida');
+
+    expect(engine.version).toBe(before);
+    expect((await engine.get(table.id)).status).toBe('available');
+    expect(await statusInDb(table.id)).toBe('available');
+  });
+
+  test('otro proceso alcanza la versión leyendo el log', async () => {
+    const other = new TableStateEngine();
+    await other.ready();
+
+    await engine.transition(tables[2].id, 'reserved');
+    expect(await other.catchUp()).toBe(1);
+
+    expect(other.version).toBe(engine.version);
+    expect((await other.get(tables[2].id)).status).toBe('reserved');
+  });
+});
+
+describe('changesSince', () => {
+  test('sin cambios desde la versión del cliente responde vacío', async () => {
+    expect(await engine.changesSince(engine.version)).toEqual({ version: engine.version, reset: false, changes: [] });
+  });
+
+  test('compacta varios cambios de una mesa en su último estado', async () => {
+    const since = engine.version;
+    await engine.transition(tables[0].id, 'occupied');
+    await engine.transition(tables[0].id, 'cleaning');
+    await engine.transition(tables[0].id, 'available');
+    await engine.transition(tables[1].id, 'reserved');
+
+    const delta = await engine.changesSince(since);
+
+    expect(delta.reset).toBe(false);
+    expect(delta.version).toBe(engine.version);
+    expect(delta.changes).toHaveLength(2);
+    expect(delta.changes.find(change => change.table.id === tables[0].id)).toMatchObject({
+      version: since + 3,
+      table: { status: 'available', version: since + 3 }
+    });
+    expect(delta.changes.find(change => change.table.id === tables[1].id).table.status).toBe('reserved');
+  });
+
+  test('una versión inválida o adelantada responde la foto completa', async () => {
+    for (const since of [undefined, 'abc', engine.version + 1]) {
+      const response = await engine.changesSince(since);
+      expect(response.reset).toBe(true);
+      expect(response.version).toBe(engine.version);
+      expect(response.tables.map(table => table.id)).toEqual(expect.arrayContaining(tables.map(table => table.id)));
+    }
+  });
+
+  test('si el log ya se recortó más allá de la versión responde la foto', async () => {
+    const since = engine.version;
+    await engine.transition(tables[0].id, 'occupied');
+    await engine.transition(tables[1].id, 'occupied');
+
+    await sequelize.query('DELETE FROM table_changes WHERE id <= ?', { replacements: [since + 1] });
+
+    const response = await engine.changesSince(since);
+    expect(response.reset).toBe(true);
+    expect(response.tables.find(table => table.id === tables[1].id).status).toBe('occupied');
+    expect(engine.stats.resets).toBe(1);
+
+    // Desde una versión que sigue en el log, el delta funciona
+    expect((await engine.changesSince(since + 1)).reset).toBe(false);
+  });
+
+  test('más de MAX_DELTA cambios responde la foto', async () => {
+    const since = engine.version;
+    const table = await engine.get(tables[2].id);
+
+    // 501 cambios escritos por "otro proceso" directamente en el log
+    await sequelize.query(
+      `WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 501)
+       INSERT INTO table_changes (tableId, data, createdAt) SELECT ?, ?, ? FROM n`,
+      { replacements: [table.id, JSON.stringify({ ...table, status: 'cleaning' }), new Date().toISOString()] }
+    );
+    expect(await engine.catchUp()).toBe(501);
+
+    const response = await engine.changesSince(since);
+    expect(response.reset).toBe(true);
+    expect(response.version).toBe(since + 501);
+
+    const [{ version }] = await sequelize.query('SELECT MAX(id) AS version FROM table_changes', { type: QueryTypes.SELECT });
+    expect((await engine.changesSince(version - 500)).reset).toBe(false);
+  });
+
+  test('una baja llega como cambio y sale de la foto', async () => {
+    const since = engine.version;
+    const row = await Table.findByPk(tables[2].id);
+    row.isActive = false;
+    await row.save();
+    await engine.record(row);
+
+    const delta = await engine.changesSince(since);
+    expect(delta.changes).toEqual([
+      expect.objectContaining({ table: expect.objectContaining({ id: row.id, removed: true }) })
+    ]);
+    expect(await engine.get(row.id)).toBeNull();
+    expect((await engine.snapshot()).tables.some(table => table.id === row.id)).toBe(false);
+  });
+});
@@ -0,0 +1,68 @@
+// backend/services/tokenCache.js
+// Caché de tokens JWT ya verificados.
+//
+// Cada petición de cada tablet verificaba su token (base64 + JSON + HMAC).
+// Aquí se recuerda el resultado por token durante su vigencia:
+// - la clave es el hash SHA-256 del token (no se guardan tokens en memoria);
+// - cada entrada vence con el `exp` del token o a los JWT_CACHE_TTL_MS, lo
+//   que ocurra primero;
+// - LRU de JWT_CACHE_SIZE entradas (0 desactiva la caché);
+// - solo se guardan verificaciones exitosas.
+const crypto = require('crypto');
+const jwt = require('jsonwebtoken');
+
+const CACHE_SIZE = parseInt(process.env.JWT_CACHE_SIZE || '1000');
+const CACHE_TTL_MS = parseInt(process.env.JWT_CACHE_TTL_MS || '300000');
+
+class TokenCache {
+  constructor({ size = CACHE_SIZE, ttlMs = CACHE_TTL_MS } = {}) {
+    this.size = size;
+    this.ttlMs = ttlMs;
+    this.entries = new Map();
+    this.stats = { hits: 0, misses: 0, evictions: 0 };
+  }
+
+  /**
+   * Devuelve el payload del token (copia) o lanza el error de jwt.verify.
+   */
+  verify(token) {
+    if (this.size <= 0) {
+      return jwt.verify(token, process.env.JWT_SECRET);
+    }
+
+    const key = crypto.createHash('sha256').update(token).digest('base64');
+    const now = Date.now();
+    const cached = this.entries.get(key);
+
+    if (cached && cached.expiresAt > now) {
+      // Reinsertar la mueve al final (más reciente)
+      this.entries.delete(key);
+      this.entries.set(key, cached);
+      this.stats.hits += 1;
+      return { ...cached.user };
+    }
+    if (cached) this.entries.delete(key);
+
+    this.stats.misses += 1;
+    const user = jwt.verify(token, process.env.JWT_SECRET);
+    const expiresAt = Math.min(user.exp ? user.exp * 1000 : Infinity, now + this.ttlMs);
+
+    this.entries.set(key, { user, expiresAt });
+    if (this.entries.size > this.size) {
+      this.entries.delete(this.entries.keys().next().value);
+      this.stats.evictions += 1;
+    }
+    return { ...user };
+  }
+
+  clear() {
+    this.entries.clear();
+  }
+}
+
+const tokenCache = new TokenCache();
+
+module.exports = {
+  TokenCache,
+  tokenCache
+};
@@ -0,0 +1,91 @@
+"""CLI del motor de codemods.
+
+    cd frontend
+    python -m codemod --list
+    python -m codemod --dry-run --diff
+    python -m codemod --rules sidebar-state,sidebar-props --report reporte.json
+    python -m codemod.bench
+
+Código de salida: 0 si todas las reglas se aplicaron o ya estaban aplicadas,
+1 si alguna no encontró su ancla o chocó con otra regla.
+"""
+import argparse
+import json
+import os
+import sys
+
+from .engine import run, select_rules
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m codemod', description='Aplica las reglas de codemod al frontend')
+    parser.add_argument('--root', default=DEFAULT_ROOT, help='raíz de los archivos (por defecto frontend/src)')
+    parser.add_argument('--rules', help='reglas a aplicar, separadas por comas (por defecto todas)')
+    parser.add_argument('--jobs', type=int, default=None, help='procesos en paralelo (por defecto uno por CPU, desde 8 archivos)')
+    parser.add_argument('--dry-run', action='store_true', help='no escribir los archivos')
+    parser.add_argument('--diff', action='store_true', help='mostrar el diff unificado de cada archivo')
+    parser.add_argument('--report', help="escribir el reporte JSON en este archivo ('-' para stdout)")
+    parser.add_argument('--list', action='store_true', help='listar las reglas registradas')
+    return parser.parse_args(argv)
+
+
+def print_summary(report):
+    for result in report['files']:
+        status = 'modificado' if result['changed'] else 'sin cambios'
+        print(f"{result['file']} ({status}, {result['elapsed_ms']} ms)")
+        for item in result['applied']:
+            print(f"  ✓ {item['rule']}: {item['edits']} edición(es), líneas {', '.join(map(str, item['lines']))}")
+        for item in result['done']:
+            print(f"  = {item['rule']}: {item['reason']}")
+        for item in result['missed']:
+            print(f"  ✗ {item['rule']}: {item['reason']}")
+        for item in result['conflicts']:
+            print(f"  ⚠ {item['rule']}: choca con {item['with']} en la línea {item['line']}")
+    for item in report['unmatched']:
+        print(f"✗ {item['rule']}: {item['reason']}")
+
+    summary = report['summary']
+    mode = ' (dry-run)' if report['dry_run'] else ''
+    print(f"\n{summary['applied']} aplicadas, {summary['done']} ya aplicadas, {summary['missed']} sin ancla, "
+          f"{summary['conflicts']} en conflicto; {summary['changed']}/{summary['files']} archivos "
+          f"modificados en {summary['elapsed_ms']} ms{mode}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = [name.strip() for name in args.rules.split(',')] if args.rules else None
+
+    try:
+        rules = select_rules(names)
+    except KeyError as error:
+        print(f'❌ {error.args[0]}', file=sys.stderr)
+        return 2
+
+    if args.list:
+        for current in rules:
+            print(f"{current.name:22} {', '.join(current.files):32} {current.description}")
+        return 0
+
+    report = run(args.root, names, jobs=args.jobs, dry_run=args.dry_run, with_diff=args.diff)
+
+    if args.report == '-':
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        if args.diff:
+            for result in report['files']:
+                if result.get('diff'):
+                    sys.stdout.write(result['diff'])
+        print_summary(report)
+        if args.report:
+            with open(args.report, 'w', encoding='utf-8') as handle:
+                json.dump(report, handle, ensure_ascii=False, indent=2)
+
+    summary = report['summary']
+    return 1 if summary['missed'] or summary['conflicts'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
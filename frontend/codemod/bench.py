@@ -0,0 +1,97 @@
+"""Tiempo del motor contra los scripts de parcheo secuenciales (codemod/legacy/).
+
+    cd frontend
+    python -m codemod.bench            # 5 repeticiones
+    python -m codemod.bench --runs 20
+
+Cada repetición trabaja sobre una copia nueva de App.js y UnifiedPOSView.js:
+- legacy: los 10 scripts, uno tras otro, cada uno en su propio proceso y
+  releyendo/reescribiendo el archivo completo (como se corrían a mano)
+- motor (CLI): `python -m codemod` en un solo proceso
+- motor (en proceso): engine.run() sin contar el arranque del intérprete
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from .engine import run
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FRONTEND = os.path.dirname(HERE)
+SRC = os.path.join(FRONTEND, 'src')
+LEGACY = os.path.join(HERE, 'legacy')
+
+FILES = ['App.js', 'components/UnifiedPOSView.js']
+# (script, directorio en el que se ejecutaba)
+LEGACY_SCRIPTS = [
+    ('replace_sidebar.py', '.'),
+    ('fix_sidebar.py', '.'),
+    ('fix_sidebar_correct.py', '.'),
+    ('add_sidebar_overlay.py', '.'),
+    ('add_sidebar_state.py', '.'),
+    ('add_state_and_props.py', '.'),
+    ('add_hamburger_button.py', '.'),
+    ('fix_header_correct.py', '.'),
+    ('fix_responsive.py', 'components'),
+    ('apply_tailwind.py', 'components'),
+]
+
+
+def make_tree(base):
+    root = tempfile.mkdtemp(prefix='codemod-bench-', dir=base)
+    for relpath in FILES:
+        target = os.path.join(root, relpath)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(os.path.join(SRC, relpath), target)
+    return root
+
+
+def time_legacy(root):
+    started = time.perf_counter()
+    for script, cwd in LEGACY_SCRIPTS:
+        subprocess.run([sys.executable, os.path.join(LEGACY, script)], cwd=os.path.join(root, cwd),
+                       check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def time_cli(root):
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-m', 'codemod', '--root', root], cwd=FRONTEND, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def time_in_process(root):
+    started = time.perf_counter()
+    run(root, jobs=1)
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m codemod.bench')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    measures = {'legacy (10 scripts)': time_legacy, 'motor (CLI)': time_cli, 'motor (en proceso)': time_in_process}
+    results = {name: [] for name in measures}
+    base = tempfile.mkdtemp(prefix='codemod-bench-')
+    try:
+        for _ in range(args.runs):
+            for name, measure in measures.items():
+                results[name].append(measure(make_tree(base)) * 1000)
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+    baseline = statistics.median(results['legacy (10 scripts)'])
+    print(f'{"":22} {"mediana ms":>11} {"mín ms":>8} {"vs legacy":>10}')
+    for name, times in results.items():
+        median = statistics.median(times)
+        print(f'{name:22} {median:11.1f} {min(times):8.1f} {baseline / median:9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""Motor de codemods: registro de reglas y aplicación en una sola pasada.
+
+Cada regla se registra con un nombre y los archivos (globs relativos a la
+raíz, normalmente frontend/src) a los que aplica. Por archivo:
+1. se lee y se indexa una sola vez (tokens, declaraciones, etiquetas JSX)
+2. cada regla recibe el mismo índice y devuelve sus ediciones sobre el texto
+   original, o lanza Miss (no encontró su ancla) o Done (ya estaba aplicada)
+3. las ediciones de todas las reglas se aplican juntas; si dos reglas tocan
+   el mismo tramo, la segunda se reporta como conflicto y no se aplica
+
+Los archivos se procesan en paralelo con un pool de procesos cuando son
+PARALLEL_MIN_FILES o más (o si se pide --jobs explícitamente).
+"""
+import difflib
+import fnmatch
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from .index import Edit, FileIndex
+
+# Con pocos archivos arrancar el pool cuesta más que procesarlos en serie
+PARALLEL_MIN_FILES = 8
+
+
+class Miss(Exception):
+    """La regla no encontró la estructura que debe modificar."""
+
+
+class Done(Exception):
+    """La regla ya está aplicada en el archivo."""
+
+
+@dataclass
+class Rule:
+    name: str
+    files: tuple
+    func: object
+    description: str = ''
+
+    def matches(self, relpath):
+        return any(fnmatch.fnmatch(relpath, pattern) for pattern in self.files)
+
+
+RULES = {}
+
+
+def rule(name, files, description=''):
+    """Decorador: registra `func(index) -> [Edit]` como regla `name`."""
+    def register(func):
+        if name in RULES:
+            raise ValueError(f'Regla duplicada: {name}')
+        RULES[name] = Rule(name, tuple(files), func, description or (func.__doc__ or '').strip().split('\n')[0])
+        return func
+    return register
+
+
+def load_rules():
+    # Importar el paquete registra todas las reglas
+    from . import rules  # noqa: F401
+    return RULES
+
+
+def select_rules(names=None):
+    registry = load_rules()
+    if not names:
+        return list(registry.values())
+    unknown = [name for name in names if name not in registry]
+    if unknown:
+        raise KeyError(f"Reglas desconocidas: {', '.join(unknown)}")
+    return [registry[name] for name in registry if name in names]
+
+
+# ----- aplicación de ediciones ----------------------------------------------
+
+def _overlaps(a, b):
+    # Las inserciones en el borde de un tramo (o en el mismo punto) no chocan
+    return a.start < b.end and b.start < a.end
+
+
+def apply_edits(text, edits):
+    """Aplica ediciones no solapadas sobre el texto original (en una pasada)."""
+    ordered = sorted(enumerate(edits), key=lambda item: (item[1].start, item[1].end, item[0]))
+    parts = []
+    cursor = 0
+    for _, edit in ordered:
+        parts.append(text[cursor:edit.start])
+        parts.append(edit.text)
+        cursor = max(cursor, edit.end)
+    parts.append(text[cursor:])
+    return ''.join(parts)
+
+
+def run_rules(index, rules):
+    """Ejecuta las reglas sobre un índice; devuelve (texto nuevo, resultado)."""
+    accepted = []
+    result = {'applied': [], 'done': [], 'missed': [], 'conflicts': []}
+
+    for current in rules:
+        try:
+            edits = current.func(index) or []
+        except Miss as miss:
+            result['missed'].append({'rule': current.name, 'reason': str(miss)})
+            continue
+        except Done as done:
+            result['done'].append({'rule': current.name, 'reason': str(done)})
+            continue
+
+        if not edits:
+            result['done'].append({'rule': current.name, 'reason': 'sin cambios'})
+            continue
+
+        clash = next(((edit, other) for edit in edits for other in accepted if _overlaps(edit, other)), None)
+        if clash:
+            edit, other = clash
+            result['conflicts'].append({
+                'rule': current.name,
+                'with': other.rule,
+                'line': index.text.count('\n', 0, edit.start) + 1
+            })
+            continue
+
+        for edit in edits:
+            edit.rule = current.name
+        accepted.extend(edits)
+        result['applied'].append({
+            'rule': current.name,
+            'edits': len(edits),
+            'lines': sorted({index.text.count('\n', 0, edit.start) + 1 for edit in edits})
+        })
+
+    return apply_edits(index.text, accepted), result
+
+
+def process_file(root, relpath, rule_names, dry_run=False, with_diff=False):
+    """Unidad de trabajo de cada proceso: leer, indexar, aplicar, escribir."""
+    started = time.perf_counter()
+    rules = select_rules(rule_names)
+    path = os.path.join(root, relpath)
+    with open(path, encoding='utf-8') as handle:
+        text = handle.read()
+
+    index = FileIndex(relpath, text)
+    new_text, result = run_rules(index, rules)
+    changed = new_text != text
+
+    if changed and not dry_run:
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(new_text)
+
+    result.update({
+        'file': relpath,
+        'changed': changed,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+    })
+    if with_diff and changed:
+        result['diff'] = ''.join(difflib.unified_diff(
+            text.splitlines(keepends=True), new_text.splitlines(keepends=True),
+            fromfile=f'a/{relpath}', tofile=f'b/{relpath}'
+        ))
+    return result
+
+
+def plan(root, rules):
+    """{archivo relativo: [nombres de regla]} para los archivos existentes."""
+    targets = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in ('node_modules', 'build', '.git')]
+        for filename in filenames:
+            relpath = os.path.relpath(os.path.join(dirpath, filename), root).replace(os.sep, '/')
+            names = [current.name for current in rules if current.matches(relpath)]
+            if names:
+                targets[relpath] = names
+    return dict(sorted(targets.items()))
+
+
+def run(root, rule_names=None, jobs=None, dry_run=False, with_diff=False):
+    """Aplica las reglas seleccionadas a todo el árbol; devuelve el reporte."""
+    started = time.perf_counter()
+    rules = select_rules(rule_names)
+    targets = plan(root, rules)
+
+    # Reglas cuyo archivo no existe en el árbol
+    matched = {name for names in targets.values() for name in names}
+    unmatched = [{'rule': current.name, 'reason': f"ningún archivo coincide con {', '.join(current.files)}"}
+                 for current in rules if current.name not in matched]
+
+    args = [(root, relpath, names, dry_run, with_diff) for relpath, names in targets.items()]
+    if jobs is None:
+        jobs = (os.cpu_count() or 1) if len(args) >= PARALLEL_MIN_FILES else 1
+    if jobs > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(args))) as pool:
+            files = list(pool.map(process_file, *zip(*args)))
+    else:
+        files = [process_file(*arg) for arg in args]
+
+    summary = {
+        'files': len(files),
+        'changed': sum(1 for f in files if f['changed']),
+        'applied': sum(len(f['applied']) for f in files),
+        'done': sum(len(f['done']) for f in files),
+        'missed': sum(len(f['missed']) for f in files) + len(unmatched),
+        'conflicts': sum(len(f['conflicts']) for f in files),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
+    return {
+        'root': os.path.abspath(root),
+        'dry_run': dry_run,
+        'rules': [current.name for current in rules],
+        'files': files,
+        'unmatched': unmatched,
+        'summary': summary
+    }
@@ -0,0 +1,363 @@
+"""Índice estructural de un archivo JS/JSX, construido una vez por archivo.
+
+A partir de los tokens calcula:
+- pares de paréntesis, corchetes y llaves (y la profundidad de cada token)
+- declaraciones `const|let|var|function Nombre` con su extensión completa
+- etiquetas JSX de apertura, con sus atributos, su clase y el elemento que
+  abren (hasta su etiqueta de cierre)
+
+Las reglas localizan lo que editan con este índice (por nombre de
+componente, etiqueta o clase CSS) en lugar de buscar bloques de texto
+exactos, y devuelven ediciones sobre posiciones del texto original.
+"""
+from dataclasses import dataclass, field
+
+from .tokens import tokenize
+
+OPEN = {'(': ')', '[': ']', '{': '}'}
+CLOSE = {v: k for k, v in OPEN.items()}
+STATEMENT_KEYWORDS = {'const', 'let', 'var', 'function', 'export', 'import', 'class'}
+# Después de estos tokens un '<' abre JSX (y no es una comparación)
+JSX_PRECEDERS = {'(', ',', '=', '?', ':', '&&', '||', '??', '{', '}', '>', '[', '=>', 'return', '/>'}
+
+
+@dataclass
+class Edit:
+    """Reemplazo de text[start:end] por `text`; start == end es una inserción."""
+    start: int
+    end: int
+    text: str
+    rule: str = ''
+
+
+@dataclass
+class Declaration:
+    name: str
+    start: int          # incluye los comentarios pegados que la preceden
+    code_start: int     # primer token de la declaración
+    end: int
+    params: list = field(default_factory=list)
+    params_close: int = None  # posición de la '}' del destructuring de props
+
+
+@dataclass
+class ClassAttr:
+    """Valor de className: string literal o template literal."""
+    token_index: int
+    start: int
+    end: int
+    quote: str  # '"', "'" o '`'
+
+    def static_segments(self, text):
+        """(inicio, fin) de cada tramo estático del valor (fuera de ${ ... })."""
+        body_start, body_end = self.start + 1, self.end - 1
+        if self.quote != '`':
+            return [(body_start, body_end)]
+        segments = []
+        i = seg_start = body_start
+        while i < body_end:
+            if text[i] == '\\':
+                i += 2
+                continue
+            if text.startswith('${', i):
+                segments.append((seg_start, i))
+                depth = 1
+                i += 2
+                while i < body_end and depth:
+                    depth += {'{': 1, '}': -1}.get(text[i], 0)
+                    i += 1
+                seg_start = i
+                continue
+            i += 1
+        segments.append((seg_start, body_end))
+        return segments
+
+    def classes(self, text):
+        names = []
+        for start, end in self.static_segments(text):
+            names.extend(text[start:end].split())
+        return names
+
+
+@dataclass
+class JsxTag:
+    name: str
+    start: int          # posición de '<'
+    attrs_end: int      # posición de '>' o '/>'
+    end: int            # fin de la etiqueta de apertura
+    self_closing: bool
+    attributes: dict    # nombre → índice del token del nombre
+    class_attr: ClassAttr = None
+    element_end: int = None  # fin del elemento completo (cierre incluido)
+    classes: tuple = ()      # clases de los tramos estáticos de className
+
+
+class FileIndex:
+    def __init__(self, path, text):
+        self.path = path
+        self.text = text
+        self.tokens = tokenize(text)
+        self.code = [i for i, token in enumerate(self.tokens) if token.kind != 'comment']
+        self.match = {}
+        self.depth = {}
+        self._pair_brackets()
+        self.declarations = self._find_declarations()
+        self.tags = self._find_tags()
+
+    # ----- utilidades ---------------------------------------------------
+
+    def token(self, code_position):
+        return self.tokens[self.code[code_position]]
+
+    def line_start(self, pos):
+        return self.text.rfind('\n', 0, pos) + 1
+
+    def indentation(self, pos):
+        start = self.line_start(pos)
+        line = self.text[start:pos]
+        return line[:len(line) - len(line.lstrip())]
+
+    def _pair_brackets(self):
+        stack = []
+        for n, token_index in enumerate(self.code):
+            token = self.tokens[token_index]
+            self.depth[n] = len(stack)
+            if token.kind != 'punct':
+                continue
+            if token.value in OPEN:
+                stack.append(n)
+            elif token.value in CLOSE and stack:
+                opened = stack.pop()
+                self.match[opened] = n
+                self.match[n] = opened
+                self.depth[n] = len(stack)
+
+    # ----- declaraciones ------------------------------------------------
+
+    def _find_declarations(self):
+        declarations = {}
+        count = len(self.code)
+        n = 0
+        while n < count:
+            token = self.token(n)
+            if (token.kind == 'ident' and token.value in ('const', 'let', 'var', 'function')
+                    and n + 1 < count and self.token(n + 1).kind == 'ident'):
+                declaration = self._declaration_at(n)
+                if declaration and declaration.name not in declarations:
+                    declarations[declaration.name] = declaration
+            n += 1
+        return declarations
+
+    def _declaration_at(self, n):
+        name = self.token(n + 1).value
+        depth = self.depth[n]
+        count = len(self.code)
+
+        # Extensión: hasta ';' o el inicio de otra sentencia a la misma
+        # profundidad; los grupos entre paréntesis o llaves se saltan enteros
+        m = n + 2
+        end_position = n + 1
+        while m < count:
+            token = self.token(m)
+            if self.depth[m] < depth:
+                break
+            if token.kind == 'punct' and token.value == ';':
+                end_position = m
+                break
+            if token.kind == 'ident' and token.value in STATEMENT_KEYWORDS and m > n + 2:
+                break
+            if token.kind == 'punct' and token.value in OPEN and m in self.match:
+                end_position = self.match[m]
+                m = self.match[m] + 1
+                # `function Nombre(...) { ... }` termina con su cuerpo
+                if self.token(n).value == 'function' and token.value == '{':
+                    break
+                continue
+            end_position = m
+            m += 1
+
+        code_start = self.token(n).start
+        declaration = Declaration(
+            name=name,
+            start=self._leading_comments_start(n),
+            code_start=code_start,
+            end=self.token(end_position).end
+        )
+        self._parse_params(n, declaration)
+        return declaration
+
+    def _leading_comments_start(self, n):
+        """Incluye los comentarios de línea pegados arriba de la declaración."""
+        token_index = self.code[n]
+        start = self.line_start(self.tokens[token_index].start)
+        k = token_index - 1
+        while k >= 0 and self.tokens[k].kind == 'comment':
+            comment = self.tokens[k]
+            between = self.text[comment.end:start]
+            if between.strip() or between.count('\n') > 1:
+                break
+            start = self.line_start(comment.start)
+            k -= 1
+        return start
+
+    def _parse_params(self, n, declaration):
+        """Props destructuradas: `const X = ({ a, b }) =>` o `function X({ a })`."""
+        count = len(self.code)
+        m = n + 2
+        if m < count and self.token(m).value == '=':
+            m += 1
+        if m < count and self.token(m).value == '(' and m + 1 < count and self.token(m + 1).value == '{':
+            close = self.match.get(m + 1)
+            if close is None:
+                return
+            params = []
+            for k in range(m + 2, close):
+                token = self.token(k)
+                if token.kind == 'ident' and self.depth[k] == self.depth[m + 1] + 1:
+                    previous = self.token(k - 1).value
+                    if previous in ('{', ',', '...'):
+                        params.append(token.value)
+            declaration.params = params
+            declaration.params_close = self.token(close).start
+
+    def declaration(self, name):
+        return self.declarations.get(name)
+
+    def body_return(self, declaration):
+        """Posición del `return` del cuerpo de un componente (no de callbacks internos)."""
+        base = None
+        for n, token_index in enumerate(self.code):
+            token = self.tokens[token_index]
+            if token.start < declaration.code_start:
+                continue
+            if token.start >= declaration.end:
+                break
+            if base is None:
+                base = self.depth[n]
+            elif token.value == 'return' and token.kind == 'ident' and self.depth[n] == base + 1:
+                return token.start
+        return None
+
+    def statement_declaring(self, name, within=None):
+        """(inicio, fin) de `const [name, ...] = ...;` o `const name = ...;`."""
+        lo, hi = (within.code_start, within.end) if within else (0, len(self.text))
+        for n in range(len(self.code) - 1):
+            token = self.token(n)
+            if token.value not in ('const', 'let', 'var') or not lo <= token.start < hi:
+                continue
+            following = self.token(n + 1)
+            names = []
+            if following.value in ('[', '{') and (n + 1) in self.match:
+                names = [self.token(k).value for k in range(n + 2, self.match[n + 1])
+                         if self.token(k).kind == 'ident']
+            elif following.kind == 'ident':
+                names = [following.value]
+            if name in names:
+                m = n + 1
+                while m < len(self.code) and self.token(m).value != ';':
+                    m = self.match[m] + 1 if m in self.match and self.token(m).value in OPEN else m + 1
+                return token.start, self.token(min(m, len(self.code) - 1)).end
+        return None
+
+    # ----- JSX ----------------------------------------------------------
+
+    def _find_tags(self):
+        tags = []
+        open_stack = []
+        count = len(self.code)
+        n = 0
+        while n < count:
+            token = self.token(n)
+            previous = self.token(n - 1).value if n > 0 else '('
+
+            if token.value == '</' and n + 1 < count:
+                # Cierre: </nombre> o </>
+                m = n + 1
+                closing = ''
+                while m < count and self.token(m).value != '>':
+                    closing += self.token(m).value
+                    m += 1
+                for k in range(len(open_stack) - 1, -1, -1):
+                    if open_stack[k].name == closing:
+                        open_stack[k].element_end = self.token(min(m, count - 1)).end
+                        del open_stack[k:]
+                        break
+                n = m + 1
+                continue
+
+            if token.value == '<' and previous in JSX_PRECEDERS and n + 1 < count:
+                tag = self._tag_at(n)
+                if tag:
+                    tags.append(tag)
+                    if tag.self_closing:
+                        tag.element_end = tag.end
+                    else:
+                        open_stack.append(tag)
+            n += 1
+        return tags
+
+    def _tag_at(self, n):
+        count = len(self.code)
+        m = n + 1
+        name = ''
+        # Nombre (Componente, div, Foo.Bar) o fragmento <>
+        while m < count and (self.token(m).kind == 'ident' or self.token(m).value == '.'):
+            if self.text[self.token(m - 1).end:self.token(m).start].strip() or (name and self.token(m).start != self.token(m - 1).end):
+                break
+            name += self.token(m).value
+            m += 1
+        if not name and self.token(m).value != '>':
+            return None
+
+        attributes = {}
+        class_attr = None
+        while m < count:
+            token = self.token(m)
+            if token.value in ('>', '/>'):
+                return JsxTag(
+                    name=name,
+                    start=self.token(n).start,
+                    attrs_end=token.start,
+                    end=token.end,
+                    self_closing=token.value == '/>',
+                    attributes=attributes,
+                    class_attr=class_attr,
+                    classes=tuple(class_attr.classes(self.text)) if class_attr else ()
+                )
+            if token.value == '{' and m in self.match:
+                m = self.match[m] + 1
+                continue
+            if token.kind == 'ident' and self.token(m - 1).value != '-':
+                attributes[token.value] = self.code[m]
+                if token.value == 'className' and m + 2 < count and self.token(m + 1).value == '=':
+                    value = self.token(m + 2)
+                    if value.kind == 'string':
+                        class_attr = ClassAttr(self.code[m + 2], value.start, value.end, value.value[0])
+                    elif value.value == '{' and m + 3 < count and self.token(m + 3).kind == 'template':
+                        template = self.token(m + 3)
+                        class_attr = ClassAttr(self.code[m + 3], template.start, template.end, '`')
+            elif token.kind not in ('ident', 'string', 'number') and token.value not in ('=', '-', '.', ':'):
+                return None  # no era una etiqueta (p. ej. una comparación)
+            m += 1
+        return None
+
+    def tags_named(self, name, within=None):
+        return [tag for tag in self.tags if tag.name == name and self.inside(tag, within)]
+
+    def tags_with_classes(self, classes, within=None):
+        wanted = set(classes)
+        return [tag for tag in self.tags
+                if wanted.issubset(tag.classes) and self.inside(tag, within)]
+
+    def tag_classes(self, tag):
+        return list(tag.classes)
+
+    @staticmethod
+    def inside(tag, within):
+        if within is None:
+            return True
+        start, end = within
+        return start <= tag.start < end
+
+    def element_span(self, tag):
+        return tag.start, tag.element_end or tag.end
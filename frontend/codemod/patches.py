@@ -0,0 +1,123 @@
+"""Ediciones de uso común para las reglas: clases de Tailwind, props y JSX."""
+import re
+from dataclasses import dataclass
+
+from .engine import Done, Miss
+from .index import Edit
+
+
+@dataclass(frozen=True)
+class ClassPatch:
+    """Reemplaza la secuencia de clases `old` por `new` en los elementos ancla.
+
+    Ancla: etiquetas con la clase `marker` (si se da), dentro del elemento con
+    la clase `within`; con `exact`, el resto de sus clases debe ser
+    exactamente `old` (o `new`, si ya se aplicó). Un elemento que ya tiene
+    todas las clases de `new` cuenta como aplicado.
+    """
+    old: str
+    new: str
+    marker: str = None
+    within: str = None
+    tag: str = None
+    exact: bool = False
+    expect: int = None  # número de elementos esperados (None = al menos uno)
+
+    def describe(self):
+        anchor = self.marker or self.within or 'className'
+        return f'{anchor}: "{self.old}"'
+
+
+def _sequence_pattern(classes):
+    words = classes.split()
+    return re.compile(r'(?<!\S)' + r'\s+'.join(re.escape(word) for word in words) + r'(?!\S)')
+
+
+def _candidates(index, patch):
+    within = None
+    if patch.within:
+        containers = index.tags_with_classes([patch.within])
+        if not containers:
+            raise Miss(f'no existe el contenedor .{patch.within}')
+        within = index.element_span(containers[0])
+
+    tags = index.tags_with_classes([patch.marker], within) if patch.marker else \
+        [tag for tag in index.tags if tag.class_attr and index.inside(tag, within)]
+    if patch.tag:
+        tags = [tag for tag in tags if tag.name == patch.tag]
+    if patch.exact:
+        wanted = ({*patch.old.split()}, {*patch.new.split()})
+        tags = [tag for tag in tags if set(index.tag_classes(tag)) - {patch.marker} in wanted]
+    return tags
+
+
+def tag_class_edit(index, tag, old, new):
+    """Edición que cambia la secuencia de clases `old` por `new` en una etiqueta."""
+    if not tag.class_attr:
+        return None
+    pattern = _sequence_pattern(old)
+    for start, end in tag.class_attr.static_segments(index.text):
+        # Sobre el tramo recortado: con search(text, pos) el lookbehind vería la comilla
+        match = pattern.search(index.text[start:end])
+        if match:
+            return Edit(start + match.start(), start + match.end(), new)
+    return None
+
+
+def class_edits(index, patches):
+    """Ediciones de un grupo de ClassPatch; Miss o Done si nada que editar."""
+    edits = []
+    for patch in patches:
+        new_classes = set(patch.new.split())
+        found = 0
+        for tag in _candidates(index, patch):
+            classes = set(index.tag_classes(tag))
+            if new_classes <= classes:
+                found += 1
+                continue
+            edit = tag_class_edit(index, tag, patch.old, patch.new)
+            if edit:
+                edits.append(edit)
+                found += 1
+        if found == 0 or patch.expect is not None and found != patch.expect:
+            raise Miss(f'{patch.describe()} encontrado en {found} elemento(s)')
+    if not edits:
+        raise Done('clases ya aplicadas')
+    return edits
+
+
+def add_params(index, declaration, names):
+    """Agrega props al destructuring `({ a, b })` de un componente."""
+    if declaration.params_close is None:
+        raise Miss(f'{declaration.name} no desestructura sus props')
+    missing = [name for name in names if name not in declaration.params]
+    if not missing:
+        return []
+    position = declaration.params_close
+    while index.text[position - 1].isspace():
+        position -= 1
+    separator = ', ' if declaration.params else ' '
+    return [Edit(position, position, separator + ', '.join(missing))]
+
+
+def add_jsx_props(index, tag, props):
+    """Agrega atributos `nombre={expresión}` que falten en una etiqueta JSX."""
+    missing = [(name, value) for name, value in props if name not in tag.attributes]
+    if not missing:
+        return []
+    position = tag.attrs_end
+    while index.text[position - 1].isspace():
+        position -= 1
+    return [Edit(position, position, ''.join(f' {name}={{{value}}}' for name, value in missing))]
+
+
+def reindent(text, spaces):
+    """Desplaza `spaces` columnas todas las líneas salvo la primera."""
+    lines = text.split('\n')
+    pad = ' ' * spaces
+    return '\n'.join([lines[0]] + [pad + line if line.strip() else line for line in lines[1:]])
+
+
+def block(lines, indent):
+    """Une líneas de código con la sangría dada (las vacías quedan vacías)."""
+    return '\n'.join(indent + line if line else '' for line in lines)
@@ -0,0 +1,6 @@
+"""Reglas registradas; importar el paquete las agrega al registro del motor.
+
+Reemplazan a los scripts de parcheo sueltos que vivían en frontend/src
+(ver codemod/legacy/).
+"""
+from . import app_shell, pos_responsive  # noqa: F401
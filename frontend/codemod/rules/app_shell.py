@@ -0,0 +1,196 @@
+"""Sidebar colapsable y botón hamburguesa en App.js.
+
+Reemplaza a fix_sidebar.py, replace_sidebar.py, fix_sidebar_correct.py,
+add_sidebar_overlay.py, add_sidebar_state.py, add_state_and_props.py,
+add_hamburger_button.py y fix_header_correct.py: los componentes se ubican
+por nombre (Sidebar, Header, MainApp) y las etiquetas por nombre y clase.
+"""
+from ..engine import Done, Miss, apply_edits, rule
+from ..index import Edit
+from ..patches import add_jsx_props, add_params, block, reindent, tag_class_edit
+
+FILES = ['App.js']
+
+SIDEBAR_CLASSES = [
+    'fixed md:static inset-y-0 left-0 z-50',
+    'w-64 bg-gray-50 border-r border-gray-200 px-4 py-6',
+    'transform transition-transform duration-300 ease-in-out',
+    "${isOpen ? 'translate-x-0' : '-translate-x-full md:translate-x-0'}"
+]
+
+HANDLE_OPTION_CLICK = [
+    'const handleOptionClick = (optionId) => {',
+    '  setCurrentView(optionId);',
+    '  // Cerrar el sidebar en móviles después de elegir',
+    '  if (window.innerWidth < 768) {',
+    '    setIsOpen(false);',
+    '  }',
+    '};',
+    ''
+]
+
+OVERLAY = [
+    '{/* Overlay para cerrar el sidebar en móviles */}',
+    '{isOpen && (',
+    '  <div',
+    '    className="fixed inset-0 bg-black bg-opacity-50 z-40 md:hidden"',
+    '    onClick={() => setIsOpen(false)}',
+    '  />',
+    ')}',
+    ''
+]
+
+CLOSE_BUTTON = [
+    '<button',
+    '  onClick={() => setIsOpen(false)}',
+    '  className="md:hidden absolute top-4 right-4 text-gray-600 hover:text-gray-800"',
+    '>',
+    '  <span className="text-2xl">✕</span>',
+    '</button>',
+    ''
+]
+
+HAMBURGER = [
+    '<button',
+    '  onClick={toggleSidebar}',
+    '  className="md:hidden text-gray-600 hover:text-gray-800 p-2 -ml-2"',
+    '>',
+    '  <svg className="w-6 h-6" fill="none" stroke="currentColor" viewBox="0 0 24 24">',
+    '    <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M4 6h16M4 12h16M4 18h16" />',
+    '  </svg>',
+    '</button>',
+    ''
+]
+
+
+def _component(index, name):
+    declaration = index.declaration(name)
+    if not declaration:
+        raise Miss(f'no existe el componente {name}')
+    return declaration
+
+
+def _first(tags, description):
+    if not tags:
+        raise Miss(f'no se encontró {description}')
+    return tags[0]
+
+
+def _relative(edits, offset):
+    return [Edit(edit.start - offset, edit.end - offset, edit.text) for edit in edits]
+
+
+@rule('sidebar-responsive', FILES)
+def sidebar_responsive(index):
+    """Sidebar fijo y deslizable en móviles, con overlay y botón de cierre."""
+    sidebar = _component(index, 'Sidebar')
+    span = (sidebar.code_start, sidebar.end)
+    aside = _first(index.tags_named('aside', span), '<aside> en Sidebar')
+    if 'md:static' in index.tag_classes(aside):
+        raise Done('el sidebar ya es responsive')
+    if not aside.class_attr or aside.class_attr.quote == '`':
+        raise Miss('className del <aside> no es un string estático')
+
+    edits = add_params(index, sidebar, ['isOpen', 'setIsOpen'])
+
+    # handleOptionClick antes del return del componente
+    return_at = index.body_return(sidebar)
+    if return_at is None:
+        raise Miss('Sidebar no tiene return')
+    indent = index.indentation(return_at)
+    if 'handleOptionClick' not in index.text[sidebar.code_start:sidebar.end]:
+        line = index.line_start(return_at)
+        edits.append(Edit(line, line, block(HANDLE_OPTION_CLICK, indent) + '\n'))
+
+    # El <aside> se reescribe completo: clases, botón de cierre, overlay y fragmento
+    start, end = index.element_span(aside)
+    inner = []
+    aside_indent = index.indentation(start)
+    class_lines = [''] + [aside_indent + '    ' + line for line in SIDEBAR_CLASSES] + [aside_indent + '  ']
+    inner.append(Edit(aside.class_attr.start, aside.class_attr.end, '{`' + '\n'.join(class_lines) + '`}'))
+
+    nav = next(iter(index.tags_named('nav', (start, end))), None)
+    if nav:
+        nav_indent = index.indentation(nav.start)
+        inner.append(Edit(nav.start, nav.start, block(CLOSE_BUTTON, nav_indent).lstrip() + '\n' + nav_indent))
+        if 'mt-8' not in index.tag_classes(nav):
+            inner.extend(filter(None, [tag_class_edit(index, nav, 'space-y-2', 'space-y-2 mt-8 md:mt-0')]))
+
+    for position in _occurrences(index.text, 'onClick={() => setCurrentView(option.id)}', start, end):
+        inner.append(Edit(position, position + len('onClick={() => setCurrentView(option.id)}'),
+                          'onClick={() => handleOptionClick(option.id)}'))
+
+    rewritten = reindent(apply_edits(index.text[start:end], _relative(inner, start)), 2)
+    wrapped = '\n'.join([
+        '<>',
+        block(OVERLAY, aside_indent + '  '),
+        aside_indent + '  ' + rewritten,
+        aside_indent + '</>'
+    ])
+    edits.append(Edit(start, end, wrapped))
+    return edits
+
+
+def _occurrences(text, needle, start, end):
+    position = text.find(needle, start, end)
+    while position != -1:
+        yield position
+        position = text.find(needle, position + len(needle), end)
+
+
+@rule('header-hamburger', FILES)
+def header_hamburger(index):
+    """Prop toggleSidebar y botón hamburguesa (solo móviles) en Header."""
+    header = _component(index, 'Header')
+    span = (header.code_start, header.end)
+    element = _first(index.tags_named('header', span), '<header> en Header')
+    edits = add_params(index, header, ['toggleSidebar'])
+
+    if 'md:px-6' not in index.tag_classes(element):
+        edits.extend(filter(None, [tag_class_edit(index, element, 'px-6', 'px-4 md:px-6')]))
+
+    header_span = index.element_span(element)
+    if 'onClick={toggleSidebar}' not in index.text[header_span[0]:header_span[1]]:
+        layout = _first(index.tags_with_classes(['justify-between'], header_span), 'el contenedor del header')
+        layout_span = index.element_span(layout)
+        title = _first([tag for tag in index.tags_named('div', layout_span) if tag.start > layout.start],
+                       'el bloque de título del header')
+        start, end = index.element_span(title)
+        indent = index.indentation(start)
+        edits.append(Edit(start, end, '\n'.join([
+            '<div className="flex items-center gap-3">',
+            block(HAMBURGER, indent + '  '),
+            indent + '  ' + reindent(index.text[start:end], 2),
+            indent + '</div>'
+        ])))
+
+    if not edits:
+        raise Done('el header ya tiene botón hamburguesa')
+    return edits
+
+
+@rule('sidebar-state', FILES)
+def sidebar_state(index):
+    """Estado sidebarOpen en MainApp, junto al de currentView."""
+    main = _component(index, 'MainApp')
+    if index.statement_declaring('sidebarOpen', main):
+        raise Done('MainApp ya declara sidebarOpen')
+    anchor = index.statement_declaring('currentView', main)
+    if not anchor:
+        raise Miss('MainApp no declara currentView')
+    indent = index.indentation(anchor[0])
+    return [Edit(anchor[1], anchor[1], f'\n{indent}const [sidebarOpen, setSidebarOpen] = useState(false);')]
+
+
+@rule('sidebar-props', FILES)
+def sidebar_props(index):
+    """Conecta sidebarOpen de MainApp con <Header> y <Sidebar>."""
+    main = _component(index, 'MainApp')
+    span = (main.code_start, main.end)
+    header = _first(index.tags_named('Header', span), '<Header> en MainApp')
+    sidebar = _first(index.tags_named('Sidebar', span), '<Sidebar> en MainApp')
+    edits = (add_jsx_props(index, header, [('toggleSidebar', '() => setSidebarOpen(!sidebarOpen)')])
+             + add_jsx_props(index, sidebar, [('isOpen', 'sidebarOpen'), ('setIsOpen', 'setSidebarOpen')]))
+    if not edits:
+        raise Done('<Header> y <Sidebar> ya reciben las props')
+    return edits
@@ -0,0 +1,61 @@
+"""Layout responsive de UnifiedPOSView (antes fix_responsive.py y apply_tailwind.py).
+
+Cada regla ancla en las clases marcadoras del componente (pos-header,
+pos-title, pos-side-panel, tables-grid) o en el conjunto exacto de clases del
+elemento, así que no dependen de números de línea ni del texto vecino.
+"""
+from ..engine import rule
+from ..patches import ClassPatch, class_edits
+
+FILES = ['components/UnifiedPOSView.js']
+
+
+def _class_rule(name, description, *patches):
+    @rule(name, FILES, description)
+    def apply(index):
+        return class_edits(index, patches)
+    return apply
+
+
+_class_rule(
+    'pos-container', 'Contenedor principal a pantalla completa',
+    ClassPatch('h-full flex flex-col', 'min-h-screen flex flex-col bg-gray-50', tag='div', exact=True, expect=1)
+)
+
+_class_rule(
+    'pos-header', 'Header compacto y en columna en móviles',
+    ClassPatch('p-4', 'p-2 sm:p-4', marker='pos-header', expect=1),
+    ClassPatch('flex items-center justify-between',
+               'flex flex-col sm:flex-row items-start sm:items-center justify-between gap-3 sm:gap-0',
+               within='pos-header', tag='div', exact=True, expect=1)
+)
+
+_class_rule(
+    'pos-title', 'Título más pequeño en móviles',
+    ClassPatch('text-2xl', 'text-xl sm:text-2xl', marker='pos-title', expect=1)
+)
+
+_class_rule(
+    'pos-order-type', 'Botones de tipo de pedido apilados y de ancho completo en móviles',
+    ClassPatch('flex space-x-2', 'flex flex-col sm:flex-row gap-2 w-full sm:w-auto',
+               within='pos-header', tag='div', exact=True, expect=1),
+    ClassPatch('flex items-center px-4 py-2', 'flex items-center justify-center w-full sm:w-auto px-4 py-2.5',
+               within='pos-header', tag='button', expect=3)
+)
+
+_class_rule(
+    'pos-main-layout', 'Paneles en columna en móviles y en fila desde md',
+    ClassPatch('flex flex-1', 'flex flex-col md:flex-row flex-1 overflow-hidden', tag='div', exact=True, expect=1)
+)
+
+_class_rule(
+    'pos-side-panel', 'Panel de mesas/clientes de ancho completo y con scroll propio en móviles',
+    ClassPatch('w-1/4', 'w-full md:w-1/3 lg:w-1/4', marker='pos-side-panel', expect=1),
+    ClassPatch('p-4', 'p-3 sm:p-4 max-h-[50vh] md:max-h-full overflow-y-auto', marker='pos-side-panel', expect=1)
+)
+
+_class_rule(
+    'pos-tables-grid', 'Grid de mesas con 3 columnas en tabletas pequeñas',
+    ClassPatch('grid-cols-2 gap-3', 'grid-cols-2 sm:grid-cols-3 md:grid-cols-2 lg:grid-cols-2 gap-2 sm:gap-3',
+               marker='tables-grid', expect=1)
+)
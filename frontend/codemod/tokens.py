@@ -0,0 +1,102 @@
+"""Tokenizador mínimo de JavaScript/JSX para los codemods.
+
+Recorre el archivo una sola vez y produce tokens con su posición en el texto
+original; los espacios no generan tokens pero las posiciones se conservan,
+así las ediciones se aplican sobre el texto sin reformatearlo.
+
+Limitaciones conocidas (suficientes para el código de este frontend):
+- '/' siempre es puntuación; no se reconocen literales de expresión regular.
+- Una comilla sin cierre en la misma línea se toma como puntuación (texto
+  JSX con apóstrofes, p. ej. "Don't").
+"""
+import re
+from dataclasses import dataclass
+
+MULTI_PUNCT = ('...', '=>', '</', '/>', '&&', '||', '??', '?.', '===', '!==', '==', '!=', '<=', '>=')
+
+# Un solo patrón con grupos nombrados; el orden de las alternativas decide
+# (comentarios antes que '/', strings cerrados antes que la comilla suelta)
+MASTER = re.compile('|'.join([
+    r'(?P<space>\s+)',
+    r'(?P<comment>//[^\n]*|/\*[\s\S]*?(?:\*/|\Z))',
+    r'(?P<string>"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\')',
+    r'(?P<ident>(?:[^\W\d]|\$)(?:\w|\$)*)',
+    r'(?P<number>\d[\w.]*)',
+    r'(?P<punct>' + '|'.join(re.escape(punct) for punct in MULTI_PUNCT) + r'|[\s\S])',
+]))
+
+
+@dataclass(frozen=True)
+class Token:
+    kind: str  # 'ident' | 'number' | 'string' | 'template' | 'comment' | 'punct'
+    value: str
+    start: int
+    end: int
+
+
+def _scan_string(text, i):
+    """Fin de un string '...' o "..." que empieza en i; None si no cierra en la línea."""
+    found = MASTER.match(text, i)
+    return found.end() if found.lastgroup == 'string' else None
+
+
+def _scan_template(text, i):
+    """Fin de un template literal que empieza en i, respetando ${ ... } anidados."""
+    j = i + 1
+    while j < len(text):
+        char = text[j]
+        if char == '\\':
+            j += 2
+            continue
+        if char == '`':
+            return j + 1
+        if text.startswith('${', j):
+            j = _scan_interpolation(text, j + 2)
+            continue
+        j += 1
+    return len(text)
+
+
+def _scan_interpolation(text, j):
+    """Avanza hasta cerrar la llave de un ${ ... }; devuelve la posición siguiente."""
+    depth = 1
+    while j < len(text) and depth:
+        char = text[j]
+        if char in '\'"':
+            end = _scan_string(text, j)
+            j = end if end else j + 1
+            continue
+        if char == '`':
+            j = _scan_template(text, j)
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        j += 1
+    return j
+
+
+def tokenize(text):
+    """Lista de Token del texto completo (una sola pasada)."""
+    tokens = []
+    append = tokens.append
+    match = MASTER.match
+    i = 0
+    length = len(text)
+
+    while i < length:
+        if text[i] == '`':
+            end = _scan_template(text, i)
+            append(Token('template', text[i:end], i, end))
+            i = end
+            continue
+
+        found = match(text, i)
+        kind = found.lastgroup
+        end = found.end()
+        if kind != 'space':
+            append(Token(kind, found.group(), i, end))
+        i = end
+
+    return tokens
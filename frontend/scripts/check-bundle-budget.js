@@ -0,0 +1,59 @@
+// frontend/scripts/check-bundle-budget.js
+// Presupuesto de JS del arranque, medido sobre el build de producción.
+// Separa el JS inicial (entrypoints de asset-manifest.json, lo que descarga
+// una tableta antes de poder tomar una orden) de los chunks diferidos
+// (vistas de administración, benchmarks) y compara el inicial comprimido
+// con gzip contra el presupuesto.
+//   npm run build && npm run budget
+//   JS_BUDGET_KB=200 npm run budget
+const fs = require('fs');
+const path = require('path');
+const zlib = require('zlib');
+
+const BUILD_DIR = path.join(__dirname, '../build');
+const BUDGET_KB = parseFloat(process.env.JS_BUDGET_KB || '250');
+
+const kb = (bytes) => (bytes / 1024).toFixed(1);
+
+function sizes(file) {
+  const content = fs.readFileSync(path.join(BUILD_DIR, file));
+  return { raw: content.length, gzip: zlib.gzipSync(content, { level: 9 }).length };
+}
+
+function main() {
+  const manifestPath = path.join(BUILD_DIR, 'asset-manifest.json');
+  if (!fs.existsSync(manifestPath)) {
+    console.error('❌ No existe build/asset-manifest.json; ejecuta antes npm run build');
+    process.exit(1);
+  }
+
+  const manifest = JSON.parse(fs.readFileSync(manifestPath, 'utf8'));
+  const initial = new Set(manifest.entrypoints.filter(file => file.endsWith('.js')));
+  const allJs = Object.values(manifest.files)
+    .map(file => file.replace(/^\.?\//, ''))
+    .filter(file => file.endsWith('.js'));
+
+  const rows = allJs.map(file => ({ file, initial: initial.has(file), ...sizes(file) }))
+    .sort((a, b) => Number(b.initial) - Number(a.initial) || b.gzip - a.gzip);
+
+  console.log('\nJS del build (KB)');
+  console.log('tipo       gzip      raw   archivo');
+  for (const row of rows) {
+    console.log(`${row.initial ? 'inicial ' : 'diferido'} ${kb(row.gzip).padStart(7)} ${kb(row.raw).padStart(8)}   ${row.file}`);
+  }
+
+  const total = (filter) => rows.filter(filter).reduce((sum, row) => sum + row.gzip, 0);
+  const initialGzip = total(row => row.initial);
+  const deferredGzip = total(row => !row.initial);
+
+  console.log(`\nInicial: ${kb(initialGzip)} KB gzip (presupuesto ${BUDGET_KB} KB)`);
+  console.log(`Diferido: ${kb(deferredGzip)} KB gzip en ${rows.filter(row => !row.initial).length} chunks`);
+
+  if (initialGzip / 1024 > BUDGET_KB) {
+    console.error(`❌ El JS inicial excede el presupuesto por ${kb(initialGzip - BUDGET_KB * 1024)} KB`);
+    process.exit(2);
+  }
+  console.log('✅ Dentro del presupuesto');
+}
+
+main();
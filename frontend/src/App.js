@@ -1,12 +1,28 @@
 // frontend/src/App.js - VERSIÓN FINAL LIMPIA
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, lazy, Suspense } from 'react';
 import { GlobalStateProvider } from './context/GlobalStateContext';
 
 // Importaciones de servicios y componentes
 import apiService from './services/apiService';
 import UnifiedPOSView from './components/UnifiedPOSView';
-import MenuManagementView from './components/MenuManagementView';
-import InventarioView from './components/Inventario/InventarioView';
+
+// Las vistas de administración van en chunks aparte: una tableta de mesero
+// solo descarga y evalúa el POS. Para el admin se precargan después del
+// primer pintado, cuando el navegador está ocioso.
+const loadMenuManagementView = () => import('./components/MenuManagementView');
+const loadInventarioView = () => import('./components/Inventario/InventarioView');
+const MenuManagementView = lazy(loadMenuManagementView);
+const InventarioView = lazy(loadInventarioView);
+
+const whenIdle = (fn) => (window.requestIdleCallback
+  ? window.requestIdleCallback(fn, { timeout: 5000 })
+  : setTimeout(fn, 2000));
+
+const ViewLoading = () => (
+  <div className="flex items-center justify-center h-full p-8 text-gray-500">
+    Cargando...
+  </div>
+);
 
 // Componente de Login
 const LoginScreen = ({ onLogin }) => {
@@ -164,6 +180,15 @@ const MainApp = () => {
     }
   }, []);
 
+  // Precarga de las vistas de administración tras el primer pintado
+  useEffect(() => {
+    if (user?.role !== 'admin') return;
+    whenIdle(() => {
+      loadMenuManagementView();
+      loadInventarioView();
+    });
+  }, [user?.role]);
+
   const handleLogin = (userData) => {
     setUser(userData);
   };
@@ -200,7 +225,9 @@ const renderCurrentView = () => {
       <div className="flex flex-1 overflow-hidden">
         <Sidebar currentView={currentView} setCurrentView={setCurrentView} user={user} />
         <main className="flex-1 overflow-y-auto">
-          {renderCurrentView()}
+          <Suspense fallback={<ViewLoading />}>
+            {renderCurrentView()}
+          </Suspense>
         </main>
       </div>
     </div>
@@ -0,0 +1,74 @@
+// frontend/src/benchmarks/cartBench.js
+// Latencia de interacción al agregar productos: hace CLICKS clics sobre las
+// tarjetas del grid y mide, para cada uno, del clic al siguiente cuadro
+// pintado (lo que percibe el mesero).
+//
+// Uso: abrir la app con ?bench=cart, entrar al POS y elegir "Para llevar"
+// (o una mesa); el benchmark arranca cuando aparece el grid de productos.
+const CLICKS = 50;
+const TIMEOUT_MS = 60000;
+
+const esperar = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+// Resuelve después del pintado del siguiente cuadro
+const siguientePintado = () => new Promise(resolve => {
+  requestAnimationFrame(() => {
+    const canal = new MessageChannel();
+    canal.port1.onmessage = () => resolve();
+    canal.port2.postMessage(null);
+  });
+});
+
+const percentil = (ordenados, p) => ordenados[Math.min(ordenados.length - 1, Math.floor(ordenados.length * p))];
+
+async function esperarGrid() {
+  const inicio = performance.now();
+  while (performance.now() - inicio < TIMEOUT_MS) {
+    const botones = document.querySelectorAll('.products-grid button:not([disabled])');
+    const carritoListo = !document.body.textContent.includes('para comenzar');
+    if (botones.length > 0 && carritoListo) return;
+    await esperar(250);
+  }
+  throw new Error('No apareció el grid de productos con un carrito activo');
+}
+
+export async function runCartBench({ clicks = CLICKS } = {}) {
+  console.log(`⏱️ Benchmark de carrito: esperando el POS con un carrito activo...`);
+  await esperarGrid();
+  await esperar(500);
+
+  const tareasLargas = [];
+  const observer = new PerformanceObserver(list => tareasLargas.push(...list.getEntries()));
+  observer.observe({ type: 'longtask' });
+
+  const latencias = [];
+  const inicio = performance.now();
+  for (let i = 0; i < clicks; i++) {
+    // Se vuelve a consultar el DOM: con el grid virtualizado los nodos cambian
+    const botones = document.querySelectorAll('.products-grid button:not([disabled])');
+    const boton = botones[i % Math.min(botones.length, 12)];
+    const t0 = performance.now();
+    boton.click();
+    await siguientePintado();
+    latencias.push(performance.now() - t0);
+  }
+  const total = performance.now() - inicio;
+  await esperar(100);
+  observer.disconnect();
+
+  const ordenadas = [...latencias].sort((a, b) => a - b);
+  const resultado = {
+    clics: clicks,
+    'total ms': Math.round(total),
+    'p50 ms': +percentil(ordenadas, 0.5).toFixed(1),
+    'p95 ms': +percentil(ordenadas, 0.95).toFixed(1),
+    'máx ms': +ordenadas[ordenadas.length - 1].toFixed(1),
+    'tareas largas': tareasLargas.length,
+    'bloqueo ms': Math.round(tareasLargas.reduce((suma, t) => suma + Math.max(0, t.duration - 50), 0))
+  };
+
+  console.table(resultado);
+  console.log('ℹ️ El carrito quedó con los productos del benchmark; vacíalo antes de cobrar.');
+  window.__cartBench = resultado;
+  return resultado;
+}
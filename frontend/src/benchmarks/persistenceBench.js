@@ -0,0 +1,123 @@
+// frontend/src/benchmarks/persistenceBench.js
+// Benchmark en el navegador de la persistencia local: escrituras por segundo
+// y tiempo de bloqueo del hilo de la UI, con una transacción por escritura
+// (como antes) contra la cola con escritura diferida de DataPersistence.
+//
+// Uso: abrir la app con ?bench=persistence (en la tableta, con las
+// herramientas de desarrollo remotas para ver la consola). Cada modo usa su
+// propia base temporal; los datos reales no se tocan.
+import { DataPersistenceService } from '../services/DataPersistence';
+
+const TAPS = 2000;
+const MESAS = 12;
+const TAPS_POR_TAREA = 5; // toques que llegan juntos en una tarea del hilo
+
+const esperar = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+// Carrito de la mesa después de `toque` toques
+function carritoSimulado(toque) {
+  const lineas = 1 + (toque % 15);
+  return Array.from({ length: lineas }, (_, i) => ({
+    id: i + 1,
+    name: `Producto ${i + 1}`,
+    price: 35 + i,
+    quantity: 1 + ((toque + i) % 4)
+  }));
+}
+
+// Tareas largas (>50 ms) y el mayor hueco entre cuadros mientras corre `fn`
+async function medirHilo(fn) {
+  const tareasLargas = [];
+  let observer = null;
+  if (typeof PerformanceObserver !== 'undefined' &&
+      (PerformanceObserver.supportedEntryTypes || []).includes('longtask')) {
+    observer = new PerformanceObserver(list => tareasLargas.push(...list.getEntries()));
+    observer.observe({ type: 'longtask' });
+  }
+
+  let midiendo = true;
+  let ultimoCuadro = performance.now();
+  let peorCuadro = 0;
+  const cuadro = (ahora) => {
+    peorCuadro = Math.max(peorCuadro, ahora - ultimoCuadro);
+    ultimoCuadro = ahora;
+    if (midiendo) requestAnimationFrame(cuadro);
+  };
+  requestAnimationFrame(cuadro);
+
+  const inicio = performance.now();
+  await fn();
+  const duracion = performance.now() - inicio;
+
+  midiendo = false;
+  await esperar(100); // entregar las últimas entradas del observer
+  if (observer) observer.disconnect();
+
+  return {
+    duracion,
+    tareasLargas: tareasLargas.length,
+    bloqueoMs: tareasLargas.reduce((total, entrada) => total + Math.max(0, entrada.duration - 50), 0),
+    peorCuadroMs: peorCuadro
+  };
+}
+
+// Antes: cada toque abre y confirma su propia transacción
+async function unaTransaccionPorEscritura(servicio) {
+  const confirmaciones = [];
+  for (let toque = 0; toque < TAPS; toque++) {
+    const mesaId = 1 + (toque % MESAS);
+    confirmaciones.push(new Promise((resolve, reject) => {
+      const transaction = servicio.db.transaction(['carrito'], 'readwrite');
+      transaction.objectStore('carrito').put({ mesa_id: mesaId, productos: carritoSimulado(toque) });
+      transaction.oncomplete = resolve;
+      transaction.onerror = () => reject(transaction.error);
+    }));
+    if (toque % TAPS_POR_TAREA === TAPS_POR_TAREA - 1) await esperar(0);
+  }
+  await Promise.all(confirmaciones);
+}
+
+// Ahora: cola con escritura diferida y lotes multi-store
+async function escrituraDiferida(servicio) {
+  const confirmaciones = [];
+  for (let toque = 0; toque < TAPS; toque++) {
+    const mesaId = 1 + (toque % MESAS);
+    confirmaciones.push(servicio.guardarCarrito(mesaId, carritoSimulado(toque)));
+    if (toque % TAPS_POR_TAREA === TAPS_POR_TAREA - 1) await esperar(0);
+  }
+  await servicio.flush();
+  await Promise.all(confirmaciones);
+}
+
+async function correr(nombre, fn) {
+  const dbName = `RestaurantPOS_Bench_${Date.now()}`;
+  const servicio = new DataPersistenceService({ dbName });
+  await servicio.ready();
+
+  try {
+    const medicion = await medirHilo(() => fn(servicio));
+    return {
+      modo: nombre,
+      'escrituras/s': Math.round(TAPS / (medicion.duracion / 1000)),
+      'total ms': Math.round(medicion.duracion),
+      'tareas largas': medicion.tareasLargas,
+      'bloqueo ms': Math.round(medicion.bloqueoMs),
+      'peor cuadro ms': Math.round(medicion.peorCuadroMs),
+      transacciones: servicio.stats.lotes || TAPS
+    };
+  } finally {
+    servicio.db.close();
+    indexedDB.deleteDatabase(dbName);
+  }
+}
+
+export async function runPersistenceBench() {
+  console.log(`⏱️ Benchmark de persistencia: ${TAPS} toques de carrito en ${MESAS} mesas...`);
+  const resultados = [
+    await correr('una transacción por escritura', unaTransaccionPorEscritura),
+    await correr('escritura diferida', escrituraDiferida)
+  ];
+  console.table(resultados);
+  window.__persistenceBench = resultados;
+  return resultados;
+}
@@ -0,0 +1,92 @@
+// frontend/src/benchmarks/startupBench.js
+// Presupuesto de arranque medido en el dispositivo real:
+// - FCP (primer pintado con contenido)
+// - TTI aproximado: fin de la última tarea larga (>50 ms) antes de una
+//   ventana de QUIET_MS sin tareas largas, contado desde FCP (la misma idea
+//   que Lighthouse, sin contar peticiones de red)
+// - pos-ready: marca que pone UnifiedPOSView cuando el menú y las mesas ya
+//   están en pantalla
+// - JS descargado antes de TTI (bytes transferidos y decodificados)
+//
+// Uso: abrir la app con ?bench=startup y esperar el resultado en la consola.
+const QUIET_MS = 5000;
+const TIMEOUT_MS = 30000;
+
+export const STARTUP_BUDGET = {
+  ttiMs: 3500,
+  posReadyMs: 4000,
+  jsTransferKb: 250
+};
+
+const esperar = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+function primerPintado() {
+  const [fcp] = performance.getEntriesByName('first-contentful-paint');
+  return fcp ? fcp.startTime : null;
+}
+
+async function medirTTI() {
+  const tareasLargas = [];
+  const observer = new PerformanceObserver(list => tareasLargas.push(...list.getEntries()));
+  observer.observe({ type: 'longtask', buffered: true });
+
+  // Esperar hasta que haya QUIET_MS sin tareas largas
+  const inicio = performance.now();
+  for (;;) {
+    await esperar(500);
+    const ultima = tareasLargas.reduce((max, t) => Math.max(max, t.startTime + t.duration), 0);
+    const quieto = performance.now() - Math.max(ultima, primerPintado() || 0);
+    if (quieto >= QUIET_MS || performance.now() - inicio > TIMEOUT_MS) break;
+  }
+  observer.disconnect();
+
+  const fcp = primerPintado() || 0;
+  const ultimaAntesDeQuietud = tareasLargas
+    .filter(t => t.startTime + t.duration >= fcp)
+    .reduce((max, t) => Math.max(max, t.startTime + t.duration), fcp);
+
+  return {
+    tti: ultimaAntesDeQuietud,
+    tareasLargas: tareasLargas.length,
+    bloqueoMs: tareasLargas
+      .filter(t => t.startTime < ultimaAntesDeQuietud)
+      .reduce((total, t) => total + Math.max(0, t.duration - 50), 0)
+  };
+}
+
+function bytesDeJs(hasta) {
+  const scripts = performance.getEntriesByType('resource')
+    .filter(r => r.startTime <= hasta && (r.initiatorType === 'script' || /\.js(\?|$)/.test(r.name)));
+  return {
+    archivos: scripts.length,
+    transferKb: scripts.reduce((total, r) => total + (r.transferSize || 0), 0) / 1024,
+    decodificadoKb: scripts.reduce((total, r) => total + (r.decodedBodySize || 0), 0) / 1024
+  };
+}
+
+export async function runStartupBench() {
+  console.log('⏱️ Midiendo arranque (esperando a que el hilo principal quede libre)...');
+  const { tti, tareasLargas, bloqueoMs } = await medirTTI();
+  const [posReady] = performance.getEntriesByName('pos-ready');
+  const js = bytesDeJs(tti);
+
+  const filas = {
+    'FCP ms': { medido: Math.round(primerPintado() || 0), presupuesto: '-' },
+    'TTI ms': { medido: Math.round(tti), presupuesto: STARTUP_BUDGET.ttiMs },
+    'pos-ready ms': { medido: posReady ? Math.round(posReady.startTime) : 'sin sesión', presupuesto: STARTUP_BUDGET.posReadyMs },
+    'JS transferido KB': { medido: Math.round(js.transferKb), presupuesto: STARTUP_BUDGET.jsTransferKb },
+    'JS decodificado KB': { medido: Math.round(js.decodificadoKb), presupuesto: '-' },
+    'archivos JS': { medido: js.archivos, presupuesto: '-' },
+    'tareas largas': { medido: tareasLargas, presupuesto: '-' },
+    'bloqueo total ms': { medido: Math.round(bloqueoMs), presupuesto: '-' }
+  };
+  for (const fila of Object.values(filas)) {
+    fila.ok = typeof fila.presupuesto === 'number' && typeof fila.medido === 'number'
+      ? (fila.medido <= fila.presupuesto ? '✅' : '❌')
+      : '';
+  }
+
+  console.table(filas);
+  window.__startupBench = filas;
+  return filas;
+}
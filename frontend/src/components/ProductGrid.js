@@ -0,0 +1,124 @@
+// frontend/src/components/ProductGrid.js
+// Grid de productos del POS.
+//
+// - ProductCard y ProductGrid están memorizados: agregar al carrito ya no
+//   vuelve a pintar el menú (solo cambia si cambian los productos, la
+//   categoría o `disabled`).
+// - Con menús grandes (VIRTUALIZE_FROM productos o más) solo se montan las
+//   filas visibles más OVERSCAN_ROWS arriba y abajo. El número de columnas
+//   sigue los mismos cortes que responsive.css y el alto de fila se mide de
+//   la primera tarjeta, así que el grid se ve igual que sin virtualizar.
+import React, { memo, useCallback, useEffect, useLayoutEffect, useRef, useState } from 'react';
+
+const VIRTUALIZE_FROM = 60;
+const OVERSCAN_ROWS = 2;
+const ROW_HEIGHT_ESTIMATE = 152;
+
+const GRID_CLASS = 'products-grid grid grid-cols-2 md:grid-cols-3 lg:grid-cols-4 gap-4';
+const SCROLL_CLASS = 'overflow-y-auto max-h-[calc(100vh-200px)]';
+
+// Mismos cortes que grid-cols-2 md:grid-cols-3 lg:grid-cols-4
+const columnsFor = (width) => (width >= 1024 ? 4 : width >= 768 ? 3 : 2);
+
+export const ProductCard = memo(({ item, onAdd, disabled }) => (
+  <button
+    onClick={() => onAdd(item)}
+    className="bg-white p-4 rounded-lg shadow hover:shadow-md transition-shadow border border-gray-200 hover:border-blue-300"
+    disabled={disabled}
+  >
+    <div className="text-center">
+      <div className="text-3xl mb-2">{item.image || '🍽️'}</div>
+      <h3 className="font-semibold text-gray-800 mb-1 text-sm leading-tight">{item.name}</h3>
+      <p className="text-lg font-bold text-blue-600">${parseFloat(item.price).toFixed(2)}</p>
+    </div>
+  </button>
+));
+
+const VirtualGrid = ({ items, onAdd, disabled }) => {
+  const scrollRef = useRef(null);
+  const gridRef = useRef(null);
+  const frameRef = useRef(null);
+  const [scrollTop, setScrollTop] = useState(0);
+  const [viewport, setViewport] = useState({ height: 800, columns: columnsFor(window.innerWidth) });
+  const [rowHeight, setRowHeight] = useState(ROW_HEIGHT_ESTIMATE);
+
+  // Alto visible y columnas; se recalculan al cambiar el tamaño
+  useEffect(() => {
+    const measure = () => {
+      setViewport({
+        height: scrollRef.current ? scrollRef.current.clientHeight : window.innerHeight,
+        columns: columnsFor(window.innerWidth)
+      });
+    };
+    measure();
+    window.addEventListener('resize', measure);
+    return () => window.removeEventListener('resize', measure);
+  }, []);
+
+  // Alto real de una fila: primera tarjeta + separación del grid
+  useLayoutEffect(() => {
+    const grid = gridRef.current;
+    const card = grid && grid.firstElementChild;
+    if (!card) return;
+    const gap = parseFloat(getComputedStyle(grid).rowGap) || 0;
+    const measured = card.offsetHeight + gap;
+    if (measured > 0 && Math.abs(measured - rowHeight) > 1) {
+      setRowHeight(measured);
+    }
+  });
+
+  // Al cambiar de categoría se vuelve al inicio
+  useEffect(() => {
+    if (scrollRef.current) scrollRef.current.scrollTop = 0;
+    setScrollTop(0);
+  }, [items]);
+
+  useEffect(() => () => cancelAnimationFrame(frameRef.current), []);
+
+  // Un setState por cuadro aunque el scroll dispare más eventos
+  const handleScroll = useCallback(() => {
+    if (frameRef.current) return;
+    frameRef.current = requestAnimationFrame(() => {
+      frameRef.current = null;
+      if (scrollRef.current) setScrollTop(scrollRef.current.scrollTop);
+    });
+  }, []);
+
+  const { columns, height } = viewport;
+  const rows = Math.ceil(items.length / columns);
+  const firstRow = Math.max(0, Math.floor(scrollTop / rowHeight) - OVERSCAN_ROWS);
+  const lastRow = Math.min(rows, Math.ceil((scrollTop + height) / rowHeight) + OVERSCAN_ROWS);
+  const visible = items.slice(firstRow * columns, lastRow * columns);
+
+  return (
+    <div ref={scrollRef} onScroll={handleScroll} className={SCROLL_CLASS}>
+      <div style={{ height: rows * rowHeight, position: 'relative' }}>
+        <div
+          ref={gridRef}
+          className={GRID_CLASS}
+          style={{ position: 'absolute', top: 0, left: 0, right: 0, transform: `translateY(${firstRow * rowHeight}px)` }}
+        >
+          {visible.map(item => (
+            <ProductCard key={item.id} item={item} onAdd={onAdd} disabled={disabled} />
+          ))}
+        </div>
+      </div>
+    </div>
+  );
+};
+
+const ProductGrid = ({ items, onAdd, disabled }) => {
+  if (items.length >= VIRTUALIZE_FROM) {
+    return <VirtualGrid items={items} onAdd={onAdd} disabled={disabled} />;
+  }
+
+  return (
+    <div className={`${GRID_CLASS} ${SCROLL_CLASS}`}>
+      {items.map(item => (
+        <ProductCard key={item.id} item={item} onAdd={onAdd} disabled={disabled} />
+      ))}
+    </div>
+  );
+};
+
+export default memo(ProductGrid);
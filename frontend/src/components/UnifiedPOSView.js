@@ -1,5 +1,5 @@
 // frontend/src/components/UnifiedPOSView.js - Versión completa con UTF-8 corregido
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef, useMemo, useCallback } from 'react';
 import '../responsive.css';
 import { useGlobalState } from '../context/GlobalStateContext';
 import { 
@@ -9,6 +9,13 @@ import {
 // Importaciones para persistencia
 import dataPersistence from '../services/DataPersistence';
 import { usePersistentTables } from '../hooks/usePersistentTables';
+import { useSocket } from '../hooks/useSocket';
+import { useCustomerSearch } from '../hooks/useCustomerSearch';
+import ProductGrid from './ProductGrid';
+import { selectCartTotals, selectItemsByCategory, selectCategoryItems } from '../context/cartSelectors';
+
+// Respuestas de /api/sales que rechazan la venta (no son falta de servidor)
+const RECHAZOS_VENTA = [400, 404, 409];
 
 const UnifiedPOSView = ({ apiService, user }) => {
   // Usar mesas persistentes en lugar del estado global
@@ -16,14 +23,17 @@ const UnifiedPOSView = ({ apiService, user }) => {
     mesas: persistentTables,
     loading: tablesLoading,
     agregarMesa,
-    cambiarEstadoMesa
-  } = usePersistentTables();
+    cambiarEstadoMesa,
+    sincronizarMesas,
+    aplicarRespuestaMesas,
+    aplicarCambioServidor
+  } = usePersistentTables({ token: apiService.token, sincronizarAlConectar: false });
 
   // Estado global (manteniendo funcionalidad existente)
   const {
     customers, menuItems, categories,
     setCustomers, setMenuItems, setCategories,
-    addToCart, updateCartItem, clearCart, getCurrentCart, hasItemsInCart
+    addToCart, updateCartItem, clearCart, applyCartLine, getCurrentCart, hasItemsInCart
   } = useGlobalState();
 
   // Estados locales de UI
@@ -58,12 +68,97 @@ const UnifiedPOSView = ({ apiService, user }) => {
   // Usar mesas persistentes en lugar de estado global
   const tables = persistentTables;
 
-  // Cargar datos iniciales solo si no existen
+  // Autocompletado de clientes (con espera entre teclas y cancelación)
+  const { results: customerResults, searching: searchingCustomers } = useCustomerSearch({
+    token: apiService.token,
+    query: customerSearch
+  });
+
+  // Arranque en una sola petición (/api/bootstrap) al montar y al volver la
+  // conexión; con las versiones guardadas solo bajan las secciones que cambiaron
+  useEffect(() => {
+    loadInitialData({ reconexion: menuItems.length > 0 });
+    const alVolverConexion = () => loadInitialData({ reconexion: true });
+    window.addEventListener('online', alVolverConexion);
+    return () => window.removeEventListener('online', alVolverConexion);
+  }, []);
+
+  // Marca de arranque: menú y mesas en pantalla (la lee ?bench=startup)
   useEffect(() => {
-    if (menuItems.length === 0) {
-      loadInitialData();
+    if (menuItems.length > 0 && !tablesLoading && performance.getEntriesByName('pos-ready').length === 0) {
+      performance.mark('pos-ready');
     }
-  }, [menuItems.length]);
+  }, [menuItems.length, tablesLoading]);
+
+  // Recargar menú y categorías solo cuando el servidor avisa que cambiaron
+  // (las secciones cuya versión ya se tiene llegan sin datos)
+  const { on: onSocketEvent, off: offSocketEvent } = useSocket({ token: apiService.token });
+
+  useEffect(() => {
+    const reloadCatalog = async () => {
+      try {
+        const { menu, categories: categoriesData, changed } = await apiService.bootstrap({ sections: ['menu', 'categories'] });
+        if (changed.includes('categories')) setCategories(categoriesData.categories || []);
+        if (changed.includes('menu')) setMenuItems(menu.menuItems || []);
+      } catch (error) {
+        console.warn('No se pudo recargar el menú:', error.message);
+      }
+    };
+
+    onSocketEvent('menu-version', reloadCatalog);
+    onSocketEvent('resync-required', reloadCatalog);
+    return () => {
+      offSocketEvent('menu-version', reloadCatalog);
+      offSocketEvent('resync-required', reloadCatalog);
+    };
+  }, []);
+
+  // Mesas: cada cambio trae la versión del salón; si se perdió alguno se
+  // piden solo los cambios faltantes
+  useEffect(() => {
+    const handleTableUpdated = (table) => { aplicarCambioServidor(table); };
+    const handleResync = () => { sincronizarMesas(); };
+
+    onSocketEvent('table-updated', handleTableUpdated);
+    onSocketEvent('resync-required', handleResync);
+    return () => {
+      offSocketEvent('table-updated', handleTableUpdated);
+      offSocketEvent('resync-required', handleResync);
+    };
+  }, []);
+
+  // Carritos compartidos: deltas por línea de otros dispositivos. Una línea
+  // con seq menor a la última limpieza del carrito ya no aplica.
+  const clearedSeqRef = useRef({});
+
+  useEffect(() => {
+    const handleCartLine = ({ cartKey, seq, ...line }) => {
+      if (seq <= (clearedSeqRef.current[cartKey] || 0)) return;
+      applyCartLine(cartKey, line);
+    };
+    const handleCartCleared = ({ cartKey, seq }) => {
+      clearedSeqRef.current[cartKey] = seq;
+      clearCart(cartKey);
+    };
+
+    onSocketEvent('cart-line', handleCartLine);
+    onSocketEvent('cart-cleared', handleCartCleared);
+    return () => {
+      offSocketEvent('cart-line', handleCartLine);
+      offSocketEvent('cart-cleared', handleCartCleared);
+    };
+  }, []);
+
+  // Carritos de mesa compartidos (/api/carts): el cambio local es inmediato
+  // y el servidor lo reparte a las demás tabletas ('cart-line'). Los envíos
+  // van en orden; sin conexión el carrito queda solo en esta tableta.
+  const envioCarritoRef = useRef(Promise.resolve());
+  const enviarCarritoMesa = (cartKey, envio) => {
+    if (!cartKey || !cartKey.startsWith('table-') || !navigator.onLine) return;
+    envioCarritoRef.current = envioCarritoRef.current
+      .then(envio)
+      .catch(error => console.warn('Carrito compartido no disponible:', error.message));
+  };
 
   // Inicializar persistencia al cargar componente
   useEffect(() => {
@@ -78,6 +173,17 @@ const UnifiedPOSView = ({ apiService, user }) => {
     initPersistence();
   }, []);
 
+  // Subida en segundo plano de las ventas guardadas sin conexión (outbox)
+  useEffect(() => {
+    dataPersistence.iniciarSincronizacion({
+      apiUrl: process.env.REACT_APP_API_URL || 'http://localhost:3001',
+      getToken: () => apiService.token,
+      deviceId: `device_${user.id}`,
+      inventario: user.role === 'admin' || user.role === 'manager'
+    });
+    return () => dataPersistence.detenerSincronizacion();
+  }, [user.id, user.role]);
+
   // NUEVA LÓGICA MEJORADA: Cargar carrito persistente solo cuando sea necesario
   useEffect(() => {
     if (selectedTable && orderType === 'dine-in' && selectedTable.id !== lastSelectedTableId) {
@@ -91,6 +197,32 @@ const UnifiedPOSView = ({ apiService, user }) => {
   const verificarYCargarCarrito = async () => {
     try {
       const cartKey = `table-${selectedTable.id}`;
+
+      // Manda el carrito compartido del servidor. Si está vacío, lo que tenga
+      // esta tableta (armado sin conexión) se sube
+      let subirLocal = false;
+      if (navigator.onLine) {
+        try {
+          const remoto = await apiService.getCart(cartKey);
+          if (remoto.items.length > 0) {
+            clearedSeqRef.current[cartKey] = remoto.seq;
+            clearCart(cartKey);
+            remoto.items.forEach(line => applyCartLine(cartKey, line));
+            await guardarCarritoEnPersistencia(selectedTable.id, remoto.items);
+            return;
+          }
+          subirLocal = true;
+        } catch (error) {
+          console.warn('Carrito compartido no disponible:', error.message);
+        }
+      }
+      const subirCarrito = (items) => {
+        if (!subirLocal) return;
+        items.forEach(item => enviarCarritoMesa(cartKey, () =>
+          apiService.setCartItem(cartKey, item.id, item.cantidad || item.quantity || 1)
+        ));
+      };
+
       const carritoActual = getCurrentCart(cartKey);
       
       console.log('📋 Estado del carrito actual:', carritoActual.length, 'items');
@@ -119,11 +251,13 @@ const UnifiedPOSView = ({ apiService, user }) => {
             });
             console.log('✅ Carrito restaurado exitosamente');
           }, 100);
+          subirCarrito(carritoGuardado);
         }
       } else {
         console.log('🔌 Carrito actual tiene productos, no sobrescribiendo');
         // Si hay carrito actual, asegurar que esté guardado en persistencia
         await guardarCarritoEnPersistencia(selectedTable.id, carritoActual);
+        subirCarrito(carritoActual);
       }
     } catch (error) {
       console.error('❌ Error verificando carrito:', error);
@@ -149,43 +283,45 @@ const UnifiedPOSView = ({ apiService, user }) => {
     }
   }, [categories, selectedCategory]);
 
-  // Efecto mejorado para sincronizar estado de mesas con persistencia
+  // Una mesa con productos en el carrito de esta tableta se muestra ocupada.
+  // Solo cambia el estado local: al servidor solo llegan las acciones del
+  // usuario (abrir, vaciar o cobrar la mesa). Un carrito local vacío no
+  // libera nada, la mesa puede estar ocupada desde otra tableta.
   useEffect(() => {
     tables.forEach(table => {
-      const cartKey = `table-${table.id}`;
-      const hasItems = hasItemsInCart(cartKey);
-      
-      // Si la mesa tiene productos pero está marcada como disponible, cambiarla a ocupada
-      if (hasItems && table.estado === 'disponible') {
-        updateTableStatusAutomatically(table.id, 'ocupada');
-      }
-      // Si la mesa no tiene productos pero está marcada como ocupada, cambiarla a disponible
-      else if (!hasItems && table.estado === 'ocupada') {
-        updateTableStatusAutomatically(table.id, 'disponible');
+      if (table.estado === 'disponible' && hasItemsInCart(`table-${table.id}`)) {
+        cambiarEstadoMesa(table.id, 'ocupada').catch(error => {
+          console.error('Error actualizando estado de mesa:', error);
+        });
       }
     });
   }, [tables, hasItemsInCart]);
 
-  const loadInitialData = async () => {
-    setLoading(true);
+  // En una reconexión no se muestra el cargando ni el error: ya hay datos
+  const loadInitialData = async ({ reconexion = false } = {}) => {
+    if (!navigator.onLine) return;
+    if (!reconexion) setLoading(true);
     try {
-      const [categoriesData, menuData, customersData] = await Promise.all([
-        apiService.getCategories(),
-        apiService.getMenu(),
-        loadCustomers()
-      ]);
-      
-      setCategories(categoriesData);
-      setMenuItems(menuData);
-      setCustomers(customersData);
+      await dataPersistence.init();
+      const tablesVersion = await dataPersistence.obtenerVersionMesas();
+      const { menu, categories: categoriesData, customers: customersData, tables } = await apiService.bootstrap({
+        known: { tables: tablesVersion }
+      });
+
+      setCategories(categoriesData.categories || []);
+      setMenuItems(menu.menuItems || []);
+      setCustomers(customersData.customers || []);
+      await aplicarRespuestaMesas(tables);
     } catch (error) {
-      setError('Error cargando datos: ' + error.message);
+      // Sin arranque se conserva lo que ya había; las mesas se piden aparte
+      if (!reconexion) setError('Error cargando datos: ' + error.message);
+      sincronizarMesas();
     } finally {
       setLoading(false);
     }
   };
 
-  // Función mejorada con persistencia
+  // Cambio de estado por una acción del usuario: local y en el servidor
   const updateTableStatusAutomatically = async (tableId, newStatus) => {
     try {
       // Actualizar en persistencia local
@@ -202,23 +338,6 @@ const UnifiedPOSView = ({ apiService, user }) => {
     }
   };
 
-  // Función para cargar clientes
-  const loadCustomers = async () => {
-    try {
-      const response = await fetch(`${process.env.REACT_APP_API_URL || 'http://localhost:3001'}/api/customers`, {
-        headers: {
-          'Authorization': `Bearer ${apiService.token}`,
-          'Content-Type': 'application/json'
-        }
-      });
-      const data = await response.json();
-      return data.customers || [];
-    } catch (error) {
-      console.error('Error cargando clientes:', error);
-      return [];
-    }
-  };
-
   // Crear nuevo cliente
   const createCustomer = async () => {
     if (!newCustomer.phone || !newCustomer.name || !newCustomer.address1) {
@@ -296,6 +415,17 @@ const UnifiedPOSView = ({ apiService, user }) => {
     return null;
   };
 
+  // Carrito actual y totales memorizados: el arreglo del carrito solo cambia
+  // de referencia cuando cambia su contenido
+  const currentCart = getCurrentCart(getCartKey());
+  // Los setTimeout de abajo leen el carrito vigente, no el de este render
+  const getCurrentCartRef = useRef(getCurrentCart);
+  getCurrentCartRef.current = getCurrentCart;
+  const cartTotals = useMemo(
+    () => selectCartTotals(currentCart, descuento, tipoDescuento),
+    [currentCart, descuento, tipoDescuento]
+  );
+
   // FUNCIÓN MEJORADA: Agregar al carrito con persistencia inmediata
   const handleAddToCart = async (item) => {
     const cartKey = getCartKey();
@@ -308,6 +438,7 @@ const UnifiedPOSView = ({ apiService, user }) => {
     console.log('➕ Agregando producto:', item.name, 'a', cartKey);
     
     addToCart(cartKey, item);
+    enviarCarritoMesa(cartKey, () => apiService.addCartItem(cartKey, item));
     setError('');
 
     // Guardar en persistencia INMEDIATAMENTE después de agregar
@@ -315,7 +446,7 @@ const UnifiedPOSView = ({ apiService, user }) => {
       // Usar setTimeout para permitir que React actualice el estado primero
       setTimeout(async () => {
         try {
-          const currentCart = getCurrentCart(cartKey);
+          const currentCart = getCurrentCartRef.current(cartKey);
           await guardarCarritoEnPersistencia(selectedTable.id, currentCart);
           
           // Si es una mesa y está disponible, cambiarla a ocupada automáticamente
@@ -337,12 +468,13 @@ const UnifiedPOSView = ({ apiService, user }) => {
     console.log('🔄 Actualizando cantidad. Item:', itemId, 'Nueva cantidad:', newQuantity);
     
     updateCartItem(cartKey, itemId, newQuantity);
+    enviarCarritoMesa(cartKey, () => apiService.setCartItem(cartKey, itemId, newQuantity));
 
     // Guardar en persistencia INMEDIATAMENTE
     if (orderType === 'dine-in' && selectedTable) {
       setTimeout(async () => {
         try {
-          const currentCart = getCurrentCart(cartKey);
+          const currentCart = getCurrentCartRef.current(cartKey);
           await guardarCarritoEnPersistencia(selectedTable.id, currentCart);
           
           // Si se vacía el carrito de una mesa, cambiarla a disponible
@@ -364,6 +496,7 @@ const UnifiedPOSView = ({ apiService, user }) => {
     console.log('🗑️ Limpiando carrito:', cartKey);
     
     clearCart(cartKey);
+    enviarCarritoMesa(cartKey, () => apiService.clearServerCart(cartKey));
 
     // Limpiar persistencia si es una mesa
     if (orderType === 'dine-in' && selectedTable) {
@@ -383,33 +516,10 @@ const UnifiedPOSView = ({ apiService, user }) => {
     setMostrarDescuento(false);
   };
 
-  // Nueva función para calcular total sin IVA y con descuentos
-  const getCartTotal = () => {
-    const cartKey = getCartKey();
-    const currentCart = getCurrentCart(cartKey);
-    const subtotal = currentCart.reduce((total, item) => total + (item.price * item.quantity), 0);
-    
-    // Calcular descuento
-    const montoDescuento = tipoDescuento === 'porcentaje' 
-      ? (subtotal * descuento) / 100 
-      : descuento;
-    
-    // Total final SIN IVA
-    return Math.max(0, subtotal - montoDescuento);
-  };
-
-  const getCartSubtotal = () => {
-    const cartKey = getCartKey();
-    const currentCart = getCurrentCart(cartKey);
-    return currentCart.reduce((total, item) => total + (item.price * item.quantity), 0);
-  };
-
-  const getCartDiscount = () => {
-    const subtotal = getCartSubtotal();
-    return tipoDescuento === 'porcentaje' 
-      ? (subtotal * descuento) / 100 
-      : descuento;
-  };
+  // Total sin IVA y con descuentos (desde los totales memorizados)
+  const getCartTotal = () => cartTotals.total;
+  const getCartSubtotal = () => cartTotals.subtotal;
+  const getCartDiscount = () => cartTotals.discount;
 
   // Funciones para manejar descuentos
   const handleAplicarDescuento = () => {
@@ -440,6 +550,7 @@ const UnifiedPOSView = ({ apiService, user }) => {
       const folio = await dataPersistence.obtenerSiguienteFolio();
       
       const saleData = {
+        clientId: dataPersistence.nuevoClientId(),
         folio: folio,
         items: currentCart.map(item => ({
           id: item.id,
@@ -459,19 +570,26 @@ const UnifiedPOSView = ({ apiService, user }) => {
 
       console.log('💰 Procesando venta:', saleData);
 
-      // Guardar venta en persistencia
-      await dataPersistence.guardarVenta(saleData);
-
-      // Intentar enviar al backend si está disponible
-      try {
-        await apiService.createSale(saleData);
-        console.log('✅ Venta enviada al backend');
-      } catch (backendError) {
-        console.warn('⚠️ Backend no disponible, venta guardada solo localmente');
+      // En línea la venta va directo a /api/sales (stock estricto, mesa y
+      // aviso a cocina). Sin conexión, o si el servidor no responde, queda en
+      // el outbox con el mismo clientId y se sube después sin duplicar
+      let enviada = false;
+      if (navigator.onLine) {
+        try {
+          await apiService.createSale(saleData);
+          enviada = true;
+        } catch (saleError) {
+          // Rechazo del servidor (stock, mesa, datos): se muestra y el
+          // carrito se conserva
+          if (RECHAZOS_VENTA.includes(saleError.status)) throw saleError;
+          console.warn('Backend no disponible, venta guardada para sincronizar');
+        }
       }
+      await dataPersistence.guardarVenta(saleData, { enviada });
 
       // Limpiar carrito y persistencia
       clearCart(cartKey);
+      enviarCarritoMesa(cartKey, () => apiService.clearServerCart(cartKey));
       if (orderType === 'dine-in' && selectedTable) {
         await dataPersistence.limpiarCarritoMesa(selectedTable.id);
         await updateTableStatusAutomatically(selectedTable.id, 'disponible');
@@ -513,15 +631,21 @@ const UnifiedPOSView = ({ apiService, user }) => {
     }
   };
 
-  // Filtros
-  const filteredItems = menuItems.filter(item => 
-    !selectedCategory || item.categoryId === selectedCategory
+  // Filtro por categoría: índice por categoría calculado una vez por menú
+  const itemsByCategory = useMemo(() => selectItemsByCategory(menuItems), [menuItems]);
+  const filteredItems = useMemo(
+    () => selectCategoryItems(menuItems, itemsByCategory, selectedCategory),
+    [menuItems, itemsByCategory, selectedCategory]
   );
 
-  const filteredCustomers = customers.filter(customer =>
-    customer.phone.includes(customerSearch) ||
-    customer.name.toLowerCase().includes(customerSearch.toLowerCase())
-  );
+  // Callback estable para el grid memorizado (siempre llama a la versión
+  // vigente de handleAddToCart)
+  const addToCartRef = useRef(null);
+  addToCartRef.current = handleAddToCart;
+  const handleProductClick = useCallback((item) => addToCartRef.current(item), []);
+
+  // Con texto se consulta el índice del servidor; sin texto, la lista inicial
+  const filteredCustomers = customerSearch.trim() ? customerResults : customers;
 
   if ((loading && menuItems.length === 0) || tablesLoading) {
     return (
@@ -646,11 +770,14 @@ const UnifiedPOSView = ({ apiService, user }) => {
                   <Search className="absolute left-3 top-3 text-gray-400" size={20} />
                   <input
                     type="text"
-                    placeholder="Buscar por teléfono o nombre..."
+                    placeholder="Buscar por teléfono, nombre o dirección..."
                     value={customerSearch}
                     onChange={(e) => setCustomerSearch(e.target.value)}
                     className="w-full pl-10 pr-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-orange-500 focus:border-orange-500"
                   />
+                  {searchingCustomers && (
+                    <div className="absolute right-3 top-3 w-4 h-4 border-2 border-orange-600 border-t-transparent rounded-full animate-spin"></div>
+                  )}
                 </div>
               </div>
 
@@ -713,22 +840,7 @@ const UnifiedPOSView = ({ apiService, user }) => {
           </div>
 
           {/* Items del Menú */}
-          <div className="products-grid grid grid-cols-2 md:grid-cols-3 lg:grid-cols-4 gap-4 overflow-y-auto max-h-[calc(100vh-200px)]">
-            {filteredItems.map(item => (
-              <button
-                key={item.id}
-                onClick={() => handleAddToCart(item)}
-                className="bg-white p-4 rounded-lg shadow hover:shadow-md transition-shadow border border-gray-200 hover:border-blue-300"
-                disabled={loading}
-              >
-                <div className="text-center">
-                  <div className="text-3xl mb-2">{item.image || '🍽️'}</div>
-                  <h3 className="font-semibold text-gray-800 mb-1 text-sm leading-tight">{item.name}</h3>
-                  <p className="text-lg font-bold text-blue-600">${parseFloat(item.price).toFixed(2)}</p>
-                </div>
-              </button>
-            ))}
-          </div>
+          <ProductGrid items={filteredItems} onAdd={handleProductClick} disabled={loading} />
         </div>
 
         {/* Panel de Carrito Mejorado */}
@@ -766,7 +878,7 @@ const UnifiedPOSView = ({ apiService, user }) => {
                 </p>
               </div>
             </div>
-          ) : getCurrentCart(getCartKey()).length === 0 ? (
+          ) : currentCart.length === 0 ? (
             <div className="flex-1 flex items-center justify-center">
               <div className="text-center text-gray-500">
                 <p>Carrito vacío</p>
@@ -778,7 +890,7 @@ const UnifiedPOSView = ({ apiService, user }) => {
               {/* Items del carrito con scroll MEJORADO */}
               <div className="flex-1 overflow-y-auto p-2 min-h-0 max-h-[350px]">
                 <div className="space-y-1">
-                  {getCurrentCart(getCartKey()).map(item => (
+                  {currentCart.map(item => (
                     <div key={item.id} className="bg-gray-50 rounded-md p-2 flex items-center justify-between text-xs">
                       <div className="flex-1 min-w-0">
                         <h4 className="font-medium text-gray-800 text-xs leading-tight truncate">{item.name}</h4>
@@ -1,5 +1,5 @@
 // frontend/src/context/GlobalStateContext.js
-import React, { createContext, useContext, useReducer, useEffect } from 'react';
+import React, { createContext, useContext, useReducer, useEffect, useRef, useCallback } from 'react';
 
 // Tipos de acciones
 const ACTIONS = {
@@ -8,6 +8,7 @@ const ACTIONS = {
   UPDATE_CART_ITEM: 'UPDATE_CART_ITEM',
   REMOVE_FROM_CART: 'REMOVE_FROM_CART',
   CLEAR_CART: 'CLEAR_CART',
+  APPLY_CART_LINE: 'APPLY_CART_LINE',
   SET_TABLES: 'SET_TABLES',
   UPDATE_TABLE: 'UPDATE_TABLE',
   ADD_TABLE: 'ADD_TABLE',
@@ -18,6 +19,36 @@ const ACTIONS = {
   SET_CATEGORIES: 'SET_CATEGORIES'
 };
 
+// Persistencia: una entrada de localStorage por carrito, escrita solo cuando
+// ese carrito cambió y agrupando ráfagas de cambios
+const LEGACY_STATE_KEY = 'pos_global_state';
+const CART_KEYS_KEY = 'pos_cart_keys';
+const CART_PREFIX = 'pos_cart:';
+const PERSIST_DELAY_MS = 250;
+
+// Mismo arreglo para cualquier carrito vacío (referencia estable para useMemo)
+const EMPTY_CART = [];
+
+function loadSavedCarts() {
+  const carts = {};
+  try {
+    const legacy = localStorage.getItem(LEGACY_STATE_KEY);
+    if (legacy) {
+      Object.assign(carts, JSON.parse(legacy).cart || {});
+    }
+    const keys = JSON.parse(localStorage.getItem(CART_KEYS_KEY) || '[]');
+    keys.forEach(cartKey => {
+      const saved = localStorage.getItem(CART_PREFIX + cartKey);
+      if (saved) {
+        carts[cartKey] = JSON.parse(saved);
+      }
+    });
+  } catch (error) {
+    console.error('Error cargando estado guardado:', error);
+  }
+  return carts;
+}
+
 // Estado inicial
 const initialState = {
   cart: {}, // { 'table-1': [...], 'delivery-2': [...], 'takeaway': [...] }
@@ -83,6 +114,32 @@ function globalReducer(state, action) {
       };
     }
 
+    // Delta de una línea recibido de otro dispositivo (cantidad resultante)
+    case ACTIONS.APPLY_CART_LINE: {
+      const { cartKey, line } = action.payload;
+      const currentCart = state.cart[cartKey] || [];
+      const existingItem = currentCart.find(item => item.id === line.menuItemId);
+
+      let newCart;
+      if (line.quantity === 0) {
+        newCart = currentCart.filter(item => item.id !== line.menuItemId);
+      } else if (existingItem) {
+        newCart = currentCart.map(item =>
+          item.id === line.menuItemId ? { ...item, ...line, id: line.menuItemId } : item
+        );
+      } else {
+        newCart = [...currentCart, { ...line, id: line.menuItemId }];
+      }
+
+      return {
+        ...state,
+        cart: {
+          ...state.cart,
+          [cartKey]: newCart
+        }
+      };
+    }
+
     case ACTIONS.CLEAR_CART: {
       const { cartKey } = action.payload;
       return {
@@ -167,55 +224,89 @@ export const useGlobalState = () => {
 export const GlobalStateProvider = ({ children }) => {
   const [state, dispatch] = useReducer(globalReducer, initialState);
 
-  // Persistir en localStorage
+  const savedCartsRef = useRef(null);
+  const persistTimerRef = useRef(null);
+
+  // Cargar carritos guardados
   useEffect(() => {
-    const savedState = localStorage.getItem('pos_global_state');
-    if (savedState) {
-      try {
-        const parsedState = JSON.parse(savedState);
-        dispatch({ type: ACTIONS.SET_CART, payload: parsedState.cart || {} });
-      } catch (error) {
-        console.error('Error cargando estado guardado:', error);
-      }
-    }
+    const carts = loadSavedCarts();
+    savedCartsRef.current = carts;
+    dispatch({ type: ACTIONS.SET_CART, payload: carts });
   }, []);
 
-  // Guardar en localStorage cuando cambie el estado
+  // Guardar solo los carritos que cambiaron, agrupando ráfagas de cambios
+  const persistCartsRef = useRef(() => {});
+  persistCartsRef.current = () => {
+    const saved = savedCartsRef.current;
+    const cart = state.cart;
+    if (saved === null || saved === cart) return;
+
+    Object.keys(cart).forEach(cartKey => {
+      if (saved[cartKey] !== cart[cartKey]) {
+        if (cart[cartKey].length > 0) {
+          localStorage.setItem(CART_PREFIX + cartKey, JSON.stringify(cart[cartKey]));
+        } else {
+          localStorage.removeItem(CART_PREFIX + cartKey);
+        }
+      }
+    });
+
+    const keys = Object.keys(cart).filter(cartKey => cart[cartKey].length > 0);
+    localStorage.setItem(CART_KEYS_KEY, JSON.stringify(keys));
+    localStorage.removeItem(LEGACY_STATE_KEY);
+    savedCartsRef.current = cart;
+  };
+
   useEffect(() => {
-    localStorage.setItem('pos_global_state', JSON.stringify({
-      cart: state.cart
-    }));
+    clearTimeout(persistTimerRef.current);
+    persistTimerRef.current = setTimeout(() => persistCartsRef.current(), PERSIST_DELAY_MS);
   }, [state.cart]);
 
-  // Acciones del carrito
-  const addToCart = (cartKey, item) => {
+  // No perder la última ráfaga si se cierra la pestaña
+  useEffect(() => {
+    const flush = () => persistCartsRef.current();
+    window.addEventListener('pagehide', flush);
+    return () => window.removeEventListener('pagehide', flush);
+  }, []);
+
+  // Acciones del carrito. Con identidad estable (useCallback) para que los
+  // efectos y componentes memorizados que dependen de ellas no se disparen
+  // en cada render; las lecturas cambian solo cuando cambia algún carrito.
+  const addToCart = useCallback((cartKey, item) => {
     dispatch({
       type: ACTIONS.ADD_TO_CART,
       payload: { cartKey, item }
     });
-  };
+  }, []);
 
-  const updateCartItem = (cartKey, itemId, quantity) => {
+  const updateCartItem = useCallback((cartKey, itemId, quantity) => {
     dispatch({
       type: ACTIONS.UPDATE_CART_ITEM,
       payload: { cartKey, itemId, quantity }
     });
-  };
+  }, []);
 
-  const clearCart = (cartKey) => {
+  const clearCart = useCallback((cartKey) => {
     dispatch({
       type: ACTIONS.CLEAR_CART,
       payload: { cartKey }
     });
-  };
+  }, []);
 
-  const getCurrentCart = (cartKey) => {
-    return cartKey ? state.cart[cartKey] || [] : [];
-  };
+  const applyCartLine = useCallback((cartKey, line) => {
+    dispatch({
+      type: ACTIONS.APPLY_CART_LINE,
+      payload: { cartKey, line }
+    });
+  }, []);
+
+  const getCurrentCart = useCallback((cartKey) => {
+    return cartKey ? state.cart[cartKey] || EMPTY_CART : EMPTY_CART;
+  }, [state.cart]);
 
-  const hasItemsInCart = (cartKey) => {
+  const hasItemsInCart = useCallback((cartKey) => {
     return state.cart[cartKey] && state.cart[cartKey].length > 0;
-  };
+  }, [state.cart]);
 
   // Acciones de mesas
   const setTables = (tables) => {
@@ -264,6 +355,7 @@ export const GlobalStateProvider = ({ children }) => {
     addToCart,
     updateCartItem,
     clearCart,
+    applyCartLine,
     getCurrentCart,
     hasItemsInCart,
 
@@ -0,0 +1,47 @@
+// frontend/src/context/cartSelectors.js
+// Selectores puros del POS. Se usan con useMemo sobre referencias que el
+// reducer solo cambia cuando cambia el dato (el arreglo de un carrito, la
+// lista de productos), así cada cálculo corre una vez por cambio y no en
+// cada render.
+
+const EMPTY = [];
+
+// Subtotal, descuento y total (sin IVA) de un carrito
+export function selectCartTotals(cart, descuento = 0, tipoDescuento = 'porcentaje') {
+  let subtotal = 0;
+  let itemCount = 0;
+  for (const item of cart) {
+    subtotal += item.price * item.quantity;
+    itemCount += item.quantity;
+  }
+
+  const discount = tipoDescuento === 'porcentaje'
+    ? (subtotal * descuento) / 100
+    : descuento;
+
+  return {
+    subtotal,
+    discount,
+    total: Math.max(0, subtotal - discount),
+    itemCount,
+    lines: cart.length
+  };
+}
+
+// Productos agrupados por categoría en una sola pasada; cambiar de
+// categoría es una búsqueda en el Map y regresa siempre el mismo arreglo
+export function selectItemsByCategory(menuItems) {
+  const byCategory = new Map();
+  for (const item of menuItems) {
+    if (!byCategory.has(item.categoryId)) {
+      byCategory.set(item.categoryId, []);
+    }
+    byCategory.get(item.categoryId).push(item);
+  }
+  return byCategory;
+}
+
+export function selectCategoryItems(menuItems, byCategory, categoryId) {
+  if (!categoryId) return menuItems;
+  return byCategory.get(categoryId) || EMPTY;
+}
@@ -0,0 +1,68 @@
+// frontend/src/hooks/useCustomerSearch.js
+import { useEffect, useRef, useState } from 'react';
+
+const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:3001';
+
+// Autocompletado de clientes contra /api/customers/search/:query.
+// Espera `delay` ms sin teclear antes de pedir, cancela la petición anterior
+// al cambiar el texto (AbortController) y descarta respuestas que llegan
+// fuera de orden, así solo se muestra el resultado del último texto.
+export const useCustomerSearch = ({ token, query, delay = 200, limit = 20 } = {}) => {
+  const [results, setResults] = useState([]);
+  const [searching, setSearching] = useState(false);
+  const [error, setError] = useState(null);
+  const requestRef = useRef(0);
+
+  useEffect(() => {
+    const text = (query || '').trim();
+    const requestId = ++requestRef.current;
+
+    if (!text) {
+      setResults([]);
+      setSearching(false);
+      setError(null);
+      return undefined;
+    }
+
+    const controller = new AbortController();
+    setSearching(true);
+
+    const timer = setTimeout(async () => {
+      try {
+        const response = await fetch(
+          `${API_URL}/api/customers/search/${encodeURIComponent(text)}?limit=${limit}`,
+          {
+            headers: {
+              'Authorization': `Bearer ${token}`,
+              'Content-Type': 'application/json'
+            },
+            signal: controller.signal
+          }
+        );
+        const data = await response.json();
+
+        if (requestId === requestRef.current) {
+          if (!response.ok) throw new Error(data.error || `HTTP ${response.status}`);
+          setResults(data.customers || []);
+          setError(null);
+        }
+      } catch (err) {
+        if (err.name !== 'AbortError' && requestId === requestRef.current) {
+          console.error('Error buscando clientes:', err);
+          setError(err.message);
+        }
+      } finally {
+        if (requestId === requestRef.current) {
+          setSearching(false);
+        }
+      }
+    }, delay);
+
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [token, query, delay, limit]);
+
+  return { results, searching, error };
+};
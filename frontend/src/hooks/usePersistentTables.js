@@ -1,17 +1,52 @@
 // hooks/usePersistentTables.js
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import dataPersistence from '../services/DataPersistence';
 
-export const usePersistentTables = () => {
+const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:3001';
+
+// Estado del servidor → estado local
+const ESTADOS = {
+  available: 'disponible',
+  occupied: 'ocupada',
+  reserved: 'reservada',
+  cleaning: 'limpieza'
+};
+
+const mesaDesdeServidor = (table) => ({
+  id: table.id,
+  numero: table.number,
+  capacidad: table.capacity,
+  ubicacion: table.location,
+  estado: ESTADOS[table.status] || table.status,
+  ultima_actualizacion: table.updatedAt
+});
+
+// Con `token` las mesas se sincronizan con el salón del servidor: la primera
+// vez se baja la foto completa y después solo los cambios desde la versión
+// guardada en IndexedDB (/api/tables/changes?since=), al montar, al volver
+// la conexión y con cada 'table-updated' que no sea la siguiente versión.
+// Con sincronizarAlConectar: false el componente trae las mesas por su
+// cuenta (p. ej. dentro de /api/bootstrap) y las entrega a
+// aplicarRespuestaMesas; el hook solo carga la copia local.
+export const usePersistentTables = ({ token, sincronizarAlConectar = true } = {}) => {
   const [mesas, setMesas] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const versionRef = useRef(null);
+  const sincronizandoRef = useRef(null);
 
   // Cargar mesas al inicializar
   useEffect(() => {
     cargarMesas();
   }, []);
 
+  useEffect(() => {
+    if (!token || !sincronizarAlConectar) return undefined;
+    const alVolverConexion = () => sincronizarMesas();
+    window.addEventListener('online', alVolverConexion);
+    return () => window.removeEventListener('online', alVolverConexion);
+  }, [token, sincronizarAlConectar]);
+
   const cargarMesas = async () => {
     try {
       setLoading(true);
@@ -19,14 +54,17 @@ export const usePersistentTables = () => {
       
       // Esperar a que la base de datos esté inicializada
       await dataPersistence.init();
-      
+
+      // El servidor manda; sin conexión se usa la copia local
+      if (token && sincronizarAlConectar && await sincronizarMesas()) {
+        return;
+      }
+
       const mesasGuardadas = await dataPersistence.obtenerMesas();
       
       // Si no hay mesas guardadas, crear algunas por defecto
       if (mesasGuardadas.length === 0) {
-        await inicializarMesasDefault();
-        const mesasDefault = await dataPersistence.obtenerMesas();
-        setMesas(mesasDefault);
+        setMesas(await inicializarMesasDefault());
       } else {
         setMesas(mesasGuardadas);
       }
@@ -41,6 +79,76 @@ export const usePersistentTables = () => {
     }
   };
 
+  // Pide los cambios desde la versión local y los guarda en un solo lote.
+  // Resuelve true si las mesas quedaron al día con el servidor.
+  const sincronizarMesas = () => {
+    if (!token || !navigator.onLine) return Promise.resolve(false);
+    if (sincronizandoRef.current) return sincronizandoRef.current;
+
+    const tarea = async () => {
+      try {
+        if (versionRef.current === null) {
+          versionRef.current = await dataPersistence.obtenerVersionMesas();
+        }
+        const since = versionRef.current ?? '';
+        const response = await fetch(`${API_URL}/api/tables/changes?since=${since}`, {
+          headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+          }
+        });
+        const data = await response.json();
+        if (!response.ok) throw new Error(data.error || `HTTP ${response.status}`);
+
+        await aplicarRespuestaMesas(data);
+        return true;
+      } catch (err) {
+        console.warn('⚠️ No se pudieron sincronizar las mesas:', err.message);
+        return false;
+      } finally {
+        sincronizandoRef.current = null;
+      }
+    };
+
+    sincronizandoRef.current = tarea();
+    return sincronizandoRef.current;
+  };
+
+  // Respuesta de /api/tables/changes ({ version, reset, tables | changes }):
+  // la guarda en un solo lote y actualiza la versión local
+  const aplicarRespuestaMesas = async (data) => {
+    if (data.reset) {
+      await dataPersistence.guardarMesasServidor(data.tables.map(mesaDesdeServidor), {
+        version: data.version,
+        reset: true
+      });
+    } else if (data.changes.length > 0) {
+      const tablas = data.changes.map(change => change.table);
+      await dataPersistence.guardarMesasServidor(
+        tablas.filter(table => !table.removed).map(mesaDesdeServidor),
+        { version: data.version, eliminadas: tablas.filter(table => table.removed).map(table => table.id) }
+      );
+    }
+    versionRef.current = data.version;
+
+    if (data.reset || data.changes.length > 0) {
+      setMesas(await dataPersistence.obtenerMesas());
+    }
+  };
+
+  // Evento 'table-updated' ({ ...mesa, version }): si es la siguiente
+  // versión se aplica tal cual; si no, se piden los cambios faltantes
+  const aplicarCambioServidor = async (table) => {
+    if (versionRef.current === null || table.version !== versionRef.current + 1) {
+      return sincronizarMesas();
+    }
+    versionRef.current = table.version;
+    const mesa = mesaDesdeServidor(table);
+    setMesas(prevMesas => prevMesas.map(m => (m.id === mesa.id ? { ...m, ...mesa } : m)));
+    await dataPersistence.guardarMesasServidor([mesa], { version: table.version });
+    return true;
+  };
+
   const inicializarMesasDefault = async () => {
     const mesasDefault = [
       { numero: 1, capacidad: 2 },
@@ -51,13 +159,8 @@ export const usePersistentTables = () => {
       { numero: 6, capacidad: 4 }
     ];
 
-    for (const mesa of mesasDefault) {
-      try {
-        await dataPersistence.crearMesa(mesa.numero, mesa.capacidad);
-      } catch (err) {
-        console.warn(`Mesa ${mesa.numero} ya existe o error al crearla:`, err);
-      }
-    }
+    // Todas en una sola transacción
+    return dataPersistence.crearMesas(mesasDefault);
   };
 
   const crearMesasTemporales = () => {
@@ -190,6 +293,9 @@ export const usePersistentTables = () => {
     
     // Métodos principales
     cargarMesas,
+    sincronizarMesas,
+    aplicarRespuestaMesas,
+    aplicarCambioServidor,
     agregarMesa,
     cambiarEstadoMesa,
     eliminarMesa,
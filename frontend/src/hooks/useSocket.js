@@ -4,17 +4,32 @@ import io from 'socket.io-client';
 
 const SOCKET_URL = process.env.REACT_APP_API_URL || window.location.origin;
 
-export const useSocket = () => {
+// El servidor envía los eventos en lotes numerados por canal:
+// { channel, epoch, events: [{ seq, event, data, at }] }.
+// Si falta un seq se pide 'events-resync'; si el servidor ya no lo tiene
+// responde 'events-reset' y se avisa con el evento local 'resync-required'
+// para que la pantalla recargue su estado por REST.
+export const useSocket = ({ token, deviceType } = {}) => {
   const socketRef = useRef(null);
+  const handlersRef = useRef(new Map());
+  const cursorRef = useRef({ channel: null, epoch: null, seq: 0 });
   const [isConnected, setIsConnected] = useState(false);
 
   useEffect(() => {
+    const dispatch = (event, data) => {
+      const handlers = handlersRef.current.get(event);
+      if (handlers) {
+        handlers.forEach(handler => handler(data));
+      }
+    };
+
     // Conectar al servidor de Socket.io
     socketRef.current = io(SOCKET_URL, {
       transports: ['websocket', 'polling'],
       reconnection: true,
       reconnectionAttempts: 5,
-      reconnectionDelay: 1000
+      reconnectionDelay: 1000,
+      auth: { token, deviceType }
     });
 
     socketRef.current.on('connect', () => {
@@ -31,22 +46,61 @@ export const useSocket = () => {
       console.error('❌ Error de conexión Socket.io:', error);
     });
 
+    // Al (re)conectar: si es el mismo canal y el mismo arranque del
+    // servidor, pedir lo que se perdió mientras estuvo desconectado
+    socketRef.current.on('events-hello', ({ channel, epoch, seq }) => {
+      const cursor = cursorRef.current;
+      const sameStream = cursor.channel === channel && cursor.epoch === epoch;
+
+      if (sameStream && cursor.seq < seq) {
+        socketRef.current.emit('events-resync', { epoch, since: cursor.seq });
+        return;
+      }
+      if (cursor.epoch && !sameStream) {
+        dispatch('resync-required', { reason: 'epoch' });
+      }
+      cursorRef.current = { channel, epoch, seq };
+    });
+
+    socketRef.current.on('events', ({ channel, epoch, events }) => {
+      const cursor = cursorRef.current;
+      if (cursor.channel !== channel || cursor.epoch !== epoch) return;
+
+      for (const envelope of events) {
+        if (envelope.seq <= cursor.seq) continue;
+        if (envelope.seq > cursor.seq + 1) {
+          // Hueco: pedir el tramo faltante y esperar la repetición
+          socketRef.current.emit('events-resync', { epoch, since: cursor.seq });
+          return;
+        }
+        cursor.seq = envelope.seq;
+        dispatch(envelope.event, envelope.data);
+      }
+    });
+
+    socketRef.current.on('events-reset', ({ channel, epoch, seq }) => {
+      cursorRef.current = { channel, epoch, seq };
+      dispatch('resync-required', { reason: 'gap' });
+    });
+
     return () => {
       if (socketRef.current) {
         socketRef.current.disconnect();
       }
     };
-  }, []);
+  }, [token, deviceType]);
 
   const on = (event, callback) => {
-    if (socketRef.current) {
-      socketRef.current.on(event, callback);
+    if (!handlersRef.current.has(event)) {
+      handlersRef.current.set(event, new Set());
     }
+    handlersRef.current.get(event).add(callback);
   };
 
   const off = (event, callback) => {
-    if (socketRef.current) {
-      socketRef.current.off(event, callback);
+    const handlers = handlersRef.current.get(event);
+    if (handlers) {
+      handlers.delete(callback);
     }
   };
 
@@ -4,4 +4,17 @@ import './index.css';
 import App from './App';
 
 const root = ReactDOM.createRoot(document.getElementById('root'));
-root.render(<App />); 
+root.render(<App />);
+
+// Benchmarks en el dispositivo (?bench=startup|cart|persistence); cada uno
+// es un chunk aparte que solo se descarga al pedirlo
+const BENCHMARKS = {
+  startup: () => import('./benchmarks/startupBench').then(({ runStartupBench }) => runStartupBench()),
+  cart: () => import('./benchmarks/cartBench').then(({ runCartBench }) => runCartBench()),
+  persistence: () => import('./benchmarks/persistenceBench').then(({ runPersistenceBench }) => runPersistenceBench())
+};
+
+const bench = BENCHMARKS[new URLSearchParams(window.location.search).get('bench')];
+if (bench) {
+  bench().catch(error => console.error('Error en benchmark:', error));
+}
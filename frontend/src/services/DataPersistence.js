@@ -1,14 +1,149 @@
-// Servicio para manejar la persistencia de datos en IndexedDB
+// frontend/src/services/DataPersistence.js
+// Persistencia local en IndexedDB con escritura diferida (write-behind).
+//
+// - Las escrituras de mesas, carrito y configuración se encolan en memoria,
+//   una por store + llave: si el carrito de una mesa cambia diez veces en
+//   FLUSH_MS solo se escribe la última versión. Al vencer el temporizador la
+//   cola completa se escribe en UNA transacción que abarca todos los stores.
+// - Las lecturas consultan primero la cola, así nunca regresan datos viejos.
+// - guardarVenta no espera al temporizador: la venta y su entrada en el
+//   `outbox` se confirman juntas (con durabilidad estricta) antes de resolver.
+//   Una venta que ya aceptó /api/sales se guarda sin entrada en el outbox.
+// - El outbox se sube a /api/sync/sales en bloques, con reintentos y espera
+//   exponencial, cuando hay conexión; el servidor es idempotente por clientId.
+// - Las ventas del servidor se bajan de forma incremental con
+//   /api/sync/pending?cursor= (cursor del servidor, por páginas).
+// - Los insumos y movimientos de inventario de la tableta se suben a
+//   /api/inventory/sync (también idempotente por clientId); la existencia
+//   vigente la devuelve el servidor, que lleva el libro de movimientos.
+
+const DB_NAME = 'RestaurantPOS_DB';
+const DB_VERSION = 3; // 3: outbox, ventas_remotas y carrito por mesa
+
+const FLUSH_MS = 50;
+const SYNC_CHUNK = 50;
+const SYNC_INTERVAL_MS = 30000;
+const RETRY_BASE_MS = 2000;
+const RETRY_MAX_MS = 5 * 60 * 1000;
+const DOWNLOAD_PAGE = 200;
+const DOWNLOAD_MAX_PAGES = 10; // por sincronización; lo demás en la siguiente
+
+// keyPath de cada store (para combinar la cola con lo leído de la base)
+const KEY_PATHS = {
+  mesas: 'id',
+  folios: 'id',
+  ventas: 'id',
+  carrito: 'mesa_id',
+  configuracion: 'clave',
+  outbox: 'clientId',
+  ventas_remotas: 'id',
+  inventario: 'id',
+  movimientos_inventario: 'id'
+};
+
+const STORES = Object.keys(KEY_PATHS);
+
+// Llave de idempotencia de la venta; randomUUID solo existe en contextos
+// seguros (https o localhost) y las tabletas entran por la IP de la red local
+function nuevoClientId() {
+  if (typeof crypto !== 'undefined' && crypto.randomUUID) {
+    return crypto.randomUUID();
+  }
+  const aleatorio = Array.from({ length: 3 }, () => Math.random().toString(36).slice(2, 10)).join('');
+  return `${Date.now().toString(36)}-${aleatorio}`;
+}
+
+// Espera antes del siguiente intento: 2 s, 4 s, 8 s... hasta 5 min, con
+// variación para que las tabletas no reintenten todas a la vez
+function esperaReintento(intentos) {
+  const espera = Math.min(RETRY_MAX_MS, RETRY_BASE_MS * 2 ** Math.max(0, intentos - 1));
+  return Math.round(espera * (0.75 + Math.random() * 0.5));
+}
+
+// Movimiento local → formato de /api/inventory/sync. Una salida es un ajuste
+// negativo; un ajuste local fija la existencia (conteo físico)
+function movimientoParaServidor(movimiento, producto) {
+  const base = {
+    clientId: movimiento.clientId,
+    reason: movimiento.motivo || movimiento.notas || null,
+    occurredAt: movimiento.fecha,
+    ...(producto.serverId ? { inventoryItemId: producto.serverId } : { itemClientId: producto.clientId })
+  };
+  const cantidad = Number(movimiento.cantidad);
+  if (movimiento.tipo === 'entrada') return { ...base, type: 'receipt', quantity: cantidad };
+  if (movimiento.tipo === 'salida') return { ...base, type: 'adjustment', delta: -cantidad };
+  return { ...base, type: 'adjustment', count: cantidad };
+}
+
+// Producto local → insumo de /api/inventory/sync
+function insumoParaServidor(producto) {
+  return {
+    clientId: producto.clientId,
+    name: producto.nombre,
+    category: producto.categoria || null,
+    unit: producto.unidad || null,
+    minLevel: Number(producto.cantidadMinima || 0),
+    isActive: !producto.eliminado
+  };
+}
+
+// Venta local → formato de /api/sync/sales
+function ventaParaServidor(venta) {
+  return {
+    clientId: venta.clientId,
+    folio: venta.folio,
+    items: venta.items,
+    subtotal: venta.subtotal,
+    discount: venta.descuento ?? venta.discount ?? 0,
+    tax: venta.tax ?? 0,
+    total: venta.total,
+    paymentMethod: venta.paymentMethod,
+    orderType: venta.orderType,
+    tableId: venta.tableId || null,
+    customerId: venta.customerId || null,
+    notes: venta.notes || null,
+    deviceId: venta.deviceId,
+    createdAt: venta.fecha
+  };
+}
 
 class DataPersistenceService {
-  constructor() {
-    this.dbName = 'RestaurantPOS_DB';
-    this.version = 2; // Subir versión para stores nuevos
+  constructor({ dbName = DB_NAME } = {}) {
+    this.dbName = dbName;
+    this.version = DB_VERSION;
     this.db = null;
+
+    // Cola de escritura: `${store}|${llave}` → { type, store, key, value, waiters }
+    this.cola = new Map();
+    this.secuencia = 0;
+    this.flushTimer = null;
+    this.enCurso = Promise.resolve();
+    this.stats = { escrituras: 0, combinadas: 0, lotes: 0, fallidas: 0 };
+
+    this.ultimoFolio = null;
+    this.cargaFolio = null;
+
+    this.sync = null;
+    this.subiendo = null;
+    this.syncTimer = null;
+    this.syncInterval = null;
+    this.onOnline = () => this.sincronizar();
+
+    // Al ocultar o cerrar la pestaña se escribe lo pendiente sin esperar
+    if (typeof window !== 'undefined') {
+      const vaciar = () => this.flush().catch(() => {});
+      window.addEventListener('pagehide', vaciar);
+      document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'hidden') vaciar();
+      });
+    }
+
     this._initPromise = this.init();
   }
 
   async init() {
+    if (this._initPromise) return this._initPromise;
+
     return new Promise((resolve, reject) => {
       const request = indexedDB.open(this.dbName, this.version);
 
@@ -23,9 +158,9 @@ class DataPersistenceService {
 
         // Crear tabla de mesas
         if (!db.objectStoreNames.contains('mesas')) {
-          const mesasStore = db.createObjectStore('mesas', { 
-            keyPath: 'id', 
-            autoIncrement: true 
+          const mesasStore = db.createObjectStore('mesas', {
+            keyPath: 'id',
+            autoIncrement: true
           });
           mesasStore.createIndex('numero', 'numero', { unique: true });
           mesasStore.createIndex('estado', 'estado', { unique: false });
@@ -33,30 +168,34 @@ class DataPersistenceService {
 
         // Crear tabla de folios
         if (!db.objectStoreNames.contains('folios')) {
-          const foliosStore = db.createObjectStore('folios', { 
-            keyPath: 'id', 
-            autoIncrement: true 
+          const foliosStore = db.createObjectStore('folios', {
+            keyPath: 'id',
+            autoIncrement: true
           });
           foliosStore.createIndex('numero', 'numero', { unique: true });
         }
 
         // Crear tabla de ventas
         if (!db.objectStoreNames.contains('ventas')) {
-          const ventasStore = db.createObjectStore('ventas', { 
-            keyPath: 'id', 
-            autoIncrement: true 
+          const ventasStore = db.createObjectStore('ventas', {
+            keyPath: 'id',
+            autoIncrement: true
           });
           ventasStore.createIndex('fecha', 'fecha', { unique: false });
           ventasStore.createIndex('mesa_id', 'mesa_id', { unique: false });
         }
+        const ventasStore = request.transaction.objectStore('ventas');
+        if (!ventasStore.indexNames.contains('clientId')) {
+          ventasStore.createIndex('clientId', 'clientId', { unique: true });
+        }
 
-        // Crear tabla de productos en carrito
+        // Carrito: un registro por mesa ({ mesa_id, productos }). En la
+        // versión 2 era un registro por producto, pero nunca se escribía
+        if (event.oldVersion < 3 && db.objectStoreNames.contains('carrito')) {
+          db.deleteObjectStore('carrito');
+        }
         if (!db.objectStoreNames.contains('carrito')) {
-          const carritoStore = db.createObjectStore('carrito', { 
-            keyPath: 'id', 
-            autoIncrement: true 
-          });
-          carritoStore.createIndex('mesa_id', 'mesa_id', { unique: false });
+          db.createObjectStore('carrito', { keyPath: 'mesa_id' });
         }
 
         // Crear configuraciones del sistema
@@ -64,11 +203,22 @@ class DataPersistenceService {
           db.createObjectStore('configuracion', { keyPath: 'clave' });
         }
 
+        // Ventas pendientes de subir al servidor
+        if (!db.objectStoreNames.contains('outbox')) {
+          db.createObjectStore('outbox', { keyPath: 'clientId' });
+        }
+
+        // Ventas bajadas del servidor (/api/sync/pending)
+        if (!db.objectStoreNames.contains('ventas_remotas')) {
+          const remotasStore = db.createObjectStore('ventas_remotas', { keyPath: 'id' });
+          remotasStore.createIndex('createdAt', 'createdAt', { unique: false });
+        }
+
         // === NUEVO: Inventario
         if (!db.objectStoreNames.contains('inventario')) {
-          const inventarioStore = db.createObjectStore('inventario', { 
-            keyPath: 'id', 
-            autoIncrement: true 
+          const inventarioStore = db.createObjectStore('inventario', {
+            keyPath: 'id',
+            autoIncrement: true
           });
           inventarioStore.createIndex('nombre', 'nombre', { unique: false });
           inventarioStore.createIndex('categoria', 'categoria', { unique: false });
@@ -76,9 +226,9 @@ class DataPersistenceService {
 
         // === NUEVO: Movimientos de Inventario
         if (!db.objectStoreNames.contains('movimientos_inventario')) {
-          const movsStore = db.createObjectStore('movimientos_inventario', { 
-            keyPath: 'id', 
-            autoIncrement: true 
+          const movsStore = db.createObjectStore('movimientos_inventario', {
+            keyPath: 'id',
+            autoIncrement: true
           });
           movsStore.createIndex('productoId', 'productoId', { unique: false });
           movsStore.createIndex('fecha', 'fecha', { unique: false });
@@ -93,45 +243,663 @@ class DataPersistenceService {
     await this._initPromise;
   }
 
-  // Métodos para mesas (igual)
-  async crearMesa(numero, capacidad = 4) { await this.ready(); /* ... */ }
-  async obtenerMesas() { await this.ready(); /* ... */ }
-  async actualizarEstadoMesa(mesaId, nuevoEstado) { await this.ready(); /* ... */ }
+  // =========================
+  // ==== COLA DE ESCRITURA ==
+  // =========================
 
-  // Métodos para folios (igual)
-  async obtenerSiguienteFolio() { await this.ready(); /* ... */ }
-  async guardarVenta(venta) { await this.ready(); /* ... */ }
+  /**
+   * Encola una operación ({ type: 'put' | 'add' | 'delete' | 'clear', store,
+   * key, value }). Una operación sobre la misma llave reemplaza a la anterior
+   * y hereda sus promesas. Resuelve con el resultado del request (la llave
+   * generada en 'add') cuando se confirma la transacción del lote.
+   */
+  encolar(op) {
+    let id = `${op.store}|${op.key}`;
+    if (op.type === 'add') id = `${op.store}|add|${++this.secuencia}`;
+    if (op.type === 'clear') id = `${op.store}|clear`;
 
-  // Métodos para carrito (igual)
-  async guardarCarrito(mesaId, productos) { await this.ready(); /* ... */ }
-  async obtenerCarrito(mesaId) { await this.ready(); /* ... */ }
-  async limpiarCarritoMesa(mesaId) { await this.ready(); /* ... */ }
-  async obtenerTodoCarrito() { await this.ready(); /* ... */ }
+    return new Promise((resolve, reject) => {
+      const waiters = [{ resolve, reject }];
 
-  // Método para resetear datos (útil para desarrollo)
-  async resetearBaseDatos() {
+      // Vaciar un store anula lo que estaba pendiente en él
+      if (op.type === 'clear') {
+        for (const [pendienteId, pendiente] of this.cola) {
+          if (pendiente.store === op.store) {
+            waiters.push(...pendiente.waiters);
+            this.cola.delete(pendienteId);
+          }
+        }
+      }
+
+      const anterior = this.cola.get(id);
+      if (anterior) {
+        waiters.push(...anterior.waiters);
+        this.stats.combinadas += 1;
+      }
+
+      this.cola.set(id, { ...op, waiters });
+      this.stats.escrituras += 1;
+      this.programarFlush();
+    });
+  }
+
+  escribir(store, value) {
+    return this.encolar({ type: 'put', store, key: value[KEY_PATHS[store]], value });
+  }
+
+  borrar(store, key) {
+    return this.encolar({ type: 'delete', store, key });
+  }
+
+  programarFlush() {
+    if (!this.flushTimer) {
+      this.flushTimer = setTimeout(() => {
+        this.flush().catch(error => console.error('Error escribiendo en IndexedDB:', error));
+      }, FLUSH_MS);
+    }
+  }
+
+  /**
+   * Escribe la cola en una sola transacción sobre todos los stores tocados.
+   * Resuelve cuando todo lo encolado hasta ahora está confirmado. Un request
+   * que falla (p. ej. número de mesa repetido) rechaza solo sus promesas, sin
+   * abortar el resto del lote.
+   */
+  async flush() {
+    clearTimeout(this.flushTimer);
+    this.flushTimer = null;
+    if (this.cola.size === 0) return this.enCurso;
+
+    const ops = [...this.cola.values()];
+    this.cola.clear();
+
+    const lote = this.ready().then(() => this.escribirLote(ops));
+    this.enCurso = lote.catch(() => {});
+    return lote;
+  }
+
+  escribirLote(ops) {
+    const stores = [...new Set(ops.map(op => op.store))];
+    // Una venta exige durabilidad estricta; carrito y mesas se pueden perder
+    // en un apagón sin problema y la escritura relajada es mucho más barata
+    const durability = stores.includes('outbox') ? 'strict' : 'relaxed';
+
+    return new Promise((resolve, reject) => {
+      let transaction;
+      try {
+        transaction = this.db.transaction(stores, 'readwrite', { durability });
+      } catch (error) {
+        ops.forEach(op => op.waiters.forEach(waiter => waiter.reject(error)));
+        reject(error);
+        return;
+      }
+
+      const resultados = new Map();
+      const errores = new Map();
+
+      for (const op of ops) {
+        const store = transaction.objectStore(op.store);
+        let request;
+        if (op.type === 'put') request = store.put(op.value);
+        else if (op.type === 'add') request = store.add(op.value);
+        else if (op.type === 'delete') request = store.delete(op.key);
+        else request = store.clear();
+
+        request.onsuccess = () => resultados.set(op, request.result);
+        request.onerror = (event) => {
+          event.preventDefault(); // no abortar el lote completo
+          errores.set(op, request.error);
+        };
+      }
+
+      transaction.oncomplete = () => {
+        this.stats.lotes += 1;
+        this.stats.fallidas += errores.size;
+        for (const op of ops) {
+          const error = errores.get(op);
+          op.waiters.forEach(waiter => (error ? waiter.reject(error) : waiter.resolve(resultados.get(op))));
+        }
+        resolve();
+      };
+
+      transaction.onabort = () => {
+        const error = transaction.error || new Error('Transacción de IndexedDB abortada');
+        ops.forEach(op => op.waiters.forEach(waiter => waiter.reject(error)));
+        reject(error);
+      };
+    });
+  }
+
+  // Lectura con una transacción de solo lectura
+  async leer(store, fn) {
+    await this.ready();
+    return new Promise((resolve, reject) => {
+      const request = fn(this.db.transaction([store], 'readonly').objectStore(store));
+      request.onsuccess = () => resolve(request.result);
+      request.onerror = () => reject(request.error);
+    });
+  }
+
+  // Un registro, viendo primero la cola
+  async obtener(store, key) {
+    const pendiente = this.cola.get(`${store}|${key}`);
+    if (pendiente) return pendiente.type === 'put' ? pendiente.value : undefined;
+    if (this.cola.has(`${store}|clear`)) return undefined;
+    return this.leer(store, objectStore => objectStore.get(key));
+  }
+
+  // Todos los registros de un store con la cola aplicada encima
+  async obtenerTodos(store) {
+    const filas = await this.leer(store, objectStore => objectStore.getAll());
+    const keyPath = KEY_PATHS[store];
+    const registros = new Map(
+      this.cola.has(`${store}|clear`) ? [] : filas.map(fila => [String(fila[keyPath]), fila])
+    );
+
+    for (const op of this.cola.values()) {
+      if (op.store !== store) continue;
+      if (op.type === 'put') registros.set(String(op.key), op.value);
+      if (op.type === 'delete') registros.delete(String(op.key));
+    }
+    return [...registros.values()];
+  }
+
+  // =========================
+  // ======== MESAS ==========
+  // =========================
+
+  async crearMesa(numero, capacidad = 4) {
+    const [mesa] = await this.crearMesas([{ numero, capacidad }]);
+    return mesa;
+  }
+
+  // Alta de varias mesas en una sola transacción
+  async crearMesas(lista) {
+    const ahora = new Date().toISOString();
+    const mesas = lista.map(({ numero, capacidad = 4 }) => ({
+      numero,
+      capacidad,
+      estado: 'disponible',
+      fecha_creacion: ahora,
+      ultima_actualizacion: ahora
+    }));
+
+    const escrituras = mesas.map(mesa => this.encolar({ type: 'add', store: 'mesas', value: mesa }));
+    this.flush().catch(() => {}); // los errores llegan por cada escritura
+    const ids = await Promise.all(escrituras);
+    return mesas.map((mesa, i) => ({ ...mesa, id: ids[i] }));
+  }
+
+  async obtenerMesas() {
+    const mesas = await this.obtenerTodos('mesas');
+    return mesas
+      .filter(mesa => mesa.estado !== 'inactiva')
+      .sort((a, b) => a.numero - b.numero);
+  }
+
+  async actualizarEstadoMesa(mesaId, nuevoEstado) {
+    const mesa = await this.obtener('mesas', mesaId);
+    if (!mesa) {
+      throw new Error('Mesa no encontrada');
+    }
+    const actualizada = { ...mesa, estado: nuevoEstado, ultima_actualizacion: new Date().toISOString() };
+    this.escribir('mesas', actualizada).catch(error => console.error('Error guardando mesa:', error));
+    return actualizada;
+  }
+
+  /**
+   * Aplica mesas del servidor (/api/tables/state o /changes) y guarda la
+   * versión del salón, todo en el mismo lote. Con reset se reemplazan todas.
+   */
+  async guardarMesasServidor(mesas, { version, reset = false, eliminadas = [] } = {}) {
+    const escrituras = [];
+    if (reset) escrituras.push(this.encolar({ type: 'clear', store: 'mesas' }));
+    mesas.forEach(mesa => escrituras.push(this.escribir('mesas', mesa)));
+    eliminadas.forEach(id => escrituras.push(this.borrar('mesas', id)));
+    escrituras.push(this.escribir('configuracion', { clave: 'mesas_version', valor: version }));
+    await Promise.all(escrituras);
+  }
+
+  async obtenerVersionMesas() {
+    const registro = await this.obtener('configuracion', 'mesas_version');
+    return registro ? registro.valor : null;
+  }
+
+  // =========================
+  // ==== FOLIOS Y VENTAS ====
+  // =========================
+
+  // El contador vive en memoria y se persiste con el siguiente lote (o con
+  // la venta, que se escribe de inmediato)
+  async obtenerSiguienteFolio() {
+    if (this.ultimoFolio === null) {
+      if (!this.cargaFolio) {
+        this.cargaFolio = this.obtener('configuracion', 'ultimo_folio').then(registro => {
+          if (this.ultimoFolio === null) this.ultimoFolio = registro ? registro.valor : 0;
+        });
+      }
+      await this.cargaFolio;
+    }
+
+    const folio = ++this.ultimoFolio;
+    this.escribir('configuracion', { clave: 'ultimo_folio', valor: folio })
+      .catch(error => console.error('Error guardando folio:', error));
+    return folio;
+  }
+
+  // Llave de idempotencia para una venta nueva (antes de mandarla)
+  nuevoClientId() {
+    return nuevoClientId();
+  }
+
+  /**
+   * Guarda la venta y la agrega al outbox en la misma transacción; resuelve
+   * cuando ambas están confirmadas en disco. La subida al servidor ocurre
+   * en segundo plano.
+   * - enviada: el servidor ya la registró (POST /api/sales); solo se guarda
+   *   en el historial local
+   */
+  async guardarVenta(venta, { enviada = false } = {}) {
+    const registro = {
+      ...venta,
+      clientId: venta.clientId || nuevoClientId(),
+      fecha: venta.fecha || new Date().toISOString(),
+      mesa_id: venta.tableId ?? null
+    };
+
+    const escrituras = [this.encolar({ type: 'add', store: 'ventas', value: registro })];
+    if (!enviada) {
+      escrituras.push(this.escribir('outbox', {
+        clientId: registro.clientId,
+        venta: ventaParaServidor(registro),
+        intentos: 0,
+        siguienteIntento: 0,
+        error: null,
+        rechazada: false,
+        creada: registro.fecha
+      }));
+    }
+    this.flush().catch(() => {}); // los errores llegan por cada escritura
+    const [id] = await Promise.all(escrituras);
+
+    if (!enviada) this.programarSincronizacion(0);
+    return { ...registro, id };
+  }
+
+  // =========================
+  // ======= CARRITO =========
+  // =========================
+
+  // Cada toque del cajero reemplaza el carrito pendiente de la mesa; solo el
+  // último llega a disco
+  guardarCarrito(mesaId, productos) {
+    if (!productos || productos.length === 0) {
+      return this.limpiarCarritoMesa(mesaId);
+    }
+    return this.escribir('carrito', {
+      mesa_id: mesaId,
+      productos,
+      ultima_actualizacion: new Date().toISOString()
+    });
+  }
+
+  async obtenerCarrito(mesaId) {
+    const registro = await this.obtener('carrito', mesaId);
+    return registro ? registro.productos : [];
+  }
+
+  limpiarCarritoMesa(mesaId) {
+    return this.borrar('carrito', mesaId);
+  }
+
+  async obtenerTodoCarrito() {
+    return this.obtenerTodos('carrito');
+  }
+
+  // =========================
+  // ==== SINCRONIZACIÓN =====
+  // =========================
+
+  /**
+   * Activa la subida del outbox y la descarga incremental.
+   * - apiUrl: base del backend
+   * - getToken: función que regresa el JWT vigente
+   * - deviceId: identificador de la tableta
+   * - inventario: subir también el inventario (solo admin y gerente)
+   */
+  iniciarSincronizacion({ apiUrl, getToken, deviceId, inventario = false, intervalo = SYNC_INTERVAL_MS }) {
+    this.detenerSincronizacion();
+    this.sync = { apiUrl, getToken, deviceId, inventario };
+
+    window.addEventListener('online', this.onOnline);
+    this.syncInterval = setInterval(() => this.sincronizar(), intervalo);
+    this.sincronizar();
+  }
+
+  detenerSincronizacion() {
+    if (typeof window !== 'undefined') {
+      window.removeEventListener('online', this.onOnline);
+    }
+    clearInterval(this.syncInterval);
+    clearTimeout(this.syncTimer);
+    this.syncInterval = null;
+    this.syncTimer = null;
+    this.sync = null;
+  }
+
+  programarSincronizacion(espera) {
+    if (!this.sync) return;
+    clearTimeout(this.syncTimer);
+    this.syncTimer = setTimeout(() => this.sincronizar(), espera);
+  }
+
+  // Sube el outbox y después baja los cambios del servidor
+  async sincronizar() {
+    if (!this.sync || !this.sync.getToken() || !navigator.onLine) return null;
+    try {
+      const subida = await this.subirVentas();
+      const descarga = await this.descargarCambios();
+      const inventario = this.sync.inventario ? await this.sincronizarInventario() : null;
+      return { ...subida, ...descarga, ...inventario };
+    } catch (error) {
+      console.warn('⚠️ Sincronización pendiente:', error.message);
+      return null;
+    }
+  }
+
+  async peticion(path, options = {}) {
+    const { apiUrl, getToken } = this.sync;
+    const response = await fetch(`${apiUrl}${path}`, {
+      ...options,
+      headers: {
+        'Authorization': `Bearer ${getToken()}`,
+        'Content-Type': 'application/json'
+      }
+    });
+    const data = await response.json().catch(() => ({}));
+    if (!response.ok) {
+      const error = new Error(data.error || `HTTP ${response.status}`);
+      error.status = response.status;
+      throw error;
+    }
+    return data;
+  }
+
+  // Una sola subida a la vez
+  subirVentas() {
+    if (!this.subiendo) {
+      this.subiendo = this.subirOutbox().finally(() => {
+        this.subiendo = null;
+      });
+    }
+    return this.subiendo;
+  }
+
+  /**
+   * Sube las ventas del outbox que ya toca reintentar, en bloques de
+   * SYNC_CHUNK. Creadas y duplicadas salen del outbox; las rechazadas por el
+   * servidor se quedan marcadas (reintentarlas no cambiaría nada). Si un
+   * bloque falla por red o por el servidor, sus ventas esperan con retraso
+   * exponencial y se detiene la subida.
+   */
+  async subirOutbox() {
+    const ahora = Date.now();
+    const pendientes = (await this.obtenerTodos('outbox'))
+      .filter(entrada => !entrada.rechazada)
+      .sort((a, b) => (a.creada < b.creada ? -1 : 1));
+    const listas = pendientes.filter(entrada => entrada.siguienteIntento <= ahora);
+
+    let enviadas = 0;
+    for (let i = 0; i < listas.length; i += SYNC_CHUNK) {
+      const bloque = listas.slice(i, i + SYNC_CHUNK);
+      try {
+        const data = await this.peticion('/api/sync/sales', {
+          method: 'POST',
+          body: JSON.stringify({ deviceId: this.sync.deviceId, sales: bloque.map(entrada => entrada.venta) })
+        });
+
+        const escrituras = (data.results || []).map(resultado => {
+          const entrada = bloque[resultado.index];
+          if (!entrada) return null;
+          if (resultado.status === 'rejected') {
+            return this.escribir('outbox', { ...entrada, rechazada: true, error: resultado.error });
+          }
+          enviadas += 1;
+          return this.borrar('outbox', entrada.clientId);
+        });
+        await Promise.all(escrituras);
+      } catch (error) {
+        const escrituras = bloque.map(entrada => {
+          const intentos = entrada.intentos + 1;
+          return this.escribir('outbox', {
+            ...entrada,
+            intentos,
+            siguienteIntento: Date.now() + esperaReintento(intentos),
+            error: error.message
+          });
+        });
+        await Promise.all(escrituras);
+        break;
+      }
+    }
+
+    // Despertar para la próxima venta en espera
+    const restantes = (await this.obtenerTodos('outbox')).filter(entrada => !entrada.rechazada);
+    const siguiente = Math.min(...restantes.map(entrada => entrada.siguienteIntento));
+    if (Number.isFinite(siguiente)) {
+      this.programarSincronizacion(Math.max(1000, siguiente - Date.now()));
+    }
+
+    return { enviadas, pendientes: restantes.length };
+  }
+
+  // Ventas nuevas del servidor desde el último cursor. La primera vez el
+  // servidor solo entrega su cursor actual: no se baja el historial
+  async descargarCambios() {
+    const registro = await this.obtener('configuracion', 'sync_cursor');
+    let cursor = registro ? registro.valor : '';
+    let descargadas = 0;
+
+    for (let pagina = 0; pagina < DOWNLOAD_MAX_PAGES; pagina++) {
+      const data = await this.peticion(`/api/sync/pending?cursor=${encodeURIComponent(cursor)}&limit=${DOWNLOAD_PAGE}`);
+      const ventas = data.pendingSales || [];
+      cursor = data.cursor;
+      await Promise.all([
+        ...ventas.map(venta => this.escribir('ventas_remotas', venta)),
+        this.escribir('configuracion', { clave: 'sync_cursor', valor: cursor }),
+        this.escribir('configuracion', { clave: 'sync_lastSync', valor: new Date().toISOString() })
+      ]);
+      descargadas += ventas.length;
+      if (!data.hasMore) break;
+    }
+
+    return { descargadas };
+  }
+
+  // Una sola subida de inventario a la vez
+  sincronizarInventario() {
+    if (!this.subiendoInventario) {
+      this.subiendoInventario = this.subirInventario().finally(() => {
+        this.subiendoInventario = null;
+      });
+    }
+    return this.subiendoInventario;
+  }
+
+  /**
+   * Sube a /api/inventory/sync los productos creados o editados y los
+   * movimientos pendientes, en bloques de SYNC_CHUNK movimientos. Los
+   * aceptados y duplicados quedan sincronizados; los rechazados se marcan y
+   * no se reenvían. La cantidad local se toma del servidor cuando el
+   * producto ya no tiene movimientos pendientes.
+   */
+  async subirInventario() {
+    await this.prepararInventarioLocal();
+
+    const productos = await this.leerStore('inventario');
+    const porId = new Map(productos.map(producto => [producto.id, producto]));
+    const pendientes = (await this.leerStore('movimientos_inventario'))
+      .filter(movimiento => !movimiento.sincronizado && !movimiento.rechazado)
+      .sort((a, b) => (a.fecha < b.fecha ? -1 : 1));
+
+    // Movimientos de productos borrados antes de subirlos: ya no aplican
+    const huerfanos = pendientes.filter(movimiento => !porId.has(movimiento.productoId));
+    await this.guardarInventario([], huerfanos.map(movimiento => ({ ...movimiento, sincronizado: true })));
+    const validos = pendientes.filter(movimiento => porId.has(movimiento.productoId));
+
+    // Los productos van en la primera petición (los movimientos los referencian)
+    let insumos = productos.filter(producto => producto.pendienteSync);
+    let subidos = 0;
+    let rechazados = 0;
+    for (let i = 0; insumos.length > 0 || i < validos.length; i += SYNC_CHUNK) {
+      const bloque = validos.slice(i, i + SYNC_CHUNK);
+      const data = await this.peticion('/api/inventory/sync', {
+        method: 'POST',
+        body: JSON.stringify({
+          deviceId: this.sync.deviceId,
+          items: insumos.map(insumoParaServidor),
+          movements: bloque.map(movimiento => movimientoParaServidor(movimiento, porId.get(movimiento.productoId)))
+        })
+      });
+
+      const movimientos = (data.results || []).map(resultado => {
+        const movimiento = bloque[resultado.index];
+        if (resultado.status === 'rejected') {
+          rechazados += 1;
+          return { ...movimiento, rechazado: true, error: resultado.error };
+        }
+        subidos += 1;
+        return { ...movimiento, sincronizado: true, serverId: resultado.movementId || null };
+      });
+
+      const conPendientes = new Set(validos.slice(i + SYNC_CHUNK).map(movimiento => movimiento.productoId));
+      const enviados = new Set(insumos.map(producto => producto.id));
+      const items = data.items || [];
+      const cambios = [];
+      const borrados = [];
+      for (const producto of porId.values()) {
+        const item = items.find(candidato => candidato.clientId === producto.clientId || candidato.id === producto.serverId);
+        if (producto.eliminado && enviados.has(producto.id)) {
+          borrados.push(producto.id);
+        } else if (item || enviados.has(producto.id)) {
+          const cambio = enviados.has(producto.id) ? { pendienteSync: false } : {};
+          if (item) {
+            cambio.serverId = item.id;
+            if (!conPendientes.has(producto.id)) cambio.cantidad = item.level;
+            porId.set(producto.id, { ...producto, serverId: item.id });
+          }
+          cambios.push({ id: producto.id, cambio, version: producto.ultima_actualizacion });
+        }
+      }
+
+      await this.guardarInventario(cambios, movimientos, borrados);
+      insumos = [];
+    }
+
+    return { inventarioSubido: subidos, inventarioRechazado: rechazados };
+  }
+
+  // Datos guardados antes de sincronizar el inventario: cada producto recibe
+  // su clientId y un conteo con su cantidad actual (su historial local ya
+  // está incluido en ella y no se sube)
+  async prepararInventarioLocal() {
+    const productos = (await this.leerStore('inventario')).filter(producto => !producto.clientId);
+    if (productos.length === 0) return;
+
+    const legados = new Set(productos.map(producto => producto.id));
+    const historial = (await this.leerStore('movimientos_inventario'))
+      .filter(movimiento => !movimiento.clientId && legados.has(movimiento.productoId))
+      .map(movimiento => ({ ...movimiento, clientId: nuevoClientId(), sincronizado: true }));
+
+    const conteos = productos.map(producto => this.conteoInventario(producto.id, producto.cantidad, 'Existencia al activar la sincronización'));
+    await this.guardarInventario(
+      productos.map(producto => ({ id: producto.id, cambio: { clientId: nuevoClientId(), pendienteSync: true } })),
+      [...historial, ...conteos]
+    );
+  }
+
+  // Todos los registros de un store de inventario (incluye eliminados)
+  async leerStore(store) {
+    await this.ready();
+    return new Promise((resolve, reject) => {
+      const req = this.db.transaction([store], 'readonly').objectStore(store).getAll();
+      req.onsuccess = () => resolve(req.result);
+      req.onerror = () => reject(req.error);
+    });
+  }
+
+  /**
+   * Aplica cambios a productos, guarda movimientos y borra productos en una
+   * sola transacción. Cada cambio se mezcla con el producto tal como está en
+   * la base; si el producto se tocó después de leerlo (`version` distinta),
+   * su cantidad local se conserva.
+   */
+  async guardarInventario(cambios, movimientos, borrados = []) {
+    if (cambios.length + movimientos.length + borrados.length === 0) return;
     await this.ready();
-    const transaction = this.db.transaction(['mesas', 'folios', 'ventas', 'carrito', 'configuracion', 'inventario', 'movimientos_inventario'], 'readwrite');
-    const stores = ['mesas', 'folios', 'ventas', 'carrito', 'configuracion', 'inventario', 'movimientos_inventario'];
-    const clearPromises = stores.map(storeName => {
-      const store = transaction.objectStore(storeName);
-      return store.clear();
+    const transaction = this.db.transaction(['inventario', 'movimientos_inventario'], 'readwrite');
+    const invStore = transaction.objectStore('inventario');
+    const movStore = transaction.objectStore('movimientos_inventario');
+
+    for (const { id, cambio, version } of cambios) {
+      const getReq = invStore.get(id);
+      getReq.onsuccess = () => {
+        const producto = getReq.result;
+        if (!producto) return;
+        const { cantidad, ...resto } = cambio;
+        const vigente = version === undefined || producto.ultima_actualizacion === version;
+        invStore.put({ ...producto, ...resto, ...(vigente && cantidad !== undefined ? { cantidad } : {}) });
+      };
+    }
+    movimientos.forEach(movimiento => movStore.put(movimiento));
+    borrados.forEach(id => invStore.delete(id));
+
+    return new Promise((resolve, reject) => {
+      transaction.oncomplete = () => resolve();
+      transaction.onerror = () => reject(transaction.error);
+      transaction.onabort = () => reject(transaction.error);
     });
-    return Promise.all(clearPromises);
+  }
+
+  async obtenerEstadoSincronizacion() {
+    const [outbox, lastSync] = await Promise.all([
+      this.obtenerTodos('outbox'),
+      this.obtener('configuracion', 'sync_lastSync')
+    ]);
+    const rechazadas = outbox.filter(entrada => entrada.rechazada);
+    return {
+      pendientes: outbox.length - rechazadas.length,
+      rechazadas: rechazadas.map(({ clientId, error, venta }) => ({ clientId, error, folio: venta.folio })),
+      lastSync: lastSync ? lastSync.valor : null,
+      escritura: { ...this.stats }
+    };
+  }
+
+  // Método para resetear datos (útil para desarrollo)
+  async resetearBaseDatos() {
+    const limpiezas = STORES.map(store => this.encolar({ type: 'clear', store }));
+    await this.flush();
+    await Promise.all(limpiezas);
+    this.ultimoFolio = null;
+    this.cargaFolio = null;
   }
 
   // Método para exportar datos (backup)
   async exportarDatos() {
     await this.ready();
-    const mesas = await this.obtenerMesas();
-    const carrito = await this.obtenerTodoCarrito();
-    const inventario = await this.obtenerProductosInventario();
-    const movimientosInventario = await this.obtenerMovimientosInventario();
+    const [mesas, carrito, inventario, movimientosInventario, outbox] = await Promise.all([
+      this.obtenerMesas(),
+      this.obtenerTodoCarrito(),
+      this.obtenerProductosInventario(),
+      this.obtenerMovimientosInventario(),
+      this.obtenerTodos('outbox')
+    ]);
     return {
       mesas,
       carrito,
       inventario,
       movimientosInventario,
+      ventasPendientes: outbox,
       fecha_exportacion: new Date().toISOString()
     };
   }
@@ -140,32 +908,46 @@ class DataPersistenceService {
   // ==== INVENTARIO =========
   // =========================
 
+  // Cada producto lleva su clientId para el servidor; su cantidad inicial y
+  // los cambios de cantidad al editarlo se registran como conteo
   async crearProductoInventario(producto) {
     await this.ready();
-    const transaction = this.db.transaction(['inventario'], 'readwrite');
+    const transaction = this.db.transaction(['inventario', 'movimientos_inventario'], 'readwrite');
     const store = transaction.objectStore('inventario');
+    const movStore = transaction.objectStore('movimientos_inventario');
     const prodData = {
       ...producto,
+      clientId: nuevoClientId(),
+      pendienteSync: true,
       fecha_creacion: new Date().toISOString(),
       ultima_actualizacion: new Date().toISOString()
     };
     return new Promise((resolve, reject) => {
       const req = store.add(prodData);
-      req.onsuccess = () => resolve({ ...prodData, id: req.result });
+      req.onsuccess = () => {
+        if (prodData.cantidad !== undefined && prodData.cantidad !== '') {
+          movStore.add(this.conteoInventario(req.result, prodData.cantidad, 'Existencia inicial'));
+        }
+        resolve({ ...prodData, id: req.result });
+      };
       req.onerror = () => reject(req.error);
     });
   }
 
   async actualizarProductoInventario(id, data) {
     await this.ready();
-    const transaction = this.db.transaction(['inventario'], 'readwrite');
+    const transaction = this.db.transaction(['inventario', 'movimientos_inventario'], 'readwrite');
     const store = transaction.objectStore('inventario');
+    const movStore = transaction.objectStore('movimientos_inventario');
     return new Promise((resolve, reject) => {
       const getReq = store.get(id);
       getReq.onsuccess = () => {
         const producto = getReq.result;
         if (producto) {
-          const actualizado = { ...producto, ...data, ultima_actualizacion: new Date().toISOString() };
+          const actualizado = { ...producto, ...data, pendienteSync: true, ultima_actualizacion: new Date().toISOString() };
+          if (data.cantidad !== undefined && Number(data.cantidad) !== Number(producto.cantidad)) {
+            movStore.add(this.conteoInventario(id, data.cantidad, 'Edición del producto'));
+          }
           const putReq = store.put(actualizado);
           putReq.onsuccess = () => resolve(actualizado);
           putReq.onerror = () => reject(putReq.error);
@@ -177,26 +959,41 @@ class DataPersistenceService {
     });
   }
 
+  // Un producto que ya puede estar en el servidor se marca como eliminado
+  // y se borra al sincronizar su baja
   async eliminarProductoInventario(id) {
     await this.ready();
     const transaction = this.db.transaction(['inventario'], 'readwrite');
     const store = transaction.objectStore('inventario');
     return new Promise((resolve, reject) => {
-      const req = store.delete(id);
-      req.onsuccess = () => resolve();
-      req.onerror = () => reject(req.error);
+      const getReq = store.get(id);
+      getReq.onsuccess = () => {
+        const producto = getReq.result;
+        const req = producto && producto.clientId
+          ? store.put({ ...producto, eliminado: true, pendienteSync: true, ultima_actualizacion: new Date().toISOString() })
+          : store.delete(id);
+        req.onsuccess = () => resolve();
+        req.onerror = () => reject(req.error);
+      };
+      getReq.onerror = () => reject(getReq.error);
     });
   }
 
   async obtenerProductosInventario() {
-    await this.ready();
-    const transaction = this.db.transaction(['inventario'], 'readonly');
-    const store = transaction.objectStore('inventario');
-    return new Promise((resolve, reject) => {
-      const req = store.getAll();
-      req.onsuccess = () => resolve(req.result);
-      req.onerror = () => reject(req.error);
-    });
+    const productos = await this.leerStore('inventario');
+    return productos.filter(producto => !producto.eliminado);
+  }
+
+  conteoInventario(productoId, cantidad, motivo) {
+    return {
+      productoId,
+      tipo: 'ajuste',
+      cantidad: Number(cantidad) || 0,
+      motivo,
+      clientId: nuevoClientId(),
+      sincronizado: false,
+      fecha: new Date().toISOString()
+    };
   }
 
   // =========================
@@ -237,6 +1034,8 @@ class DataPersistenceService {
           // Registra el movimiento
           const movData = {
             ...movimiento,
+            clientId: nuevoClientId(),
+            sincronizado: false,
             fecha: new Date().toISOString()
           };
           const addReq = movStore.add(movData);
@@ -273,6 +1072,8 @@ class DataPersistenceService {
   }
 }
 
+export { DataPersistenceService };
+
 // Instancia singleton
 const dataPersistence = new DataPersistenceService();
-export default dataPersistence;
\ No newline at end of file
+export default dataPersistence;
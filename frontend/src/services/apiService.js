@@ -1,54 +1,240 @@
-import axios from 'axios';
-import AsyncStorage from '@react-native-async-storage/async-storage';
-import { API_URL } from '../config';
+// frontend/src/services/apiService.js
+// Cliente HTTP del POS web.
+//
+// El arranque usa /api/bootstrap: una sola petición trae todo lo que
+// necesita el rol (perfil, menú, categorías, mesas, turno, clientes...).
+// Las secciones se guardan en localStorage con su versión; al recargar o
+// reconectar se mandan esas versiones y solo bajan las que cambiaron. Las
+// mesas no se guardan aquí: su versión vive en IndexedDB (DataPersistence).
+const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:3001';
+const BOOTSTRAP_KEY = 'pos_bootstrap';
+
+// Secciones que no se guardan en localStorage
+const SIN_CACHE = ['tables'];
+
+// Estado local de la mesa → estado del servidor (inverso de ESTADOS en
+// hooks/usePersistentTables)
+const ESTADOS_SERVIDOR = {
+  disponible: 'available',
+  ocupada: 'occupied',
+  reservada: 'reserved',
+  limpieza: 'cleaning'
+};
 
 class APIService {
   constructor() {
     this.baseURL = API_URL;
-    this.token = null;
-  }
-
-  async init() {
-    this.token = await AsyncStorage.getItem('pos_token');
+    this.token = localStorage.getItem('pos_token');
+    this.arranque = null;
   }
 
-  async login(username, password) {
-    try {
-      const response = await axios.post(`${this.baseURL}/api/auth/login`, {
-        username,
-        password,
-        deviceId: `mobile_${Date.now()}`
-      });
-
-      if (response.data.success) {
-        this.token = response.data.token;
-        await AsyncStorage.setItem('pos_token', this.token);
-        await AsyncStorage.setItem('pos_user', JSON.stringify(response.data.user));
-        return response.data;
+  async request(path, options = {}) {
+    const response = await fetch(`${this.baseURL}${path}`, {
+      ...options,
+      headers: {
+        'Content-Type': 'application/json',
+        ...(this.token ? { Authorization: `Bearer ${this.token}` } : {}),
+        ...options.headers
       }
-      throw new Error(response.data.error || 'Error de autenticación');
-    } catch (error) {
+    });
+    const data = await response.json().catch(() => ({}));
+    if (!response.ok) {
+      const error = new Error(data.error || `HTTP ${response.status}`);
+      error.status = response.status;
       throw error;
     }
+    return data;
+  }
+
+  async login(username, password, deviceId) {
+    const data = await this.request('/api/auth/login', {
+      method: 'POST',
+      body: JSON.stringify({ username, password, deviceId })
+    });
+    if (!data.success) {
+      throw new Error(data.error || 'Error de autenticación');
+    }
+
+    this.token = data.token;
+    localStorage.setItem('pos_token', this.token);
+    this.borrarArranque();
+    return data;
   }
 
   async logout() {
     this.token = null;
-    await AsyncStorage.removeItem('pos_token');
-    await AsyncStorage.removeItem('pos_user');
+    localStorage.removeItem('pos_token');
+    localStorage.removeItem('pos_user');
+    this.borrarArranque();
   }
 
   async getMenu() {
-    const headers = this.token ? { Authorization: `Bearer ${this.token}` } : {};
-    const response = await axios.get(`${this.baseURL}/api/menu`, { headers });
-    return response.data.menuItems || [];
+    const data = await this.request('/api/menu');
+    return data.menuItems || [];
   }
 
   async getCategories() {
-    const headers = this.token ? { Authorization: `Bearer ${this.token}` } : {};
-    const response = await axios.get(`${this.baseURL}/api/menu/categories`, { headers });
-    return response.data.categories || [];
+    const data = await this.request('/api/menu/categories');
+    return data.categories || [];
+  }
+
+  async createMenuItem(item) {
+    const data = await this.request('/api/menu/items', { method: 'POST', body: JSON.stringify(item) });
+    return data.menuItem;
+  }
+
+  async updateMenuItem(id, cambios) {
+    const data = await this.request(`/api/menu/items/${id}`, { method: 'PUT', body: JSON.stringify(cambios) });
+    return data.menuItem;
+  }
+
+  async deleteMenuItem(id) {
+    return this.request(`/api/menu/items/${id}`, { method: 'DELETE' });
+  }
+
+  async createCategory(category) {
+    const data = await this.request('/api/menu/categories', { method: 'POST', body: JSON.stringify(category) });
+    return data.category;
+  }
+
+  async updateCategory(id, cambios) {
+    const data = await this.request(`/api/menu/categories/${id}`, { method: 'PUT', body: JSON.stringify(cambios) });
+    return data.category;
+  }
+
+  // =========================
+  // ==== VENTAS =============
+  // =========================
+
+  // Registra la venta en línea (stock estricto, mesa y aviso a cocina). El
+  // clientId es el mismo del outbox: si la venta ya subió por ahí, responde 409
+  async createSale(venta) {
+    const data = await this.request('/api/sales', {
+      method: 'POST',
+      body: JSON.stringify({ ...venta, discount: venta.descuento ?? venta.discount ?? 0 })
+    });
+    return data.sale;
+  }
+
+  // =========================
+  // ==== CARRITOS ===========
+  // =========================
+
+  // Carrito compartido de una mesa; la clave es la misma que en el cliente
+  // ('table-5'). Cada cambio llega a las demás tabletas como 'cart-line'
+  async getCart(cartKey) {
+    const data = await this.request(`/api/carts/${encodeURIComponent(cartKey)}`);
+    return data.cart;
+  }
+
+  async addCartItem(cartKey, item, quantity = 1) {
+    const data = await this.request(`/api/carts/${encodeURIComponent(cartKey)}/items`, {
+      method: 'POST',
+      body: JSON.stringify({ item: { id: item.id, notes: item.notes }, quantity })
+    });
+    return data.cart;
+  }
+
+  // quantity 0 quita la línea
+  async setCartItem(cartKey, itemId, quantity) {
+    const data = await this.request(`/api/carts/${encodeURIComponent(cartKey)}/items/${itemId}`, {
+      method: 'PUT',
+      body: JSON.stringify({ quantity })
+    });
+    return data.cart;
+  }
+
+  async clearServerCart(cartKey) {
+    return this.request(`/api/carts/${encodeURIComponent(cartKey)}`, { method: 'DELETE' });
+  }
+
+  // =========================
+  // ==== MESAS ==============
+  // =========================
+
+  // Cambia el estado en el motor de mesas del servidor; acepta el estado
+  // local ('ocupada') o el del servidor ('occupied')
+  async updateTableStatus(tableId, estado) {
+    const data = await this.request(`/api/tables/${tableId}/status`, {
+      method: 'PUT',
+      body: JSON.stringify({ status: ESTADOS_SERVIDOR[estado] || estado })
+    });
+    return data.table;
+  }
+
+  // =========================
+  // ==== ARRANQUE ===========
+  // =========================
+
+  leerArranque() {
+    if (!this.arranque) {
+      try {
+        this.arranque = JSON.parse(localStorage.getItem(BOOTSTRAP_KEY)) || { sections: {} };
+      } catch (error) {
+        this.arranque = { sections: {} };
+      }
+    }
+    return this.arranque;
+  }
+
+  guardarArranque() {
+    try {
+      localStorage.setItem(BOOTSTRAP_KEY, JSON.stringify(this.arranque));
+    } catch (error) {
+      // Sin espacio: el siguiente arranque baja todo de nuevo
+      localStorage.removeItem(BOOTSTRAP_KEY);
+    }
+  }
+
+  borrarArranque() {
+    this.arranque = null;
+    localStorage.removeItem(BOOTSTRAP_KEY);
+  }
+
+  /**
+   * Todo lo del rol en una petición. Regresa { seccion: cuerpo } con el mismo
+   * cuerpo que el endpoint de cada sección (menu → { menuItems }, tables →
+   * respuesta de /api/tables/changes, ...) más `changed` con las secciones
+   * que sí bajaron.
+   * - known: versiones que guarda otro lado (p. ej. { tables: 12 })
+   * - sections: solo estas secciones
+   */
+  async bootstrap({ known = {}, sections = null } = {}) {
+    const cache = this.leerArranque();
+    const versiones = { ...known };
+    for (const [nombre, seccion] of Object.entries(cache.sections)) {
+      if (versiones[nombre] === undefined) versiones[nombre] = seccion.version;
+    }
+
+    const params = new URLSearchParams();
+    const conocidas = Object.entries(versiones)
+      .filter(([, version]) => version !== null && version !== undefined)
+      .map(([nombre, version]) => `${nombre}:${version}`);
+    if (conocidas.length > 0) params.set('known', conocidas.join(','));
+    if (sections) params.set('sections', sections.join(','));
+
+    const data = await this.request(`/api/bootstrap?${params}`);
+
+    const resultado = { changed: [] };
+    for (const [nombre, seccion] of Object.entries(data.sections)) {
+      if (!seccion.unchanged) {
+        resultado[nombre] = seccion.data;
+        resultado.changed.push(nombre);
+        if (!SIN_CACHE.includes(nombre)) {
+          cache.sections[nombre] = { version: seccion.version, data: seccion.data };
+        }
+      } else if (nombre === 'tables') {
+        resultado.tables = { success: true, version: Number(seccion.version), reset: false, changes: [] };
+      } else {
+        resultado[nombre] = cache.sections[nombre] ? cache.sections[nombre].data : null;
+      }
+    }
+
+    if (resultado.changed.some(nombre => !SIN_CACHE.includes(nombre))) {
+      this.guardarArranque();
+    }
+    return resultado;
   }
 }
 
-export default new APIService();
\ No newline at end of file
+export default new APIService();
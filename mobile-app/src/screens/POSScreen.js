@@ -20,14 +20,17 @@ export default function POSScreen({ navigation }) {
         setUser(JSON.parse(userData));
       }
 
+      // Perfil, categorías y menú en una sola petición
       await apiService.init();
-      const [cats, items] = await Promise.all([
-        apiService.getCategories(),
-        apiService.getMenu()
-      ]);
+      const { profile, categories: cats, menu } = await apiService.bootstrap({
+        sections: ['profile', 'categories', 'menu']
+      });
 
-      setCategories(cats);
-      setMenuItems(items);
+      if (profile && profile.user) {
+        setUser(profile.user);
+      }
+      setCategories(cats.categories || []);
+      setMenuItems(menu.menuItems || []);
     } catch (error) {
       console.error('Error cargando datos:', error);
     } finally {
@@ -2,10 +2,14 @@ import axios from 'axios';
 import AsyncStorage from '@react-native-async-storage/async-storage';
 import { API_URL } from '../config';
 
+// Copia local de /api/bootstrap: { sections: { nombre: { version, data } } }
+const BOOTSTRAP_KEY = 'pos_bootstrap';
+
 class APIService {
   constructor() {
     this.baseURL = API_URL;
     this.token = null;
+    this.arranque = null;
   }
 
   async init() {
@@ -24,6 +28,7 @@ class APIService {
         this.token = response.data.token;
         await AsyncStorage.setItem('pos_token', this.token);
         await AsyncStorage.setItem('pos_user', JSON.stringify(response.data.user));
+        await this.borrarArranque();
         return response.data;
       }
       throw new Error(response.data.error || 'Error de autenticación');
@@ -36,6 +41,7 @@ class APIService {
     this.token = null;
     await AsyncStorage.removeItem('pos_token');
     await AsyncStorage.removeItem('pos_user');
+    await this.borrarArranque();
   }
 
   async getMenu() {
@@ -49,6 +55,61 @@ class APIService {
     const response = await axios.get(`${this.baseURL}/api/menu/categories`, { headers });
     return response.data.categories || [];
   }
+
+  async leerArranque() {
+    if (!this.arranque) {
+      try {
+        this.arranque = JSON.parse(await AsyncStorage.getItem(BOOTSTRAP_KEY)) || { sections: {} };
+      } catch (error) {
+        this.arranque = { sections: {} };
+      }
+    }
+    return this.arranque;
+  }
+
+  async borrarArranque() {
+    this.arranque = null;
+    await AsyncStorage.removeItem(BOOTSTRAP_KEY);
+  }
+
+  /**
+   * Lo que necesita la app en una sola petición (/api/bootstrap). Manda las
+   * versiones guardadas; las secciones sin cambios se toman de la copia
+   * local. Regresa { seccion: cuerpo, changed: [secciones que bajaron] }.
+   */
+  async bootstrap({ sections = null } = {}) {
+    const cache = await this.leerArranque();
+    const conocidas = Object.entries(cache.sections)
+      .filter(([nombre]) => !sections || sections.includes(nombre))
+      .map(([nombre, seccion]) => `${nombre}:${seccion.version}`);
+
+    const headers = this.token ? { Authorization: `Bearer ${this.token}` } : {};
+    const params = {};
+    if (conocidas.length > 0) params.known = conocidas.join(',');
+    if (sections) params.sections = sections.join(',');
+    const response = await axios.get(`${this.baseURL}/api/bootstrap`, { headers, params });
+
+    const resultado = { changed: [] };
+    for (const [nombre, seccion] of Object.entries(response.data.sections)) {
+      if (seccion.unchanged) {
+        resultado[nombre] = cache.sections[nombre] ? cache.sections[nombre].data : null;
+      } else {
+        resultado[nombre] = seccion.data;
+        resultado.changed.push(nombre);
+        cache.sections[nombre] = { version: seccion.version, data: seccion.data };
+      }
+    }
+
+    if (resultado.changed.length > 0) {
+      try {
+        await AsyncStorage.setItem(BOOTSTRAP_KEY, JSON.stringify(cache));
+      } catch (error) {
+        // Sin espacio: el siguiente arranque baja todo de nuevo
+        await AsyncStorage.removeItem(BOOTSTRAP_KEY);
+      }
+    }
+    return resultado;
+  }
 }
 
-export default new APIService();
\ No newline at end of file
+export default new APIService();